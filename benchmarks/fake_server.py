@@ -0,0 +1,255 @@
+"""In-process stand-in of the CopyFactory and provisioning APIs, served as an ASGI application so that the SDK can be
+benchmarked via httpx.ASGITransport without network access."""
+from lib.models import format_date
+from typing_extensions import TypedDict
+from typing import Optional, Dict, List, Tuple
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs
+import asyncio
+import json
+import pytz
+import random
+import re
+import time
+
+
+class FakeServerOpts(TypedDict, total=False):
+    """Stand-in server options."""
+    regions: Optional[List[str]]
+    """Regions returned by provisioning API, default value is ['vint-hill', 'new-york']."""
+    latencyInSeconds: Optional[float]
+    """Latency of regular requests, default value is 0.005."""
+    longPollTimeoutInSeconds: Optional[float]
+    """Time a stream request waits when there are no events to return, default value is 1."""
+    streamEventsPerPoll: Optional[int]
+    """Amount of events returned by a stream request, 0 means that stream requests always time out. Default value is
+    10."""
+    streamIntervalInSeconds: Optional[float]
+    """Time a stream request waits before returning events, default value is 0.1."""
+    logPageRecords: Optional[int]
+    """Amount of user log records available per subscriber for history requests, default value is 10000."""
+    subscribers: Optional[int]
+    """Amount of subscribers in the configuration, default value is 1000."""
+    strategies: Optional[int]
+    """Amount of strategies in the configuration, default value is 10."""
+    accepted202Rate: Optional[float]
+    """Fraction of signal requests answered with 202 status and retry-after header, default value is 0."""
+    tooManyRequests429Rate: Optional[float]
+    """Fraction of requests answered with 429 status, default value is 0."""
+    internalError500Rate: Optional[float]
+    """Fraction of requests answered with 500 status, default value is 0."""
+    seed: Optional[int]
+    """Random seed of error injection, default value is 0."""
+    streamBacklog: Optional[int]
+    """Amount of events pending in each stream when the server starts. Pending events are returned at once in pages of
+    the requested limit. Default value is 0."""
+    streamOutageStartInSeconds: Optional[float]
+    """Time since the server start when stream requests, including ones in flight, start failing with 500 status,
+    default value is None which means no outage."""
+    streamOutageInSeconds: Optional[float]
+    """Duration of the stream outage, default value is 1."""
+
+
+class FakeCopyFactoryServer:
+    """ASGI stand-in of the CopyFactory and provisioning APIs. Configuration is stored in memory, streams produce
+    synthetic events and errors are injected randomly according to the options."""
+
+    def __init__(self, opts: FakeServerOpts = None):
+        """Inits stand-in server instance.
+
+        Args:
+            opts: Server options.
+        """
+        opts: FakeServerOpts = opts or {}
+        self._regions = opts['regions'] if 'regions' in opts else ['vint-hill', 'new-york']
+        self._latency = opts['latencyInSeconds'] if 'latencyInSeconds' in opts else 0.005
+        self._longPollTimeout = opts['longPollTimeoutInSeconds'] if 'longPollTimeoutInSeconds' in opts else 1
+        self._streamEvents = opts['streamEventsPerPoll'] if 'streamEventsPerPoll' in opts else 10
+        self._streamInterval = opts['streamIntervalInSeconds'] if 'streamIntervalInSeconds' in opts else 0.1
+        self._logRecords = opts['logPageRecords'] if 'logPageRecords' in opts else 10000
+        self._rate202 = opts['accepted202Rate'] if 'accepted202Rate' in opts else 0
+        self._rate429 = opts['tooManyRequests429Rate'] if 'tooManyRequests429Rate' in opts else 0
+        self._rate500 = opts['internalError500Rate'] if 'internalError500Rate' in opts else 0
+        self._random = random.Random(opts['seed'] if 'seed' in opts else 0)
+        self._backlog = opts['streamBacklog'] if 'streamBacklog' in opts else 0
+        self._backlogs: Dict[str, int] = {}
+        self._outageStart = opts['streamOutageStartInSeconds'] if 'streamOutageStartInSeconds' in opts else None
+        self._outageDuration = opts['streamOutageInSeconds'] if 'streamOutageInSeconds' in opts else 1
+        self._startTime = time.perf_counter()
+        self.stream_request_times: List[float] = []
+        """Times of stream requests since the server start."""
+        self._epoch = datetime(2022, 1, 1, tzinfo=pytz.utc)
+        self.strategies: Dict[str, dict] = {}
+        self.subscribers: Dict[str, dict] = {}
+        strategies = opts['strategies'] if 'strategies' in opts else 10
+        subscribers = opts['subscribers'] if 'subscribers' in opts else 1000
+        for index in range(strategies):
+            strategy_id = f'strategy{index}'
+            self.strategies[strategy_id] = {'_id': strategy_id, 'name': f'Strategy {index}',
+                                            'description': 'Benchmark strategy', 'accountId': f'provider{index}',
+                                            'platformCommissionRate': 0.01}
+        for index in range(subscribers):
+            subscriber_id = f'subscriber{index}'
+            self.subscribers[subscriber_id] = {
+                '_id': subscriber_id, 'name': f'Subscriber {index}',
+                'subscriptions': [{'strategyId': f'strategy{index % len(self.strategies)}', 'multiplier': 1}]}
+        self.status_counts: Dict[int, int] = {}
+        self._routes = [
+            ('GET', r'/users/current/regions', self._get_regions),
+            ('GET', r'/users/current/servers/mt-client-api', self._get_server),
+            ('GET', r'/users/current/accounts/(?P<id>[^/]+)', self._get_account),
+            ('GET', r'/users/current/configuration/(?P<collection>strategies|subscribers)', self._get_collection),
+            ('PUT', r'/users/current/configuration/(?P<collection>strategies|subscribers)/(?P<id>[^/]+)',
+             self._put_document),
+            ('DELETE', r'/users/current/configuration/(?P<collection>strategies|subscribers)/(?P<id>[^/]+)',
+             self._delete_document),
+            ('GET', r'/users/current/(strategies|subscribers)/(?P<id>[^/]+)/transactions/stream',
+             self._stream_transactions),
+            ('GET', r'/users/current/(strategies|subscribers)/(?P<id>[^/]+)/user-log/stream', self._stream_user_log),
+            ('GET', r'/users/current/stopouts/stream', self._stream_stopouts),
+            ('GET', r'/users/current/subscribers/(?P<id>[^/]+)/user-log', self._get_user_log),
+            ('PUT', r'/users/current/strategies/(?P<strategyId>[^/]+)/external-signals/(?P<id>[^/]+)',
+             self._put_signal),
+            ('POST', r'/users/current/strategies/(?P<strategyId>[^/]+)/external-signals/(?P<id>[^/]+)/remove',
+             self._put_signal)
+        ]
+        self._routes = [(method, re.compile(pattern + '$'), handler) for method, pattern, handler in self._routes]
+        self._sequence = 0
+
+    @property
+    def outage_end(self) -> Optional[float]:
+        """Returns time since the server start when the stream outage ends.
+
+        Returns:
+            Outage end time or None if there is no outage.
+        """
+        return self._outageStart + self._outageDuration if self._outageStart is not None else None
+
+    async def __call__(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        query = {key: values[-1] for key, values in parse_qs(scope['query_string'].decode()).items()}
+        status, payload, headers = await self._handle(scope['method'], scope['path'], query, body)
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        content = json.dumps(payload).encode() if payload is not None else b''
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json')] +
+                    [(key.encode(), value.encode()) for key, value in headers.items()]})
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def _handle(self, method: str, path: str, query: dict, body: bytes) -> Tuple[int, object, dict]:
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                roll = self._random.random()
+                if roll < self._rate500:
+                    await asyncio.sleep(self._latency)
+                    return 500, {'id': 1, 'error': 'InternalError', 'message': 'Injected error'}, {}
+                if roll < self._rate500 + self._rate429:
+                    await asyncio.sleep(self._latency)
+                    retry_time = format_date(datetime.now(pytz.utc) + timedelta(milliseconds=100))
+                    return 429, {'id': 1, 'error': 'TooManyRequestsError', 'message': 'Injected error',
+                                 'metadata': {'recommendedRetryTime': retry_time}}, {}
+                return await handler(query=query, body=json.loads(body) if body else None, **match.groupdict())
+        return 404, {'id': 1, 'error': 'NotFoundError', 'message': f'{method} {path} not found'}, {}
+
+    async def _get_regions(self, **kwargs):
+        await asyncio.sleep(self._latency)
+        return 200, self._regions, {}
+
+    async def _get_server(self, **kwargs):
+        await asyncio.sleep(self._latency)
+        return 200, {'domain': 'agiliumtrade.ai'}, {}
+
+    async def _get_account(self, id: str, **kwargs):
+        await asyncio.sleep(self._latency)
+        return 200, {'_id': id, 'region': self._regions[0]}, {}
+
+    async def _get_collection(self, collection: str, query: dict, **kwargs):
+        await asyncio.sleep(self._latency)
+        documents = list((self.strategies if collection == 'strategies' else self.subscribers).values())
+        offset = int(query.get('offset', 0))
+        limit = int(query.get('limit', 1000))
+        return 200, documents[offset:offset + limit], {}
+
+    async def _put_document(self, collection: str, id: str, body: dict, **kwargs):
+        await asyncio.sleep(self._latency)
+        (self.strategies if collection == 'strategies' else self.subscribers)[id] = {**body, '_id': id}
+        return 204, None, {}
+
+    async def _delete_document(self, collection: str, id: str, **kwargs):
+        await asyncio.sleep(self._latency)
+        (self.strategies if collection == 'strategies' else self.subscribers).pop(id, None)
+        return 204, None, {}
+
+    async def _put_signal(self, **kwargs):
+        await asyncio.sleep(self._latency)
+        if self._random.random() < self._rate202:
+            return 202, None, {'retry-after': '0.05'}
+        return 204, None, {}
+
+    async def _stream(self, create_event, key: str, query: dict, **kwargs):
+        now = time.perf_counter() - self._startTime
+        self.stream_request_times.append(now)
+        if self._outageStart is not None and self._outageStart <= now < self.outage_end:
+            await asyncio.sleep(self._latency)
+            return 500, {'id': 1, 'error': 'InternalError', 'message': 'Stream outage'}, {}
+        backlog = self._backlogs.get(key, self._backlog)
+        if backlog:
+            count = min(backlog, int(query.get('limit', 1000)))
+            self._backlogs[key] = backlog - count
+            await asyncio.sleep(self._latency)
+            return 200, list(reversed([create_event() for i in range(count)])), {}
+        wait = self._longPollTimeout if not self._streamEvents else self._streamInterval
+        if self._outageStart is not None and now < self._outageStart < now + wait:
+            # requests in flight fail when the outage starts, as if connections were dropped
+            await asyncio.sleep(self._outageStart - now)
+            return 500, {'id': 1, 'error': 'InternalError', 'message': 'Stream outage'}, {}
+        await asyncio.sleep(wait)
+        if not self._streamEvents:
+            return 200, [], {}
+        events = [create_event() for i in range(self._streamEvents)]
+        # streams return events in reverse chronological order
+        return 200, list(reversed(events)), {}
+
+    async def _stream_transactions(self, id: str, query: dict, **kwargs):
+        def create_event():
+            self._sequence += 1
+            return {'id': str(self._sequence), 'type': 'DEAL_TYPE_BUY', 'time': self._time(self._sequence),
+                    'subscriberId': id, 'symbol': 'EURUSD', 'subscriberUser': {'id': 'userId', 'name': 'User'},
+                    'demo': True, 'providerUser': {'id': 'userId', 'name': 'User'},
+                    'strategy': {'id': 'strategy0', 'name': 'Strategy 0'}, 'positionId': '1', 'volume': 0.01,
+                    'price': 1.1, 'commission': 0, 'swap': 0, 'profit': 0, 'metrics': {}}
+        return await self._stream(create_event, f'transactions:{id}', query)
+
+    async def _stream_user_log(self, id: str, query: dict, **kwargs):
+        def create_event():
+            self._sequence += 1
+            return {'time': self._time(self._sequence), 'level': 'INFO', 'message': 'Benchmark message',
+                    'symbol': 'EURUSD', 'strategyId': 'strategy0'}
+        return await self._stream(create_event, f'user-log:{id}', query)
+
+    async def _stream_stopouts(self, query: dict, **kwargs):
+        def create_event():
+            self._sequence += 1
+            return {'subscriberId': 'subscriber0', 'strategy': {'id': 'strategy0', 'name': 'Strategy 0'},
+                    'reason': 'monthly-balance', 'reasonDescription': 'Benchmark stopout', 'closePositions': False,
+                    'stoppedAt': self._time(self._sequence), 'stoppedTill': self._time(self._sequence + 3600),
+                    'sequenceNumber': self._sequence}
+        return await self._stream(create_event, 'stopouts', query)
+
+    async def _get_user_log(self, query: dict, **kwargs):
+        await asyncio.sleep(self._latency)
+        offset = int(query.get('offset', 0))
+        limit = int(query.get('limit', 1000))
+        count = max(0, min(limit, self._logRecords - offset))
+        return 200, [{'time': self._time(self._logRecords - offset - index), 'level': 'INFO',
+                      'message': 'Benchmark message', 'symbol': 'EURUSD', 'strategyId': 'strategy0'}
+                     for index in range(count)], {}
+
+    def _time(self, seconds: int) -> str:
+        return format_date(self._epoch + timedelta(seconds=seconds))
@@ -0,0 +1,137 @@
+"""Measurement helpers of the benchmark suite: a transport recording request latency and status codes, and
+collection of process CPU time and resident memory."""
+from typing_extensions import TypedDict
+from typing import List, Dict, Optional
+import httpx
+import resource
+import time
+
+
+class BenchmarkReport(TypedDict):
+    """Benchmark scenario report."""
+    scenario: str
+    """Scenario name."""
+    loop: str
+    """Event loop policy the scenario ran on."""
+    durationInSeconds: float
+    """Wall clock duration of the scenario."""
+    requests: int
+    """Amount of requests sent."""
+    requestsPerSecond: float
+    """Request throughput."""
+    latencyP50InMs: float
+    """Median request latency."""
+    latencyP99InMs: float
+    """99th percentile of request latency."""
+    statusCounts: Dict[int, int]
+    """Amount of responses by status code."""
+    cpuInSeconds: float
+    """Process CPU time spent during the scenario, including the stand-in server."""
+    cpuUtilization: float
+    """CPU time divided by wall clock duration."""
+    rssInMb: float
+    """Resident memory of the process at the end of the scenario."""
+    maxRssInMb: float
+    """Peak resident memory of the process."""
+    events: int
+    """Amount of events processed by the scenario, e.g. transactions received or records fetched."""
+    catchUpInSeconds: Optional[float]
+    """Time until listeners received the stream backlog, reported by stream_recovery scenario."""
+    reconnectPeakRequests: Optional[int]
+    """Maximum amount of stream requests in a 100 ms window after the stream outage, reported by stream_recovery
+    scenario."""
+
+
+class MeasuringTransport(httpx.AsyncBaseTransport):
+    """Transport which sends requests to an ASGI application and records latency and status of each request."""
+
+    def __init__(self, app):
+        """Inits measuring transport instance.
+
+        Args:
+            app: ASGI application to send requests to.
+        """
+        self._transport = httpx.ASGITransport(app=app)
+        self.latencies: List[float] = []
+        self.status_counts: Dict[int, int] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        self.latencies.append(time.perf_counter() - start)
+        self.status_counts[response.status_code] = self.status_counts.get(response.status_code, 0) + 1
+        return response
+
+    def reset(self):
+        """Clears recorded measurements."""
+        self.latencies = []
+        self.status_counts = {}
+
+
+class Measurement:
+    """Measures wall clock time, CPU time and memory of a benchmark scenario."""
+
+    def __init__(self, scenario: str, transport: MeasuringTransport):
+        """Inits measurement instance.
+
+        Args:
+            scenario: Scenario name.
+            transport: Transport the scenario sends requests with.
+        """
+        self._scenario = scenario
+        self._transport = transport
+        self.events = 0
+
+    def __enter__(self):
+        self._transport.reset()
+        self._start = time.perf_counter()
+        self._cpuStart = time.process_time()
+        return self
+
+    def __exit__(self, *args):
+        self._duration = time.perf_counter() - self._start
+        self._cpu = time.process_time() - self._cpuStart
+
+    def report(self) -> BenchmarkReport:
+        """Returns scenario report.
+
+        Returns:
+            Scenario report.
+        """
+        latencies = sorted(self._transport.latencies)
+        requests = len(latencies)
+        return {
+            'scenario': self._scenario,
+            'loop': 'default',
+            'durationInSeconds': round(self._duration, 3),
+            'requests': requests,
+            'requestsPerSecond': round(requests / self._duration, 1) if self._duration else 0,
+            'latencyP50InMs': round(self._percentile(latencies, 0.5) * 1000, 2),
+            'latencyP99InMs': round(self._percentile(latencies, 0.99) * 1000, 2),
+            'statusCounts': dict(sorted(self._transport.status_counts.items())),
+            'cpuInSeconds': round(self._cpu, 3),
+            'cpuUtilization': round(self._cpu / self._duration, 3) if self._duration else 0,
+            'rssInMb': round(current_rss() / 2 ** 20, 1),
+            'maxRssInMb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'events': self.events
+        }
+
+    @staticmethod
+    def _percentile(values: List[float], fraction: float) -> float:
+        if not values:
+            return 0
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def current_rss() -> int:
+    """Returns current resident memory of the process in bytes, or peak resident memory where current one is not
+    available.
+
+    Returns:
+        Resident memory in bytes.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
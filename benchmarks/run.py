@@ -0,0 +1,240 @@
+"""Runs SDK benchmark scenarios against an in-process stand-in of the CopyFactory and provisioning APIs and reports
+request throughput, request latency percentiles, CPU time and resident memory per scenario.
+
+Run from the repository root:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --scenario listeners --listeners 500 --duration 10
+    python -m benchmarks.run --error-rate 0.05 --json
+    python -m benchmarks.run --scenario listeners --loop default --loop uvloop
+    python -m benchmarks.run --scenario stream_recovery --burst-limit 1000 --error-jitter 0
+
+Scenarios:
+    listeners: subscriber transaction listeners long polling the transaction stream.
+    signal_burst: a burst of concurrent external signal updates, optionally answered with 202 status.
+    history_backfill: merged user log backfill of many subscribers.
+    config_reconcile: reconciliation of a large subscriber configuration with a fraction of subscribers changed.
+    sharded_listeners: the listeners scenario run by a sharded listener runtime with worker processes. Requests are
+        sent by workers, so only events and CPU time of the parent process are reported.
+    stream_recovery: transaction listeners catching up with a stream backlog, then long polling quiet streams and
+        reconnecting after a stream outage. Reports time until the backlog is received and the peak of stream requests
+        after the outage.
+
+Each scenario runs on every event loop policy given with --loop, e.g. to compare listener throughput under default
+asyncio loop and uvloop.
+"""
+from .fake_server import FakeCopyFactoryServer, FakeServerOpts
+from .harness import MeasuringTransport, Measurement, BenchmarkReport
+from lib import CopyFactory, TransactionListener, UserLogFetcher, ConfigurationReconciler, ShardedListenerRuntime
+from lib.event_loop import new_event_loop
+from lib.clients.copyFactory.streaming.streamListenerOpts import StreamListenerOpts
+from datetime import datetime, timedelta
+from typing import List
+import argparse
+import httpx
+import asyncio
+import json
+import pytz
+import time
+
+scenarios = ['listeners', 'signal_burst', 'history_backfill', 'config_reconcile', 'sharded_listeners',
+             'stream_recovery']
+
+
+class CountingTransactionListener(TransactionListener):
+
+    def __init__(self, measurement: Measurement):
+        self._measurement = measurement
+
+    async def on_transaction(self, transaction_event):
+        self._measurement.events += len(transaction_event)
+
+
+def create_copy_factory(transport: MeasuringTransport, stream_listener_opts: StreamListenerOpts = None) -> CopyFactory:
+    return CopyFactory('header.payload.sign', {'transport': transport, 'retryOpts': {'minDelayInSeconds': 0.05},
+                                               'streamListenerOpts': stream_listener_opts or {}})
+
+
+async def run_listeners(args, server_opts: FakeServerOpts) -> BenchmarkReport:
+    transport = MeasuringTransport(FakeCopyFactoryServer(server_opts))
+    history_api = create_copy_factory(transport).history_api
+    with Measurement('listeners', transport) as measurement:
+        listener = CountingTransactionListener(measurement)
+        listener_ids = [history_api.add_subscriber_transaction_listener(listener, f'subscriber{index}')
+                        for index in range(args.listeners)]
+        await asyncio.sleep(args.duration)
+        for listener_id in listener_ids:
+            history_api.remove_subscriber_transaction_listener(listener_id)
+    # lets pending polls finish before the next scenario
+    await asyncio.sleep(args.stream_interval * 2)
+    return measurement.report()
+
+
+async def run_sharded_listeners(args, server_opts: FakeServerOpts) -> BenchmarkReport:
+    server = FakeCopyFactoryServer(server_opts)
+    runtime = ShardedListenerRuntime('header.payload.sign', {'workers': args.workers, 'copyFactoryOpts': {
+        'transport': httpx.ASGITransport(app=server), 'retryOpts': {'minDelayInSeconds': 0.05}}})
+    await runtime.start()
+    with Measurement('sharded_listeners', MeasuringTransport(server)) as measurement:
+        listener = CountingTransactionListener(measurement)
+        listener_ids = [runtime.add_subscriber_transaction_listener(listener, f'subscriber{index}')
+                        for index in range(args.listeners)]
+        await asyncio.sleep(args.duration)
+        for listener_id in listener_ids:
+            runtime.remove_listener(listener_id)
+    await runtime.close()
+    return measurement.report()
+
+
+async def run_stream_recovery(args, server_opts: FakeServerOpts) -> BenchmarkReport:
+    # streams are quiet once the backlog is received, so that reconnects after the outage are not hidden by polls
+    server = FakeCopyFactoryServer({**server_opts, 'streamEventsPerPoll': 0, 'streamBacklog': args.backlog,
+                                    'streamOutageStartInSeconds': args.outage_start, 'streamOutageInSeconds': 1.5})
+    transport = MeasuringTransport(server)
+    history_api = create_copy_factory(transport, {
+        'limit': args.page_limit, 'burstLimit': args.burst_limit, 'emptyPollJitterInSeconds': args.empty_poll_jitter,
+        'errorJitter': args.error_jitter}).history_api
+    catch_up_time = None
+    with Measurement('stream_recovery', transport) as measurement:
+        listener = CountingTransactionListener(measurement)
+        listener_ids = [history_api.add_subscriber_transaction_listener(listener, f'subscriber{index}')
+                        for index in range(args.listeners)]
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.duration:
+            if catch_up_time is None and measurement.events >= args.listeners * args.backlog:
+                catch_up_time = time.perf_counter() - start
+            await asyncio.sleep(0.01)
+        for listener_id in listener_ids:
+            history_api.remove_subscriber_transaction_listener(listener_id)
+    await asyncio.sleep(args.stream_interval * 2)
+    windows = {}
+    for request_time in server.stream_request_times:
+        if request_time >= server.outage_end:
+            windows[int(request_time * 10)] = windows.get(int(request_time * 10), 0) + 1
+    report = measurement.report()
+    report['catchUpInSeconds'] = round(catch_up_time, 3) if catch_up_time is not None else None
+    report['reconnectPeakRequests'] = max(windows.values()) if windows else 0
+    return report
+
+
+async def run_signal_burst(args, server_opts: FakeServerOpts) -> BenchmarkReport:
+    transport = MeasuringTransport(FakeCopyFactoryServer({**server_opts, 'accepted202Rate': args.accepted_rate}))
+    signal_client = await create_copy_factory(transport).trading_api.get_signal_client('accountId')
+    signal = {'symbol': 'EURUSD', 'type': 'POSITION_TYPE_BUY', 'time': datetime.now(pytz.utc), 'volume': 0.01}
+    with Measurement('signal_burst', transport) as measurement:
+        results = await asyncio.gather(*[
+            signal_client.update_external_signal(f'strategy{index % 10}', f'{index:08d}', signal)
+            for index in range(args.signals)], return_exceptions=True)
+        measurement.events = len([result for result in results if not isinstance(result, Exception)])
+    return measurement.report()
+
+
+async def run_history_backfill(args, server_opts: FakeServerOpts) -> BenchmarkReport:
+    transport = MeasuringTransport(FakeCopyFactoryServer({**server_opts, 'logPageRecords': args.log_records}))
+    fetcher = UserLogFetcher(create_copy_factory(transport).trading_api, {'windowInHours': 24 * 365})
+    subscriber_ids = [f'subscriber{index}' for index in range(args.backfill_subscribers)]
+    start_time = datetime.now(pytz.utc) - timedelta(days=30)
+    with Measurement('history_backfill', transport) as measurement:
+        async for record in fetcher.fetch_subscriber_logs(subscriber_ids, start_time):
+            measurement.events += 1
+    return measurement.report()
+
+
+async def run_config_reconcile(args, server_opts: FakeServerOpts) -> BenchmarkReport:
+    server = FakeCopyFactoryServer({**server_opts, 'subscribers': args.subscribers})
+    transport = MeasuringTransport(server)
+    reconciler = ConfigurationReconciler(create_copy_factory(transport).configuration_api)
+    desired = {}
+    for index, (subscriber_id, subscriber) in enumerate(server.subscribers.items()):
+        subscriber = {key: value for key, value in subscriber.items() if key != '_id'}
+        if index < args.subscribers * args.changed_fraction:
+            subscriber['subscriptions'] = [{**subscriber['subscriptions'][0], 'multiplier': 2}]
+        desired[subscriber_id] = subscriber
+    with Measurement('config_reconcile', transport) as measurement:
+        plan = await reconciler.plan({'subscribers': desired})
+        result = await reconciler.apply(plan, {'concurrency': args.concurrency})
+        measurement.events = len(result['results'])
+    return measurement.report()
+
+
+async def run(args, loop: str = 'default') -> List[BenchmarkReport]:
+    server_opts: FakeServerOpts = {
+        'latencyInSeconds': args.latency,
+        'streamIntervalInSeconds': args.stream_interval,
+        'streamEventsPerPoll': args.stream_events,
+        'tooManyRequests429Rate': args.error_rate / 2,
+        'internalError500Rate': args.error_rate / 2
+    }
+    runners = {'listeners': run_listeners, 'signal_burst': run_signal_burst,
+               'history_backfill': run_history_backfill, 'config_reconcile': run_config_reconcile,
+               'sharded_listeners': run_sharded_listeners, 'stream_recovery': run_stream_recovery}
+    reports = []
+    for scenario in args.scenario or scenarios:
+        report = await runners[scenario](args, server_opts)
+        report['loop'] = loop
+        reports.append(report)
+    return reports
+
+
+def run_on_loops(args) -> List[BenchmarkReport]:
+    reports = []
+    for loop_policy in args.loop or ['default']:
+        loop = new_event_loop(loop_policy)
+        try:
+            reports += loop.run_until_complete(run(args, loop_policy))
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+    return reports
+
+
+def print_reports(reports: List[BenchmarkReport]):
+    columns = ['scenario', 'loop', 'durationInSeconds', 'requests', 'requestsPerSecond', 'latencyP50InMs',
+               'latencyP99InMs', 'cpuUtilization', 'rssInMb', 'events']
+    print(' '.join(f'{column:>18}' for column in columns))
+    for report in reports:
+        print(' '.join(f'{str(report[column]):>18}' for column in columns))
+    for report in reports:
+        print(f'{report["scenario"]} ({report["loop"]}) status codes: {report["statusCounts"]}')
+        if report.get('reconnectPeakRequests') is not None:
+            print(f'{report["scenario"]} ({report["loop"]}) catch up: {report["catchUpInSeconds"]} s, '
+                  f'reconnect peak: {report["reconnectPeakRequests"]} requests per 100 ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs SDK benchmarks against a local stand-in server.')
+    parser.add_argument('--scenario', action='append', choices=scenarios,
+                        help='Scenario to run, may be repeated. Default is to run all scenarios.')
+    parser.add_argument('--loop', action='append', choices=['default', 'uvloop'],
+                        help='Event loop policy to run scenarios on, may be repeated. Default is default asyncio loop.')
+    parser.add_argument('--latency', type=float, default=0.005, help='Stand-in server latency in seconds.')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests failed with 429 or 500.')
+    parser.add_argument('--listeners', type=int, default=100, help='Amount of transaction listeners.')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes of sharded listeners scenario.')
+    parser.add_argument('--duration', type=float, default=5, help='Listener scenario duration in seconds.')
+    parser.add_argument('--stream-interval', type=float, default=0.1, help='Delay of stream responses in seconds.')
+    parser.add_argument('--stream-events', type=int, default=10, help='Events per stream response, 0 for timeouts.')
+    parser.add_argument('--backlog', type=int, default=500, help='Pending events per stream in stream recovery.')
+    parser.add_argument('--outage-start', type=float, default=3, help='Stream outage start time in stream recovery.')
+    parser.add_argument('--page-limit', type=int, default=100, help='Stream page size.')
+    parser.add_argument('--burst-limit', type=int, default=500, help='Stream page size while catching up.')
+    parser.add_argument('--empty-poll-jitter', type=float, default=1, help='Maximum delay after empty polls.')
+    parser.add_argument('--error-jitter', type=float, default=0.5, help='Randomized fraction of retry delays.')
+    parser.add_argument('--signals', type=int, default=1000, help='Amount of signals in the burst.')
+    parser.add_argument('--accepted-rate', type=float, default=0.1, help='Fraction of signals answered with 202.')
+    parser.add_argument('--backfill-subscribers', type=int, default=20, help='Amount of subscribers to backfill.')
+    parser.add_argument('--log-records', type=int, default=5000, help='User log records per subscriber.')
+    parser.add_argument('--subscribers', type=int, default=5000, help='Amount of subscribers to reconcile.')
+    parser.add_argument('--changed-fraction', type=float, default=0.1, help='Fraction of subscribers changed.')
+    parser.add_argument('--concurrency', type=int, default=10, help='Reconciliation concurrency.')
+    parser.add_argument('--json', action='store_true', help='Print reports as JSON.')
+    args = parser.parse_args()
+    reports = run_on_loops(args)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print_reports(reports)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Compares request body serialization via deepcopy + format_request with serialization via a JSON encoder default
+hook, on realistic strategy and subscriber payloads.
+
+Run from the repository root:
+
+    python -m benchmarks.serialization
+"""
+from lib.models import format_request, json_default
+from copy import deepcopy
+from datetime import datetime, timedelta
+import json
+import pytz
+import timeit
+import tracemalloc
+
+start_time = datetime(2020, 8, 24, tzinfo=pytz.utc)
+risk_limits = [{'type': type, 'applyTo': 'balance-difference', 'maxRelativeRisk': 0.2, 'closePositions': False,
+                'startTime': start_time + timedelta(days=index)}
+               for index, type in enumerate(['day', 'week', 'month', 'year'])]
+news_filter = {
+    'breakingNewsFilter': {'priorities': ['high', 'medium'], 'closePositionTimeGapInMinutes': 30,
+                           'openPositionFollowingTimeGapInMinutes': 60},
+    'calendarNewsFilter': {'priorities': ['election', 'high'], 'closePositionTimeGapInMinutes': 30,
+                           'openPositionPrecedingTimeGapInMinutes': 120, 'openPositionFollowingTimeGapInMinutes': 60}
+}
+symbol_mapping = [{'from': symbol, 'to': symbol + '.m'} for symbol in
+                  ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD', 'USDCHF', 'NZDUSD', 'EURGBP', 'EURJPY', 'GBPJPY',
+                   'XAUUSD', 'XAGUSD', 'US30', 'US500', 'NAS100', 'GER40', 'UK100', 'JP225', 'BTCUSD', 'ETHUSD']]
+strategy = {
+    'name': 'Test strategy',
+    'description': 'Some useful description about your strategy',
+    'accountId': 'accountId',
+    'maxTradeRisk': 0.1,
+    'stopOutRisk': {'value': 0.4, 'startTime': start_time},
+    'riskLimits': risk_limits,
+    'newsFilter': news_filter,
+    'symbolMapping': symbol_mapping,
+    'symbolFilter': {'included': [mapping['from'] for mapping in symbol_mapping]},
+    'tradeSizeScaling': {'mode': 'balance'},
+    'timeSettings': {'lifetimeInHours': 192, 'openingIntervalInMinutes': 5, 'expirePendingOrderSignals': True},
+    'commissionScheme': {'type': 'high-water-mark', 'billingPeriod': 'month', 'commissionRate': 0.1}
+}
+subscriber = {
+    'name': 'Demo account',
+    'riskLimits': risk_limits,
+    'maxLeverage': 20,
+    'subscriptions': [{'strategyId': f'strategy{index}', 'multiplier': 1, 'riskLimits': risk_limits,
+                       'newsFilter': news_filter, 'symbolMapping': symbol_mapping} for index in range(10)]
+}
+encoder = json.JSONEncoder(default=json_default)
+
+
+def copy_and_format(payload: dict) -> bytes:
+    copy = deepcopy(payload)
+    format_request(copy)
+    return json.dumps(copy).encode('utf-8')
+
+
+def encode(payload: dict) -> bytes:
+    return encoder.encode(payload).encode('utf-8')
+
+
+def peak_memory(func, payload: dict) -> int:
+    tracemalloc.start()
+    func(payload)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    for name, payload in [('strategy', strategy), ('subscriber', subscriber)]:
+        assert json.loads(copy_and_format(payload)) == json.loads(encode(payload))
+        print(f'{name} payload, {len(encode(payload))} bytes')
+        results = {}
+        for method, func in [('deepcopy + format_request', copy_and_format), ('encoder default hook', encode)]:
+            number, total = timeit.Timer(lambda: func(payload)).autorange()
+            results[method] = total / number * 1e6
+            print(f'  {method:<28}{results[method]:10.1f} us/op{peak_memory(func, payload) / 1024:10.1f} KiB peak')
+        print(f'  speedup {results["deepcopy + format_request"] / results["encoder default hook"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
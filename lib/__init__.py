@@ -1,4 +1,56 @@
-from .copyFactory import CopyFactory
-from .clients.copyFactory.streaming.stopoutListener import StopoutListener
-from .clients.copyFactory.streaming.userLogListener import UserLogListener
-from .clients.copyFactory.streaming.transactionListener import TransactionListener
+from typing import TYPE_CHECKING
+import importlib
+
+_exports = {
+    'CopyFactory': '.copyFactory',
+    'CopyFactoryPool': '.copyFactoryPool',
+    'StopoutListener': '.clients.copyFactory.streaming.stopoutListener',
+    'UserLogListener': '.clients.copyFactory.streaming.userLogListener',
+    'TransactionListener': '.clients.copyFactory.streaming.transactionListener',
+    'StopoutStateService': '.clients.copyFactory.stopout_state_service',
+    'UserLogFetcher': '.clients.copyFactory.user_log_fetcher',
+    'UserLogStore': '.clients.copyFactory.user_log_store',
+    'ConfigurationCache': '.clients.copyFactory.configuration_cache',
+    'ConfigurationChangeListener': '.clients.copyFactory.configuration_change_listener',
+    'ConfigurationReconciler': '.clients.copyFactory.configuration_reconciler',
+    'ConfigurationIndex': '.clients.copyFactory.configuration_index',
+    'ConfigurationValidator': '.clients.copyFactory.configuration_validator',
+    'ShardedListenerRuntime': '.clients.copyFactory.streaming.shardedListenerRuntime',
+    'MetricsListener': '.clients.metrics',
+    'StructuredFormatter': '.logger',
+    'RateLimitFilter': '.logger'
+}
+"""Exported names and modules they are defined in. Modules are imported on first access to a name, so that only the
+parts of the SDK which are used are loaded."""
+
+__all__ = list(_exports)
+
+if TYPE_CHECKING:
+    from .copyFactory import CopyFactory
+    from .copyFactoryPool import CopyFactoryPool
+    from .clients.copyFactory.streaming.stopoutListener import StopoutListener
+    from .clients.copyFactory.streaming.userLogListener import UserLogListener
+    from .clients.copyFactory.streaming.transactionListener import TransactionListener
+    from .clients.copyFactory.stopout_state_service import StopoutStateService
+    from .clients.copyFactory.user_log_fetcher import UserLogFetcher
+    from .clients.copyFactory.user_log_store import UserLogStore
+    from .clients.copyFactory.configuration_cache import ConfigurationCache
+    from .clients.copyFactory.configuration_change_listener import ConfigurationChangeListener
+    from .clients.copyFactory.configuration_reconciler import ConfigurationReconciler
+    from .clients.copyFactory.configuration_index import ConfigurationIndex
+    from .clients.copyFactory.configuration_validator import ConfigurationValidator
+    from .clients.copyFactory.streaming.shardedListenerRuntime import ShardedListenerRuntime
+    from .clients.metrics import MetricsListener
+    from .logger import StructuredFormatter, RateLimitFilter
+
+
+def __getattr__(name: str):
+    if name not in _exports:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_exports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,238 @@
+from .rateLimiter import RateLimiter
+from ..logger import LoggerManager
+from typing_extensions import TypedDict
+from typing import List, Optional, Callable, Awaitable, Any, Set
+import asyncio
+import json
+import math
+import os
+import time
+
+
+class BatchProgress(TypedDict):
+    """Batch execution progress."""
+    total: int
+    """Total amount of items in the batch."""
+    completed: int
+    """Amount of items processed, including skipped ones."""
+    succeeded: int
+    """Amount of items processed successfully."""
+    failed: int
+    """Amount of failed items."""
+    skipped: int
+    """Amount of items skipped because they were completed by a previous run."""
+
+
+class BatchItemResult(TypedDict, total=False):
+    """Result of a batch item execution."""
+    key: str
+    """Item key."""
+    item: Any
+    """Item executed."""
+    success: bool
+    """Whether the item was processed successfully."""
+    result: Any
+    """Item result if the item succeeded."""
+    error: Exception
+    """Error raised if the item failed."""
+    attempts: int
+    """Amount of attempts made to execute the item."""
+    latencyInSeconds: float
+    """Time spent executing the item, including retries."""
+
+
+class BatchLatency(TypedDict):
+    """Item latency statistics in seconds."""
+    average: float
+    """Average latency."""
+    p50: float
+    """Median latency."""
+    p99: float
+    """99th percentile of latency."""
+    max: float
+    """Maximum latency."""
+
+
+class BatchSummary(TypedDict):
+    """Batch execution summary."""
+    executed: int
+    """Amount of items executed during this run."""
+    durationInSeconds: float
+    """Batch execution time."""
+    itemsPerSecond: float
+    """Batch throughput."""
+    latency: BatchLatency
+    """Item latency statistics."""
+
+
+class BatchResult(TypedDict):
+    """Batch execution result."""
+    results: List[BatchItemResult]
+    """Results of the items executed during this run, in the order of items."""
+    failed: List[BatchItemResult]
+    """Results of the failed items."""
+    skipped: List[str]
+    """Keys of the items skipped because they were completed by a previous run."""
+    summary: BatchSummary
+    """Throughput and latency summary of the items executed during this run."""
+
+
+class BatchOpts(TypedDict, total=False):
+    """Batch execution options."""
+    concurrency: Optional[int]
+    """Maximum amount of items executed concurrently, default value is 10."""
+    requestsPerSecond: Optional[float]
+    """Maximum rate of item executions per second, default is not to limit the rate."""
+    checkpointFile: Optional[str]
+    """Path to a file to record completed items in. When the batch is run again with the same file, items completed
+    by previous runs are skipped, so that an interrupted batch can be resumed."""
+    onProgress: Optional[Callable[[BatchProgress], Any]]
+    """Function called each time an item is processed. Can be either a function or a coroutine function."""
+    retries: Optional[int]
+    """Maximum amount of times a failed item is retried, default value is 0."""
+    retryDelayInSeconds: Optional[float]
+    """Delay before the first retry of an item, doubled on each next retry, default value is 1."""
+
+
+class BatchExecutor:
+    """Executes a list of items with bounded concurrency and rate, collecting per-item results without stopping
+    the batch on failures."""
+
+    def __init__(self, opts: BatchOpts = None):
+        """Inits batch executor instance.
+
+        Args:
+            opts: Batch execution options.
+        """
+        opts: BatchOpts = opts or {}
+        self._concurrency = opts['concurrency'] if 'concurrency' in opts else 10
+        self._rateLimiter = RateLimiter(opts['requestsPerSecond']) if opts.get('requestsPerSecond') else None
+        self._checkpointFile = opts['checkpointFile'] if 'checkpointFile' in opts else None
+        self._onProgress = opts['onProgress'] if 'onProgress' in opts else None
+        self._retries = opts['retries'] if 'retries' in opts else 0
+        self._retryDelay = opts['retryDelayInSeconds'] if 'retryDelayInSeconds' in opts else 1
+        self._logger = LoggerManager.get_logger('BatchExecutor')
+
+    async def execute(self, items: List[Any], func: Callable[[Any], Awaitable], key: Callable[[Any], str],
+                      should_retry: Callable[[Exception], bool] = None) -> BatchResult:
+        """Executes batch items.
+
+        Args:
+            items: Items to execute.
+            func: Coroutine function executing an item.
+            key: Function returning a unique key of an item, used to resume the batch.
+            should_retry: Function deciding whether an item which raised an error should be retried, default is to
+            retry all errors.
+
+        Returns:
+            A coroutine resolving with batch result.
+        """
+        completed_keys = self._load_checkpoint()
+        results: List[Optional[BatchItemResult]] = [None] * len(items)
+        skipped = []
+        pending = []
+        for index, item in enumerate(items):
+            item_key = key(item)
+            if item_key in completed_keys:
+                skipped.append(item_key)
+            else:
+                pending.append((index, item_key, item))
+        progress: BatchProgress = {'total': len(items), 'completed': len(skipped), 'succeeded': 0, 'failed': 0,
+                                   'skipped': len(skipped)}
+        queue = iter(pending)
+        checkpoint = open(self._checkpointFile, 'a') if self._checkpointFile else None
+
+        async def worker():
+            for index, item_key, item in queue:
+                item_result: BatchItemResult = {'key': item_key, 'item': item}
+                started_at = time.perf_counter()
+                attempt = 0
+                while True:
+                    if self._rateLimiter:
+                        await self._rateLimiter.acquire()
+                    attempt += 1
+                    try:
+                        item_result['result'] = await func(item)
+                        item_result['success'] = True
+                        break
+                    except Exception as err:
+                        if attempt > self._retries or (should_retry and not should_retry(err)):
+                            item_result['success'] = False
+                            item_result['error'] = err
+                            break
+                        await asyncio.sleep(self._retryDelay * pow(2, attempt - 1))
+                item_result['attempts'] = attempt
+                item_result['latencyInSeconds'] = time.perf_counter() - started_at
+                if item_result['success']:
+                    progress['succeeded'] += 1
+                    if checkpoint:
+                        checkpoint.write(json.dumps({'key': item_key}) + '\n')
+                        checkpoint.flush()
+                else:
+                    progress['failed'] += 1
+                results[index] = item_result
+                progress['completed'] += 1
+                await self._report_progress(progress)
+
+        started_at = time.perf_counter()
+        try:
+            await asyncio.gather(*[worker() for i in range(min(self._concurrency, len(pending)))])
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        executed = [result for result in results if result is not None]
+        return {
+            'results': executed,
+            'failed': [result for result in executed if not result['success']],
+            'skipped': skipped,
+            'summary': self.summarize(executed, time.perf_counter() - started_at)
+        }
+
+    @staticmethod
+    def summarize(results: List[BatchItemResult], duration_in_seconds: float) -> BatchSummary:
+        """Computes throughput and latency summary of executed items.
+
+        Args:
+            results: Results of the items executed.
+            duration_in_seconds: Time spent executing the items.
+
+        Returns:
+            Batch summary.
+        """
+        latencies = sorted(result['latencyInSeconds'] for result in results)
+
+        def percentile(fraction: float) -> float:
+            return latencies[min(len(latencies) - 1, math.ceil(fraction * len(latencies)) - 1)] if latencies else 0
+
+        return {
+            'executed': len(results),
+            'durationInSeconds': duration_in_seconds,
+            'itemsPerSecond': len(results) / duration_in_seconds if duration_in_seconds > 0 else 0,
+            'latency': {
+                'average': sum(latencies) / len(latencies) if latencies else 0,
+                'p50': percentile(0.5),
+                'p99': percentile(0.99),
+                'max': latencies[-1] if latencies else 0
+            }
+        }
+
+    def _load_checkpoint(self) -> Set[str]:
+        completed_keys = set()
+        if self._checkpointFile and os.path.exists(self._checkpointFile):
+            with open(self._checkpointFile) as checkpoint:
+                for line in checkpoint:
+                    try:
+                        completed_keys.add(json.loads(line)['key'])
+                    except Exception:
+                        # the last line may be truncated if the process crashed while writing it
+                        pass
+        return completed_keys
+
+    async def _report_progress(self, progress: BatchProgress):
+        if self._onProgress:
+            try:
+                result = self._onProgress(dict(progress))
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as err:
+                self._logger.error('Failed to report batch progress', err)
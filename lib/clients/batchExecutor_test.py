@@ -0,0 +1,109 @@
+from .batchExecutor import BatchExecutor
+from asyncio import sleep
+import pytest
+import time
+import os
+
+items = ['a', 'b', 'c', 'd', 'e']
+
+
+class TestBatchExecutor:
+    @pytest.mark.asyncio
+    async def test_execute_items_with_bounded_concurrency(self):
+        """Should execute all items without exceeding concurrency limit."""
+        running = 0
+        max_running = 0
+
+        async def func(item):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await sleep(0.01)
+            running -= 1
+            return item.upper()
+
+        result = await BatchExecutor({'concurrency': 2}).execute(items, func, lambda item: item)
+        assert max_running == 2
+        assert list(map(lambda r: r['result'], result['results'])) == ['A', 'B', 'C', 'D', 'E']
+        assert result['failed'] == []
+
+    @pytest.mark.asyncio
+    async def test_collect_failures(self):
+        """Should collect failed items without stopping the batch."""
+        error = Exception('test')
+        progress = []
+
+        async def func(item):
+            if item == 'b':
+                raise error
+            return item
+
+        result = await BatchExecutor({'onProgress': lambda p: progress.append(p)})\
+            .execute(items, func, lambda item: item)
+        assert len(result['results']) == 5
+        assert [{key: r[key] for key in ['key', 'item', 'success', 'error', 'attempts']} for r in result['failed']] \
+            == [{'key': 'b', 'item': 'b', 'success': False, 'error': error, 'attempts': 1}]
+        assert progress[-1] == {'total': 5, 'completed': 5, 'succeeded': 4, 'failed': 1, 'skipped': 0}
+
+    @pytest.mark.asyncio
+    async def test_limit_rate(self):
+        """Should limit rate of item executions."""
+        async def func(item):
+            return item
+
+        executor = BatchExecutor({'requestsPerSecond': 50, 'concurrency': 5})
+        executor._rateLimiter._tokens = 1
+        start = time.time()
+        await executor.execute(items, func, lambda item: item)
+        assert time.time() - start >= 0.07
+
+    @pytest.mark.asyncio
+    async def test_resume_from_checkpoint(self, tmp_path):
+        """Should skip items completed by a previous run."""
+        checkpoint_file = os.path.join(tmp_path, 'checkpoint')
+        calls = []
+
+        async def func(item):
+            calls.append(item)
+            if item == 'c' and calls.count('c') == 1:
+                raise Exception('test')
+            return item
+
+        result = await BatchExecutor({'checkpointFile': checkpoint_file}).execute(items, func, lambda item: item)
+        assert list(map(lambda r: r['key'], result['failed'])) == ['c']
+        result = await BatchExecutor({'checkpointFile': checkpoint_file}).execute(items, func, lambda item: item)
+        assert result['skipped'] == ['a', 'b', 'd', 'e']
+        assert list(map(lambda r: r['key'], result['results'])) == ['c']
+        assert calls.count('c') == 2
+
+    @pytest.mark.asyncio
+    async def test_retry_failed_items(self):
+        """Should retry failed items which are allowed to be retried."""
+        calls = []
+
+        async def func(item):
+            calls.append(item)
+            if item in ['b', 'c'] and calls.count(item) < 3:
+                raise Exception(item)
+            return item
+
+        result = await BatchExecutor({'retries': 2, 'retryDelayInSeconds': 0.001})\
+            .execute(items, func, lambda item: item, lambda err: str(err) != 'c')
+        assert [r['attempts'] for r in result['results']] == [1, 3, 1, 1, 1]
+        assert list(map(lambda r: r['key'], result['failed'])) == ['c']
+        assert calls.count('c') == 1
+
+    @pytest.mark.asyncio
+    async def test_summarize_execution(self):
+        """Should summarize throughput and latency."""
+        async def func(item):
+            await sleep(0.01 if item == 'e' else 0)
+            return item
+
+        result = await BatchExecutor({'concurrency': 5}).execute(items, func, lambda item: item)
+        summary = result['summary']
+        assert summary['executed'] == 5
+        assert summary['itemsPerSecond'] == 5 / summary['durationInSeconds']
+        assert summary['latency']['p99'] == summary['latency']['max'] >= 0.01
+        assert summary['latency']['p50'] < 0.01
+        assert BatchExecutor.summarize([], 0)['latency'] == {'average': 0, 'p50': 0, 'p99': 0, 'max': 0}
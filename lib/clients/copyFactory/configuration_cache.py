@@ -0,0 +1,154 @@
+from .configuration_change_listener import ConfigurationChangeListener, ConfigurationChange
+from .copyFactory_models import CopyFactoryStrategy, CopyFactorySubscriber, CopyFactoryPortfolioStrategy
+from ...logger import LoggerManager
+from typing_extensions import TypedDict
+from typing import Optional, List
+from datetime import datetime
+import asyncio
+
+
+class ConfigurationCacheOpts(TypedDict, total=False):
+    """Configuration cache options."""
+    ttlInSeconds: Optional[float]
+    """Time during which cached results are returned without revalidation, default value is 60."""
+    staleWhileRevalidateInSeconds: Optional[float]
+    """Time after ttl expiration during which stale results are returned while being revalidated in the background,
+    default value is 300."""
+
+
+class ConfigurationCache(ConfigurationChangeListener):
+    """Caches strategies, portfolio strategies and subscribers returned by a configuration client. Results are
+    revalidated with conditional requests when the server supports them, and are invalidated automatically when the
+    configuration client updates or removes configuration objects. Returned objects are shared between callers and
+    must not be modified."""
+
+    def __init__(self, configuration_client, opts: ConfigurationCacheOpts = None):
+        """Inits configuration cache instance.
+
+        Args:
+            configuration_client: CopyFactory configuration API client.
+            opts: Cache options.
+        """
+        opts: ConfigurationCacheOpts = opts or {}
+        self._configurationClient = configuration_client
+        self._ttl = opts['ttlInSeconds'] if 'ttlInSeconds' in opts else 60
+        self._staleWhileRevalidate = opts['staleWhileRevalidateInSeconds'] if 'staleWhileRevalidateInSeconds' in \
+            opts else 300
+        self._entries = {}
+        self._generations = {'strategies': 0, 'portfolio-strategies': 0, 'subscribers': 0}
+        self._listenerId = configuration_client.add_change_listener(self)
+        self._logger = LoggerManager.get_logger('ConfigurationCache')
+
+    async def get_strategies(self, include_removed: bool = None, limit: int = None,
+                             offset: int = None) -> 'List[CopyFactoryStrategy]':
+        """Returns CopyFactory copy trading strategies from cache, retrieving them if needed.
+
+        Args:
+            include_removed: Flag instructing to include removed strategies in results.
+            limit: Pagination limit.
+            offset: Pagination offset.
+
+        Returns:
+            A coroutine resolving with CopyFactory strategies found.
+        """
+        return await self._get('get_strategies', 'strategies', include_removed, limit, offset)
+
+    async def get_portfolio_strategies(self, include_removed: bool = None, limit: int = None,
+                                       offset: int = None) -> 'List[CopyFactoryPortfolioStrategy]':
+        """Returns CopyFactory portfolio strategies from cache, retrieving them if needed.
+
+        Args:
+            include_removed: Flag instructing to include removed portfolio strategies in results.
+            limit: Pagination limit.
+            offset: Pagination offset.
+
+        Returns:
+            A coroutine resolving with CopyFactory portfolio strategies found.
+        """
+        return await self._get('get_portfolio_strategies', 'portfolio-strategies', include_removed, limit, offset)
+
+    async def get_subscribers(self, include_removed: bool = None, limit: int = None,
+                              offset: int = None) -> 'List[CopyFactorySubscriber]':
+        """Returns CopyFactory subscribers from cache, retrieving them if needed.
+
+        Args:
+            include_removed: Flag instructing to include removed subscribers in results.
+            limit: Pagination limit.
+            offset: Pagination offset.
+
+        Returns:
+            A coroutine resolving with subscribers found.
+        """
+        return await self._get('get_subscribers', 'subscribers', include_removed, limit, offset)
+
+    def invalidate(self, collection: str = None):
+        """Removes cached results.
+
+        Args:
+            collection: Collection to invalidate, one of strategies, portfolio-strategies, subscribers. Default is to
+            invalidate all collections.
+        """
+        collections = [collection] if collection else list(self._generations.keys())
+        for collection in collections:
+            self._generations[collection] += 1
+        for key in list(self._entries.keys()):
+            if key[0] in collections:
+                del self._entries[key]
+
+    def close(self):
+        """Stops listening to configuration changes and clears the cache."""
+        self._configurationClient.remove_change_listener(self._listenerId)
+        self.invalidate()
+
+    async def on_configuration_change(self, change: ConfigurationChange):
+        if change['type'] == 'strategy':
+            # strategy removal affects portfolio members and subscriptions as well
+            self.invalidate('strategies' if change['action'] == 'update' else None)
+        elif change['type'] in ['portfolioStrategy', 'portfolioStrategyMember']:
+            self.invalidate('portfolio-strategies')
+        else:
+            self.invalidate('subscribers')
+
+    async def _get(self, method_name: str, collection: str, include_removed: Optional[bool], limit: Optional[int],
+                   offset: Optional[int]):
+        key = (collection, include_removed, limit, offset)
+        entry = self._entries.get(key)
+        if entry and 'value' in entry:
+            age = datetime.now().timestamp() - entry['updatedAt']
+            if age < self._ttl:
+                return entry['value']
+            if age < self._ttl + self._staleWhileRevalidate:
+                task = self._refresh(method_name, key, entry)
+                if not task.done():
+                    task.add_done_callback(lambda t: self._log_refresh_error(key, t))
+                return entry['value']
+        if entry is None:
+            entry = {}
+            self._entries[key] = entry
+        return await asyncio.shield(self._refresh(method_name, key, entry))
+
+    def _refresh(self, method_name: str, key: tuple, entry: dict) -> asyncio.Task:
+        if not entry.get('refreshTask'):
+            entry['refreshTask'] = asyncio.create_task(self._revalidate(method_name, key, entry))
+        return entry['refreshTask']
+
+    async def _revalidate(self, method_name: str, key: tuple, entry: dict):
+        collection, include_removed, limit, offset = key
+        generation = self._generations[collection]
+        try:
+            response = await self._configurationClient._get_collection_conditional(
+                method_name, collection, include_removed, limit, offset, entry.get('etag'), entry.get('lastModified'))
+        finally:
+            entry['refreshTask'] = None
+        value = entry.get('value') if response['status'] == 304 else response['body']
+        # results requested before an invalidation may be outdated, so they are returned but not cached
+        if generation == self._generations[collection] and self._entries.get(key) is entry:
+            entry['value'] = value
+            entry['etag'] = response['etag']
+            entry['lastModified'] = response['lastModified']
+            entry['updatedAt'] = datetime.now().timestamp()
+        return value
+
+    def _log_refresh_error(self, key: tuple, task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            self._logger.error(f'Failed to revalidate cached {key[0]}', task.exception())
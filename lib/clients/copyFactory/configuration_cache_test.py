@@ -0,0 +1,86 @@
+from .configuration_cache import ConfigurationCache
+from mock import MagicMock, AsyncMock
+from freezegun import freeze_time
+from asyncio import sleep
+import pytest
+
+configuration_client = MagicMock()
+cache = ConfigurationCache(configuration_client)
+strategies = [{'_id': 'ABCD'}]
+start_time = '2020-10-05 10:00:00.000'
+
+
+@pytest.fixture(autouse=True)
+async def run_around_tests():
+    global configuration_client
+    configuration_client = MagicMock()
+    configuration_client.add_change_listener = MagicMock(return_value='listenerId')
+    configuration_client._get_collection_conditional = AsyncMock(return_value={
+        'status': 200, 'body': strategies, 'etag': '"v1"', 'lastModified': None})
+    global cache
+    cache = ConfigurationCache(configuration_client, {'ttlInSeconds': 60, 'staleWhileRevalidateInSeconds': 60})
+
+
+class TestConfigurationCache:
+    @pytest.mark.asyncio
+    async def test_return_cached_results(self):
+        """Should return cached results within ttl."""
+        assert await cache.get_strategies() == strategies
+        assert await cache.get_strategies() == strategies
+        assert await cache.get_strategies(True) == strategies
+        assert configuration_client._get_collection_conditional.call_count == 2
+        configuration_client._get_collection_conditional.assert_any_call(
+            'get_strategies', 'strategies', None, None, None, None, None)
+
+    @pytest.mark.asyncio
+    async def test_deduplicate_concurrent_requests(self):
+        """Should send one request for concurrent misses."""
+        async def request(*args):
+            await sleep(0.01)
+            return {'status': 200, 'body': strategies, 'etag': None, 'lastModified': None}
+
+        configuration_client._get_collection_conditional = AsyncMock(side_effect=request)
+        results = [cache.get_subscribers(), cache.get_subscribers()]
+        assert [await results[0], await results[1]] == [strategies, strategies]
+        assert configuration_client._get_collection_conditional.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_revalidate_stale_results_in_background(self):
+        """Should return stale results and revalidate them with a conditional request."""
+        with freeze_time(start_time) as frozen_datetime:
+            await cache.get_strategies()
+            configuration_client._get_collection_conditional = AsyncMock(return_value={
+                'status': 304, 'body': None, 'etag': '"v1"', 'lastModified': None})
+            frozen_datetime.tick(90)
+            assert await cache.get_strategies() == strategies
+            await sleep(0.01)
+            configuration_client._get_collection_conditional.assert_called_once_with(
+                'get_strategies', 'strategies', None, None, None, '"v1"', None)
+            await cache.get_strategies()
+            assert configuration_client._get_collection_conditional.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_wait_for_revalidation_of_expired_results(self):
+        """Should wait for new results if stale results are too old."""
+        with freeze_time(start_time) as frozen_datetime:
+            await cache.get_strategies()
+            updated = [{'_id': 'EFGH'}]
+            configuration_client._get_collection_conditional = AsyncMock(return_value={
+                'status': 200, 'body': updated, 'etag': '"v2"', 'lastModified': None})
+            frozen_datetime.tick(150)
+            assert await cache.get_strategies() == updated
+
+    @pytest.mark.asyncio
+    async def test_invalidate_on_configuration_change(self):
+        """Should invalidate cached results on configuration changes."""
+        await cache.get_strategies()
+        await cache.get_subscribers()
+        await cache.on_configuration_change({'type': 'subscription', 'action': 'remove', 'id': 'subscriberId',
+                                             'strategyId': 'ABCD'})
+        await cache.get_strategies()
+        await cache.get_subscribers()
+        assert configuration_client._get_collection_conditional.call_count == 3
+        await cache.on_configuration_change({'type': 'strategy', 'action': 'remove', 'id': 'ABCD'})
+        await cache.get_strategies()
+        await cache.get_subscribers()
+        assert configuration_client._get_collection_conditional.call_count == 5
@@ -0,0 +1,35 @@
+from abc import abstractmethod
+from typing_extensions import TypedDict, Literal
+from typing import Optional, Any
+
+ConfigurationChangeType = Literal['strategy', 'portfolioStrategy', 'portfolioStrategyMember', 'subscriber',
+                                  'subscription']
+"""Type of configuration object changed."""
+
+
+class ConfigurationChange(TypedDict, total=False):
+    """Configuration change made by a configuration client."""
+    type: ConfigurationChangeType
+    """Type of configuration object changed."""
+    action: Literal['update', 'remove']
+    """Action performed."""
+    id: str
+    """Id of the strategy, portfolio strategy or subscriber changed."""
+    strategyId: Optional[str]
+    """Id of the member strategy or subscription strategy changed, for portfolioStrategyMember and subscription
+    changes."""
+    payload: Optional[Any]
+    """Update payload or close instructions sent."""
+
+
+class ConfigurationChangeListener:
+    """Listener of configuration changes made by a configuration client."""
+
+    @abstractmethod
+    async def on_configuration_change(self, change: ConfigurationChange):
+        """Calls a predefined function when a configuration change request succeeds.
+
+        Args:
+            change: Configuration change.
+        """
+        pass
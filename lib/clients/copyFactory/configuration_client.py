@@ -1,11 +1,28 @@
 from ..metaApi_client import MetaApiClient
-from ...models import random_id, convert_iso_time_to_date, format_request
+from ...models import random_id, convert_iso_time_to_date, json_default
+from ...logger import LoggerManager
+from .configuration_change_listener import ConfigurationChangeListener, ConfigurationChange
+from .configuration_validator import ConfigurationValidator
 from .copyFactory_models import StrategyId, CopyFactoryStrategyUpdate, CopyFactorySubscriberUpdate, \
     CopyFactorySubscriber, CopyFactoryStrategy, CopyFactoryPortfolioStrategy, \
-    CopyFactoryPortfolioStrategyUpdate, CopyFactoryCloseInstructions
-from typing import List
+    CopyFactoryPortfolioStrategyUpdate, CopyFactoryCloseInstructions, CopyFactoryConfigurationMutation
+from typing import List, AsyncIterator, Callable, Awaitable, Optional
 from ..domain_client import DomainClient
-from copy import deepcopy
+from ..httpClient import ConditionalResponse
+from ..errorHandler import ValidationException
+from ..batchExecutor import BatchExecutor, BatchOpts, BatchResult
+from collections import deque
+import asyncio
+import hashlib
+import json
+
+_json_encoder = json.JSONEncoder(default=json_default, sort_keys=True)
+
+
+class ConfigurationMutationOpts(BatchOpts, total=False):
+    """Bulk configuration mutation options."""
+    validate: Optional[bool]
+    """Whether to validate updates locally before sending them, default value is False."""
 
 
 class ConfigurationClient(MetaApiClient):
@@ -20,6 +37,32 @@ class ConfigurationClient(MetaApiClient):
         """
         super().__init__(domain_client)
         self._domainClient = domain_client
+        self._changeListeners = {}
+        self._validator = ConfigurationValidator()
+        self._logger = LoggerManager.get_logger('ConfigurationClient')
+
+    def add_change_listener(self, listener: ConfigurationChangeListener) -> str:
+        """Adds a listener of configuration changes made by this client. The listener is called after an update or
+        remove request succeeds.
+
+        Args:
+            listener: Configuration change listener.
+
+        Returns:
+            Listener id.
+        """
+        listener_id = random_id(10)
+        self._changeListeners[listener_id] = listener
+        return listener_id
+
+    def remove_change_listener(self, listener_id: str):
+        """Removes configuration change listener.
+
+        Args:
+            listener_id: Listener id.
+        """
+        if listener_id in self._changeListeners:
+            del self._changeListeners[listener_id]
 
     async def generate_strategy_id(self) -> StrategyId:
         """Retrieves new unused strategy id. Method is accessible only with API access token. See
@@ -82,6 +125,36 @@ class ConfigurationClient(MetaApiClient):
         convert_iso_time_to_date(result)
         return result
 
+    async def iter_strategies(self, include_removed: bool = None, page_size: int = 1000,
+                              concurrency: int = 5) -> AsyncIterator[CopyFactoryStrategy]:
+        """Iterates over all CopyFactory copy trading strategies, requesting pages following the first one concurrently.
+        Results are streamed in the order returned by the API.
+
+        Args:
+            include_removed: Flag instructing to include removed strategies in results.
+            page_size: Amount of CopyFactory copy trading strategies requested per page. Default is 1000.
+            concurrency: Maximum amount of pages requested concurrently. Default is 5.
+
+        Returns:
+            An asynchronous iterator over CopyFactory copy trading strategies found.
+        """
+        async for item in self._iter_pages(self.get_strategies, include_removed, page_size, concurrency):
+            yield item
+
+    async def fetch_all_strategies(self, include_removed: bool = None, page_size: int = 1000,
+                                   concurrency: int = 5) -> 'List[CopyFactoryStrategy]':
+        """Retrieves all CopyFactory copy trading strategies, requesting pages following the first one concurrently.
+
+        Args:
+            include_removed: Flag instructing to include removed strategies in results.
+            page_size: Amount of CopyFactory copy trading strategies requested per page. Default is 1000.
+            concurrency: Maximum amount of pages requested concurrently. Default is 5.
+
+        Returns:
+            A coroutine resolving with CopyFactory copy trading strategies found.
+        """
+        return [item async for item in self.iter_strategies(include_removed, page_size, concurrency)]
+
     async def get_strategy(self, strategy_id: str) -> CopyFactoryStrategy:
         """Retrieves CopyFactory copy trading strategy by id. See
         https://metaapi.cloud/docs/copyfactory/restApi/api/configuration/getStrategy/
@@ -105,30 +178,36 @@ class ConfigurationClient(MetaApiClient):
         convert_iso_time_to_date(strategy)
         return strategy
 
-    async def update_strategy(self, strategy_id: str, strategy: CopyFactoryStrategyUpdate):
+    async def update_strategy(self, strategy_id: str, strategy: CopyFactoryStrategyUpdate,
+                              validate: bool = False):
         """Updates a CopyFactory strategy. See
         https://metaapi.cloud/docs/copyfactory/restApi/api/configuration/updateStrategy/
 
         Args:
             strategy_id: Copy trading strategy id.
             strategy: Trading strategy update.
+            validate: Whether to validate the update locally before sending it, raising ValidationException
+            without a request if it is invalid.
 
         Returns:
             A coroutine resolving when strategy is updated.
         """
         if self._is_not_jwt_token():
             return self._handle_no_access_exception('update_strategy')
-        payload = deepcopy(strategy)
-        format_request(payload)
+        if validate:
+            self._validator.validate_strategy(strategy)
         opts = {
             'url': f"/users/current/configuration/strategies/{strategy_id}",
             'method': 'PUT',
             'headers': {
                 'auth-token': self._token
             },
-            'body': payload
+            'body': strategy
         }
-        return await self._domainClient.request_copyfactory(opts)
+        result = await self._domainClient.request_copyfactory(opts)
+        await self._notify_change({'type': 'strategy', 'action': 'update', 'id': strategy_id,
+                                  'payload': strategy})
+        return result
 
     async def remove_strategy(self, strategy_id: str, close_instructions: CopyFactoryCloseInstructions = None):
         """Deletes a CopyFactory strategy. See
@@ -151,9 +230,11 @@ class ConfigurationClient(MetaApiClient):
             }
         }
         if close_instructions is not None:
-            format_request(close_instructions)
             opts['body'] = close_instructions
-        return await self._domainClient.request_copyfactory(opts)
+        result = await self._domainClient.request_copyfactory(opts)
+        await self._notify_change({'type': 'strategy', 'action': 'remove', 'id': strategy_id,
+                                  'payload': close_instructions})
+        return result
 
     async def get_portfolio_strategies(self, include_removed: bool = None, limit: int = None,
                                        offset: int = None) -> 'List[CopyFactoryPortfolioStrategy]':
@@ -189,6 +270,36 @@ class ConfigurationClient(MetaApiClient):
         convert_iso_time_to_date(result)
         return result
 
+    async def iter_portfolio_strategies(self, include_removed: bool = None, page_size: int = 1000,
+                                        concurrency: int = 5) -> AsyncIterator[CopyFactoryPortfolioStrategy]:
+        """Iterates over all CopyFactory portfolio strategies, requesting pages following the first one concurrently.
+        Results are streamed in the order returned by the API.
+
+        Args:
+            include_removed: Flag instructing to include removed portfolio strategies in results.
+            page_size: Amount of CopyFactory portfolio strategies requested per page. Default is 1000.
+            concurrency: Maximum amount of pages requested concurrently. Default is 5.
+
+        Returns:
+            An asynchronous iterator over CopyFactory portfolio strategies found.
+        """
+        async for item in self._iter_pages(self.get_portfolio_strategies, include_removed, page_size, concurrency):
+            yield item
+
+    async def fetch_all_portfolio_strategies(self, include_removed: bool = None, page_size: int = 1000,
+                                             concurrency: int = 5) -> 'List[CopyFactoryPortfolioStrategy]':
+        """Retrieves all CopyFactory portfolio strategies, requesting pages following the first one concurrently.
+
+        Args:
+            include_removed: Flag instructing to include removed portfolio strategies in results.
+            page_size: Amount of CopyFactory portfolio strategies requested per page. Default is 1000.
+            concurrency: Maximum amount of pages requested concurrently. Default is 5.
+
+        Returns:
+            A coroutine resolving with CopyFactory portfolio strategies found.
+        """
+        return [item async for item in self.iter_portfolio_strategies(include_removed, page_size, concurrency)]
+
     async def get_portfolio_strategy(self, portfolio_id: str) -> CopyFactoryPortfolioStrategy:
         """Retrieves a CopyFactory copy portfolio strategy by id. See
         https://metaapi.cloud/docs/copyfactory/restApi/api/configuration/getPortfolioStrategy/
@@ -212,30 +323,36 @@ class ConfigurationClient(MetaApiClient):
         convert_iso_time_to_date(strategy)
         return strategy
 
-    async def update_portfolio_strategy(self, portfolio_id: str, portfolio: CopyFactoryPortfolioStrategyUpdate):
+    async def update_portfolio_strategy(self, portfolio_id: str, portfolio: CopyFactoryPortfolioStrategyUpdate,
+                                        validate: bool = False):
         """Updates a CopyFactory portfolio strategy. See
         https://metaapi.cloud/docs/copyfactory/restApi/api/configuration/updatePortfolioStrategy/
 
         Args:
             portfolio_id: Copy trading portfolio strategy id.
             portfolio: Portfolio strategy update.
+            validate: Whether to validate the update locally before sending it, raising ValidationException
+            without a request if it is invalid.
 
         Returns:
             A coroutine resolving when portfolio strategy is updated.
         """
         if self._is_not_jwt_token():
             return self._handle_no_access_exception('update_portfolio_strategy')
-        payload = deepcopy(portfolio)
-        format_request(payload)
+        if validate:
+            self._validator.validate_portfolio_strategy(portfolio)
         opts = {
             'url': f"/users/current/configuration/portfolio-strategies/{portfolio_id}",
             'method': 'PUT',
             'headers': {
                 'auth-token': self._token
             },
-            'body': payload
+            'body': portfolio
         }
-        return await self._domainClient.request_copyfactory(opts)
+        result = await self._domainClient.request_copyfactory(opts)
+        await self._notify_change({'type': 'portfolioStrategy', 'action': 'update', 'id': portfolio_id,
+                                  'payload': portfolio})
+        return result
 
     async def remove_portfolio_strategy(self, portfolio_id: str,
                                         close_instructions: CopyFactoryCloseInstructions = None):
@@ -259,9 +376,11 @@ class ConfigurationClient(MetaApiClient):
             }
         }
         if close_instructions is not None:
-            format_request(close_instructions)
             opts['body'] = close_instructions
-        return await self._domainClient.request_copyfactory(opts)
+        result = await self._domainClient.request_copyfactory(opts)
+        await self._notify_change({'type': 'portfolioStrategy', 'action': 'remove', 'id': portfolio_id,
+                                  'payload': close_instructions})
+        return result
 
     async def remove_portfolio_strategy_member(self, portfolio_id: str, strategy_id: str,
                                                close_instructions: CopyFactoryCloseInstructions = None):
@@ -287,9 +406,11 @@ class ConfigurationClient(MetaApiClient):
             }
         }
         if close_instructions is not None:
-            format_request(close_instructions)
             opts['body'] = close_instructions
-        return await self._domainClient.request_copyfactory(opts)
+        result = await self._domainClient.request_copyfactory(opts)
+        await self._notify_change({'type': 'portfolioStrategyMember', 'action': 'remove', 'id': portfolio_id,
+                                  'strategyId': strategy_id, 'payload': close_instructions})
+        return result
 
     async def get_subscribers(self, include_removed: bool = None, limit: int = None,
                               offset: int = None) -> 'List[CopyFactorySubscriber]':
@@ -325,6 +446,36 @@ class ConfigurationClient(MetaApiClient):
         convert_iso_time_to_date(result)
         return result
 
+    async def iter_subscribers(self, include_removed: bool = None, page_size: int = 1000,
+                               concurrency: int = 5) -> AsyncIterator[CopyFactorySubscriber]:
+        """Iterates over all CopyFactory subscribers, requesting pages following the first one concurrently.
+        Results are streamed in the order returned by the API.
+
+        Args:
+            include_removed: Flag instructing to include removed subscribers in results.
+            page_size: Amount of CopyFactory subscribers requested per page. Default is 1000.
+            concurrency: Maximum amount of pages requested concurrently. Default is 5.
+
+        Returns:
+            An asynchronous iterator over CopyFactory subscribers found.
+        """
+        async for item in self._iter_pages(self.get_subscribers, include_removed, page_size, concurrency):
+            yield item
+
+    async def fetch_all_subscribers(self, include_removed: bool = None, page_size: int = 1000,
+                                    concurrency: int = 5) -> 'List[CopyFactorySubscriber]':
+        """Retrieves all CopyFactory subscribers, requesting pages following the first one concurrently.
+
+        Args:
+            include_removed: Flag instructing to include removed subscribers in results.
+            page_size: Amount of CopyFactory subscribers requested per page. Default is 1000.
+            concurrency: Maximum amount of pages requested concurrently. Default is 5.
+
+        Returns:
+            A coroutine resolving with CopyFactory subscribers found.
+        """
+        return [item async for item in self.iter_subscribers(include_removed, page_size, concurrency)]
+
     async def get_subscriber(self, subscriber_id: str) -> CopyFactorySubscriber:
         """Returns CopyFactory subscriber by id. See
         https://metaapi.cloud/docs/copyfactory/restApi/api/configuration/getSubscriber/
@@ -348,30 +499,36 @@ class ConfigurationClient(MetaApiClient):
         convert_iso_time_to_date(subscriber)
         return subscriber
 
-    async def update_subscriber(self, subscriber_id: str, subscriber: CopyFactorySubscriberUpdate):
+    async def update_subscriber(self, subscriber_id: str, subscriber: CopyFactorySubscriberUpdate,
+                                validate: bool = False):
         """Updates CopyFactory subscriber configuration. See
         https://metaapi.cloud/docs/copyfactory/restApi/api/configuration/updateSubscriber/
 
         Args:
             subscriber_id: Subscriber id.
             subscriber: Subscriber update.
+            validate: Whether to validate the update locally before sending it, raising ValidationException
+            without a request if it is invalid.
 
         Returns:
             A coroutine resolving when subscriber configuration is updated.
         """
         if self._is_not_jwt_token():
             return self._handle_no_access_exception('update_subscriber')
-        payload = deepcopy(subscriber)
-        format_request(payload)
+        if validate:
+            self._validator.validate_subscriber(subscriber)
         opts = {
             'url': f"/users/current/configuration/subscribers/{subscriber_id}",
             'method': 'PUT',
             'headers': {
                 'auth-token': self._token
             },
-            'body': payload
+            'body': subscriber
         }
-        return await self._domainClient.request_copyfactory(opts)
+        result = await self._domainClient.request_copyfactory(opts)
+        await self._notify_change({'type': 'subscriber', 'action': 'update', 'id': subscriber_id,
+                                  'payload': subscriber})
+        return result
 
     async def remove_subscriber(self, subscriber_id: str, close_instructions: CopyFactoryCloseInstructions = None):
         """Deletes subscriber configuration. See
@@ -394,9 +551,11 @@ class ConfigurationClient(MetaApiClient):
             }
         }
         if close_instructions is not None:
-            format_request(close_instructions)
             opts['body'] = close_instructions
-        return await self._domainClient.request_copyfactory(opts)
+        result = await self._domainClient.request_copyfactory(opts)
+        await self._notify_change({'type': 'subscriber', 'action': 'remove', 'id': subscriber_id,
+                                  'payload': close_instructions})
+        return result
 
     async def remove_subscription(self, subscriber_id: str, strategy_id: str,
                                   close_instructions: CopyFactoryCloseInstructions = None):
@@ -421,6 +580,132 @@ class ConfigurationClient(MetaApiClient):
             }
         }
         if close_instructions is not None:
-            format_request(close_instructions)
             opts['body'] = close_instructions
-        return await self._domainClient.request_copyfactory(opts)
+        result = await self._domainClient.request_copyfactory(opts)
+        await self._notify_change({'type': 'subscription', 'action': 'remove', 'id': subscriber_id,
+                                  'strategyId': strategy_id, 'payload': close_instructions})
+        return result
+
+    async def execute_mutations(self, mutations: List[CopyFactoryConfigurationMutation],
+                                opts: ConfigurationMutationOpts = None) -> BatchResult:
+        """Executes many configuration updates and removals with bounded concurrency. Failed mutations are retried
+        if the error is transient, and failures of single mutations are collected in the result and do not stop the
+        batch. Mutations are idempotent, so failed mutations of a result can be executed again safely.
+
+        Args:
+            mutations: Configuration mutations.
+            opts: Mutation options. By default 10 mutations are executed concurrently and transient errors are
+            retried 2 times.
+
+        Returns:
+            A coroutine which resolves with batch result containing throughput and latency summary.
+        """
+        if self._is_not_jwt_token():
+            return self._handle_no_access_exception('execute_mutations')
+        opts: ConfigurationMutationOpts = {'concurrency': 10, 'retries': 2, **(opts or {})}
+        validate = opts.get('validate') or False
+        methods = {
+            ('strategy', 'update'): lambda m: self.update_strategy(m['id'], m['payload'], validate),
+            ('strategy', 'remove'): lambda m: self.remove_strategy(m['id'], m.get('payload')),
+            ('portfolioStrategy', 'update'): lambda m: self.update_portfolio_strategy(m['id'], m['payload'],
+                                                                                      validate),
+            ('portfolioStrategy', 'remove'): lambda m: self.remove_portfolio_strategy(m['id'], m.get('payload')),
+            ('portfolioStrategyMember', 'remove'): lambda m: self.remove_portfolio_strategy_member(
+                m['id'], m['strategyId'], m.get('payload')),
+            ('subscriber', 'update'): lambda m: self.update_subscriber(m['id'], m['payload'], validate),
+            ('subscriber', 'remove'): lambda m: self.remove_subscriber(m['id'], m.get('payload')),
+            ('subscription', 'remove'): lambda m: self.remove_subscription(m['id'], m['strategyId'],
+                                                                           m.get('payload'))
+        }
+
+        async def execute(mutation: CopyFactoryConfigurationMutation):
+            method = methods.get((mutation['type'], mutation['action']))
+            if method is None:
+                raise ValidationException('Validation failed', [{
+                    'parameter': 'action', 'value': mutation['action'],
+                    'message': f'{mutation["action"]} action is not supported for {mutation["type"]} mutations'}])
+            return await method(mutation)
+
+        def mutation_key(mutation: CopyFactoryConfigurationMutation) -> str:
+            payload = _json_encoder.encode(mutation.get('payload'))
+            return '/'.join([mutation['type'], mutation['action'], mutation['id'], mutation.get('strategyId') or '',
+                             hashlib.sha1(payload.encode()).hexdigest()])
+
+        def is_transient(err: Exception) -> bool:
+            return err.__class__.__name__ in ['ApiException', 'ConflictException', 'InternalException',
+                                              'TooManyRequestsException', 'TimeoutException', 'ConnectTimeout']
+
+        return await BatchExecutor(opts).execute(mutations, execute, mutation_key, is_transient)
+
+    async def retry_failed_mutations(self, result: BatchResult, opts: ConfigurationMutationOpts = None) \
+            -> BatchResult:
+        """Executes failed mutations of a bulk configuration mutation result again.
+
+        Args:
+            result: Result of a previous execute_mutations call.
+            opts: Mutation options.
+
+        Returns:
+            A coroutine which resolves with batch result of the mutations retried.
+        """
+        return await self.execute_mutations([item['item'] for item in result['failed']], opts)
+
+    async def _get_collection_conditional(self, method_name: str, collection: str, include_removed: bool = None,
+                                          limit: int = None, offset: int = None, etag: str = None,
+                                          last_modified: str = None) -> ConditionalResponse:
+        if self._is_not_jwt_token():
+            return self._handle_no_access_exception(method_name)
+        qs = {}
+        if include_removed is not None:
+            qs['includeRemoved'] = include_removed
+        if limit is not None:
+            qs['limit'] = limit
+        if offset is not None:
+            qs['offset'] = offset
+        headers = {
+            'auth-token': self._token
+        }
+        if etag:
+            headers['if-none-match'] = etag
+        if last_modified:
+            headers['if-modified-since'] = last_modified
+        opts = {
+            'url': f"/users/current/configuration/{collection}",
+            'method': 'GET',
+            'headers': headers,
+            'params': qs
+        }
+        response = await self._domainClient.request_copyfactory(opts, True, True)
+        if response['body'] is not None:
+            convert_iso_time_to_date(response['body'])
+        return response
+
+    async def _iter_pages(self, get_page: Callable[..., Awaitable[list]], include_removed: bool, page_size: int,
+                          concurrency: int):
+        # the API does not report collection size, so once the first page turns out to be full, the following pages
+        # are requested ahead in a sliding window until a page which is not full is received
+        page = await get_page(include_removed, page_size, 0)
+        for item in page:
+            yield item
+        offset = page_size
+        tasks = deque()
+        try:
+            while len(page) == page_size:
+                while len(tasks) < concurrency:
+                    tasks.append(asyncio.create_task(get_page(include_removed, page_size, offset)))
+                    offset += page_size
+                page = await tasks.popleft()
+                for item in page:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _notify_change(self, change: ConfigurationChange):
+        for listener_id, listener in list(self._changeListeners.items()):
+            try:
+                await listener.on_configuration_change(change)
+            except Exception as err:
+                self._logger.error(f'Failed to notify configuration change listener {listener_id}', err)
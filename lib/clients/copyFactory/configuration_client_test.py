@@ -1,6 +1,8 @@
 from .configuration_client import ConfigurationClient
-from ...models import date, format_date
+from ..errorHandler import ValidationException, InternalException, NotFoundException
+from ...models import date
 import pytest
+import asyncio
 import json
 import respx
 from copy import deepcopy
@@ -172,8 +174,6 @@ class TestConfigurationClient:
                 'openingIntervalInMinutes': 5
             }
         }
-        json_copy = deepcopy(strategy)
-        json_copy['riskLimits'][0]['startTime'] = format_date(json_copy['riskLimits'][0]['startTime'])
         await copy_factory_client.update_strategy('ABCD', strategy)
         domain_client.request_copyfactory.assert_called_with({
             'url': '/users/current/configuration/strategies/ABCD',
@@ -181,7 +181,7 @@ class TestConfigurationClient:
             'headers': {
                 'auth-token': token
             },
-            'body': json_copy
+            'body': strategy
         })
 
     @pytest.mark.asyncio
@@ -570,3 +570,131 @@ class TestConfigurationClient:
             assert err.__str__() == 'You can not invoke remove_subscription method, because you have connected ' \
                                     'with account access token. Please use API access token from ' \
                                     'https://app.metaapi.cloud/token page to invoke this method.'
+
+    @pytest.mark.asyncio
+    async def test_notify_change_listeners(self):
+        """Should notify change listeners about successful updates and removals."""
+        listener = MagicMock()
+        listener.on_configuration_change = AsyncMock()
+        listener_id = copy_factory_client.add_change_listener(listener)
+        await copy_factory_client.update_subscriber('subscriberId', {'name': 'Demo account', 'subscriptions': []})
+        await copy_factory_client.remove_subscription('subscriberId', 'ABCD')
+        listener.on_configuration_change.assert_any_call({
+            'type': 'subscriber', 'action': 'update', 'id': 'subscriberId',
+            'payload': {'name': 'Demo account', 'subscriptions': []}})
+        listener.on_configuration_change.assert_any_call({
+            'type': 'subscription', 'action': 'remove', 'id': 'subscriberId', 'strategyId': 'ABCD', 'payload': None})
+        domain_client.request_copyfactory = AsyncMock(side_effect=Exception('test'))
+        with pytest.raises(Exception):
+            await copy_factory_client.remove_strategy('ABCD')
+        copy_factory_client.remove_change_listener(listener_id)
+        domain_client.request_copyfactory = AsyncMock()
+        await copy_factory_client.remove_strategy('ABCD')
+        assert listener.on_configuration_change.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_retrieve_collection_conditionally(self):
+        """Should send conditional collection request."""
+        domain_client.request_copyfactory = AsyncMock(return_value={
+            'status': 304, 'body': None, 'etag': '"v1"', 'lastModified': None})
+        response = await copy_factory_client._get_collection_conditional('get_strategies', 'strategies', True, 10,
+                                                                         0, '"v1"')
+        assert response['status'] == 304
+        domain_client.request_copyfactory.assert_called_with({
+            'url': '/users/current/configuration/strategies',
+            'method': 'GET',
+            'headers': {
+                'auth-token': token,
+                'if-none-match': '"v1"'
+            },
+            'params': {
+                'includeRemoved': True,
+                'limit': 10,
+                'offset': 0
+            }
+        }, True, True)
+
+    @pytest.mark.asyncio
+    async def test_iterate_over_all_strategies(self):
+        """Should request pages concurrently and stream strategies in order."""
+        pages = [[{'_id': 'A'}, {'_id': 'B'}], [{'_id': 'C'}, {'_id': 'D'}], [{'_id': 'E'}], [], []]
+
+        async def get_page(opts, is_extended_timeout=False):
+            await asyncio.sleep(0.01 * (3 - opts['params']['offset'] // 2))
+            return deepcopy(pages[opts['params']['offset'] // 2])
+
+        domain_client.request_copyfactory = AsyncMock(side_effect=get_page)
+        strategies = [strategy['_id'] async for strategy in copy_factory_client.iter_strategies(True, 2, 3)]
+        assert strategies == ['A', 'B', 'C', 'D', 'E']
+        assert domain_client.request_copyfactory.call_count == 4
+        domain_client.request_copyfactory.assert_any_call({
+            'url': '/users/current/configuration/strategies',
+            'method': 'GET',
+            'headers': {
+                'auth-token': token
+            },
+            'params': {
+                'includeRemoved': True,
+                'limit': 2,
+                'offset': 6
+            }
+        }, True)
+
+    @pytest.mark.asyncio
+    async def test_fetch_all_subscribers(self):
+        """Should retrieve all subscribers."""
+        domain_client.request_copyfactory = AsyncMock(side_effect=[[{'_id': 'A'}], [{'_id': 'B'}], []])
+        subscribers = await copy_factory_client.fetch_all_subscribers(page_size=1, concurrency=1)
+        assert subscribers == [{'_id': 'A'}, {'_id': 'B'}]
+        assert domain_client.request_copyfactory.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_validate_update_locally(self):
+        """Should validate updates locally if requested."""
+        domain_client.request_copyfactory = AsyncMock()
+        with pytest.raises(ValidationException) as error:
+            await copy_factory_client.update_subscriber('subscriberId', {'subscriptions': [{'strategyId': 'ABCD',
+                                                                                            'multiplier': -1}]},
+                                                        validate=True)
+        assert [detail['parameter'] for detail in error.value.details] == ['name', 'subscriptions[0].multiplier']
+        with pytest.raises(ValidationException):
+            await copy_factory_client.update_strategy('ABCD', {'name': 'Test strategy'}, validate=True)
+        with pytest.raises(ValidationException):
+            await copy_factory_client.update_portfolio_strategy('ABCD', {'name': 'Test', 'description': 'Test',
+                                                                         'members': [{}]}, validate=True)
+        domain_client.request_copyfactory.assert_not_called()
+        await copy_factory_client.update_subscriber('subscriberId', {'name': 'Demo account', 'subscriptions': []},
+                                                    validate=True)
+        domain_client.request_copyfactory.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_execute_mutations(self):
+        """Should execute mutations, retrying transient errors and collecting failures."""
+        calls = []
+
+        async def request(opts, is_extended_timeout=False):
+            calls.append((opts['method'], opts['url']))
+            if opts['url'].endswith('subscriber1') and calls.count(('PUT', opts['url'])) == 1:
+                raise InternalException('test')
+            if opts['url'].endswith('subscriber2'):
+                raise NotFoundException('test')
+
+        domain_client.request_copyfactory = AsyncMock(side_effect=request)
+        result = await copy_factory_client.execute_mutations([
+            {'type': 'subscriber', 'action': 'update', 'id': 'subscriber1',
+             'payload': {'name': 'Demo account', 'subscriptions': []}},
+            {'type': 'subscriber', 'action': 'update', 'id': 'subscriber2',
+             'payload': {'name': 'Demo account', 'subscriptions': []}},
+            {'type': 'subscription', 'action': 'remove', 'id': 'subscriber3', 'strategyId': 'ABCD'},
+            {'type': 'subscription', 'action': 'update', 'id': 'subscriber3', 'strategyId': 'ABCD'}
+        ], {'retryDelayInSeconds': 0.001})
+        assert [item['success'] for item in result['results']] == [True, False, True, False]
+        assert [item['attempts'] for item in result['results']] == [2, 1, 1, 1]
+        assert ('DELETE', '/users/current/configuration/subscribers/subscriber3/subscriptions/ABCD') in calls
+        assert result['failed'][1]['error'].details[0]['message'] == \
+            'update action is not supported for subscription mutations'
+        assert result['summary']['executed'] == 4
+        domain_client.request_copyfactory = AsyncMock()
+        result = await copy_factory_client.retry_failed_mutations(result)
+        assert [item['item']['id'] for item in result['results']] == ['subscriber2', 'subscriber3']
+        assert domain_client.request_copyfactory.call_count == 1
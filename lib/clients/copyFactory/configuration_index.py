@@ -0,0 +1,209 @@
+from .configuration_change_listener import ConfigurationChangeListener, ConfigurationChange
+from .copyFactory_models import CopyFactorySubscriber, CopyFactoryPortfolioStrategy, \
+    CopyFactoryStrategySubscription, CopyFactoryPortfolioStrategyMember
+from typing import List, Dict, Set, Optional
+
+
+class ConfigurationIndex(ConfigurationChangeListener):
+    """In-memory index of relationships between strategies, portfolio strategies and subscribers. The index is built
+    from configuration snapshots and is kept up to date with changes made via the configuration client it is attached
+    to. Relationships are stored as maps of multipliers, so that direct lookups in both directions take constant
+    time. Subscriptions scheduled for removal are not indexed."""
+
+    def __init__(self, configuration_client=None):
+        """Inits configuration index instance.
+
+        Args:
+            configuration_client: CopyFactory configuration API client to load snapshots from and listen to
+            configuration changes of.
+        """
+        self._configurationClient = configuration_client
+        self._listenerId = configuration_client.add_change_listener(self) if configuration_client else None
+        self._subscriptions: Dict[str, Dict[str, float]] = {}
+        self._subscribers: Dict[str, Dict[str, float]] = {}
+        self._members: Dict[str, Dict[str, float]] = {}
+        self._portfolios: Dict[str, Dict[str, float]] = {}
+
+    async def refresh(self):
+        """Rebuilds the index from a configuration snapshot retrieved via the configuration client.
+
+        Returns:
+            A coroutine resolving when the index is rebuilt.
+        """
+        self.load(await self._configurationClient.fetch_all_portfolio_strategies(),
+                  await self._configurationClient.fetch_all_subscribers())
+
+    def load(self, portfolio_strategies: List[CopyFactoryPortfolioStrategy],
+             subscribers: List[CopyFactorySubscriber]):
+        """Rebuilds the index from a configuration snapshot.
+
+        Args:
+            portfolio_strategies: Portfolio strategies.
+            subscribers: Subscribers.
+        """
+        self._subscriptions = {}
+        self._subscribers = {}
+        self._members = {}
+        self._portfolios = {}
+        for portfolio in portfolio_strategies:
+            self._set_members(portfolio['_id'], portfolio.get('members') or [])
+        for subscriber in subscribers:
+            self._set_subscriptions(subscriber['_id'], subscriber.get('subscriptions') or [])
+
+    def close(self):
+        """Stops listening to configuration changes."""
+        if self._listenerId:
+            self._configurationClient.remove_change_listener(self._listenerId)
+            self._listenerId = None
+
+    def get_strategy_subscribers(self, strategy_id: str) -> Dict[str, float]:
+        """Returns subscribers subscribed to a strategy or portfolio strategy directly.
+
+        Args:
+            strategy_id: Strategy or portfolio strategy id.
+
+        Returns:
+            Subscription multipliers by subscriber id.
+        """
+        return dict(self._subscribers.get(strategy_id, {}))
+
+    def get_subscriber_strategies(self, subscriber_id: str) -> Dict[str, float]:
+        """Returns strategies and portfolio strategies a subscriber is subscribed to directly.
+
+        Args:
+            subscriber_id: Subscriber id.
+
+        Returns:
+            Subscription multipliers by strategy or portfolio strategy id.
+        """
+        return dict(self._subscriptions.get(subscriber_id, {}))
+
+    def get_portfolio_members(self, portfolio_id: str) -> Dict[str, float]:
+        """Returns members of a portfolio strategy.
+
+        Args:
+            portfolio_id: Portfolio strategy id.
+
+        Returns:
+            Member multipliers by strategy id.
+        """
+        return dict(self._members.get(portfolio_id, {}))
+
+    def get_strategy_portfolios(self, strategy_id: str) -> Dict[str, float]:
+        """Returns portfolio strategies a strategy is a member of.
+
+        Args:
+            strategy_id: Strategy id.
+
+        Returns:
+            Member multipliers by portfolio strategy id.
+        """
+        return dict(self._portfolios.get(strategy_id, {}))
+
+    def get_strategy_exposure(self, strategy_id: str) -> Dict[str, float]:
+        """Returns subscribers exposed to a strategy directly or through portfolio strategies. Multipliers of
+        subscriptions and portfolio members on the path from a subscriber to the strategy are multiplied, and
+        multipliers of different paths are summed up.
+
+        Args:
+            strategy_id: Strategy id.
+
+        Returns:
+            Effective multipliers by subscriber id.
+        """
+        exposure = {}
+        self._add_strategy_exposure(strategy_id, 1, exposure, set())
+        return exposure
+
+    def get_subscriber_exposure(self, subscriber_id: str) -> Dict[str, float]:
+        """Returns strategies a subscriber is exposed to directly or through portfolio strategies. Portfolio
+        strategies are expanded into their members, and multipliers are applied in the same way as in
+        get_strategy_exposure.
+
+        Args:
+            subscriber_id: Subscriber id.
+
+        Returns:
+            Effective multipliers by strategy id.
+        """
+        exposure = {}
+        for strategy_id, multiplier in self._subscriptions.get(subscriber_id, {}).items():
+            self._add_subscriber_exposure(strategy_id, multiplier, exposure, set())
+        return exposure
+
+    async def on_configuration_change(self, change: ConfigurationChange):
+        if change['type'] == 'subscriber':
+            if change['action'] == 'update':
+                self._set_subscriptions(change['id'], (change.get('payload') or {}).get('subscriptions') or [])
+            else:
+                self._set_subscriptions(change['id'], [])
+        elif change['type'] == 'subscription':
+            self._remove_edge(self._subscriptions, self._subscribers, change['id'], change['strategyId'])
+        elif change['type'] == 'portfolioStrategy':
+            if change['action'] == 'update':
+                self._set_members(change['id'], (change.get('payload') or {}).get('members') or [])
+            else:
+                self._remove_strategy(change['id'])
+        elif change['type'] == 'portfolioStrategyMember':
+            self._remove_edge(self._members, self._portfolios, change['id'], change['strategyId'])
+        elif change['type'] == 'strategy' and change['action'] == 'remove':
+            self._remove_strategy(change['id'])
+
+    def _add_strategy_exposure(self, strategy_id: str, multiplier: float, exposure: Dict[str, float],
+                               path: Set[str]):
+        # path guards against cycles of nested portfolio strategies
+        if strategy_id in path:
+            return
+        path.add(strategy_id)
+        for subscriber_id, subscription_multiplier in self._subscribers.get(strategy_id, {}).items():
+            exposure[subscriber_id] = exposure.get(subscriber_id, 0) + multiplier * subscription_multiplier
+        for portfolio_id, member_multiplier in self._portfolios.get(strategy_id, {}).items():
+            self._add_strategy_exposure(portfolio_id, multiplier * member_multiplier, exposure, path)
+        path.remove(strategy_id)
+
+    def _add_subscriber_exposure(self, strategy_id: str, multiplier: float, exposure: Dict[str, float],
+                                 path: Set[str]):
+        if strategy_id in path:
+            return
+        members = self._members.get(strategy_id)
+        if not members:
+            exposure[strategy_id] = exposure.get(strategy_id, 0) + multiplier
+            return
+        path.add(strategy_id)
+        for member_id, member_multiplier in members.items():
+            self._add_subscriber_exposure(member_id, multiplier * member_multiplier, exposure, path)
+        path.remove(strategy_id)
+
+    def _set_subscriptions(self, subscriber_id: str, subscriptions: List[CopyFactoryStrategySubscription]):
+        self._replace_edges(self._subscriptions, self._subscribers, subscriber_id,
+                            [subscription for subscription in subscriptions if not subscription.get('removed')])
+
+    def _set_members(self, portfolio_id: str, members: List[CopyFactoryPortfolioStrategyMember]):
+        self._replace_edges(self._members, self._portfolios, portfolio_id, members)
+
+    def _remove_strategy(self, strategy_id: str):
+        self._replace_edges(self._members, self._portfolios, strategy_id, [])
+        for subscriber_id in list(self._subscribers.get(strategy_id, {})):
+            self._remove_edge(self._subscriptions, self._subscribers, subscriber_id, strategy_id)
+        for portfolio_id in list(self._portfolios.get(strategy_id, {})):
+            self._remove_edge(self._members, self._portfolios, portfolio_id, strategy_id)
+
+    def _replace_edges(self, forward: Dict[str, Dict[str, float]], reverse: Dict[str, Dict[str, float]],
+                       source_id: str, targets: List[dict]):
+        for target_id in list(forward.get(source_id, {})):
+            self._remove_edge(forward, reverse, source_id, target_id)
+        for target in targets:
+            multiplier = target.get('multiplier')
+            multiplier = 1 if multiplier is None else multiplier
+            forward.setdefault(source_id, {})[target['strategyId']] = multiplier
+            reverse.setdefault(target['strategyId'], {})[source_id] = multiplier
+
+    @staticmethod
+    def _remove_edge(forward: Dict[str, Dict[str, float]], reverse: Dict[str, Dict[str, float]], source_id: str,
+                     target_id: Optional[str]):
+        for index, key, value in [(forward, source_id, target_id), (reverse, target_id, source_id)]:
+            edges = index.get(key)
+            if edges is not None:
+                edges.pop(value, None)
+                if not edges:
+                    del index[key]
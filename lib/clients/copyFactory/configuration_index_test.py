@@ -0,0 +1,72 @@
+from .configuration_index import ConfigurationIndex
+from mock import MagicMock, AsyncMock
+import pytest
+
+configuration_client = MagicMock()
+index = ConfigurationIndex()
+portfolios = [
+    {'_id': 'portfolio', 'members': [{'strategyId': 'ABCD', 'multiplier': 0.5}, {'strategyId': 'EFGH',
+                                                                                 'multiplier': 2}]}
+]
+subscribers = [
+    {'_id': 'subscriber1', 'subscriptions': [{'strategyId': 'ABCD', 'multiplier': 2}, {'strategyId': 'portfolio'}]},
+    {'_id': 'subscriber2', 'subscriptions': [{'strategyId': 'portfolio', 'multiplier': 3},
+                                             {'strategyId': 'IJKL', 'removed': True}]}
+]
+
+
+@pytest.fixture(autouse=True)
+async def run_around_tests():
+    global configuration_client
+    configuration_client = MagicMock()
+    configuration_client.add_change_listener = MagicMock(return_value='listenerId')
+    configuration_client.fetch_all_portfolio_strategies = AsyncMock(return_value=portfolios)
+    configuration_client.fetch_all_subscribers = AsyncMock(return_value=subscribers)
+    global index
+    index = ConfigurationIndex(configuration_client)
+    await index.refresh()
+
+
+class TestConfigurationIndex:
+    @pytest.mark.asyncio
+    async def test_lookup_relationships(self):
+        """Should look up relationships in both directions."""
+        assert index.get_strategy_subscribers('portfolio') == {'subscriber1': 1, 'subscriber2': 3}
+        assert index.get_strategy_subscribers('IJKL') == {}
+        assert index.get_subscriber_strategies('subscriber1') == {'ABCD': 2, 'portfolio': 1}
+        assert index.get_portfolio_members('portfolio') == {'ABCD': 0.5, 'EFGH': 2}
+        assert index.get_strategy_portfolios('EFGH') == {'portfolio': 2}
+
+    @pytest.mark.asyncio
+    async def test_compute_exposure(self):
+        """Should compute transitive exposure with multipliers applied."""
+        assert index.get_strategy_exposure('ABCD') == {'subscriber1': 2.5, 'subscriber2': 1.5}
+        assert index.get_strategy_exposure('EFGH') == {'subscriber1': 2, 'subscriber2': 6}
+        assert index.get_subscriber_exposure('subscriber1') == {'ABCD': 2.5, 'EFGH': 2}
+
+    @pytest.mark.asyncio
+    async def test_update_on_configuration_changes(self):
+        """Should update the index on configuration changes."""
+        await index.on_configuration_change({'type': 'subscription', 'action': 'remove', 'id': 'subscriber1',
+                                             'strategyId': 'ABCD'})
+        assert index.get_strategy_exposure('ABCD') == {'subscriber1': 0.5, 'subscriber2': 1.5}
+        await index.on_configuration_change({'type': 'portfolioStrategyMember', 'action': 'remove',
+                                             'id': 'portfolio', 'strategyId': 'ABCD'})
+        assert index.get_strategy_exposure('ABCD') == {}
+        await index.on_configuration_change({'type': 'subscriber', 'action': 'update', 'id': 'subscriber3',
+                                             'payload': {'name': 'Test', 'subscriptions': [{'strategyId': 'EFGH'}]}})
+        assert index.get_strategy_exposure('EFGH') == {'subscriber1': 2, 'subscriber2': 6, 'subscriber3': 1}
+        await index.on_configuration_change({'type': 'portfolioStrategy', 'action': 'remove', 'id': 'portfolio'})
+        assert index.get_strategy_exposure('EFGH') == {'subscriber3': 1}
+        assert index.get_subscriber_strategies('subscriber2') == {}
+        await index.on_configuration_change({'type': 'subscriber', 'action': 'remove', 'id': 'subscriber3'})
+        assert index.get_strategy_subscribers('EFGH') == {}
+
+    @pytest.mark.asyncio
+    async def test_ignore_portfolio_cycles(self):
+        """Should not loop on cycles of nested portfolio strategies."""
+        index.load([{'_id': 'A', 'members': [{'strategyId': 'B', 'multiplier': 1}]},
+                    {'_id': 'B', 'members': [{'strategyId': 'A', 'multiplier': 1}]}],
+                   [{'_id': 'subscriber', 'subscriptions': [{'strategyId': 'A'}]}])
+        assert index.get_strategy_exposure('B') == {'subscriber': 1}
+        assert index.get_subscriber_exposure('subscriber') == {}
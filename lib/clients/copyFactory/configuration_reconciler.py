@@ -0,0 +1,190 @@
+from .copyFactory_models import CopyFactoryStrategyUpdate, CopyFactorySubscriberUpdate
+from ..batchExecutor import BatchExecutor, BatchOpts, BatchResult
+from ...models import date, format_date
+from typing_extensions import TypedDict, Literal
+from typing import List, Dict, Optional, Any
+from datetime import datetime
+import hashlib
+import json
+
+_server_fields = ['_id', 'platformCommissionRate', 'closeOnRemovalMode', 'removed']
+_date_fields = ['closeAfter', 'stoppedAt', 'stoppedTill', 'startTime', 'time', 'updateTime']
+_missing = object()
+
+
+class ConfigurationDesiredState(TypedDict, total=False):
+    """Desired CopyFactory configuration."""
+    strategies: Optional[Dict[str, CopyFactoryStrategyUpdate]]
+    """Desired strategies by strategy id."""
+    subscribers: Optional[Dict[str, CopyFactorySubscriberUpdate]]
+    """Desired subscribers by subscriber id."""
+
+
+class ConfigurationFieldChange(TypedDict):
+    """Change of a configuration field."""
+    path: str
+    """Field path, e.g. subscriptions[ABCD].multiplier."""
+    current: Any
+    """Current field value, None if the field is absent."""
+    desired: Any
+    """Desired field value, None if the field is to be removed."""
+
+
+class ConfigurationPlanItem(TypedDict, total=False):
+    """Configuration object change planned."""
+    type: Literal['strategy', 'subscriber']
+    """Configuration object type."""
+    id: str
+    """Strategy or subscriber id."""
+    action: Literal['create', 'update', 'remove']
+    """Action to perform."""
+    changes: List[ConfigurationFieldChange]
+    """Field changes, for update actions."""
+    desired: Optional[Any]
+    """Desired strategy or subscriber, for create and update actions."""
+
+
+class ConfigurationPlan(TypedDict):
+    """Plan of configuration changes needed to reach a desired configuration."""
+    items: List[ConfigurationPlanItem]
+    """Configuration object changes planned."""
+    unchanged: int
+    """Amount of configuration objects which already match the desired configuration."""
+
+
+class ConfigurationReconciler:
+    """Brings CopyFactory strategies and subscribers to a desired configuration. The current configuration is
+    retrieved with concurrent page requests and compared to the desired one, so that only changed objects are
+    updated."""
+
+    def __init__(self, configuration_client, page_size: int = 1000):
+        """Inits configuration reconciler instance.
+
+        Args:
+            configuration_client: CopyFactory configuration API client.
+            page_size: Amount of objects retrieved per request, default value is 1000.
+        """
+        self._configurationClient = configuration_client
+        self._pageSize = page_size
+
+    async def plan(self, desired: ConfigurationDesiredState, remove_unmanaged: bool = False) -> ConfigurationPlan:
+        """Computes changes needed to reach a desired configuration. Only collections present in the desired
+        configuration are compared.
+
+        Args:
+            desired: Desired configuration.
+            remove_unmanaged: Whether to plan removal of existing objects absent in the desired configuration of
+            their collection.
+
+        Returns:
+            A coroutine resolving with configuration plan.
+        """
+        items = []
+        unchanged = 0
+        for type, collection, method_name in [('strategy', 'strategies', 'fetch_all_strategies'),
+                                              ('subscriber', 'subscribers', 'fetch_all_subscribers')]:
+            if desired.get(collection) is None:
+                continue
+            current = {item['_id']: item for item in
+                       await getattr(self._configurationClient, method_name)(page_size=self._pageSize)}
+            for id, document in desired[collection].items():
+                if id not in current:
+                    items.append({'type': type, 'id': id, 'action': 'create', 'desired': document})
+                    continue
+                changes = []
+                self._diff(self._normalize(current[id]), self._normalize(document), '', changes)
+                if changes:
+                    items.append({'type': type, 'id': id, 'action': 'update', 'changes': changes,
+                                  'desired': document})
+                else:
+                    unchanged += 1
+            if remove_unmanaged:
+                for id in current:
+                    if id not in desired[collection]:
+                        items.append({'type': type, 'id': id, 'action': 'remove'})
+        return {'items': items, 'unchanged': unchanged}
+
+    async def apply(self, plan: ConfigurationPlan, opts: BatchOpts = None, validate: bool = False) -> BatchResult:
+        """Applies a configuration plan with bounded concurrency. Strategies are created and updated before
+        subscribers, and subscribers are removed before strategies, so that subscriptions never refer to missing
+        strategies. Failures of single objects are collected in the result and do not stop the batch.
+
+        Args:
+            plan: Configuration plan.
+            opts: Batch options. By default 10 objects are changed concurrently.
+            validate: Whether to validate updates locally before sending them. Invalid updates are reported as
+            failed without a request.
+
+        Returns:
+            A coroutine which resolves with batch result.
+        """
+        executor = BatchExecutor(opts)
+        client = self._configurationClient
+        upserts = [item for item in plan['items'] if item['action'] != 'remove']
+        removals = [item for item in plan['items'] if item['action'] == 'remove']
+        phases = [
+            [item for item in upserts if item['type'] == 'strategy'],
+            [item for item in upserts if item['type'] == 'subscriber'],
+            [item for item in removals if item['type'] == 'subscriber'],
+            [item for item in removals if item['type'] == 'strategy']
+        ]
+
+        async def apply_item(item: ConfigurationPlanItem):
+            if item['action'] == 'remove':
+                if item['type'] == 'strategy':
+                    return await client.remove_strategy(item['id'])
+                return await client.remove_subscriber(item['id'])
+            if item['type'] == 'strategy':
+                return await client.update_strategy(item['id'], item['desired'], validate)
+            return await client.update_subscriber(item['id'], item['desired'], validate)
+
+        result = {'results': [], 'failed': [], 'skipped': []}
+        duration = 0
+        for items in phases:
+            if items:
+                phase_result = await executor.execute(items, apply_item, self._item_key)
+                for field in result:
+                    result[field] += phase_result[field]
+                duration += phase_result['summary']['durationInSeconds']
+        result['summary'] = BatchExecutor.summarize(result['results'], duration)
+        return result
+
+    @staticmethod
+    def _item_key(item: ConfigurationPlanItem) -> str:
+        # the desired document is part of the key, so that checkpoints of previous runs skip only identical changes
+        data = json.dumps(ConfigurationReconciler._normalize(item.get('desired')), sort_keys=True)
+        return '/'.join([item['type'], item['id'], item['action'], hashlib.sha1(data.encode()).hexdigest()])
+
+    @staticmethod
+    def _normalize(value, field: str = None):
+        if isinstance(value, dict):
+            return {key: ConfigurationReconciler._normalize(item, key) for key, item in value.items()
+                    if key not in _server_fields and item is not None}
+        if isinstance(value, list):
+            return [ConfigurationReconciler._normalize(item) for item in value]
+        if isinstance(value, datetime) or (isinstance(value, str) and field in _date_fields):
+            return format_date(date(value))
+        return value
+
+    @staticmethod
+    def _diff(current, desired, path: str, changes: List[ConfigurationFieldChange]):
+        if isinstance(current, dict) and isinstance(desired, dict):
+            for key in list(current.keys()) + [key for key in desired.keys() if key not in current]:
+                ConfigurationReconciler._diff(current.get(key, _missing), desired.get(key, _missing),
+                                              f'{path}.{key}' if path else key, changes)
+        elif ConfigurationReconciler._is_subscription_list(current) and \
+                ConfigurationReconciler._is_subscription_list(desired):
+            current_items = {item['strategyId']: item for item in current}
+            desired_items = {item['strategyId']: item for item in desired}
+            for strategy_id in list(current_items.keys()) + \
+                    [strategy_id for strategy_id in desired_items.keys() if strategy_id not in current_items]:
+                ConfigurationReconciler._diff(current_items.get(strategy_id, _missing),
+                                              desired_items.get(strategy_id, _missing), f'{path}[{strategy_id}]',
+                                              changes)
+        elif current != desired:
+            changes.append({'path': path, 'current': None if current is _missing else current,
+                            'desired': None if desired is _missing else desired})
+
+    @staticmethod
+    def _is_subscription_list(value) -> bool:
+        return isinstance(value, list) and all(isinstance(item, dict) and 'strategyId' in item for item in value)
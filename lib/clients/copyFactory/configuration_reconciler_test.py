@@ -0,0 +1,96 @@
+from .configuration_reconciler import ConfigurationReconciler
+from mock import MagicMock, AsyncMock
+from datetime import datetime
+import pytest
+import pytz
+
+configuration_client = MagicMock()
+reconciler = ConfigurationReconciler(configuration_client)
+strategy = {
+    '_id': 'ABCD',
+    'name': 'Test strategy',
+    'accountId': 'accountId',
+    'platformCommissionRate': 0.01,
+    'stopOutRisk': {'value': 0.4, 'startTime': datetime(2020, 8, 24, tzinfo=pytz.utc)}
+}
+subscriber = {
+    '_id': 'subscriberId',
+    'name': 'Demo account',
+    'subscriptions': [{'strategyId': 'ABCD', 'multiplier': 1}, {'strategyId': 'EFGH', 'multiplier': 2}]
+}
+
+
+@pytest.fixture(autouse=True)
+async def run_around_tests():
+    global configuration_client
+    configuration_client = MagicMock()
+    configuration_client.fetch_all_strategies = AsyncMock(return_value=[strategy])
+    configuration_client.fetch_all_subscribers = AsyncMock(return_value=[subscriber, {
+        '_id': 'unmanaged', 'name': 'Test', 'subscriptions': []}])
+    configuration_client.update_strategy = AsyncMock()
+    configuration_client.update_subscriber = AsyncMock()
+    configuration_client.remove_strategy = AsyncMock()
+    configuration_client.remove_subscriber = AsyncMock()
+    global reconciler
+    reconciler = ConfigurationReconciler(configuration_client, 1000)
+
+
+class TestConfigurationReconciler:
+    @pytest.mark.asyncio
+    async def test_plan_changes(self):
+        """Should plan only changed objects."""
+        plan = await reconciler.plan({
+            'strategies': {
+                'ABCD': {'name': 'Test strategy', 'accountId': 'accountId',
+                         'stopOutRisk': {'value': 0.4, 'startTime': '2020-08-24T00:00:00Z'}},
+                'IJKL': {'name': 'New strategy', 'accountId': 'accountId'}
+            },
+            'subscribers': {
+                'subscriberId': {'name': 'Demo account', 'subscriptions': [
+                    {'strategyId': 'EFGH', 'multiplier': 2}, {'strategyId': 'ABCD', 'multiplier': 1.5},
+                    {'strategyId': 'IJKL'}]}
+            }
+        }, True)
+        assert plan == {'unchanged': 1, 'items': [
+            {'type': 'strategy', 'id': 'IJKL', 'action': 'create',
+             'desired': {'name': 'New strategy', 'accountId': 'accountId'}},
+            {'type': 'subscriber', 'id': 'subscriberId', 'action': 'update', 'changes': [
+                {'path': 'subscriptions[ABCD].multiplier', 'current': 1, 'desired': 1.5},
+                {'path': 'subscriptions[IJKL]', 'current': None, 'desired': {'strategyId': 'IJKL'}}
+            ], 'desired': {'name': 'Demo account', 'subscriptions': [
+                {'strategyId': 'EFGH', 'multiplier': 2}, {'strategyId': 'ABCD', 'multiplier': 1.5},
+                {'strategyId': 'IJKL'}]}},
+            {'type': 'subscriber', 'id': 'unmanaged', 'action': 'remove'}
+        ]}
+        configuration_client.fetch_all_strategies.assert_called_once_with(page_size=1000)
+
+    @pytest.mark.asyncio
+    async def test_plan_requested_collections(self):
+        """Should compare only collections present in desired configuration."""
+        reconciler = ConfigurationReconciler(configuration_client, 100)
+        plan = await reconciler.plan({'subscribers': {}}, True)
+        assert plan['items'] == [{'type': 'subscriber', 'id': 'subscriberId', 'action': 'remove'},
+                                 {'type': 'subscriber', 'id': 'unmanaged', 'action': 'remove'}]
+        configuration_client.fetch_all_subscribers.assert_called_once_with(page_size=100)
+        configuration_client.fetch_all_strategies.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_apply_plan(self):
+        """Should apply plan in dependency order and collect failures."""
+        calls = []
+        configuration_client.update_strategy = AsyncMock(side_effect=lambda *args: calls.append('update_strategy'))
+        configuration_client.update_subscriber = AsyncMock(side_effect=Exception('test'))
+        configuration_client.remove_strategy = AsyncMock(side_effect=lambda *args: calls.append('remove_strategy'))
+        configuration_client.remove_subscriber = AsyncMock(
+            side_effect=lambda *args: calls.append('remove_subscriber'))
+        result = await reconciler.apply({'unchanged': 0, 'items': [
+            {'type': 'strategy', 'id': 'EFGH', 'action': 'remove'},
+            {'type': 'subscriber', 'id': 'subscriberId', 'action': 'update', 'changes': [],
+             'desired': {'name': 'Demo account', 'subscriptions': []}},
+            {'type': 'subscriber', 'id': 'unmanaged', 'action': 'remove'},
+            {'type': 'strategy', 'id': 'IJKL', 'action': 'create', 'desired': {'name': 'New strategy'}}
+        ]})
+        assert calls == ['update_strategy', 'remove_subscriber', 'remove_strategy']
+        configuration_client.update_strategy.assert_called_once_with('IJKL', {'name': 'New strategy'}, False)
+        assert len(result['results']) == 4
+        assert [item['item']['id'] for item in result['failed']] == ['subscriberId']
@@ -0,0 +1,239 @@
+from .copyFactory_models import CopyFactoryStrategyUpdate, CopyFactorySubscriberUpdate, \
+    CopyFactoryPortfolioStrategyUpdate, CopyFactoryCloseInstructions
+from ..errorHandler import ValidationException
+from ...models import ValidationDetails
+from typing_extensions import Literal, get_type_hints, get_origin, get_args
+from typing import List, Dict, Callable, Union, Any
+from datetime import datetime
+
+Check = Callable[[Any, str, List[ValidationDetails]], None]
+
+_close_modes = ['preserve', 'close-gracefully-by-position', 'close-gracefully-by-symbol', 'close-immediately']
+
+_optional_fields: Dict[str, List[str]] = {
+    'CopyFactoryStrategySymbolFilter': ['included', 'excluded'],
+    'CopyFactoryStrategyMagicFilter': ['included', 'excluded'],
+    'CopyFactoryStrategyCommissionScheme': ['billingPeriod', 'commissionRate'],
+    'CopyFactoryStrategyBreakingNewsFilter': ['priorities'],
+    'CopyFactoryStrategyCalendarNewsFilter': ['priorities'],
+    'CopyFactoryStrategyRiskLimit': ['closePositions'],
+    'StrategyTelegramPublishingSettings': ['template']
+}
+"""Fields which are not marked as optional in the models but may be omitted, by model name."""
+
+_enums: Dict[str, List[str]] = {
+    'CopyFactoryStrategyCommissionScheme.type': ['flat-fee', 'lots-traded', 'lots-won', 'amount-traded',
+                                                 'amount-won', 'high-water-mark'],
+    'CopyFactoryStrategyCommissionScheme.billingPeriod': ['week', 'month', 'quarter'],
+    'CopyFactoryStrategyMaxStopLoss.units': ['pips'],
+    'CopyFactoryStrategyTradeSizeScaling.mode': ['balance', 'equity', 'contractSize', 'fixedVolume', 'fixedRisk',
+                                                 'expression', 'none'],
+    'CopyFactoryStrategyDrawdownFilter.action': ['include', 'exclude'],
+    'CopyFactoryStrategyBreakingNewsFilter.priorities': ['high', 'medium', 'low'],
+    'CopyFactoryStrategyCalendarNewsFilter.priorities': ['election', 'high', 'medium', 'low'],
+    'CopyFactoryCloseInstructions.mode': _close_modes,
+    'closeOnRemovalMode': _close_modes,
+    'closeOnly': ['by-position', 'by-symbol', 'immediately'],
+    'reduceCorrelations': ['by-strategy', 'by-account'],
+    'allowedSides': ['buy', 'sell', 'all']
+}
+"""Allowed values by model field or by field name. Values of list fields are checked item by item."""
+
+_ranges: Dict[str, tuple] = {
+    'maxTradeRisk': (0, 1),
+    'maxRelativeRisk': (0, 1),
+    'maxDrawdown': (0, 1),
+    'riskFraction': (0, 1),
+    'multiplier': (0, None),
+    'reservedMarginFraction': (0, None),
+    'minTradeAmount': (0, None),
+    'maxLeverage': (0, None),
+    'minTradeVolume': (0, None),
+    'maxTradeVolume': (0, None),
+    'tradeVolume': (0, None),
+    'maxAbsoluteRisk': (0, None),
+    'commissionRate': (0, None),
+    'lifetimeInHours': (0, None),
+    'openingIntervalInMinutes': (0, None),
+    'minInSeconds': (0, None),
+    'maxInSeconds': (0, None),
+    'period': (0, None),
+    'closePositionTimeGapInMinutes': (0, None),
+    'openPositionPrecedingTimeGapInMinutes': (0, None),
+    'openPositionFollowingTimeGapInMinutes': (0, None)
+}
+"""Inclusive numeric ranges by field name, None means the range is not limited from that side."""
+
+
+class ConfigurationValidator:
+    """Validates configuration payloads locally before they are sent to the API. Validation functions are compiled
+    once per model from type hints of the models, extended with tables of optional fields, allowed values and
+    numeric ranges. Unknown fields are not reported, so that payloads with fields added to the API after the models
+    pass validation."""
+
+    def __init__(self):
+        """Inits configuration validator instance."""
+        self._compiled: Dict[type, Check] = {}
+
+    def validate_strategy(self, strategy: CopyFactoryStrategyUpdate):
+        """Validates a strategy update.
+
+        Args:
+            strategy: Strategy update.
+
+        Raises:
+            ValidationException: If the strategy update is invalid.
+        """
+        self.validate(strategy, CopyFactoryStrategyUpdate)
+
+    def validate_subscriber(self, subscriber: CopyFactorySubscriberUpdate):
+        """Validates a subscriber update.
+
+        Args:
+            subscriber: Subscriber update.
+
+        Raises:
+            ValidationException: If the subscriber update is invalid.
+        """
+        self.validate(subscriber, CopyFactorySubscriberUpdate)
+
+    def validate_portfolio_strategy(self, portfolio: CopyFactoryPortfolioStrategyUpdate):
+        """Validates a portfolio strategy update.
+
+        Args:
+            portfolio: Portfolio strategy update.
+
+        Raises:
+            ValidationException: If the portfolio strategy update is invalid.
+        """
+        self.validate(portfolio, CopyFactoryPortfolioStrategyUpdate)
+
+    def validate_close_instructions(self, close_instructions: CopyFactoryCloseInstructions):
+        """Validates close instructions.
+
+        Args:
+            close_instructions: Close instructions.
+
+        Raises:
+            ValidationException: If close instructions are invalid.
+        """
+        self.validate(close_instructions, CopyFactoryCloseInstructions)
+
+    def validate(self, document: dict, model: type):
+        """Validates a document against a model.
+
+        Args:
+            document: Document to validate.
+            model: TypedDict model of the document.
+
+        Raises:
+            ValidationException: If the document is invalid. Exception details contain all errors found.
+        """
+        errors: List[ValidationDetails] = []
+        self._compile_model(model)(document, '', errors)
+        if errors:
+            raise ValidationException('Validation failed', errors)
+
+    def _compile_model(self, model: type) -> Check:
+        if model in self._compiled:
+            return self._compiled[model]
+        fields = {}
+
+        def check(value, path: str, errors: List[ValidationDetails]):
+            if not isinstance(value, dict):
+                errors.append(self._error(path, value, 'must be an object'))
+                return
+            for field, (required, check_field) in fields.items():
+                field_value = value.get(field)
+                field_path = f'{path}.{field}' if path else field
+                if field_value is None:
+                    if required:
+                        errors.append(self._error(field_path, None, 'is required'))
+                else:
+                    check_field(field_value, field_path, errors)
+
+        # registered before the fields are compiled to support recursive models
+        self._compiled[model] = check
+        optional_fields = _optional_fields.get(model.__name__, [])
+        for field, hint in get_type_hints(model).items():
+            required = not self._is_optional(hint) and field not in optional_fields
+            enum = _enums.get(f'{model.__name__}.{field}') or _enums.get(field)
+            fields[field] = (required, self._compile_hint(hint, enum, _ranges.get(field)))
+        return check
+
+    def _compile_hint(self, hint, enum: List[str] = None, range: tuple = None) -> Check:
+        origin = get_origin(hint)
+        if origin is Union:
+            types = [arg for arg in get_args(hint) if arg is not type(None)]
+            if len(types) == 1:
+                return self._compile_hint(types[0], enum, range)
+            checks = [self._compile_hint(arg, enum, range) for arg in types]
+
+            def check_union(value, path: str, errors: List[ValidationDetails]):
+                for check in checks:
+                    union_errors = []
+                    check(value, path, union_errors)
+                    if not union_errors:
+                        return
+                errors.append(self._error(path, value, 'has invalid type'))
+            return check_union
+        if origin in (list, List):
+            check_item = self._compile_hint(get_args(hint)[0], enum, range)
+
+            def check_list(value, path: str, errors: List[ValidationDetails]):
+                if not isinstance(value, list):
+                    errors.append(self._error(path, value, 'must be a list'))
+                    return
+                for index, item in enumerate(value):
+                    check_item(item, f'{path}[{index}]', errors)
+            return check_list
+        if origin is Literal:
+            return self._compile_enum(list(get_args(hint)))
+        if isinstance(hint, type) and issubclass(hint, dict) and hasattr(hint, '__annotations__'):
+            return self._compile_model(hint)
+        if hint is str:
+            if enum:
+                return self._compile_enum(enum)
+            return self._compile_type(str, 'must be a string')
+        if hint is bool:
+            return self._compile_type(bool, 'must be a boolean')
+        if hint in (float, int):
+            return self._compile_number(range)
+        if hint is datetime:
+            return self._compile_type((datetime, str), 'must be a date')
+        return lambda value, path, errors: None
+
+    def _compile_enum(self, values: List[str]) -> Check:
+        allowed = frozenset(values)
+        message = 'must be one of ' + ', '.join(map(str, values))
+
+        def check(value, path: str, errors: List[ValidationDetails]):
+            if not isinstance(value, str) or value not in allowed:
+                errors.append(self._error(path, value, message))
+        return check
+
+    def _compile_type(self, types, message: str) -> Check:
+        def check(value, path: str, errors: List[ValidationDetails]):
+            if not isinstance(value, types):
+                errors.append(self._error(path, value, message))
+        return check
+
+    def _compile_number(self, range: tuple = None) -> Check:
+        minimum, maximum = range or (None, None)
+
+        def check(value, path: str, errors: List[ValidationDetails]):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                errors.append(self._error(path, value, 'must be a number'))
+            elif minimum is not None and value < minimum:
+                errors.append(self._error(path, value, f'must be greater than or equal to {minimum}'))
+            elif maximum is not None and value > maximum:
+                errors.append(self._error(path, value, f'must be less than or equal to {maximum}'))
+        return check
+
+    @staticmethod
+    def _is_optional(hint) -> bool:
+        return get_origin(hint) is Union and type(None) in get_args(hint)
+
+    @staticmethod
+    def _error(path: str, value, message: str) -> ValidationDetails:
+        return {'parameter': path, 'value': None if value is None else str(value), 'message': f'{path} {message}'}
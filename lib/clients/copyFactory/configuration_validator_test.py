@@ -0,0 +1,68 @@
+from .configuration_validator import ConfigurationValidator
+from ..errorHandler import ValidationException
+from datetime import datetime
+import pytest
+
+validator = ConfigurationValidator()
+
+
+class TestConfigurationValidator:
+    def test_accept_valid_documents(self):
+        """Should accept valid documents."""
+        validator.validate_strategy({
+            'name': 'Test strategy',
+            'description': 'Some useful description about your strategy',
+            'accountId': 'accountId',
+            'maxTradeRisk': 0.1,
+            'riskLimits': [{'type': 'day', 'applyTo': 'balance-difference', 'maxRelativeRisk': 0.5,
+                            'startTime': datetime.now()}],
+            'commissionScheme': {'type': 'flat-fee'},
+            'symbolFilter': {'included': ['EURUSD']},
+            'timeSettings': {'lifetimeInHours': 192, 'openingIntervalInMinutes': 5},
+            'unknownField': 'value'
+        })
+        validator.validate_subscriber({
+            'name': 'Demo account',
+            'allowedSides': ['buy'],
+            'subscriptions': [{'strategyId': 'ABCD', 'multiplier': 1, 'closeOnly': 'by-symbol',
+                               'symbolMapping': [{'from': 'EURUSD', 'to': 'EURUSD.m'}]}]
+        })
+        validator.validate_portfolio_strategy({
+            'name': 'Test portfolio',
+            'description': 'description',
+            'members': [{'strategyId': 'ABCD', 'multiplier': 0.5, 'closeOnRemovalMode': 'preserve'}]
+        })
+        validator.validate_close_instructions({'mode': 'preserve', 'removeAfter': '2020-08-24T00:00:00.000Z'})
+
+    def test_report_all_errors(self):
+        """Should report missing fields, invalid types, enum values and ranges."""
+        with pytest.raises(ValidationException) as error:
+            validator.validate_subscriber({
+                'reservedMarginFraction': 'high',
+                'riskLimits': [{'type': 'hour', 'applyTo': 'equity-difference', 'maxRelativeRisk': 2}],
+                'subscriptions': [{'multiplier': -1, 'closeOnly': 'never', 'copyStopLoss': 1}]
+            })
+        assert error.value.details == [
+            {'parameter': 'name', 'value': None, 'message': 'name is required'},
+            {'parameter': 'reservedMarginFraction', 'value': 'high',
+             'message': 'reservedMarginFraction must be a number'},
+            {'parameter': 'riskLimits[0].type', 'value': 'hour',
+             'message': 'riskLimits[0].type must be one of day, date, week, week-to-date, month, month-to-date, '
+                        'quarter, quarter-to-date, year, year-to-date, lifetime'},
+            {'parameter': 'riskLimits[0].maxRelativeRisk', 'value': '2',
+             'message': 'riskLimits[0].maxRelativeRisk must be less than or equal to 1'},
+            {'parameter': 'subscriptions[0].strategyId', 'value': None,
+             'message': 'subscriptions[0].strategyId is required'},
+            {'parameter': 'subscriptions[0].multiplier', 'value': '-1',
+             'message': 'subscriptions[0].multiplier must be greater than or equal to 0'},
+            {'parameter': 'subscriptions[0].closeOnly', 'value': 'never',
+             'message': 'subscriptions[0].closeOnly must be one of by-position, by-symbol, immediately'},
+            {'parameter': 'subscriptions[0].copyStopLoss', 'value': '1',
+             'message': 'subscriptions[0].copyStopLoss must be a boolean'}
+        ]
+
+    def test_validate_close_instructions_mode(self):
+        """Should validate close instructions mode."""
+        with pytest.raises(ValidationException) as error:
+            validator.validate_close_instructions({'mode': 'close'})
+        assert error.value.details[0]['parameter'] == 'mode'
@@ -783,3 +783,29 @@ class CopyFactoryCloseInstructions(TypedDict, total=False):
     """Time to force remove object after. The object will be removed after this time, even if positions are not yet
     closed fully. Default is current date plus 30 days. Can not be less than 30 days or greater than current date plus
     90 days. The setting is ignored when a subscription is being removed."""
+
+
+class CopyFactoryResynchronizeJob(TypedDict, total=False):
+    """Subscriber resynchronization job."""
+    subscriberId: str
+    """Subscriber id."""
+    strategyIds: Optional[List[str]]
+    """Array of strategy ids to resynchronize. Default is to synchronize all strategies."""
+    positionIds: Optional[List[str]]
+    """Array of position ids to resynchronize. Default is to synchronize all positions."""
+
+
+class CopyFactoryConfigurationMutation(TypedDict, total=False):
+    """Configuration change executed by a bulk configuration mutation."""
+    type: Literal['strategy', 'portfolioStrategy', 'portfolioStrategyMember', 'subscriber', 'subscription']
+    """Type of configuration object to change. Portfolio strategy members and subscriptions can only be removed."""
+    action: Literal['update', 'remove']
+    """Action to perform."""
+    id: str
+    """Id of the strategy, portfolio strategy or subscriber to change."""
+    strategyId: Optional[str]
+    """Id of the member strategy or subscription strategy to remove, for portfolioStrategyMember and subscription
+    mutations."""
+    payload: Optional[dict]
+    """Strategy, portfolio strategy or subscriber update for update actions, or optional close instructions for
+    remove actions."""
@@ -1,11 +1,13 @@
 from ..metaApi_client import MetaApiClient
-from ...models import format_date, convert_iso_time_to_date
+from ...models import format_date
 from .copyFactory_models import CopyFactoryTransaction
-from .streaming.transactionListenerManager import TransactionListenerManager
 from .streaming.transactionListener import TransactionListener
+from .streaming.listenerStats import StreamListenerStats
 from datetime import datetime
-from typing import List
+from typing import List, TYPE_CHECKING
 from ..domain_client import DomainClient
+if TYPE_CHECKING:
+    from .streaming.transactionListenerManager import TransactionListenerManager
 
 
 class HistoryClient(MetaApiClient):
@@ -20,7 +22,8 @@ class HistoryClient(MetaApiClient):
         """
         super().__init__(domain_client)
         self._domainClient = domain_client
-        self._transactionListenerManager = TransactionListenerManager(domain_client)
+        # listener manager is created on first use, so that its module is only loaded when streams are used
+        self._transactionListenerManager = None
 
     async def get_provided_transactions(self, time_from: datetime, time_till: datetime,
                                         strategy_ids: List[str] = None, subscriber_ids: List[str] = None,
@@ -59,10 +62,10 @@ class HistoryClient(MetaApiClient):
           'headers': {
             'auth-token': self._token
           },
-          'params': qs
+          'params': qs,
+          'convertDates': True
         }
         transactions = await self._domainClient.request_copyfactory(opts, True)
-        convert_iso_time_to_date(transactions)
         return transactions
 
     async def get_subscription_transactions(self, time_from: datetime, time_till: datetime,
@@ -103,10 +106,10 @@ class HistoryClient(MetaApiClient):
           'headers': {
             'auth-token': self._token
           },
-          'params': qs
+          'params': qs,
+          'convertDates': True
         }
         transactions = await self._domainClient.request_copyfactory(opts, True)
-        convert_iso_time_to_date(transactions)
         return transactions
 
     def add_strategy_transaction_listener(self, listener: TransactionListener, strategy_id: str,
@@ -121,7 +124,8 @@ class HistoryClient(MetaApiClient):
         Returns:
             Listener id.
         """
-        return self._transactionListenerManager.add_strategy_transaction_listener(listener, strategy_id, start_time)
+        return self._get_transaction_listener_manager().add_strategy_transaction_listener(listener, strategy_id,
+                                                                                          start_time)
 
     def remove_strategy_transaction_listener(self, listener_id: str):
         """Removes strategy transaction listener and cancels the event stream.
@@ -129,7 +133,7 @@ class HistoryClient(MetaApiClient):
         Args:
             listener_id: Strategy transaction listener id.
         """
-        self._transactionListenerManager.remove_strategy_transaction_listener(listener_id)
+        self._get_transaction_listener_manager().remove_strategy_transaction_listener(listener_id)
 
     def add_subscriber_transaction_listener(self, listener: TransactionListener, subscriber_id: str,
                                             start_time: datetime = None) -> str:
@@ -143,8 +147,8 @@ class HistoryClient(MetaApiClient):
         Returns:
             Listener id.
         """
-        return self._transactionListenerManager.add_subscriber_transaction_listener(listener, subscriber_id,
-                                                                                    start_time)
+        return self._get_transaction_listener_manager().add_subscriber_transaction_listener(listener, subscriber_id,
+                                                                                            start_time)
 
     def remove_subscriber_transaction_listener(self, listener_id: str):
         """Removes subscriber transaction listener and cancels the event stream.
@@ -152,4 +156,29 @@ class HistoryClient(MetaApiClient):
         Args:
             listener_id: Subscriber transaction listener id.
         """
-        self._transactionListenerManager.remove_subscriber_transaction_listener(listener_id)
+        self._get_transaction_listener_manager().remove_subscriber_transaction_listener(listener_id)
+
+    def stats(self) -> 'List[StreamListenerStats]':
+        """Returns health statistics of active transaction listeners, such as last successful poll, throughput,
+        stream position, lag, errors and callback execution time.
+
+        Returns:
+            Statistics of strategy and subscriber transaction listeners.
+        """
+        return self._transactionListenerManager.stats() if self._transactionListenerManager else []
+
+    async def close(self, timeout: float = 10):
+        """Removes all transaction listeners, cancels their stream requests in flight and waits until their jobs stop.
+
+        Args:
+            timeout: Maximum time to wait for listener jobs to stop in seconds, default value is 10.
+        """
+        if self._transactionListenerManager:
+            await self._transactionListenerManager.close(timeout)
+
+    def _get_transaction_listener_manager(self) -> 'TransactionListenerManager':
+        if self._transactionListenerManager is None:
+            from .streaming.transactionListenerManager import TransactionListenerManager
+            self._transactionListenerManager = TransactionListenerManager(
+                self._domainClient, self._domainClient.executor, self._domainClient.stream_listener_opts)
+        return self._transactionListenerManager
@@ -74,6 +74,7 @@ class TestHistoryClient:
                 'offset': 100,
                 'limit': 200
             },
+            'convertDates': True
         }, True)
 
     @pytest.mark.asyncio
@@ -143,6 +144,7 @@ class TestHistoryClient:
                 'offset': 100,
                 'limit': 200
             },
+            'convertDates': True
         }, True)
 
     @pytest.mark.asyncio
@@ -163,7 +165,7 @@ class TestTransactionListener:
     async def test_add_strategy_transaction_listener(self):
         """Should add strategy listener."""
         call_stub = MagicMock(return_value='listenerId')
-        history_client._transactionListenerManager.add_strategy_transaction_listener = call_stub
+        history_client._get_transaction_listener_manager().add_strategy_transaction_listener = call_stub
         listener = MagicMock()
         listener_id = history_client.add_strategy_transaction_listener(listener, 'ABCD')
         assert listener_id == 'listenerId'
@@ -173,7 +175,7 @@ class TestTransactionListener:
     async def test_remove_strategy_transaction_listener(self):
         """Should remove strategy listener."""
         call_stub = MagicMock()
-        history_client._transactionListenerManager.remove_strategy_transaction_listener = call_stub
+        history_client._get_transaction_listener_manager().remove_strategy_transaction_listener = call_stub
         history_client.remove_strategy_transaction_listener('id')
         call_stub.assert_called_with('id')
 
@@ -181,7 +183,7 @@ class TestTransactionListener:
     async def test_add_subscriber_transaction_listener(self):
         """Should add subscriber listener."""
         call_stub = MagicMock(return_value='listenerId')
-        history_client._transactionListenerManager.add_subscriber_transaction_listener = call_stub
+        history_client._get_transaction_listener_manager().add_subscriber_transaction_listener = call_stub
         listener = MagicMock()
         listener_id = history_client.add_subscriber_transaction_listener(listener, 'accountId')
         assert listener_id == 'listenerId'
@@ -191,6 +193,6 @@ class TestTransactionListener:
     async def test_remove_subscriber_transaction_listener(self):
         """Should remove subscriber listener."""
         call_stub = MagicMock()
-        history_client._transactionListenerManager.remove_subscriber_transaction_listener = call_stub
+        history_client._get_transaction_listener_manager().remove_subscriber_transaction_listener = call_stub
         history_client.remove_subscriber_transaction_listener('id')
         call_stub.assert_called_with('id')
@@ -2,8 +2,7 @@ from ..domain_client import DomainClient
 from .copyFactory_models import CopyFactoryExternalSignalUpdate, CopyFactoryExternalSignalRemove, \
     CopyFactoryTradingSignal, CopyFactoryExternalSignal
 from typing import List
-from copy import deepcopy
-from ...models import convert_iso_time_to_date, format_request, random_id
+from ...models import convert_iso_time_to_date, random_id
 
 
 class SignalClient:
@@ -21,6 +20,24 @@ class SignalClient:
         self._domainClient = domain_client
         self._host = host
 
+    @property
+    def account_id(self) -> str:
+        """Returns signal client account id.
+
+        Returns:
+            Account id.
+        """
+        return self._accountId
+
+    @property
+    def host(self) -> dict:
+        """Returns signal client host data.
+
+        Returns:
+            Host data.
+        """
+        return self._host
+
     @staticmethod
     def generate_signal_id():
         """Generates random signal id.
@@ -82,15 +99,13 @@ class SignalClient:
         Returns:
             A coroutine which resolves when external signal is updated.
         """
-        payload: dict = deepcopy(signal)
-        format_request(payload)
         opts = {
             'url': f"/users/current/strategies/{strategy_id}/external-signals/{signal_id}",
             'method': 'PUT',
             'headers': {
                 'auth-token': self._domainClient.token
             },
-            'body': payload
+            'body': signal
         }
         return await self._domainClient.request_signal(opts, self._host, self._accountId)
 
@@ -106,14 +121,12 @@ class SignalClient:
         Returns:
             A coroutine which resolves when external signal is removed.
         """
-        payload: dict = deepcopy(signal)
-        format_request(payload)
         opts = {
             'url': f"/users/current/strategies/{strategy_id}/external-signals/{signal_id}/remove",
             'method': 'POST',
             'headers': {
                 'auth-token': self._domainClient.token
             },
-            'body': payload
+            'body': signal
         }
         return await self._domainClient.request_signal(opts, self._host, self._accountId)
@@ -0,0 +1,104 @@
+from ..domain_client import DomainClient
+from .signal_client import SignalClient
+from ...logger import LoggerManager
+from typing_extensions import TypedDict
+from typing import Optional
+import asyncio
+
+
+class SignalClientRegistryOpts(TypedDict, total=False):
+    """Signal client registry options."""
+    keepAliveIntervalInSeconds: Optional[float]
+    """Interval between keep-alive probes sent to signal client regions, default value is 30."""
+
+
+class SignalClientRegistry:
+    """Keeps signal client instances per account and maintains warm connections to all account regions, so that
+    time-critical signal requests do not pay connection setup costs."""
+
+    def __init__(self, trading_client, domain_client: DomainClient, opts: SignalClientRegistryOpts = None):
+        """Inits signal client registry instance.
+
+        Args:
+            trading_client: CopyFactory trading API client.
+            domain_client: Domain client.
+            opts: Registry options.
+        """
+        opts: SignalClientRegistryOpts = opts or {}
+        self._tradingClient = trading_client
+        self._domainClient = domain_client
+        self._keepAliveInterval = opts['keepAliveIntervalInSeconds'] if 'keepAliveIntervalInSeconds' in opts \
+            else 30
+        self._signalClients = {}
+        self._pendingClients = {}
+        self._keepAliveTask = None
+        self._logger = LoggerManager.get_logger('SignalClientRegistry')
+
+    @property
+    def signal_clients(self):
+        """Returns the dictionary of registered signal clients by account id.
+
+        Returns:
+            Dictionary of signal clients.
+        """
+        return self._signalClients
+
+    async def get_signal_client(self, account_id: str) -> SignalClient:
+        """Returns a registered signal client for an account. If the client does not exist yet, resolves the account,
+        opens connections to all account regions and registers the client.
+
+        Args:
+            account_id: Account id.
+
+        Returns:
+            A coroutine resolving with signal client.
+        """
+        if account_id in self._signalClients:
+            return self._signalClients[account_id]
+        if account_id not in self._pendingClients:
+            self._pendingClients[account_id] = asyncio.create_task(self._create_signal_client(account_id))
+        return await asyncio.shield(self._pendingClients[account_id])
+
+    def remove_signal_client(self, account_id: str):
+        """Removes signal client of an account from the registry. Its connections stop being kept alive. Keep-alive
+        probes stop when the last signal client is removed.
+
+        Args:
+            account_id: Account id.
+        """
+        if account_id in self._signalClients:
+            del self._signalClients[account_id]
+        if not self._signalClients and self._keepAliveTask:
+            self._keepAliveTask.cancel()
+            self._keepAliveTask = None
+
+    async def close(self):
+        """Stops keep-alive probes and removes all signal clients."""
+        if self._keepAliveTask:
+            self._keepAliveTask.cancel()
+            self._keepAliveTask = None
+        self._signalClients = {}
+
+    async def _create_signal_client(self, account_id: str) -> SignalClient:
+        try:
+            signal_client = await self._tradingClient.get_signal_client(account_id)
+            await self._domainClient.warm_up_signal_host(signal_client.host)
+            self._signalClients[account_id] = signal_client
+            if not self._keepAliveTask:
+                self._keepAliveTask = asyncio.create_task(self._keep_alive_job())
+            return signal_client
+        finally:
+            del self._pendingClients[account_id]
+
+    async def _keep_alive_job(self):
+        while self._signalClients:
+            await asyncio.sleep(self._keepAliveInterval)
+            signal_clients = list(self._signalClients.items())
+            results = await asyncio.gather(*[self._domainClient.warm_up_signal_host(signal_client.host)
+                                             for account_id, signal_client in signal_clients],
+                                           return_exceptions=True)
+            for (account_id, signal_client), result in zip(signal_clients, results):
+                if isinstance(result, Exception):
+                    self._logger.error(f'Failed to keep signal client connections alive for account {account_id}',
+                                       result)
+        self._keepAliveTask = None
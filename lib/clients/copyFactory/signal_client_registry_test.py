@@ -0,0 +1,86 @@
+from .signal_client_registry import SignalClientRegistry
+from .signal_client import SignalClient
+from mock import MagicMock, AsyncMock, patch
+from asyncio import sleep
+import asyncio
+import pytest
+
+host = {
+    'host': 'https://copyfactory-api-v1',
+    'regions': ['vint-hill', 'new-york'],
+    'domain': 'agiliumtrade.ai'
+}
+domain_client = MagicMock()
+trading_client = MagicMock()
+registry = SignalClientRegistry(trading_client, domain_client)
+
+
+@pytest.fixture(autouse=True)
+async def run_around_tests():
+    global domain_client
+    domain_client = MagicMock()
+    domain_client.warm_up_signal_host = AsyncMock()
+    global trading_client
+    trading_client = MagicMock()
+
+    async def get_signal_client(account_id):
+        await sleep(0.01)
+        return SignalClient(account_id, host, domain_client)
+
+    trading_client.get_signal_client = AsyncMock(side_effect=get_signal_client)
+    global registry
+    registry = SignalClientRegistry(trading_client, domain_client, {'keepAliveIntervalInSeconds': 0.05})
+    yield
+    await registry.close()
+
+
+class TestSignalClientRegistry:
+    @pytest.mark.asyncio
+    async def test_create_and_warm_up_signal_client(self):
+        """Should create signal client and warm up connections to its regions."""
+        signal_client = await registry.get_signal_client('accountId')
+        assert signal_client.account_id == 'accountId'
+        trading_client.get_signal_client.assert_called_once_with('accountId')
+        domain_client.warm_up_signal_host.assert_called_once_with(host)
+
+    @pytest.mark.asyncio
+    async def test_reuse_signal_client(self):
+        """Should create signal client once for concurrent and subsequent requests."""
+        clients = await asyncio.gather(registry.get_signal_client('accountId'),
+                                       registry.get_signal_client('accountId'))
+        assert clients[0] is clients[1]
+        assert await registry.get_signal_client('accountId') is clients[0]
+        assert trading_client.get_signal_client.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_keep_connections_alive(self):
+        """Should periodically probe regions of registered signal clients."""
+        await registry.get_signal_client('accountId')
+        await sleep(0.12)
+        assert domain_client.warm_up_signal_host.call_count == 3
+        registry.remove_signal_client('accountId')
+        await sleep(0.06)
+        assert domain_client.warm_up_signal_host.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_stop_keep_alive_probes_without_signal_clients(self):
+        """Should stop keep-alive probes when the last signal client is removed and restart them for a new one."""
+        await asyncio.gather(registry.get_signal_client('accountId'), registry.get_signal_client('accountId2'))
+        keep_alive_task = registry._keepAliveTask
+        registry.remove_signal_client('accountId')
+        assert not keep_alive_task.done()
+        registry.remove_signal_client('accountId2')
+        await sleep(0)
+        assert keep_alive_task.done()
+        assert registry._keepAliveTask is None
+        await registry.get_signal_client('accountId')
+        await sleep(0.07)
+        assert domain_client.warm_up_signal_host.call_count == 4
+
+    @pytest.mark.asyncio
+    async def test_not_register_client_if_creation_failed(self):
+        """Should not register signal client if account could not be resolved."""
+        trading_client.get_signal_client = AsyncMock(side_effect=Exception('test'))
+        with pytest.raises(Exception):
+            await registry.get_signal_client('accountId')
+        assert 'accountId' not in registry.signal_clients
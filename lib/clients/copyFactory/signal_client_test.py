@@ -38,14 +38,6 @@ class TestTradingClient:
             'updateTime': date('2020-08-24T00:00:00.000Z'),
             'volume': 1
         }
-        expected_signal = {
-            'symbol': 'EURUSD',
-            'type': 'POSITION_TYPE_BUY',
-            'time': '2020-08-24T00:00:00.000Z',
-            'updateTime': '2020-08-24T00:00:00.000Z',
-            'volume': 1
-        }
-
         await signal_client.update_external_signal('ABCD', '0123456', signal)
         domain_client.request_signal.assert_called_with({
             'url': '/users/current/strategies/ABCD/external-signals/0123456',
@@ -53,7 +45,7 @@ class TestTradingClient:
             'headers': {
                 'auth-token': token
             },
-            'body': expected_signal
+            'body': signal
         }, host, 'accountId')
 
     @pytest.mark.asyncio
@@ -0,0 +1,156 @@
+from .streaming.stopoutListener import StopoutListener
+from .copyFactory_models import CopyFactoryStrategyStopout, CopyFactoryStrategyStopoutReason
+from ..batchExecutor import BatchExecutor, BatchResult
+from ...logger import LoggerManager
+from typing import List, Dict, Tuple, Set
+from datetime import datetime
+import pytz
+
+
+class StopoutStateService(StopoutListener):
+    """Keeps an in-memory index of current stopouts of many subscribers. The index is loaded once and then kept
+    current from a single stopout event stream, replacing per-subscriber polling. The stream is subscribed to before
+    stopouts are loaded, so that events are not missed while loading, and the most recently stopped record is kept
+    per strategy and reason whichever of them arrives first."""
+
+    def __init__(self, trading_client):
+        """Inits stopout state service instance.
+
+        Args:
+            trading_client: CopyFactory trading API client.
+        """
+        self._tradingClient = trading_client
+        self._subscriberStopouts: Dict[str, Dict[Tuple[str, str], CopyFactoryStrategyStopout]] = {}
+        self._strategySubscribers: Dict[str, Set[str]] = {}
+        self._subscriberIds: Set[str] = set()
+        self._listenerId = None
+        self._logger = LoggerManager.get_logger('StopoutStateService')
+
+    async def start(self, subscriber_ids: List[str], concurrency: int = 10) -> BatchResult:
+        """Subscribes to the stopout event stream and loads current stopouts of subscribers concurrently. Only
+        stopouts of subscribers passed to this method are indexed.
+
+        Args:
+            subscriber_ids: Ids of subscribers to load and index stopouts for.
+            concurrency: Maximum amount of concurrent stopout requests.
+
+        Returns:
+            A coroutine resolving with stopout loading result, which contains subscribers failed to load.
+        """
+        self._subscriberIds.update(subscriber_ids)
+        if self._listenerId is None:
+            self._listenerId = self._tradingClient.add_stopout_listener(self)
+
+        async def load_stopouts(subscriber_id: str):
+            for stopout in await self._tradingClient.get_stopouts(subscriber_id):
+                self._apply(subscriber_id, stopout)
+
+        return await BatchExecutor({'concurrency': concurrency})\
+            .execute(subscriber_ids, load_stopouts, lambda subscriber_id: subscriber_id)
+
+    def stop(self):
+        """Unsubscribes from the stopout event stream."""
+        if self._listenerId is not None:
+            self._tradingClient.remove_stopout_listener(self._listenerId)
+            self._listenerId = None
+
+    def get_subscriber_stopouts(self, subscriber_id: str) -> List[CopyFactoryStrategyStopout]:
+        """Returns active stopouts of a subscriber.
+
+        Args:
+            subscriber_id: Subscriber id.
+
+        Returns:
+            Active stopouts.
+        """
+        stopouts = self._subscriberStopouts.get(subscriber_id)
+        if not stopouts:
+            return []
+        now = datetime.now(pytz.utc)
+        return [stopout for stopout in stopouts.values() if self._is_active(stopout, now)]
+
+    def get_strategy_stopouts(self, strategy_id: str) -> Dict[str, List[CopyFactoryStrategyStopout]]:
+        """Returns active stopouts of a strategy by subscriber id.
+
+        Args:
+            strategy_id: Strategy id.
+
+        Returns:
+            Dictionary of active stopouts by subscriber id.
+        """
+        result = {}
+        now = datetime.now(pytz.utc)
+        for subscriber_id in self._strategySubscribers.get(strategy_id, ()):
+            stopouts = [stopout for (stopout_strategy_id, reason), stopout in
+                        self._subscriberStopouts[subscriber_id].items()
+                        if stopout_strategy_id == strategy_id and self._is_active(stopout, now)]
+            if stopouts:
+                result[subscriber_id] = stopouts
+        return result
+
+    def is_stopped_out(self, subscriber_id: str, strategy_id: str) -> bool:
+        """Checks whether a subscription of a subscriber to a strategy is currently stopped out.
+
+        Args:
+            subscriber_id: Subscriber id.
+            strategy_id: Strategy id.
+
+        Returns:
+            Whether the subscription is stopped out.
+        """
+        now = datetime.now(pytz.utc)
+        return any(stopout_strategy_id == strategy_id and self._is_active(stopout, now) for
+                   (stopout_strategy_id, reason), stopout in self._subscriberStopouts.get(subscriber_id, {}).items())
+
+    async def reset_stopouts(self, subscriber_id: str, strategy_id: str, reason: CopyFactoryStrategyStopoutReason):
+        """Resets strategy stopouts and removes them from the index.
+
+        Args:
+            subscriber_id: Subscriber id.
+            strategy_id: Strategy id.
+            reason: Stopout reason to reset.
+
+        Returns:
+            A coroutine which resolves when the stopouts are reset.
+        """
+        await self._tradingClient.reset_stopouts(subscriber_id, strategy_id, reason)
+        self._remove(subscriber_id, strategy_id, reason)
+
+    async def on_stopout(self, strategy_stopout_event: List[CopyFactoryStrategyStopout]):
+        for stopout in strategy_stopout_event:
+            if stopout.get('subscriberId') in self._subscriberIds:
+                self._apply(stopout['subscriberId'], stopout)
+
+    async def on_error(self, error: Exception):
+        self._logger.error('Stopout state service failed to retrieve stopout events', error)
+
+    def _apply(self, subscriber_id: str, stopout: CopyFactoryStrategyStopout):
+        strategy_id = stopout['strategy']['id']
+        if subscriber_id not in self._subscriberStopouts:
+            self._subscriberStopouts[subscriber_id] = {}
+        key = (strategy_id, stopout.get('reason'))
+        current = self._subscriberStopouts[subscriber_id].get(key)
+        if current and self._is_newer(current, stopout):
+            return
+        self._subscriberStopouts[subscriber_id][key] = stopout
+        if strategy_id not in self._strategySubscribers:
+            self._strategySubscribers[strategy_id] = set()
+        self._strategySubscribers[strategy_id].add(subscriber_id)
+
+    def _remove(self, subscriber_id: str, strategy_id: str, reason: str):
+        stopouts = self._subscriberStopouts.get(subscriber_id, {})
+        stopouts.pop((strategy_id, reason), None)
+        if not any(stopout_strategy_id == strategy_id for stopout_strategy_id, stopout_reason in stopouts):
+            self._strategySubscribers.get(strategy_id, set()).discard(subscriber_id)
+
+    @staticmethod
+    def _is_newer(stopout: CopyFactoryStrategyStopout, other: CopyFactoryStrategyStopout) -> bool:
+        stopped_at = stopout.get('stoppedAt')
+        other_stopped_at = other.get('stoppedAt')
+        return isinstance(stopped_at, datetime) and isinstance(other_stopped_at, datetime) and \
+            stopped_at > other_stopped_at
+
+    @staticmethod
+    def _is_active(stopout: CopyFactoryStrategyStopout, now: datetime) -> bool:
+        stopped_till = stopout.get('stoppedTill')
+        return not isinstance(stopped_till, datetime) or stopped_till > now
@@ -0,0 +1,120 @@
+from .stopout_state_service import StopoutStateService
+from ...models import date
+from mock import MagicMock, AsyncMock
+import pytest
+
+trading_client = MagicMock()
+service = StopoutStateService(trading_client)
+
+
+def stopout(strategy_id: str, reason: str, stopped_till: str = '2100-01-01T00:00:00.000Z', subscriber_id: str = None,
+            stopped_at: str = '2020-08-08T07:57:30.328Z'):
+    result = {
+        'strategy': {
+            'id': strategy_id,
+            'name': 'Strategy'
+        },
+        'reason': reason,
+        'stoppedAt': date(stopped_at),
+        'stoppedTill': date(stopped_till)
+    }
+    if subscriber_id:
+        result['subscriberId'] = subscriber_id
+    return result
+
+
+@pytest.fixture(autouse=True)
+async def run_around_tests():
+    global trading_client
+    trading_client = MagicMock()
+    trading_client.add_stopout_listener = MagicMock(return_value='listenerId')
+    trading_client.reset_stopouts = AsyncMock()
+    stopouts = {
+        'subscriber1': [stopout('ABCD', 'day-balance-difference'),
+                        stopout('EFGH', 'day-balance-difference', '2020-01-01T00:00:00.000Z')],
+        'subscriber2': [stopout('ABCD', 'lifetime-equity-difference')],
+        'subscriber3': []
+    }
+
+    async def get_stopouts(subscriber_id):
+        if subscriber_id == 'subscriber4':
+            raise Exception('test')
+        return stopouts[subscriber_id]
+
+    trading_client.get_stopouts = AsyncMock(side_effect=get_stopouts)
+    global service
+    service = StopoutStateService(trading_client)
+
+
+class TestStopoutStateService:
+    @pytest.mark.asyncio
+    async def test_load_stopouts(self):
+        """Should load stopouts of subscribers and subscribe to stopout stream."""
+        result = await service.start(['subscriber1', 'subscriber2', 'subscriber3', 'subscriber4'])
+        trading_client.add_stopout_listener.assert_called_once_with(service)
+        assert list(map(lambda r: r['key'], result['failed'])) == ['subscriber4']
+        assert service.get_subscriber_stopouts('subscriber1') == [stopout('ABCD', 'day-balance-difference')]
+        assert service.get_subscriber_stopouts('subscriber3') == []
+        assert service.get_strategy_stopouts('ABCD') == {
+            'subscriber1': [stopout('ABCD', 'day-balance-difference')],
+            'subscriber2': [stopout('ABCD', 'lifetime-equity-difference')]
+        }
+        assert service.get_strategy_stopouts('EFGH') == {}
+        assert service.is_stopped_out('subscriber1', 'ABCD')
+        assert not service.is_stopped_out('subscriber1', 'EFGH')
+
+    @pytest.mark.asyncio
+    async def test_apply_stopout_events(self):
+        """Should apply stopout events to the index."""
+        await service.start(['subscriber3'])
+        await service.on_stopout([{
+            'subscriberId': 'subscriber3',
+            'strategy': {'id': 'ABCD', 'name': 'Strategy'},
+            'reason': 'day-balance-difference',
+            'stoppedAt': date('2020-08-08T07:57:30.328Z'),
+            'stoppedTill': date('2100-01-01T00:00:00.000Z'),
+            'sequenceNumber': 1
+        }])
+        assert service.is_stopped_out('subscriber3', 'ABCD')
+        assert list(service.get_strategy_stopouts('ABCD').keys()) == ['subscriber3']
+
+    @pytest.mark.asyncio
+    async def test_keep_newest_stopout(self):
+        """Should keep the newest stopout if a stopout event arrives before the loaded state."""
+        stopouts = [stopout('ABCD', 'day-balance-difference', '2020-01-01T00:00:00.000Z')]
+
+        async def get_stopouts(subscriber_id):
+            await service.on_stopout([stopout('ABCD', 'day-balance-difference', subscriber_id='subscriber1',
+                                              stopped_at='2020-08-09T07:57:30.328Z')])
+            return stopouts
+
+        trading_client.get_stopouts = AsyncMock(side_effect=get_stopouts)
+        await service.start(['subscriber1'])
+        assert service.is_stopped_out('subscriber1', 'ABCD')
+        await service.on_stopout([stopout('ABCD', 'day-balance-difference', '2020-01-01T00:00:00.000Z',
+                                          'subscriber1', '2020-08-10T07:57:30.328Z')])
+        assert not service.is_stopped_out('subscriber1', 'ABCD')
+
+    @pytest.mark.asyncio
+    async def test_index_stopouts_of_started_subscribers_only(self):
+        """Should ignore stopout events of subscribers the service was not started for."""
+        await service.start(['subscriber3'])
+        await service.on_stopout([stopout('ABCD', 'day-balance-difference', subscriber_id='subscriber5')])
+        assert not service.is_stopped_out('subscriber5', 'ABCD')
+        assert service.get_strategy_stopouts('ABCD') == {}
+
+    @pytest.mark.asyncio
+    async def test_reset_stopouts(self):
+        """Should reset stopouts and remove them from the index."""
+        await service.start(['subscriber1'])
+        await service.reset_stopouts('subscriber1', 'ABCD', 'day-balance-difference')
+        trading_client.reset_stopouts.assert_called_once_with('subscriber1', 'ABCD', 'day-balance-difference')
+        assert not service.is_stopped_out('subscriber1', 'ABCD')
+        assert service.get_strategy_stopouts('ABCD') == {}
+
+    @pytest.mark.asyncio
+    async def test_stop(self):
+        """Should unsubscribe from stopout stream."""
+        await service.start([])
+        service.stop()
+        trading_client.remove_stopout_listener.assert_called_once_with('listenerId')
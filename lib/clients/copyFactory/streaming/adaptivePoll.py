@@ -0,0 +1,71 @@
+from .streamListenerOpts import StreamListenerOpts
+from typing import Optional
+import random
+
+
+class AdaptivePoll:
+    """Chooses page size and delay of the next stream poll. A full page means the stream is behind, so the next page
+    is requested at once with the burst limit. An empty page means the stream is quiet, so the next poll is delayed by
+    a random jitter. Retries after errors are randomized as well."""
+
+    def __init__(self, limit: Optional[int], opts: StreamListenerOpts = None):
+        """Inits adaptive poll instance.
+
+        Args:
+            limit: Regular page size, None if the page size is not specified in requests.
+            opts: Stream listener options, only polling options are used.
+        """
+        opts: StreamListenerOpts = opts or {}
+        self._limit = limit
+        self._burstLimit = opts['burstLimit'] if 'burstLimit' in opts and limit is not None else limit
+        self._emptyPollJitter = opts['emptyPollJitterInSeconds'] if 'emptyPollJitterInSeconds' in opts else 1
+        self._errorJitter = opts['errorJitter'] if 'errorJitter' in opts else 0.5
+        self._burst = False
+
+    @property
+    def limit(self) -> Optional[int]:
+        """Returns page size of the next poll.
+
+        Returns:
+            Page size or None if it is not specified in requests.
+        """
+        return self._burstLimit if self._burst else self._limit
+
+    @property
+    def burst(self) -> bool:
+        """Returns whether the stream is catching up after a full page.
+
+        Returns:
+            Whether the stream is in burst mode.
+        """
+        return self._burst
+
+    def record_poll(self, packets: int, new_packets: int = None) -> float:
+        """Records a successful poll.
+
+        Args:
+            packets: Amount of packets returned.
+            new_packets: Amount of packets which were not delivered before, default is the amount of packets returned.
+            A poll which returned only packets delivered before is delayed like an empty poll.
+
+        Returns:
+            Delay before the next poll in seconds.
+        """
+        limit = self.limit
+        self._burst = limit is not None and packets >= limit
+        if (packets if new_packets is None else new_packets) == 0 and self._emptyPollJitter:
+            return random.uniform(0, self._emptyPollJitter)
+        return 0
+
+    def error_delay(self, throttle_time: float) -> float:
+        """Returns delay before retrying a failed poll, which is between throttle time reduced by the error jitter and
+        throttle time.
+
+        Args:
+            throttle_time: Throttle time in seconds.
+
+        Returns:
+            Delay in seconds.
+        """
+        self._burst = False
+        return throttle_time * (1 - self._errorJitter * random.random())
@@ -0,0 +1,48 @@
+from .adaptivePoll import AdaptivePoll
+
+
+class TestAdaptivePoll:
+
+    def test_request_burst_pages_after_full_page(self):
+        """Should request next page at once with burst limit after a full page."""
+        poll = AdaptivePoll(2, {'burstLimit': 5})
+        assert poll.limit == 2
+        assert poll.record_poll(2) == 0
+        assert poll.burst
+        assert poll.limit == 5
+        assert poll.record_poll(5) == 0
+        assert poll.limit == 5
+        assert poll.record_poll(3) == 0
+        assert not poll.burst
+        assert poll.limit == 2
+
+    def test_not_enter_burst_mode_without_limit(self):
+        """Should not enter burst mode if page size is not specified in requests."""
+        poll = AdaptivePoll(None, {'burstLimit': 5})
+        poll.record_poll(1000)
+        assert not poll.burst
+        assert poll.limit is None
+
+    def test_delay_polls_of_quiet_streams_by_jitter(self):
+        """Should delay next poll by random jitter after an empty page."""
+        poll = AdaptivePoll(1000, {'emptyPollJitterInSeconds': 2})
+        delays = [poll.record_poll(0) for i in range(100)]
+        assert all(0 <= delay <= 2 for delay in delays)
+        assert len(set(delays)) > 90
+        assert AdaptivePoll(1000, {'emptyPollJitterInSeconds': 0}).record_poll(0) == 0
+
+    def test_delay_polls_without_new_packets(self):
+        """Should delay next poll by random jitter after a page of packets delivered already."""
+        poll = AdaptivePoll(1000, {'emptyPollJitterInSeconds': 2})
+        assert 0 < poll.record_poll(1, 0) <= 2
+        assert poll.record_poll(1, 1) == 0
+
+    def test_randomize_error_delays(self):
+        """Should spread retries after errors between throttle time reduced by jitter and throttle time."""
+        poll = AdaptivePoll(1000, {'errorJitter': 0.5})
+        poll.record_poll(1000)
+        delays = [poll.error_delay(4) for i in range(100)]
+        assert not poll.burst
+        assert all(2 <= delay <= 4 for delay in delays)
+        assert max(delays) - min(delays) > 1
+        assert AdaptivePoll(1000, {'errorJitter': 0}).error_delay(4) == 4
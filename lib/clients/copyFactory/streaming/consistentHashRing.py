@@ -0,0 +1,64 @@
+from typing import List, Optional
+import bisect
+import hashlib
+
+
+class ConsistentHashRing:
+    """Consistent hash ring mapping keys to nodes numbered from 0. Each node is placed on the ring at several virtual
+    points, so that keys are spread evenly and adding or removing a node only moves keys of that node. Lookups may be
+    bounded by node load, in which case a key goes to the first node clockwise from its point which is below
+    capacity."""
+
+    def __init__(self, nodes: int, virtual_nodes: int = 64):
+        """Inits consistent hash ring instance.
+
+        Args:
+            nodes: Amount of nodes.
+            virtual_nodes: Amount of ring points per node.
+        """
+        self._nodes = nodes
+        self._virtualNodes = virtual_nodes
+        points = sorted((self.hash(f'{node}:{index}'), node) for node in range(nodes) for index in range(virtual_nodes))
+        self._points = [point for point, node in points]
+        self._pointNodes = [node for point, node in points]
+
+    @property
+    def nodes(self) -> int:
+        """Returns amount of nodes.
+
+        Returns:
+            Amount of nodes.
+        """
+        return self._nodes
+
+    def node_for(self, key: str, loads: Optional[List[int]] = None, capacity: Optional[int] = None) -> int:
+        """Returns node a key belongs to.
+
+        Args:
+            key: Key.
+            loads: Current load of each node. If specified, nodes with load equal to capacity are skipped.
+            capacity: Maximum load of a node.
+
+        Returns:
+            Node number.
+        """
+        if not self._nodes:
+            raise ValueError('Consistent hash ring has no nodes')
+        index = bisect.bisect(self._points, self.hash(key))
+        for offset in range(len(self._points)):
+            node = self._pointNodes[(index + offset) % len(self._points)]
+            if loads is None or loads[node] < capacity:
+                return node
+        raise ValueError('All nodes of consistent hash ring are at capacity')
+
+    @staticmethod
+    def hash(key: str) -> int:
+        """Returns position of a key on the ring.
+
+        Args:
+            key: Key.
+
+        Returns:
+            Ring position.
+        """
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
@@ -0,0 +1,39 @@
+from .consistentHashRing import ConsistentHashRing
+import pytest
+
+keys = [f'subscriber{index}' for index in range(10000)]
+
+
+class TestConsistentHashRing:
+
+    def test_map_keys_deterministically(self):
+        """Should map keys to the same nodes across ring instances."""
+        assert [ConsistentHashRing(4).node_for(key) for key in keys[:100]] == \
+            [ConsistentHashRing(4).node_for(key) for key in keys[:100]]
+
+    def test_spread_keys_evenly(self):
+        """Should spread keys evenly over nodes."""
+        ring = ConsistentHashRing(4)
+        loads = [0] * 4
+        for key in keys:
+            loads[ring.node_for(key)] += 1
+        assert min(loads) > 0.7 * len(keys) / 4
+        assert max(loads) < 1.3 * len(keys) / 4
+
+    def test_move_only_keys_of_added_node(self):
+        """Should only move keys to the added node when a node is added."""
+        ring = ConsistentHashRing(4)
+        resized_ring = ConsistentHashRing(5)
+        moved = [key for key in keys if ring.node_for(key) != resized_ring.node_for(key)]
+        assert all(resized_ring.node_for(key) == 4 for key in moved)
+        assert len(moved) < 0.3 * len(keys)
+
+    def test_skip_nodes_at_capacity(self):
+        """Should skip nodes at capacity when loads are specified."""
+        ring = ConsistentHashRing(3)
+        node = ring.node_for('subscriber0')
+        loads = [0, 0, 0]
+        loads[node] = 10
+        assert ring.node_for('subscriber0', loads, 10) != node
+        with pytest.raises(ValueError):
+            ring.node_for('subscriber0', [10, 10, 10], 10)
@@ -0,0 +1,30 @@
+from concurrent.futures import Executor
+from typing import Callable, Optional
+import functools
+import asyncio
+import inspect
+
+
+async def invoke_listener_callback(callback: Callable, executor: Optional[Executor], *args):
+    """Invokes a listener callback. Coroutine callbacks are awaited on the event loop. Synchronous callbacks run in
+    the executor if one is specified, so that they do not block stream jobs of other listeners, and on the event loop
+    otherwise. Stream jobs wait for the callback to finish before requesting next packets, so callbacks of a listener
+    are invoked in order.
+
+    Args:
+        callback: Listener callback.
+        executor: Thread or process pool to run synchronous callbacks in.
+        args: Callback arguments.
+
+    Returns:
+        Callback result.
+    """
+    if inspect.iscoroutinefunction(callback):
+        return await callback(*args)
+    if executor is not None:
+        result = await asyncio.get_running_loop().run_in_executor(executor, functools.partial(callback, *args))
+    else:
+        result = callback(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
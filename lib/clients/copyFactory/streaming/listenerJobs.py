@@ -0,0 +1,59 @@
+from ....logger import LoggerManager
+from typing import Coroutine, Dict
+import asyncio
+
+
+class ListenerJobs:
+    """Stream jobs of listeners. A job is cancelled when its listener is removed, which aborts its stream request in
+    flight and releases the connection at once instead of when the long poll returns."""
+
+    def __init__(self):
+        """Inits listener jobs instance."""
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._logger = LoggerManager.get_logger('ListenerJobs')
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def start(self, listener_id: str, job: Coroutine):
+        """Starts a listener job.
+
+        Args:
+            listener_id: Listener id.
+            job: Job coroutine.
+        """
+        self._tasks[listener_id] = asyncio.create_task(job)
+
+    def stop(self, listener_id: str):
+        """Cancels a listener job. A job removing its own listener is not cancelled and stops after the current
+        iteration instead.
+
+        Args:
+            listener_id: Listener id.
+        """
+        task = self._tasks.pop(listener_id, None)
+        if task is not None and not self._is_current(task):
+            task.cancel()
+
+    async def close(self, timeout: float = 10):
+        """Cancels all jobs and waits until they stop.
+
+        Args:
+            timeout: Maximum time to wait for jobs to stop in seconds.
+        """
+        tasks = [task for task in self._tasks.values() if not self._is_current(task)]
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            if pending:
+                self._logger.warning(f'{len(pending)} listener jobs did not stop in {timeout} seconds')
+
+    @staticmethod
+    def _is_current(task: asyncio.Task) -> bool:
+        try:
+            return task is asyncio.current_task()
+        except RuntimeError:
+            # no event loop is running
+            return False
@@ -0,0 +1,54 @@
+from .listenerJobs import ListenerJobs
+import asyncio
+import pytest
+
+
+class TestListenerJobs:
+
+    @pytest.mark.asyncio
+    async def test_cancel_job_on_stop(self):
+        """Should cancel job when it is stopped."""
+        jobs = ListenerJobs()
+        jobs.start('id', asyncio.sleep(10))
+        task = jobs._tasks['id']
+        jobs.stop('id')
+        await asyncio.sleep(0)
+        assert task.cancelled()
+        assert len(jobs) == 0
+
+    @pytest.mark.asyncio
+    async def test_not_cancel_job_stopping_itself(self):
+        """Should not cancel job which stops its own listener."""
+        jobs = ListenerJobs()
+
+        async def job():
+            jobs.stop('id')
+            await asyncio.sleep(0.01)
+            return 'done'
+
+        jobs.start('id', job())
+        task = jobs._tasks['id']
+        assert await task == 'done'
+
+    @pytest.mark.asyncio
+    async def test_wait_for_jobs_on_close_within_timeout(self):
+        """Should cancel jobs on close and wait for them to stop at most timeout."""
+        jobs = ListenerJobs()
+        stopped = []
+
+        async def job(delay):
+            try:
+                await asyncio.sleep(10)
+            finally:
+                # shields cleanup from cancellation, e.g. a slow callback
+                await asyncio.shield(asyncio.sleep(delay))
+                stopped.append(delay)
+
+        jobs.start('fast', job(0.01))
+        jobs.start('slow', job(0.3))
+        await asyncio.sleep(0)
+        await jobs.close(0.1)
+        assert stopped == [0.01]
+        assert len(jobs) == 0
+        await asyncio.sleep(0.3)
+        assert stopped == [0.01, 0.3]
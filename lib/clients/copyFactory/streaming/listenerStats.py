@@ -0,0 +1,201 @@
+from ....models import date
+from typing_extensions import TypedDict, Literal
+from typing import Optional, Union, List
+from datetime import datetime
+from collections import deque
+import pytz
+
+StreamListenerType = Literal['strategyTransactions', 'subscriberTransactions', 'strategyLog', 'subscriberLog',
+                             'stopouts']
+
+
+class StreamListenerStats(TypedDict):
+    """Health statistics of a stream listener."""
+    listenerId: str
+    """Listener id."""
+    type: StreamListenerType
+    """Stream type."""
+    id: Optional[str]
+    """Id of the strategy or subscriber the stream is filtered by."""
+    startedAt: datetime
+    """Time the listener was added."""
+    lastPollTime: Optional[datetime]
+    """Time of the last successful stream request."""
+    polls: int
+    """Amount of successful stream requests."""
+    packets: int
+    """Amount of packets received."""
+    packetsPerSecond: float
+    """Packets received per second during the last minute."""
+    cursor: Optional[Union[datetime, int]]
+    """Current stream position, start time of the next request for transaction and log streams and previous sequence
+    number for stopout streams."""
+    lagInSeconds: float
+    """Estimated lag of the listener behind the wall clock. The lag is 0 while the last request returned a page which
+    was not full, since the listener is caught up and waits for new packets. Otherwise the listener is known to be
+    caught up to the time of the newest packet received, or to the time it was last caught up if requests fail, and
+    the lag is the time passed since then."""
+    consecutiveErrors: int
+    """Amount of stream requests failed in a row."""
+    lastError: Optional[str]
+    """Message of the last error, None if the last request succeeded."""
+    throttleTimeInSeconds: float
+    """Delay before the next stream request due to errors, 0 if the last request succeeded."""
+    lastCallbackTimeInSeconds: Optional[float]
+    """Execution time of the last listener callback."""
+    averageCallbackTimeInSeconds: Optional[float]
+    """Average execution time of listener callbacks."""
+    maxCallbackTimeInSeconds: Optional[float]
+    """Maximum execution time of listener callbacks."""
+    gaps: int
+    """Amount of gaps found in sequence numbers of a stopout stream."""
+    backfilledGaps: int
+    """Amount of gaps in sequence numbers of a stopout stream all missing stopouts were fetched for."""
+
+
+class ListenerStatsTracker:
+    """Collects health statistics of a stream listener."""
+
+    def __init__(self, listener_id: str, type: StreamListenerType, id: Optional[str],
+                 cursor: Union[datetime, int, None] = None, domain_client=None):
+        """Inits listener stats tracker instance.
+
+        Args:
+            listener_id: Listener id.
+            type: Stream type.
+            id: Id of the strategy or subscriber the stream is filtered by.
+            cursor: Initial stream position.
+            domain_client: Domain client to report statistics to metrics listeners with after each request.
+        """
+        now = datetime.now().timestamp()
+        self._domainClient = domain_client
+        self._listenerId = listener_id
+        self._type = type
+        self._id = id
+        self._startedAt = now
+        self._cursor = cursor
+        # a listener started from a point in the past is behind by that time until it catches up
+        self._caughtUpTo = min(cursor.timestamp(), now) if isinstance(cursor, datetime) else now
+        self._caughtUp = False
+        self._lastPollTime = None
+        self._polls = 0
+        self._packets = 0
+        self._recentPackets = deque()
+        self._consecutiveErrors = 0
+        self._lastError = None
+        self._throttleTime = 0
+        self._lastCallbackTime = None
+        self._totalCallbackTime = 0
+        self._maxCallbackTime = None
+        self._gaps = 0
+        self._backfilledGaps = 0
+
+    def record_success(self, packets: List[dict], callback_time: float, cursor: Union[datetime, int, None],
+                       time_field: str = 'time', caught_up: bool = None):
+        """Records a successful stream request.
+
+        Args:
+            packets: Packets received, newest first for time-based streams.
+            callback_time: Listener callback execution time in seconds.
+            cursor: Stream position after the request.
+            time_field: Packet field containing event time.
+            caught_up: Whether the request returned all packets available, e.g. the page was not full. Default is
+            whether no packets were returned.
+        """
+        now = datetime.now().timestamp()
+        self._lastPollTime = now
+        self._polls += 1
+        self._packets += len(packets)
+        self._recentPackets.append((now, len(packets)))
+        self._trim_recent_packets(now)
+        self._cursor = cursor
+        self._caughtUp = not packets if caught_up is None else caught_up
+        if packets and not self._caughtUp:
+            times = [packets[0].get(time_field), packets[-1].get(time_field)]
+            times = [date(value).timestamp() if isinstance(value, str) else value.timestamp() for value in times
+                     if value is not None]
+            self._caughtUpTo = max(times) if times else now
+        else:
+            self._caughtUpTo = now
+        self._consecutiveErrors = 0
+        self._lastError = None
+        self._throttleTime = 0
+        self._lastCallbackTime = callback_time
+        self._totalCallbackTime += callback_time
+        self._maxCallbackTime = max(self._maxCallbackTime or 0, callback_time)
+        self._report()
+
+    def record_error(self, error: Exception, throttle_time: float):
+        """Records a failed stream request.
+
+        Args:
+            error: Error the request failed with.
+            throttle_time: Delay before the next request in seconds.
+        """
+        self._caughtUp = False
+        self._consecutiveErrors += 1
+        self._lastError = str(error) or error.__class__.__name__
+        self._throttleTime = throttle_time
+        self._report()
+
+    def record_gap(self):
+        """Records a gap found in stream sequence numbers."""
+        self._gaps += 1
+        self._report()
+
+    def record_gap_closed(self, backfilled: bool):
+        """Records a gap in stream sequence numbers closed.
+
+        Args:
+            backfilled: Whether all missing packets were fetched.
+        """
+        if backfilled:
+            self._backfilledGaps += 1
+            self._report()
+
+    def stats(self) -> StreamListenerStats:
+        """Returns listener statistics.
+
+        Returns:
+            Listener statistics.
+        """
+        now = datetime.now().timestamp()
+        self._trim_recent_packets(now)
+        window = min(60, now - self._startedAt)
+        return {
+            'listenerId': self._listenerId,
+            'type': self._type,
+            'id': self._id,
+            'startedAt': self._to_date(self._startedAt),
+            'lastPollTime': self._to_date(self._lastPollTime),
+            'polls': self._polls,
+            'packets': self._packets,
+            'packetsPerSecond': sum(count for time, count in self._recentPackets) / window if window > 0 else 0,
+            'cursor': self._cursor,
+            'lagInSeconds': 0 if self._caughtUp else max(now - self._caughtUpTo, 0),
+            'consecutiveErrors': self._consecutiveErrors,
+            'lastError': self._lastError,
+            'throttleTimeInSeconds': self._throttleTime,
+            'lastCallbackTimeInSeconds': self._lastCallbackTime,
+            'averageCallbackTimeInSeconds': self._totalCallbackTime / self._polls if self._polls else None,
+            'maxCallbackTimeInSeconds': self._maxCallbackTime,
+            'gaps': self._gaps,
+            'backfilledGaps': self._backfilledGaps
+        }
+
+    def close(self):
+        """Reports the listener removed to metrics listeners, so that they release its series."""
+        if self._domainClient is not None and self._domainClient.metrics_listeners:
+            self._domainClient.report_listener_removed(self.stats())
+
+    def _report(self):
+        if self._domainClient is not None and self._domainClient.metrics_listeners:
+            self._domainClient.report_listener_stats(self.stats())
+
+    def _trim_recent_packets(self, now: float):
+        while self._recentPackets and self._recentPackets[0][0] < now - 60:
+            self._recentPackets.popleft()
+
+    @staticmethod
+    def _to_date(timestamp: Optional[float]) -> Optional[datetime]:
+        return datetime.fromtimestamp(timestamp, pytz.utc) if timestamp is not None else None
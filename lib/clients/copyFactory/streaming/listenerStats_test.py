@@ -0,0 +1,100 @@
+from ....models import date
+from .listenerStats import ListenerStatsTracker
+from freezegun import freeze_time
+from mock import MagicMock
+import pytest
+
+start_time = '2020-08-08T08:00:00.000Z'
+packets = [{'id': '2', 'time': '2020-08-08T08:59:50.000Z'}, {'id': '1', 'time': '2020-08-08T08:59:40.000Z'}]
+
+
+class TestListenerStatsTracker:
+
+    def test_track_successful_polls(self):
+        """Should track throughput, cursor, lag and callback time of successful polls."""
+        with freeze_time('2020-08-08T09:00:00.000Z') as frozen_datetime:
+            tracker = ListenerStatsTracker('listenerId', 'subscriberTransactions', 'subscriberId', date(start_time))
+            assert tracker.stats()['lagInSeconds'] == 3600
+            frozen_datetime.tick(10)
+            cursor = date('2020-08-08T08:59:50.001Z')
+            tracker.record_success(packets, 0.2, cursor)
+            tracker.record_success([], 0.4, cursor)
+            stats = tracker.stats()
+            assert stats['listenerId'] == 'listenerId'
+            assert stats['type'] == 'subscriberTransactions'
+            assert stats['id'] == 'subscriberId'
+            assert stats['lastPollTime'] == date('2020-08-08T09:00:10.000Z')
+            assert stats['polls'] == 2
+            assert stats['packets'] == 2
+            assert stats['packetsPerSecond'] == 0.2
+            assert stats['cursor'] == cursor
+            assert stats['lagInSeconds'] == 0
+            assert stats['lastCallbackTimeInSeconds'] == 0.4
+            assert stats['averageCallbackTimeInSeconds'] == pytest.approx(0.3)
+            assert stats['maxCallbackTimeInSeconds'] == 0.4
+            frozen_datetime.tick(120)
+            assert tracker.stats()['packetsPerSecond'] == 0
+            assert tracker.stats()['lagInSeconds'] == 0
+
+    def test_not_report_lag_while_caught_up(self):
+        """Should report no lag during a long poll of a caught up stream and count lag from then on errors."""
+        with freeze_time('2020-08-08T09:00:00.000Z') as frozen_datetime:
+            tracker = ListenerStatsTracker('listenerId', 'subscriberTransactions', 'subscriberId')
+            tracker.record_success(packets, 0.1, date('2020-08-08T08:59:50.000Z'), caught_up=True)
+            frozen_datetime.tick(70)
+            assert tracker.stats()['lagInSeconds'] == 0
+            tracker.record_error(Exception('test'), 1)
+            assert tracker.stats()['lagInSeconds'] == 70
+
+    def test_track_lag_by_newest_packet(self):
+        """Should estimate lag by the newest packet received."""
+        with freeze_time('2020-08-08T09:00:00.000Z'):
+            tracker = ListenerStatsTracker('listenerId', 'stopouts', None, 10)
+            tracker.record_success([{'sequenceNumber': 11, 'stoppedAt': date('2020-08-08T08:59:00.000Z')},
+                                    {'sequenceNumber': 12, 'stoppedAt': date('2020-08-08T08:59:30.000Z')}], 0.1, 12,
+                                   'stoppedAt')
+            stats = tracker.stats()
+            assert stats['cursor'] == 12
+            assert stats['lagInSeconds'] == 30
+
+    def test_track_gaps(self):
+        """Should track gaps found and gaps backfilled."""
+        tracker = ListenerStatsTracker('listenerId', 'stopouts', None, 10)
+        tracker.record_gap()
+        tracker.record_gap()
+        tracker.record_gap_closed(True)
+        tracker.record_gap_closed(False)
+        stats = tracker.stats()
+        assert stats['gaps'] == 2
+        assert stats['backfilledGaps'] == 1
+
+    def test_track_errors(self):
+        """Should track consecutive errors and throttle time, and reset them after a successful poll."""
+        tracker = ListenerStatsTracker('listenerId', 'strategyLog', 'strategyId')
+        tracker.record_error(Exception('test'), 1)
+        tracker.record_error(Exception('test2'), 2)
+        stats = tracker.stats()
+        assert stats['consecutiveErrors'] == 2
+        assert stats['lastError'] == 'test2'
+        assert stats['throttleTimeInSeconds'] == 2
+        assert stats['lastPollTime'] is None
+        tracker.record_success([], 0, None)
+        stats = tracker.stats()
+        assert stats['consecutiveErrors'] == 0
+        assert stats['lastError'] is None
+        assert stats['throttleTimeInSeconds'] == 0
+
+    def test_report_stats(self):
+        """Should report stats via domain client only if metrics listeners are added."""
+        domain_client = MagicMock()
+        domain_client.metrics_listeners = []
+        tracker = ListenerStatsTracker('listenerId', 'strategyLog', 'strategyId', None, domain_client)
+        tracker.record_success([], 0, None)
+        domain_client.report_listener_stats.assert_not_called()
+        domain_client.metrics_listeners = [MagicMock()]
+        tracker.record_error(Exception('test'), 1)
+        stats = domain_client.report_listener_stats.call_args[0][0]
+        assert stats['consecutiveErrors'] == 1
+        assert stats['polls'] == 1
+        tracker.close()
+        assert domain_client.report_listener_removed.call_args[0][0]['listenerId'] == 'listenerId'
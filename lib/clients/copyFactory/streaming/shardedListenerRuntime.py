@@ -0,0 +1,578 @@
+from ....models import random_id, date
+from ....logger import LoggerManager
+from .consistentHashRing import ConsistentHashRing
+from .transactionListener import TransactionListener
+from .userLogListener import UserLogListener
+from .stopoutListener import StopoutListener
+from .listenerStats import StreamListenerType
+from .transactionDedup import TransactionDedup
+from .listenerCallback import invoke_listener_callback
+from ..copyFactory_models import LogLevel
+from typing_extensions import TypedDict
+from typing import Optional, Dict, List, Tuple, Any, TYPE_CHECKING
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+import multiprocessing
+import importlib
+import threading
+import asyncio
+import pickle
+import struct
+import math
+import os
+if TYPE_CHECKING:
+    from ....copyFactory import CopyFactoryOpts
+
+PACKETS_FRAME = 1
+"""Frame with packets received by a listener and the stream position after them."""
+ERROR_FRAME = 2
+"""Frame with an error received by a listener."""
+_frame_header = struct.Struct('!BB')
+
+_listener_methods = {
+    'strategyTransactions': ('history_api', 'add_strategy_transaction_listener',
+                             'remove_strategy_transaction_listener', 'on_transaction'),
+    'subscriberTransactions': ('history_api', 'add_subscriber_transaction_listener',
+                               'remove_subscriber_transaction_listener', 'on_transaction'),
+    'strategyLog': ('trading_api', 'add_strategy_log_listener', 'remove_strategy_log_listener', 'on_user_log'),
+    'subscriberLog': ('trading_api', 'add_subscriber_log_listener', 'remove_subscriber_log_listener', 'on_user_log'),
+    'stopouts': ('trading_api', 'add_stopout_listener', 'remove_stopout_listener', 'on_stopout')
+}
+"""API, add method, remove method and listener callback of each stream type."""
+
+
+class ShardedListenerRuntimeOpts(TypedDict, total=False):
+    """Sharded listener runtime options."""
+    workers: Optional[int]
+    """Amount of worker processes, default is the amount of CPUs."""
+    virtualNodes: Optional[int]
+    """Amount of consistent hash ring points per worker, default value is 64."""
+    balanceFactor: Optional[float]
+    """Maximum load of a worker relative to the average load, e.g. 0.25 means that a worker runs at most 25% more
+    listeners than the average. Default value is 0.25."""
+    copyFactoryOpts: Optional['CopyFactoryOpts']
+    """Options of CopyFactory instances of workers. Options are passed to worker processes, so transport and executor,
+    if set, must be picklable. Thread pools are not picklable, use executor option of the runtime to run synchronous
+    callbacks in a thread pool of the parent process."""
+    shutdownTimeoutInSeconds: Optional[float]
+    """Time to wait for workers to exit on close before terminating them, default value is 10."""
+    executor: Optional[Executor]
+    """Thread pool to run synchronous listener callbacks in. If not specified, synchronous callbacks run on the event
+    loop."""
+
+
+def encode_frame(frame_type: int, listener_id: str, payload: Any) -> bytes:
+    """Encodes a frame sent from a worker to the parent process. A frame consists of frame type byte, listener id
+    length byte, listener id and pickled payload.
+
+    Args:
+        frame_type: Frame type.
+        listener_id: Listener id.
+        payload: Frame payload.
+
+    Returns:
+        Encoded frame.
+    """
+    listener_id = listener_id.encode()
+    return _frame_header.pack(frame_type, len(listener_id)) + listener_id + \
+        pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode_frame(frame: bytes) -> Tuple[int, str, Any]:
+    """Decodes a frame sent from a worker to the parent process.
+
+    Args:
+        frame: Encoded frame.
+
+    Returns:
+        Tuple of frame type, listener id and payload.
+    """
+    frame_type, length = _frame_header.unpack_from(frame)
+    offset = _frame_header.size
+    listener_id = frame[offset:offset + length].decode()
+    return frame_type, listener_id, pickle.loads(memoryview(frame)[offset + length:])
+
+
+def _encode_error(error: Exception) -> Tuple[str, str, tuple, dict]:
+    # SDK exceptions take more constructor arguments than they keep in args, so they are restored without calling
+    # constructors
+    state = error.__dict__
+    try:
+        pickle.dumps((error.args, state))
+    except Exception:
+        return 'builtins', 'Exception', (f'{error.__class__.__name__}: {error}',), {}
+    return error.__class__.__module__, error.__class__.__qualname__, error.args, state
+
+
+def _decode_error(payload: Tuple[str, str, tuple, dict]) -> Exception:
+    module, name, args, state = payload
+    try:
+        error_class = getattr(importlib.import_module(module), name)
+        error = error_class.__new__(error_class)
+        error.args = args
+        error.__dict__.update(state)
+        return error
+    except Exception:
+        return Exception(f'{name}: {args[0] if args else ""}')
+
+
+class _ForwardingListener(TransactionListener, UserLogListener, StopoutListener):
+    """Listener of a worker process which sends packets and errors to the parent process."""
+
+    def __init__(self, listener_id: str, type: StreamListenerType, events):
+        self._listenerId = listener_id
+        self._type = type
+        self._events = events
+
+    async def on_transaction(self, transaction_event):
+        self._forward(transaction_event)
+
+    async def on_user_log(self, log_event):
+        self._forward(log_event)
+
+    async def on_stopout(self, strategy_stopout_event):
+        self._forward(strategy_stopout_event)
+
+    async def on_error(self, error: Exception):
+        self._events.send_bytes(encode_frame(ERROR_FRAME, self._listenerId, _encode_error(error)))
+
+    def _forward(self, packets: List[dict]):
+        if not packets:
+            return
+        # stream position is calculated the same way as listener managers do, so that the listener can resume from it
+        # on another worker, whatever the order of packets in a page
+        if self._type == 'stopouts':
+            cursor = max(packet['sequenceNumber'] for packet in packets)
+        elif self._type in ('strategyTransactions', 'subscriberTransactions'):
+            cursor = max(date(packet['time']) for packet in packets)
+        else:
+            cursor = max(date(packet['time']) for packet in packets) + timedelta(milliseconds=1)
+        self._events.send_bytes(encode_frame(PACKETS_FRAME, self._listenerId, (packets, cursor)))
+
+
+def _run_worker(token: str, copy_factory_opts: dict, commands, events):
+    asyncio.run(_run_worker_loop(token, copy_factory_opts, commands, events))
+
+
+async def _run_worker_loop(token: str, copy_factory_opts: dict, commands, events):
+    from ....copyFactory import CopyFactory
+    copy_factory = CopyFactory(token, copy_factory_opts)
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def read_commands():
+        while True:
+            try:
+                command = commands.recv()
+            except (EOFError, OSError):
+                command = ('stop',)
+            loop.call_soon_threadsafe(queue.put_nowait, command)
+            if command[0] == 'stop':
+                break
+    threading.Thread(target=read_commands, daemon=True).start()
+    listeners = {}
+    while True:
+        command = await queue.get()
+        if command[0] == 'add':
+            listener_id, type, args, kwargs = command[1:]
+            api, add_method = _listener_methods[type][:2]
+            listeners[listener_id] = (type, getattr(getattr(copy_factory, api), add_method)(
+                _ForwardingListener(listener_id, type, events), *args, **kwargs))
+        elif command[0] == 'remove':
+            if command[1] in listeners:
+                type, worker_listener_id = listeners.pop(command[1])
+                api, add_method, remove_method = _listener_methods[type][:3]
+                getattr(getattr(copy_factory, api), remove_method)(worker_listener_id)
+        else:
+            break
+    await copy_factory.close()
+    events.close()
+
+
+class _Worker:
+    """Worker process of the sharded listener runtime as seen by the parent process."""
+
+    def __init__(self, index: int, process, commands, events):
+        self.index = index
+        self.process = process
+        self.commands = commands
+        self.events = events
+        self.queue = asyncio.Queue()
+        self.dispatch_task = None
+        self.stopping = False
+
+
+class ShardedListenerRuntime:
+    """Runs transaction, user log and stopout stream listeners in a pool of worker processes, so that stream requests,
+    JSON decoding and date conversion are spread over CPU cores. Listeners are assigned to workers by consistent
+    hashing of strategy or subscriber id with bounded worker load. Packets are sent back to the parent process over
+    pipes as binary frames and listener callbacks are invoked on the parent event loop, or in the executor for
+    synchronous callbacks, in the order packets are received from each worker. Listeners are moved between workers
+    when load becomes unbalanced after listeners are added or removed, or when the pool is resized, and resume from
+    the last stream position delivered. Unlike listeners run by CopyFactory API clients, callbacks are not invoked for
+    empty packet lists and workers do not wait for callbacks before requesting next packets."""
+
+    def __init__(self, token: str, opts: ShardedListenerRuntimeOpts = None):
+        """Inits sharded listener runtime instance.
+
+        Args:
+            token: Authorization token.
+            opts: Runtime options.
+        """
+        opts: ShardedListenerRuntimeOpts = opts or {}
+        self._token = token
+        self._workerCount = opts['workers'] if 'workers' in opts else (os.cpu_count() or 1)
+        self._virtualNodes = opts['virtualNodes'] if 'virtualNodes' in opts else 64
+        self._balanceFactor = opts['balanceFactor'] if 'balanceFactor' in opts else 0.25
+        self._copyFactoryOpts = opts['copyFactoryOpts'] if 'copyFactoryOpts' in opts else {}
+        stream_listener_opts = self._copyFactoryOpts['streamListenerOpts'] \
+            if 'streamListenerOpts' in self._copyFactoryOpts else {}
+        self._dedupWindowSize = stream_listener_opts['dedupWindowSize'] if 'dedupWindowSize' in stream_listener_opts \
+            else 10000
+        self._shutdownTimeout = opts['shutdownTimeoutInSeconds'] if 'shutdownTimeoutInSeconds' in opts else 10
+        self._executor = opts['executor'] if 'executor' in opts else None
+        self._context = multiprocessing.get_context('spawn')
+        self._ring = ConsistentHashRing(self._workerCount, self._virtualNodes)
+        self._workers: List[_Worker] = []
+        self._workerListeners: List[Dict[str, None]] = []
+        self._listeners: Dict[str, dict] = {}
+        self._loop = None
+        self._started = False
+        self._logger = LoggerManager.get_logger('ShardedListenerRuntime')
+
+    @property
+    def worker_loads(self) -> List[int]:
+        """Returns amount of listeners run by each worker.
+
+        Returns:
+            Amount of listeners of each worker.
+        """
+        return [len(listeners) for listeners in self._workerListeners]
+
+    @property
+    def assignments(self) -> Dict[str, Optional[int]]:
+        """Returns worker each listener is run by.
+
+        Returns:
+            Dictionary of worker numbers by listener id, None for listeners added before the runtime is started.
+        """
+        return {listener_id: record['worker'] for listener_id, record in self._listeners.items()}
+
+    async def start(self):
+        """Starts worker processes and the listeners added so far."""
+        if self._started:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._started = True
+        self._resize_workers(self._workerCount)
+        self._rebalance()
+
+    async def close(self):
+        """Stops worker processes. Listeners are kept and restarted if the runtime is started again."""
+        if not self._started:
+            return
+        self._started = False
+        workers = self._workers
+        self._workers = []
+        self._workerListeners = []
+        for record in self._listeners.values():
+            record['worker'] = None
+        await self._stop_workers(workers)
+
+    async def resize(self, workers: int):
+        """Changes amount of worker processes and moves listeners between workers. Only listeners of removed workers,
+        listeners which belong to added workers and listeners of overloaded workers are moved.
+
+        Args:
+            workers: Amount of worker processes.
+        """
+        self._workerCount = workers
+        self._ring = ConsistentHashRing(workers, self._virtualNodes)
+        for record in self._listeners.values():
+            record['preferredWorker'] = self._ring.node_for(record['key'])
+        if self._started:
+            removed = self._resize_workers(workers)
+            self._rebalance()
+            await self._stop_workers(removed)
+
+    def add_strategy_transaction_listener(self, listener: TransactionListener, strategy_id: str,
+                                          start_time: datetime = None) -> str:
+        """Adds a strategy transaction listener.
+
+        Args:
+            listener: Transaction listener.
+            strategy_id: Strategy id.
+            start_time: Transaction search start time.
+
+        Returns:
+            Listener id.
+        """
+        return self._add_listener('strategyTransactions', listener, strategy_id, [strategy_id],
+                                  {'start_time': start_time})
+
+    def add_subscriber_transaction_listener(self, listener: TransactionListener, subscriber_id: str,
+                                            start_time: datetime = None) -> str:
+        """Adds a subscriber transaction listener.
+
+        Args:
+            listener: Transaction listener.
+            subscriber_id: Subscriber id.
+            start_time: Transaction search start time.
+
+        Returns:
+            Listener id.
+        """
+        return self._add_listener('subscriberTransactions', listener, subscriber_id, [subscriber_id],
+                                  {'start_time': start_time})
+
+    def add_strategy_log_listener(self, listener: UserLogListener, strategy_id: str, start_time: datetime = None,
+                                  position_id: str = None, level: LogLevel = None, limit: int = None) -> str:
+        """Adds a strategy log listener.
+
+        Args:
+            listener: User log listener.
+            strategy_id: Strategy id.
+            start_time: Log search start time.
+            position_id: Position id filter.
+            level: Minimum severity level.
+            limit: Log pagination limit.
+
+        Returns:
+            Listener id.
+        """
+        return self._add_listener('strategyLog', listener, strategy_id, [strategy_id], {
+            'start_time': start_time, 'position_id': position_id, 'level': level, 'limit': limit})
+
+    def add_subscriber_log_listener(self, listener: UserLogListener, subscriber_id: str, start_time: datetime = None,
+                                    strategy_id: str = None, position_id: str = None, level: LogLevel = None,
+                                    limit: int = None) -> str:
+        """Adds a subscriber log listener.
+
+        Args:
+            listener: User log listener.
+            subscriber_id: Subscriber id.
+            start_time: Log search start time.
+            strategy_id: Strategy id filter.
+            position_id: Position id filter.
+            level: Minimum severity level.
+            limit: Log pagination limit.
+
+        Returns:
+            Listener id.
+        """
+        return self._add_listener('subscriberLog', listener, subscriber_id, [subscriber_id], {
+            'start_time': start_time, 'strategy_id': strategy_id, 'position_id': position_id, 'level': level,
+            'limit': limit})
+
+    def add_stopout_listener(self, listener: StopoutListener, account_id: str = None, strategy_id: str = None,
+                             sequence_number: int = None) -> str:
+        """Adds a stopout listener.
+
+        Args:
+            listener: Stopout listener.
+            account_id: Account id.
+            strategy_id: Strategy id.
+            sequence_number: Sequence number.
+
+        Returns:
+            Listener id.
+        """
+        return self._add_listener('stopouts', listener, account_id or strategy_id, [], {
+            'account_id': account_id, 'strategy_id': strategy_id, 'sequence_number': sequence_number})
+
+    def remove_listener(self, listener_id: str):
+        """Removes a listener of any type.
+
+        Args:
+            listener_id: Listener id.
+        """
+        record = self._listeners.pop(listener_id, None)
+        if record is None or record['worker'] is None:
+            return
+        self._workerListeners[record['worker']].pop(listener_id, None)
+        self._send(record['worker'], ('remove', listener_id))
+        self._shed_excess_load()
+
+    def _add_listener(self, type: StreamListenerType, listener, id: Optional[str], args: list, kwargs: dict) -> str:
+        listener_id = random_id(10)
+        key = id or type
+        self._listeners[listener_id] = {'type': type, 'listener': listener, 'key': key, 'args': args,
+                                        'kwargs': kwargs, 'worker': None,
+                                        'preferredWorker': self._ring.node_for(key)}
+        if _listener_methods[type][3] == 'on_transaction':
+            # a moved listener resumes from the time of the newest transaction delivered inclusive, transactions
+            # delivered by the previous worker are dropped
+            self._listeners[listener_id]['dedup'] = TransactionDedup(kwargs['start_time'], self._dedupWindowSize)
+        if self._started:
+            self._assign(listener_id, self._ring.node_for(key, self.worker_loads, self._capacity()))
+        return listener_id
+
+    def _capacity(self) -> int:
+        return max(1, math.ceil(len(self._listeners) / self._workerCount * (1 + self._balanceFactor)))
+
+    def _assign(self, listener_id: str, worker: int):
+        record = self._listeners[listener_id]
+        if record['worker'] == worker:
+            return
+        if record['worker'] is not None:
+            self._workerListeners[record['worker']].pop(listener_id, None)
+            self._send(record['worker'], ('remove', listener_id))
+        record['worker'] = worker
+        self._workerListeners[worker][listener_id] = None
+        self._send(worker, ('add', listener_id, record['type'], record['args'], record['kwargs']))
+
+    def _shed_excess_load(self):
+        capacity = self._capacity()
+        for worker, listeners in enumerate(self._workerListeners):
+            excess = len(listeners) - capacity
+            if excess > 0:
+                # listeners run away from their preferred worker move first, as they were placed there due to load
+                candidates = sorted(listeners, key=lambda listener_id:
+                                    self._listeners[listener_id]['preferredWorker'] == worker)[:excess]
+                for listener_id in candidates:
+                    del listeners[listener_id]
+                    self._listeners[listener_id]['worker'] = None
+                    self._send(worker, ('remove', listener_id))
+                    self._assign(listener_id, self._ring.node_for(self._listeners[listener_id]['key'],
+                                                                  self.worker_loads, capacity))
+
+    def _rebalance(self):
+        capacity = self._capacity()
+        loads = [0] * self._workerCount
+        targets = {}
+        # listeners run by their preferred worker stay first, then listeners go to their preferred worker if it has
+        # room, stay on their current worker if it has room or go to the first worker with room clockwise on the ring
+        for listener_id, record in self._listeners.items():
+            if record['worker'] == record['preferredWorker'] and loads[record['worker']] < capacity:
+                targets[listener_id] = record['worker']
+                loads[record['worker']] += 1
+        for listener_id, record in self._listeners.items():
+            if listener_id in targets:
+                continue
+            worker = record['worker']
+            if loads[record['preferredWorker']] < capacity:
+                worker = record['preferredWorker']
+            elif worker is None or worker >= self._workerCount or loads[worker] >= capacity:
+                worker = self._ring.node_for(record['key'], loads, capacity)
+            targets[listener_id] = worker
+            loads[worker] += 1
+        for listener_id, worker in targets.items():
+            record = self._listeners[listener_id]
+            if record['worker'] is not None and record['worker'] >= self._workerCount:
+                # removed workers are stopped without removing listeners one by one
+                record['worker'] = None
+            self._assign(listener_id, worker)
+
+    def _resize_workers(self, workers: int) -> List[_Worker]:
+        while len(self._workers) < workers:
+            self._workers.append(self._start_worker(len(self._workers)))
+            self._workerListeners.append({})
+        removed = self._workers[workers:]
+        self._workers = self._workers[:workers]
+        self._workerListeners = self._workerListeners[:workers]
+        return removed
+
+    def _start_worker(self, index: int) -> _Worker:
+        commands_reader, commands_writer = self._context.Pipe(duplex=False)
+        events_reader, events_writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=_run_worker, name=f'copyfactory-listener-worker-{index}', daemon=True,
+                                        args=(self._token, self._copyFactoryOpts, commands_reader, events_writer))
+        process.start()
+        commands_reader.close()
+        events_writer.close()
+        worker = _Worker(index, process, commands_writer, events_reader)
+        worker.dispatch_task = asyncio.create_task(self._dispatch(worker))
+        threading.Thread(target=self._read_events, args=(worker,), daemon=True,
+                         name=f'copyfactory-listener-worker-{index}-reader').start()
+        return worker
+
+    async def _stop_workers(self, workers: List[_Worker]):
+        for worker in workers:
+            worker.stopping = True
+            try:
+                worker.commands.send(('stop',))
+            except OSError:
+                pass
+
+        def join():
+            for worker in workers:
+                worker.process.join(self._shutdownTimeout)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join()
+        await self._loop.run_in_executor(None, join)
+        for worker in workers:
+            worker.commands.close()
+            worker.dispatch_task.cancel()
+
+    def _send(self, worker: int, command: tuple):
+        try:
+            self._workers[worker].commands.send(command)
+        except OSError as err:
+            self._logger.error(f'Failed to send command to listener worker {worker}', err)
+
+    def _read_events(self, worker: _Worker):
+        while True:
+            try:
+                frame = worker.events.recv_bytes()
+            except (EOFError, OSError):
+                break
+            try:
+                event = decode_frame(frame)
+            except Exception as err:
+                self._logger.error(f'Failed to decode frame of listener worker {worker.index}', err)
+                continue
+            try:
+                self._loop.call_soon_threadsafe(worker.queue.put_nowait, event)
+            except RuntimeError:
+                # event loop is closed
+                break
+        worker.events.close()
+        try:
+            self._loop.call_soon_threadsafe(self._on_worker_exit, worker)
+        except RuntimeError:
+            pass
+
+    def _on_worker_exit(self, worker: _Worker):
+        if worker.stopping or not self._is_current(worker):
+            return
+        self._logger.error(f'Listener worker {worker.index} exited with code {worker.process.exitcode}, restarting')
+        worker.dispatch_task.cancel()
+        worker.commands.close()
+        self._workers[worker.index] = self._start_worker(worker.index)
+        for listener_id in self._workerListeners[worker.index]:
+            record = self._listeners[listener_id]
+            self._send(worker.index, ('add', listener_id, record['type'], record['args'], record['kwargs']))
+
+    def _is_current(self, worker: _Worker) -> bool:
+        return worker.index < len(self._workers) and self._workers[worker.index] is worker
+
+    async def _dispatch(self, worker: _Worker):
+        while True:
+            frame_type, listener_id, payload = await worker.queue.get()
+            record = self._listeners.get(listener_id)
+            if record is None or record['worker'] != worker.index or not self._is_current(worker):
+                # frames of removed listeners and of listeners moved to another worker are dropped, moved listeners
+                # resume from the last position delivered
+                continue
+            try:
+                if frame_type == PACKETS_FRAME:
+                    packets, cursor = payload
+                    if 'dedup' in record:
+                        packets = record['dedup'].filter(packets)
+                        if not packets:
+                            continue
+                    record['kwargs']['sequence_number' if record['type'] == 'stopouts' else 'start_time'] = cursor
+                    await invoke_listener_callback(getattr(record['listener'], _listener_methods[record['type']][3]),
+                                                   self._executor, packets)
+                    if 'dedup' in record:
+                        record['dedup'].commit(packets)
+                else:
+                    error = _decode_error(payload)
+                    if error.__class__.__name__ == 'NotFoundException':
+                        # the worker has removed the listener already
+                        self._listeners.pop(listener_id, None)
+                        self._workerListeners[worker.index].pop(listener_id, None)
+                    await invoke_listener_callback(record['listener'].on_error, self._executor, error)
+            except Exception as err:
+                self._logger.error(f'Failed to invoke listener {listener_id}', err, extra={'listener_id': listener_id})
@@ -0,0 +1,225 @@
+from ....models import date
+from ...errorHandler import NotFoundException
+from .shardedListenerRuntime import ShardedListenerRuntime, encode_frame, decode_frame, PACKETS_FRAME, \
+    ERROR_FRAME, _encode_error, _decode_error, _ForwardingListener
+from .transactionListener import TransactionListener
+from mock import MagicMock, patch
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+import httpx
+import threading
+import asyncio
+import json
+import pytest
+
+
+class StreamServer:
+    """Stand-in of provisioning and transaction stream APIs returning a single transaction per subscriber."""
+
+    async def __call__(self, scope, receive, send):
+        path = scope['path']
+        query = parse_qs(scope['query_string'].decode())
+        status, body = 200, []
+        if path == '/users/current/servers/mt-client-api':
+            body = {'domain': 'agiliumtrade.ai'}
+        elif path == '/users/current/regions':
+            body = ['vint-hill']
+        elif path.endswith('/transactions/stream'):
+            subscriber_id = path.split('/')[4]
+            if subscriber_id == 'missing':
+                status, body = 404, {'id': 1, 'error': 'NotFoundError', 'message': 'Subscriber not found'}
+            elif 'startTime' not in query:
+                body = [{'id': f'{subscriber_id}-1', 'type': 'DEAL_TYPE_BUY', 'time': '2020-08-08T08:00:00.000Z'}]
+            else:
+                await asyncio.sleep(0.05)
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': json.dumps(body).encode()})
+
+
+class CollectingListener(TransactionListener):
+
+    def __init__(self):
+        self.transactions = []
+        self.errors = []
+
+    async def on_transaction(self, transaction_event):
+        self.transactions += transaction_event
+
+    async def on_error(self, error):
+        self.errors.append(error)
+
+
+class SyncListener(TransactionListener):
+
+    def __init__(self):
+        self.transactions = []
+        self.errors = []
+        self.threads = set()
+
+    def on_transaction(self, transaction_event):
+        self.threads.add(threading.get_ident())
+        self.transactions += transaction_event
+
+    def on_error(self, error):
+        self.threads.add(threading.get_ident())
+        self.errors.append(error)
+
+
+def create_stub_runtime(workers: int, opts: dict = None) -> ShardedListenerRuntime:
+    runtime = ShardedListenerRuntime('token', {'workers': workers, **(opts or {})})
+    runtime._start_worker = lambda index: MagicMock(index=index)
+    runtime._send = MagicMock()
+    return runtime
+
+
+class TestFrames:
+
+    def test_encode_frames(self):
+        """Should encode and decode packet frames."""
+        packets = [{'id': '1', 'time': '2020-08-08T08:00:00.000Z'}]
+        cursor = date('2020-08-08T08:00:00.001Z')
+        assert decode_frame(encode_frame(PACKETS_FRAME, 'listenerId', (packets, cursor))) == \
+            (PACKETS_FRAME, 'listenerId', (packets, cursor))
+
+    def test_encode_errors(self):
+        """Should restore class and attributes of errors which cannot be constructed from their args."""
+        error = _decode_error(_encode_error(NotFoundException('Subscriber not found')))
+        assert isinstance(error, NotFoundException)
+        assert error.status_code == 404
+        assert str(error) == 'Subscriber not found'
+
+    @pytest.mark.asyncio
+    async def test_forward_newest_position_of_page(self):
+        """Should forward the newest position of a page whatever the order of packets in it."""
+        events = MagicMock()
+        listener = _ForwardingListener('listenerId', 'subscriberTransactions', events)
+        packets = [{'id': '1', 'time': date('2020-08-08T07:00:00.000Z')},
+                   {'id': '2', 'time': date('2020-08-08T08:00:00.000Z')}]
+        await listener.on_transaction(packets)
+        assert decode_frame(events.send_bytes.call_args[0][0])[2] == (packets, date('2020-08-08T08:00:00.000Z'))
+        listener = _ForwardingListener('listenerId', 'stopouts', events)
+        await listener.on_stopout([{'sequenceNumber': 3}, {'sequenceNumber': 2}])
+        assert decode_frame(events.send_bytes.call_args[0][0])[2][1] == 3
+
+
+class TestListenerPlacement:
+
+    @pytest.mark.asyncio
+    async def test_bound_worker_load(self):
+        """Should keep worker load within capacity as listeners are added and removed."""
+        runtime = create_stub_runtime(4)
+        await runtime.start()
+        listener_ids = [runtime.add_subscriber_transaction_listener(CollectingListener(), f'subscriber{index}')
+                        for index in range(200)]
+        assert sum(runtime.worker_loads) == 200
+        assert max(runtime.worker_loads) <= 63
+        busiest = runtime.worker_loads.index(max(runtime.worker_loads))
+        for listener_id in listener_ids[:150]:
+            if runtime.assignments[listener_id] != busiest:
+                runtime.remove_listener(listener_id)
+        assert max(runtime.worker_loads) <= runtime._capacity()
+
+    @pytest.mark.asyncio
+    async def test_rebalance_on_resize(self):
+        """Should only move listeners of removed workers or listeners which belong to added workers on resize."""
+        runtime = create_stub_runtime(4)
+        await runtime.start()
+        for index in range(400):
+            runtime.add_subscriber_transaction_listener(CollectingListener(), f'subscriber{index}')
+        before = runtime.assignments
+        await runtime.resize(5)
+        after = runtime.assignments
+        moved = [listener_id for listener_id in before if before[listener_id] != after[listener_id]]
+        assert runtime.worker_loads[4] > 0
+        assert len(moved) < 0.4 * len(before)
+        assert max(runtime.worker_loads) <= runtime._capacity()
+        await runtime.resize(3)
+        resized = runtime.assignments
+        assert all(worker < 3 for worker in resized.values())
+        assert all(resized[listener_id] == after[listener_id] for listener_id in after
+                   if after[listener_id] < 3 and after[listener_id] == runtime._listeners[listener_id]
+                   ['preferredWorker'])
+
+    @pytest.mark.asyncio
+    async def test_place_listeners_added_before_start(self):
+        """Should start listeners added before the runtime is started."""
+        runtime = create_stub_runtime(2)
+        listener_id = runtime.add_subscriber_transaction_listener(CollectingListener(), 'subscriberId')
+        assert runtime.assignments[listener_id] is None
+        await runtime.start()
+        assert runtime.assignments[listener_id] is not None
+        runtime._send.assert_called_with(runtime.assignments[listener_id],
+                                         ('add', listener_id, 'subscriberTransactions', ['subscriberId'],
+                                          {'start_time': None}))
+
+    @pytest.mark.asyncio
+    async def test_drop_transactions_delivered_before_move(self):
+        """Should drop transactions a moved listener receives again from the position it resumed from."""
+        runtime = create_stub_runtime(2)
+        await runtime.start()
+        listener = CollectingListener()
+        listener_id = runtime.add_subscriber_transaction_listener(listener, 'subscriberId')
+        worker = runtime._workers[runtime.assignments[listener_id]]
+        worker.queue = asyncio.Queue()
+        dispatch_task = asyncio.create_task(runtime._dispatch(worker))
+        first = [{'id': '2', 'time': '2020-08-08T08:00:00.000Z'}, {'id': '1', 'time': '2020-08-07T08:00:00.000Z'}]
+        second = [{'id': '3', 'time': '2020-08-08T08:00:00.000Z'}, first[0]]
+        for packets in [first, second, first[:1]]:
+            worker.queue.put_nowait((PACKETS_FRAME, listener_id, (packets, date(packets[0]['time']))))
+        await asyncio.sleep(0.01)
+        dispatch_task.cancel()
+        assert [transaction['id'] for transaction in listener.transactions] == ['2', '1', '3']
+        assert runtime._listeners[listener_id]['kwargs']['start_time'] == date('2020-08-08T08:00:00.000Z')
+
+    @pytest.mark.asyncio
+    async def test_invoke_synchronous_listener_callbacks(self):
+        """Should invoke synchronous listener callbacks in the executor."""
+        with ThreadPoolExecutor(1) as executor:
+            runtime = create_stub_runtime(1, {'executor': executor})
+            runtime._logger = MagicMock()
+            await runtime.start()
+            listener = SyncListener()
+            listener_id = runtime.add_subscriber_transaction_listener(listener, 'subscriberId')
+            worker = runtime._workers[0]
+            worker.queue = asyncio.Queue()
+            dispatch_task = asyncio.create_task(runtime._dispatch(worker))
+            packets = [{'id': '1', 'time': '2020-08-08T08:00:00.000Z'}]
+            worker.queue.put_nowait((PACKETS_FRAME, listener_id, (packets, date(packets[0]['time']))))
+            worker.queue.put_nowait((ERROR_FRAME, listener_id, _encode_error(Exception('test'))))
+            await asyncio.sleep(0.05)
+            dispatch_task.cancel()
+            assert listener.transactions == packets
+            assert str(listener.errors[0]) == 'test'
+            assert threading.get_ident() not in listener.threads
+            runtime._logger.error.assert_not_called()
+
+
+class TestWorkerProcesses:
+
+    @pytest.mark.asyncio
+    async def test_stream_packets_from_workers(self):
+        """Should stream packets received by worker processes to listeners."""
+        runtime = ShardedListenerRuntime('token', {
+            'workers': 2, 'copyFactoryOpts': {'transport': httpx.ASGITransport(app=StreamServer())}})
+        listeners = [CollectingListener() for index in range(4)]
+        listener_ids = [runtime.add_subscriber_transaction_listener(listener, f'subscriber{index}')
+                        for index, listener in enumerate(listeners)]
+        missing_listener = CollectingListener()
+        missing_listener_id = runtime.add_subscriber_transaction_listener(missing_listener, 'missing')
+        await runtime.start()
+        try:
+            for i in range(100):
+                if all(listener.transactions for listener in listeners) and missing_listener.errors:
+                    break
+                await asyncio.sleep(0.1)
+            for index, listener in enumerate(listeners):
+                assert [transaction['id'] for transaction in listener.transactions] == [f'subscriber{index}-1']
+            assert isinstance(missing_listener.errors[0], NotFoundException)
+            assert missing_listener_id not in runtime.assignments
+            assert runtime._listeners[listener_ids[0]]['kwargs']['start_time'] == date('2020-08-08T08:00:00.000Z')
+            runtime.remove_listener(listener_ids[0])
+            assert listener_ids[0] not in runtime.assignments
+        finally:
+            await runtime.close()
+        assert all(not worker.process.is_alive() for worker in runtime._workers)
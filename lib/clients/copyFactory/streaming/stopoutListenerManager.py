@@ -3,23 +3,41 @@ from ...domain_client import DomainClient
 from ....models import random_id
 from .stopoutListener import StopoutListener
 from ....logger import LoggerManager
+from .listenerCallback import invoke_listener_callback
+from .listenerJobs import ListenerJobs
+from .adaptivePoll import AdaptivePoll
+from .streamListenerOpts import StreamListenerOpts
+from .stopoutSequencer import StopoutSequencer, Gap
+from concurrent.futures import Executor
+from .listenerStats import ListenerStatsTracker, StreamListenerStats
+from typing import Deque, Dict, List
+from collections import deque
 import math
 import asyncio
+import time
 
 
 class StopoutListenerManager(MetaApiClient):
     """Stopout event listener manager."""
 
-    def __init__(self, domain_client: DomainClient):
+    def __init__(self, domain_client: DomainClient, executor: Executor = None,
+                 listener_opts: StreamListenerOpts = None):
         """Inits stopout listener manager instance.
 
         Args:
             domain_client: Domain client.
+            executor: Thread or process pool to run synchronous listener callbacks in. If not specified, callbacks
+                run on the event loop.
+            listener_opts: Stream listener options.
         """
         super().__init__(domain_client)
         self._domainClient = domain_client
+        self._executor = executor
+        self._listenerOpts: StreamListenerOpts = listener_opts or {}
         self._stopoutListeners = {}
         self._errorThrottleTime = 1
+        self._listenerStats: Dict[str, ListenerStatsTracker] = {}
+        self._jobs = ListenerJobs()
         self._logger = LoggerManager.get_logger('StopoutListenerManager')
 
     @property
@@ -46,8 +64,11 @@ class StopoutListenerManager(MetaApiClient):
         """
         listener_id = random_id(10)
         self._stopoutListeners[listener_id] = listener
-        asyncio.create_task(self._start_stopout_event_job(listener_id, listener, account_id, strategy_id,
-                                                          sequence_number))
+        stats = ListenerStatsTracker(listener_id, 'stopouts', account_id or strategy_id, sequence_number,
+                                     self._domainClient)
+        self._listenerStats[listener_id] = stats
+        job = self._start_stopout_event_job(listener_id, listener, stats, account_id, strategy_id, sequence_number)
+        self._jobs.start(listener_id, job)
         return listener_id
 
     def remove_stopout_listener(self, listener_id: str):
@@ -58,33 +79,174 @@ class StopoutListenerManager(MetaApiClient):
         """
         if listener_id in self._stopoutListeners:
             del self._stopoutListeners[listener_id]
+            self._remove_stats(listener_id)
+            self._jobs.stop(listener_id)
 
-    async def _start_stopout_event_job(self, listener_id: str, listener: StopoutListener, account_id: str = None,
-                                       strategy_id: str = None, sequence_number: int = None):
+    def stats(self) -> List[StreamListenerStats]:
+        """Returns health statistics of active listeners.
+
+        Returns:
+            Listener statistics.
+        """
+        return [tracker.stats() for tracker in self._listenerStats.values()]
+
+    async def close(self, timeout: float = 10):
+        """Removes all listeners, cancels their jobs including stream requests in flight and waits until the jobs stop.
+
+        Args:
+            timeout: Maximum time to wait for jobs to stop in seconds, default value is 10.
+        """
+        self._stopoutListeners.clear()
+        for stats in self._listenerStats.values():
+            stats.close()
+        self._listenerStats.clear()
+        await self._jobs.close(timeout)
+
+    def _remove_stats(self, listener_id: str):
+        stats = self._listenerStats.pop(listener_id, None)
+        if stats:
+            stats.close()
+
+    async def _start_stopout_event_job(self, listener_id: str, listener: StopoutListener, stats: ListenerStatsTracker,
+                                       account_id: str = None, strategy_id: str = None, sequence_number: int = None):
         throttle_time = self._errorThrottleTime
-        while listener_id in self._stopoutListeners:
-            opts = {
-                'url': '/users/current/stopouts/stream',
-                'method': 'GET',
-                'params': {
-                    'previousSequenceNumber': sequence_number,
-                    'subscriberId': account_id,
-                    'strategyId': strategy_id,
-                    'limit': 1000
-                },
-                'headers': {
-                    'auth-token': self._token
-                },
-            }
+        poll = AdaptivePoll(self._listenerOpts['limit'] if 'limit' in self._listenerOpts else 1000, self._listenerOpts)
+        # sequence numbers of streams filtered by subscriber or strategy are not consecutive, so gaps are detected in
+        # them only if enabled explicitly
+        backfill_attempts = self._listenerOpts['backfillAttempts'] if 'backfillAttempts' in self._listenerOpts else \
+            (0 if account_id or strategy_id else 3)
+        sequencer = StopoutSequencer(sequence_number, backfill_attempts > 0)
+        # live polls and backfills deliver stopouts one at a time, so that they stay in sequence order
+        delivery_lock = asyncio.Lock()
+        max_concurrent_backfills = self._listenerOpts['maxConcurrentBackfills'] \
+            if 'maxConcurrentBackfills' in self._listenerOpts else 2
+        max_pending_backfills = self._listenerOpts['maxPendingBackfills'] \
+            if 'maxPendingBackfills' in self._listenerOpts else 10
+        # gaps waiting for a backfill slot, oldest first
+        backfill_queue: Deque[Gap] = deque()
+        backfills = set()
+        try:
+            while listener_id in self._stopoutListeners:
+                opts = {
+                    'url': '/users/current/stopouts/stream',
+                    'method': 'GET',
+                    'params': {
+                        'previousSequenceNumber': sequencer.received,
+                        'subscriberId': account_id,
+                        'strategyId': strategy_id,
+                        'limit': poll.limit
+                    },
+                    'headers': {
+                        'auth-token': self._token
+                    },
+                    'convertDates': True
+                }
+                try:
+                    packets = await self._domainClient.request_copyfactory(opts, True)
+                    for gap in sequencer.add(packets):
+                        self._logger.warning(f'Stopouts {gap[0] + 1}-{gap[1] - 1} missing in stream of strategy ' +
+                                             f'{strategy_id}, listener {listener_id}, backfilling them',
+                                             extra={'listener_id': listener_id, 'strategy_id': strategy_id})
+                        stats.record_gap()
+                        backfill_queue.append(gap)
+                        if len([task for task in backfills if not task.done()]) < max_concurrent_backfills:
+                            backfill = asyncio.create_task(self._run_backfills(
+                                listener_id, listener, stats, sequencer, backfill_queue.popleft(), backfill_queue,
+                                backfill_attempts, delivery_lock, account_id, strategy_id))
+                            backfills.add(backfill)
+                            backfill.add_done_callback(backfills.discard)
+                        elif len(backfill_queue) > max_pending_backfills:
+                            skipped = backfill_queue.popleft()
+                            self._logger.warning(f'Too many gaps pending backfill in stream of strategy ' +
+                                                 f'{strategy_id}, listener {listener_id}, delivering stopouts ' +
+                                                 f'without {skipped[0] + 1}-{skipped[1] - 1}',
+                                                 extra={'listener_id': listener_id, 'strategy_id': strategy_id})
+                            stats.record_gap_closed(sequencer.close_gap(skipped))
+                    async with delivery_lock:
+                        stopouts = sequencer.ready()
+                        callback_start = time.perf_counter()
+                        await invoke_listener_callback(listener.on_stopout, self._executor, stopouts)
+                        callback_time = time.perf_counter() - callback_start
+                        sequencer.delivered(stopouts)
+                    throttle_time = self._errorThrottleTime
+                    stats.record_success(packets, callback_time, sequencer.sequence_number, 'stoppedAt',
+                                         poll.limit is None or len(packets) < poll.limit)
+                    delay = poll.record_poll(len(packets))
+                    if delay:
+                        await asyncio.sleep(delay)
+                except asyncio.CancelledError:
+                    # cancellation is an Exception on python 3.7
+                    raise
+                except Exception as err:
+                    await invoke_listener_callback(listener.on_error, self._executor, err)
+                    self._logger.error(f'Failed to retrieve stopouts stream for strategy {strategy_id}, ' +
+                                       f'listener {listener_id}, retrying in {math.floor(throttle_time)} seconds',
+                                       err, extra={'listener_id': listener_id, 'strategy_id': strategy_id,
+                                                   'throttle_time': throttle_time})
+                    stats.record_error(err, throttle_time)
+                    await asyncio.sleep(poll.error_delay(throttle_time))
+                    throttle_time = min(throttle_time * 2, 30)
+        finally:
+            for backfill in list(backfills):
+                backfill.cancel()
+
+    async def _run_backfills(self, listener_id: str, listener: StopoutListener, stats: ListenerStatsTracker,
+                             sequencer: StopoutSequencer, gap: Gap, queue: Deque[Gap], attempts: int,
+                             delivery_lock: asyncio.Lock, account_id: str = None, strategy_id: str = None):
+        # backfills the gap and then gaps left in the queue, so that the amount of backfill jobs stays limited
+        while gap is not None and listener_id in self._stopoutListeners:
+            await self._backfill_stopouts(listener_id, listener, stats, sequencer, gap, attempts, delivery_lock,
+                                          account_id, strategy_id)
+            gap = queue.popleft() if queue else None
+
+    async def _backfill_stopouts(self, listener_id: str, listener: StopoutListener, stats: ListenerStatsTracker,
+                                 sequencer: StopoutSequencer, gap: Gap, attempts: int, delivery_lock: asyncio.Lock,
+                                 account_id: str = None, strategy_id: str = None):
+        for attempt in range(attempts):
+            if attempt:
+                await asyncio.sleep(self._errorThrottleTime)
+            try:
+                previous_sequence_number = gap[0]
+                while previous_sequence_number < gap[1] - 1 and not sequencer.is_filled(gap):
+                    limit = min(gap[1] - previous_sequence_number - 1, 1000)
+                    packets = await self._domainClient.request_copyfactory({
+                        'url': '/users/current/stopouts/stream',
+                        'method': 'GET',
+                        'params': {
+                            'previousSequenceNumber': previous_sequence_number,
+                            'subscriberId': account_id,
+                            'strategyId': strategy_id,
+                            'limit': limit
+                        },
+                        'headers': {
+                            'auth-token': self._token
+                        },
+                        'convertDates': True
+                    }, True)
+                    sequencer.add([packet for packet in packets if gap[0] < packet['sequenceNumber'] < gap[1]])
+                    if len(packets) < limit:
+                        break
+                    previous_sequence_number = packets[-1]['sequenceNumber']
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                self._logger.error(f'Failed to backfill stopouts {gap[0] + 1}-{gap[1] - 1} of strategy ' +
+                                   f'{strategy_id}, listener {listener_id}', err,
+                                   extra={'listener_id': listener_id, 'strategy_id': strategy_id})
+            if sequencer.is_filled(gap):
+                break
+        stats.record_gap_closed(sequencer.close_gap(gap))
+        if listener_id not in self._stopoutListeners:
+            return
+        async with delivery_lock:
+            stopouts = sequencer.ready()
+            if not stopouts:
+                return
             try:
-                packets = await self._domainClient.request_copyfactory(opts, True)
-                await listener.on_stopout(packets)
-                throttle_time = self._errorThrottleTime
-                if listener_id in self._stopoutListeners and len(packets):
-                    sequence_number = packets[-1]['sequenceNumber']
+                await invoke_listener_callback(listener.on_stopout, self._executor, stopouts)
+                sequencer.delivered(stopouts)
+            except asyncio.CancelledError:
+                raise
             except Exception as err:
-                await listener.on_error(err)
-                self._logger.error(f'Failed to retrieve stopouts stream for strategy {strategy_id}, ' +
-                                   f'listener {listener_id}, retrying in {math.floor(throttle_time)} seconds', err)
-                await asyncio.sleep(throttle_time)
-                throttle_time = min(throttle_time * 2, 30)
+                # stopouts are kept and delivered again after the next poll
+                await invoke_listener_callback(listener.on_error, self._executor, err)
@@ -4,9 +4,14 @@ from .stopoutListener import StopoutListener
 from ...domain_client import DomainClient
 from mock import MagicMock, patch, AsyncMock
 from asyncio import sleep
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import pytest
+import gc
 
 token = 'header.payload.sign'
+# polls are not randomized so that retry timing can be asserted
+poll_opts = {'emptyPollJitterInSeconds': 0, 'errorJitter': 0}
 expected = [
     {
         'subscriberId': 'accountId',
@@ -63,10 +68,13 @@ listener = StopoutListener()
 
 @pytest.fixture(autouse=True)
 async def run_around_tests():
+    # a full garbage collection takes tens of milliseconds, collect garbage of previous tests before retry timing
+    # is asserted
+    gc.collect()
     global domain_client
     domain_client = DomainClient(MagicMock(), token)
     global stopout_listener_manager
-    stopout_listener_manager = StopoutListenerManager(domain_client)
+    stopout_listener_manager = StopoutListenerManager(domain_client, listener_opts=poll_opts)
     global call_stub
     call_stub = MagicMock()
 
@@ -93,6 +101,7 @@ async def run_around_tests():
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }:
             await sleep(0.1)
             return expected
@@ -108,6 +117,7 @@ async def run_around_tests():
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }:
             await sleep(0.1)
             return expected2
@@ -117,6 +127,8 @@ async def run_around_tests():
 
     get_stopout_mock = AsyncMock(side_effect=get_stopout_func)
     domain_client.request_copyfactory = get_stopout_mock
+    yield
+    await stopout_listener_manager.close()
 
 
 class TestStopoutListenerManager:
@@ -131,17 +143,158 @@ class TestStopoutListenerManager:
             call_stub.assert_any_call(expected2)
             stopout_listener_manager.remove_stopout_listener(id)
 
+    @pytest.mark.asyncio
+    async def test_run_sync_callbacks_in_executor(self):
+        """Should run synchronous callbacks in executor in order."""
+        calls = []
+
+        class SyncListener(StopoutListener):
+            def on_stopout(self, strategy_stopout_event):
+                calls.append((threading.current_thread().name, strategy_stopout_event))
+
+        executor = ThreadPoolExecutor(2, thread_name_prefix='callbacks')
+        manager = StopoutListenerManager(domain_client, executor)
+        with patch('lib.clients.copyFactory.streaming.stopoutListenerManager.asyncio.sleep',
+                   new=lambda x: sleep(x / 10)):
+            id = manager.add_stopout_listener(SyncListener(), 'accountId', 'ABCD', 1)
+            await sleep(0.22)
+            manager.remove_stopout_listener(id)
+        executor.shutdown()
+        assert [packets for thread, packets in calls[:2]] == [expected, expected2]
+        assert all(thread.startswith('callbacks') for thread, packets in calls)
+
     @pytest.mark.asyncio
     async def test_remove_stopout_listener(self):
-        """Should remove stopout listener."""
+        """Should remove stopout listener and cancel its stream request in flight."""
         with patch('lib.clients.copyFactory.streaming.stopoutListenerManager.asyncio.sleep',
                    new=lambda x: sleep(x / 10)):
             id = stopout_listener_manager.add_stopout_listener(listener, 'accountId', 'ABCD', 1)
             await sleep(0.08)
             stopout_listener_manager.remove_stopout_listener(id)
             await sleep(0.22)
-            call_stub.assert_any_call(expected)
-            assert call_stub.call_count == 1
+            assert call_stub.call_count == 0
+            assert domain_client.request_copyfactory.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_close(self):
+        """Should remove all listeners and wait until their jobs stop on close."""
+        ids = [stopout_listener_manager.add_stopout_listener(listener, 'accountId', 'ABCD', 1) for i in range(3)]
+        await sleep(0.05)
+        tasks = list(stopout_listener_manager._jobs._tasks.values())
+        await stopout_listener_manager.close(1)
+        assert all(task.cancelled() for task in tasks)
+        assert len(stopout_listener_manager._jobs) == 0
+        assert stopout_listener_manager.stopout_listeners == {}
+        assert stopout_listener_manager.stats() == []
+        assert domain_client.request_copyfactory.call_count == len(ids)
+        assert call_stub.call_count == 0
+
+    @pytest.mark.asyncio
+    async def test_backfill_gaps(self):
+        """Should backfill stopouts missing in sequence numbers and deliver stopouts in sequence order."""
+        stopouts = {sequence_number: {**expected[0], 'sequenceNumber': sequence_number}
+                    for sequence_number in range(2, 7)}
+        backfills = [[stopouts[4]], [stopouts[3], stopouts[4]]]
+
+        async def get_stopout_func(arg, arg2):
+            await sleep(0.01)
+            if arg['params']['previousSequenceNumber'] == 1:
+                return [stopouts[2], stopouts[5], stopouts[6]]
+            if arg['params']['previousSequenceNumber'] == 2:
+                assert arg['params']['limit'] == 2
+                return backfills.pop(0)
+            return []
+
+        domain_client.request_copyfactory = AsyncMock(side_effect=get_stopout_func)
+        with patch('lib.clients.copyFactory.streaming.stopoutListenerManager.asyncio.sleep',
+                   new=lambda x: sleep(x / 10)):
+            id = stopout_listener_manager.add_stopout_listener(listener, sequence_number=1)
+            await sleep(0.05)
+            delivered = [stopout['sequenceNumber'] for call in call_stub.call_args_list for stopout in call[0][0]]
+            assert delivered == [2]
+            await sleep(0.15)
+            delivered = [stopout['sequenceNumber'] for call in call_stub.call_args_list for stopout in call[0][0]]
+            assert delivered == [2, 3, 4, 5, 6]
+            stats = stopout_listener_manager.stats()[0]
+            assert stats['gaps'] == 1
+            assert stats['backfilledGaps'] == 1
+            assert stats['cursor'] == 6
+            stopout_listener_manager.remove_stopout_listener(id)
+
+    @pytest.mark.asyncio
+    async def test_deliver_stopouts_after_unfilled_gap(self):
+        """Should deliver stopouts after a gap once backfill attempts are exhausted."""
+        stopout = {**expected[0], 'sequenceNumber': 4}
+
+        async def get_stopout_func(arg, arg2):
+            await sleep(0.01)
+            return [stopout] if arg['params']['previousSequenceNumber'] == 1 else []
+
+        domain_client.request_copyfactory = AsyncMock(side_effect=get_stopout_func)
+        manager = StopoutListenerManager(domain_client, listener_opts={**poll_opts, 'backfillAttempts': 2})
+        with patch('lib.clients.copyFactory.streaming.stopoutListenerManager.asyncio.sleep',
+                   new=lambda x: sleep(x / 10)):
+            manager.add_stopout_listener(listener, sequence_number=1)
+            await sleep(0.2)
+            call_stub.assert_any_call([stopout])
+            stats = manager.stats()[0]
+            assert stats['gaps'] == 1
+            assert stats['backfilledGaps'] == 0
+            await manager.close()
+        backfill_calls = [call for call in domain_client.request_copyfactory.call_args_list
+                          if call[0][0]['params']['previousSequenceNumber'] == 1]
+        assert len(backfill_calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_limit_pending_backfills(self):
+        """Should backfill a limited amount of gaps at a time and give up the oldest waiting gaps."""
+        stopouts = [{**expected[0], 'sequenceNumber': sequence_number} for sequence_number in range(2, 14, 2)]
+        backfill_numbers = []
+
+        async def get_stopout_func(arg, arg2):
+            previous_sequence_number = arg['params']['previousSequenceNumber']
+            if previous_sequence_number == 1:
+                await sleep(0.01)
+                return stopouts
+            if previous_sequence_number in [2, 4, 6, 8, 10]:
+                backfill_numbers.append(previous_sequence_number)
+                await sleep(0.1)
+                return []
+            await sleep(1)
+            return []
+
+        domain_client.request_copyfactory = AsyncMock(side_effect=get_stopout_func)
+        manager = StopoutListenerManager(domain_client, listener_opts={
+            **poll_opts, 'backfillAttempts': 1, 'maxConcurrentBackfills': 1, 'maxPendingBackfills': 2})
+        manager.add_stopout_listener(listener, sequence_number=1)
+        await sleep(0.05)
+        assert backfill_numbers == [2]
+        assert call_stub.call_args_list[0][0][0] == [stopouts[0]]
+        await sleep(0.3)
+        assert backfill_numbers == [2, 8, 10]
+        delivered = [stopout['sequenceNumber'] for call in call_stub.call_args_list for stopout in call[0][0]]
+        assert delivered == [2, 4, 6, 8, 10, 12]
+        assert manager.stats()[0]['gaps'] == 5
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_not_detect_gaps_in_filtered_streams(self):
+        """Should deliver stopouts of a filtered stream with skipped sequence numbers at once."""
+        stopouts = [{**expected[0], 'sequenceNumber': sequence_number} for sequence_number in [2, 5]]
+
+        async def get_stopout_func(arg, arg2):
+            await sleep(0.01)
+            return stopouts if arg['params']['previousSequenceNumber'] == 1 else []
+
+        domain_client.request_copyfactory = AsyncMock(side_effect=get_stopout_func)
+        stopout_listener_manager.add_stopout_listener(listener, 'accountId', 'ABCD', 1)
+        await sleep(0.05)
+        call_stub.assert_any_call(stopouts)
+        assert stopout_listener_manager.stats()[0]['gaps'] == 0
+        previous_sequence_numbers = [call[0][0]['params']['previousSequenceNumber']
+                                     for call in domain_client.request_copyfactory.call_args_list]
+        assert previous_sequence_numbers.count(1) == 1
+        assert set(previous_sequence_numbers) == {1, 5}
 
     @pytest.mark.asyncio
     async def test_wait_if_error_returned(self):
@@ -170,6 +323,7 @@ class TestStopoutListenerManager:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.05)
                 return expected
@@ -192,9 +346,17 @@ class TestStopoutListenerManager:
             assert call_stub.call_count == 0
             assert error_stub.call_count == 2
             error_stub.assert_any_call(error2)
+            stats = stopout_listener_manager.stats()[0]
+            assert stats['consecutiveErrors'] == 2
+            assert stats['throttleTimeInSeconds'] == 2
+            assert stats['cursor'] == 1
             await sleep(0.2)
             assert domain_client.request_copyfactory.call_count == 3
             assert call_stub.call_count == 0
             await sleep(0.08)
             assert call_stub.call_count == 1
+            stats = stopout_listener_manager.stats()[0]
+            assert stats['consecutiveErrors'] == 0
+            assert stats['cursor'] == 3
+            assert stats['packets'] == 2
             stopout_listener_manager.remove_stopout_listener(id)
@@ -0,0 +1,123 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+Gap = Tuple[int, int]
+"""Range of missing sequence numbers, as sequence numbers of the stopouts received before and after it."""
+
+
+class StopoutSequencer:
+    """Orders stopouts of a stream by sequence number. When a stopout is received after a gap in sequence numbers,
+    the gap is opened and stopouts from it on are held until the missing stopouts are backfilled or the gap is closed
+    without them, so that stopouts are delivered in strict sequence order."""
+
+    def __init__(self, sequence_number: int = None, detect_gaps: bool = True):
+        """Inits stopout sequencer instance.
+
+        Args:
+            sequence_number: Sequence number of the last stopout delivered.
+            detect_gaps: Whether to open gaps, if False stopouts are delivered in the order received.
+        """
+        self._sequenceNumber = sequence_number
+        self._received = sequence_number
+        self._detectGaps = detect_gaps
+        self._pending: Dict[int, dict] = {}
+        self._gaps: Dict[Gap, Set[int]] = {}
+
+    @property
+    def sequence_number(self) -> Optional[int]:
+        """Returns sequence number of the last stopout delivered.
+
+        Returns:
+            Sequence number or None if no stopouts were delivered yet.
+        """
+        return self._sequenceNumber
+
+    @property
+    def received(self) -> Optional[int]:
+        """Returns the highest sequence number received, which the stream is polled from.
+
+        Returns:
+            Sequence number or None if no stopouts were received yet.
+        """
+        return self._received
+
+    @property
+    def gaps(self) -> List[Gap]:
+        """Returns open gaps.
+
+        Returns:
+            Open gaps.
+        """
+        return list(self._gaps)
+
+    def add(self, packets: List[dict]) -> List[Gap]:
+        """Adds stopouts received from the stream or backfilled.
+
+        Args:
+            packets: Stopouts received.
+
+        Returns:
+            Gaps opened by the stopouts.
+        """
+        gaps = []
+        for packet in sorted(packets, key=lambda packet: packet['sequenceNumber']):
+            sequence_number = packet['sequenceNumber']
+            if self._sequenceNumber is not None and sequence_number <= self._sequenceNumber or \
+                    sequence_number in self._pending:
+                continue
+            self._pending[sequence_number] = packet
+            if self._received is None or sequence_number > self._received:
+                if self._detectGaps and self._received is not None and sequence_number > self._received + 1:
+                    gap = (self._received, sequence_number)
+                    self._gaps[gap] = set()
+                    gaps.append(gap)
+                self._received = sequence_number
+            else:
+                for after, before in self._gaps:
+                    if after < sequence_number < before:
+                        self._gaps[(after, before)].add(sequence_number)
+        return gaps
+
+    def is_filled(self, gap: Gap) -> bool:
+        """Returns whether all missing stopouts of a gap were received.
+
+        Args:
+            gap: Gap.
+
+        Returns:
+            Whether the gap is filled.
+        """
+        return len(self._gaps.get(gap, ())) == gap[1] - gap[0] - 1
+
+    def close_gap(self, gap: Gap) -> bool:
+        """Closes a gap, so that stopouts after it are delivered whether the missing stopouts were received or not.
+
+        Args:
+            gap: Gap.
+
+        Returns:
+            Whether all missing stopouts of the gap were received.
+        """
+        filled = self.is_filled(gap)
+        self._gaps.pop(gap, None)
+        return filled
+
+    def ready(self) -> List[dict]:
+        """Returns stopouts which can be delivered, in sequence order. Stopouts are kept until delivered.
+
+        Returns:
+            Stopouts to deliver.
+        """
+        limit = min((after for after, before in self._gaps), default=None)
+        return [self._pending[sequence_number] for sequence_number in sorted(self._pending)
+                if limit is None or sequence_number <= limit]
+
+    def delivered(self, packets: List[dict]):
+        """Records stopouts as delivered.
+
+        Args:
+            packets: Stopouts delivered.
+        """
+        for packet in packets:
+            self._pending.pop(packet['sequenceNumber'], None)
+        if packets:
+            self._sequenceNumber = max(self._sequenceNumber or 0, packets[-1]['sequenceNumber'])
@@ -0,0 +1,49 @@
+from .stopoutSequencer import StopoutSequencer
+
+
+def stopouts(*sequence_numbers: int):
+    return [{'subscriberId': 'accountId', 'sequenceNumber': sequence_number} for sequence_number in sequence_numbers]
+
+
+class TestStopoutSequencer:
+
+    def test_deliver_stopouts_without_gaps(self):
+        """Should deliver stopouts as received if there are no gaps."""
+        sequencer = StopoutSequencer(1)
+        assert sequencer.add(stopouts(2, 3)) == []
+        assert sequencer.ready() == stopouts(2, 3)
+        sequencer.delivered(stopouts(2, 3))
+        assert sequencer.sequence_number == 3
+        assert sequencer.received == 3
+        assert sequencer.ready() == []
+
+    def test_hold_stopouts_after_gap(self):
+        """Should hold stopouts after a gap until it is filled and deliver them in sequence order."""
+        sequencer = StopoutSequencer(1)
+        assert sequencer.add(stopouts(2, 5, 6)) == [(2, 5)]
+        assert sequencer.received == 6
+        assert sequencer.ready() == stopouts(2)
+        sequencer.delivered(stopouts(2))
+        sequencer.add(stopouts(4))
+        assert sequencer.ready() == []
+        assert not sequencer.is_filled((2, 5))
+        sequencer.add(stopouts(3))
+        assert sequencer.is_filled((2, 5))
+        assert sequencer.close_gap((2, 5))
+        assert sequencer.ready() == stopouts(3, 4, 5, 6)
+
+    def test_deliver_stopouts_after_closed_gap(self):
+        """Should deliver stopouts after a gap closed without missing stopouts and drop them if received later."""
+        sequencer = StopoutSequencer(1)
+        sequencer.add(stopouts(4))
+        assert not sequencer.close_gap((1, 4))
+        assert sequencer.ready() == stopouts(4)
+        sequencer.delivered(stopouts(4))
+        sequencer.add(stopouts(2, 3, 4))
+        assert sequencer.ready() == []
+
+    def test_not_detect_gaps_if_disabled(self):
+        """Should deliver stopouts in the order received if gap detection is disabled."""
+        sequencer = StopoutSequencer(1, False)
+        assert sequencer.add(stopouts(3, 5)) == []
+        assert sequencer.ready() == stopouts(3, 5)
@@ -0,0 +1,34 @@
+from typing_extensions import TypedDict
+from typing import Optional
+
+
+class StreamListenerOpts(TypedDict):
+    """Options of stream listeners. Polling options apply to transaction, user log and stopout listeners, while
+    dedupWindowSize applies to transaction listeners and backfill options apply to stopout listeners only."""
+    limit: Optional[int]
+    """Maximum amount of packets requested per poll, default value is 1000. User log listeners request the limit
+    specified when the listener is added."""
+    burstLimit: Optional[int]
+    """Maximum amount of packets requested per poll while catching up after a full page was returned, default value is
+    the regular limit."""
+    emptyPollJitterInSeconds: Optional[float]
+    """Maximum random delay before the next poll after a poll returned no packets, so that polls of quiet streams
+    started at the same time spread out over time. Default value is 1, 0 disables the delay."""
+    errorJitter: Optional[float]
+    """Fraction of the delay before retrying a failed poll which is randomized, so that listeners failed during the
+    same outage reconnect at different times. Default value is 0.5, 0 retries after the exact throttle time."""
+    dedupWindowSize: Optional[int]
+    """Maximum amount of recent transaction ids remembered by each transaction listener to drop transactions
+    delivered already, default value is 10000."""
+    backfillAttempts: Optional[int]
+    """Amount of requests made to fetch stopouts missing in a gap of sequence numbers before stopouts after the gap
+    are delivered without them. 0 disables gap detection and stopouts are delivered as received. Default value is 3
+    for unfiltered stopout streams. Gap detection is off by default for streams filtered by subscriber or strategy,
+    since their sequence numbers are not consecutive, and is enabled for them only if the option is set explicitly."""
+    maxConcurrentBackfills: Optional[int]
+    """Maximum amount of gaps in sequence numbers of a stopout listener backfilled at the same time, default value is
+    2."""
+    maxPendingBackfills: Optional[int]
+    """Maximum amount of gaps of a stopout listener waiting for a backfill while others are backfilled. When more gaps
+    are detected, the oldest waiting gap is closed without backfilling it and stopouts after it are delivered. Default
+    value is 10."""
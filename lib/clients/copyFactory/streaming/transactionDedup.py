@@ -0,0 +1,86 @@
+from ....models import date
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+
+
+class TransactionDedup:
+    """Delivers each transaction of a stream once. The next page is requested from the time of the newest transaction
+    delivered inclusive, so that transactions sharing a millisecond with it are not skipped even if they are committed
+    later, and transactions delivered already are dropped by id. Ids are kept in a bounded LRU window, so memory does
+    not grow with the stream. The window is kept in memory only, so a listener added again from the last start time
+    after a restart may receive transactions of that millisecond again."""
+
+    def __init__(self, start_time: datetime = None, size: int = 10000):
+        """Inits transaction dedup instance.
+
+        Args:
+            start_time: Transaction search start time.
+            size: Maximum amount of recent transaction ids remembered.
+        """
+        self._startTime = start_time
+        self._size = size
+        self._cursor: Optional[Tuple[datetime, str]] = None
+        self._ids = OrderedDict()
+
+    @property
+    def start_time(self) -> Optional[datetime]:
+        """Returns start time of the next stream request.
+
+        Returns:
+            Start time or None if not specified.
+        """
+        return self._startTime
+
+    @property
+    def cursor(self) -> Optional[Tuple[datetime, str]]:
+        """Returns time and id of the newest transaction delivered.
+
+        Returns:
+            Time and id tuple or None if no transactions were delivered yet.
+        """
+        return self._cursor
+
+    def filter(self, packets: List[dict]) -> List[dict]:
+        """Returns transactions which were not delivered yet, keeping their order.
+
+        Args:
+            packets: Transactions received.
+
+        Returns:
+            Transactions to deliver.
+        """
+        result = []
+        ids = set()
+        for packet in packets:
+            if packet['id'] in self._ids:
+                self._ids.move_to_end(packet['id'])
+            elif packet['id'] not in ids:
+                ids.add(packet['id'])
+                result.append(packet)
+        return result
+
+    def commit(self, packets: List[dict], full_page: bool = False):
+        """Records transactions of a page as delivered and moves the stream position to the newest of them.
+
+        Args:
+            packets: Transactions received.
+            full_page: Whether the page contained as many transactions as requested. If a full page consists of
+            transactions of a single millisecond, the next page is requested from the next millisecond, since
+            requesting the same millisecond again would return the same page.
+        """
+        if not packets:
+            return
+        for packet in packets:
+            self._ids[packet['id']] = True
+            self._ids.move_to_end(packet['id'])
+        while len(self._ids) > self._size:
+            self._ids.popitem(last=False)
+        times = [(date(packet['time']), packet['id']) for packet in packets]
+        newest = max(times)
+        if self._cursor is None or newest > self._cursor:
+            self._cursor = newest
+        if full_page and all(time == newest[0] for time, id in times):
+            self._startTime = self._cursor[0] + timedelta(milliseconds=1)
+        else:
+            self._startTime = self._cursor[0]
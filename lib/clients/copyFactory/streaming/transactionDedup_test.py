@@ -0,0 +1,59 @@
+from ....models import date
+from .transactionDedup import TransactionDedup
+
+
+def transaction(id: str, time: str) -> dict:
+    return {'id': id, 'type': 'DEAL_TYPE_SELL', 'time': time}
+
+
+class TestTransactionDedup:
+
+    def test_drop_transactions_delivered_already(self):
+        """Should drop transactions delivered already and request newest millisecond again."""
+        dedup = TransactionDedup(date('2020-08-08T00:00:00.000Z'))
+        first = [transaction('2', '2020-08-08T08:57:30.328Z'), transaction('1', '2020-08-08T07:57:30.328Z')]
+        assert dedup.filter(first) == first
+        dedup.commit(first, True)
+        assert dedup.start_time == date('2020-08-08T08:57:30.328Z')
+        assert dedup.cursor == (date('2020-08-08T08:57:30.328Z'), '2')
+        second = [transaction('3', '2020-08-08T08:57:30.328Z'), transaction('2', '2020-08-08T08:57:30.328Z')]
+        assert dedup.filter(second) == second[:1]
+        dedup.commit(second)
+        assert dedup.cursor == (date('2020-08-08T08:57:30.328Z'), '3')
+        assert dedup.filter(second) == []
+
+    def test_request_newest_millisecond_again_after_partial_page(self):
+        """Should request newest millisecond again after a page which is not full, so that transactions committed
+        later within it are not skipped."""
+        dedup = TransactionDedup()
+        page = [transaction('2', '2020-08-08T08:57:30.328Z'), transaction('1', '2020-08-08T07:57:30.328Z')]
+        dedup.commit(page)
+        assert dedup.start_time == date('2020-08-08T08:57:30.328Z')
+        later = [transaction('3', '2020-08-08T08:57:30.328Z'), page[0]]
+        assert dedup.filter(later) == later[:1]
+
+    def test_not_mark_transactions_delivered_before_commit(self):
+        """Should deliver transactions again if a page was not committed."""
+        dedup = TransactionDedup()
+        page = [transaction('1', '2020-08-08T07:57:30.328Z'), transaction('1', '2020-08-08T07:57:30.328Z')]
+        assert dedup.filter(page) == page[:1]
+        assert dedup.filter(page) == page[:1]
+        assert dedup.start_time is None
+
+    def test_skip_millisecond_of_full_page(self):
+        """Should request next page from next millisecond if a full page shares one millisecond."""
+        dedup = TransactionDedup()
+        page = [transaction(str(index), '2020-08-08T07:57:30.328Z') for index in range(2)]
+        dedup.commit(page, True)
+        assert dedup.start_time == date('2020-08-08T07:57:30.329Z')
+        dedup.commit([transaction('3', '2020-08-08T07:57:31.328Z'), *page], True)
+        assert dedup.start_time == date('2020-08-08T07:57:31.328Z')
+
+    def test_keep_bounded_window_of_ids(self):
+        """Should remember a bounded amount of recent transaction ids."""
+        dedup = TransactionDedup(size=2)
+        for index in range(3):
+            dedup.commit([transaction(str(index), '2020-08-08T07:57:30.328Z')])
+        assert len(dedup._ids) == 2
+        assert dedup.filter([transaction('0', '2020-08-08T07:57:30.328Z')]) != []
+        assert dedup.filter([transaction('2', '2020-08-08T07:57:30.328Z')]) == []
@@ -1,28 +1,45 @@
 from ...metaApi_client import MetaApiClient
 from ...domain_client import DomainClient
-from ....models import random_id, format_date, date
+from ....models import random_id, format_date
 from ...errorHandler import NotFoundException
 from .transactionListener import TransactionListener
-from datetime import datetime, timedelta
+from datetime import datetime
 from ....logger import LoggerManager
+from .listenerCallback import invoke_listener_callback
+from .listenerJobs import ListenerJobs
+from .transactionDedup import TransactionDedup
+from .adaptivePoll import AdaptivePoll
+from .streamListenerOpts import StreamListenerOpts
+from concurrent.futures import Executor
+from .listenerStats import ListenerStatsTracker, StreamListenerStats
+from typing import Dict, List
 import math
 import asyncio
+import time
 
 
 class TransactionListenerManager(MetaApiClient):
     """Transaction listener manager."""
 
-    def __init__(self, domain_client: DomainClient):
+    def __init__(self, domain_client: DomainClient, executor: Executor = None,
+                 listener_opts: StreamListenerOpts = None):
         """Inits transaction listener manager instance.
 
         Args:
             domain_client: Domain client.
+            executor: Thread or process pool to run synchronous listener callbacks in. If not specified, callbacks
+                run on the event loop.
+            listener_opts: Stream listener options.
         """
         super().__init__(domain_client)
         self._domainClient = domain_client
+        self._executor = executor
+        self._listenerOpts: StreamListenerOpts = listener_opts or {}
         self._strategyTransactionListeners = {}
         self._subscriberTransactionListeners = {}
         self._errorThrottleTime = 1
+        self._listenerStats: Dict[str, ListenerStatsTracker] = {}
+        self._jobs = ListenerJobs()
         self._logger = LoggerManager.get_logger('TransactionListenerManager')
 
     @property
@@ -57,8 +74,10 @@ class TransactionListenerManager(MetaApiClient):
         """
         listener_id = random_id(10)
         self._strategyTransactionListeners[listener_id] = listener
-        asyncio.create_task(self._start_strategy_transaction_stream_job(listener_id, listener, strategy_id,
-                                                                        start_time))
+        stats = ListenerStatsTracker(listener_id, 'strategyTransactions', strategy_id, start_time, self._domainClient)
+        self._listenerStats[listener_id] = stats
+        job = self._start_strategy_transaction_stream_job(listener_id, listener, stats, strategy_id, start_time)
+        self._jobs.start(listener_id, job)
         return listener_id
 
     def add_subscriber_transaction_listener(self, listener: TransactionListener, subscriber_id: str,
@@ -75,8 +94,11 @@ class TransactionListenerManager(MetaApiClient):
         """
         listener_id = random_id(10)
         self._subscriberTransactionListeners[listener_id] = listener
-        asyncio.create_task(self._start_subscriber_transaction_stream_job(listener_id, listener, subscriber_id,
-                                                                          start_time))
+        stats = ListenerStatsTracker(listener_id, 'subscriberTransactions', subscriber_id, start_time,
+                                     self._domainClient)
+        self._listenerStats[listener_id] = stats
+        job = self._start_subscriber_transaction_stream_job(listener_id, listener, stats, subscriber_id, start_time)
+        self._jobs.start(listener_id, job)
         return listener_id
 
     def remove_strategy_transaction_listener(self, listener_id: str):
@@ -87,6 +109,8 @@ class TransactionListenerManager(MetaApiClient):
         """
         if listener_id in self._strategyTransactionListeners:
             del self._strategyTransactionListeners[listener_id]
+            self._remove_stats(listener_id)
+            self._jobs.stop(listener_id)
 
     def remove_subscriber_transaction_listener(self, listener_id: str):
         """Removes subscriber transaction listener by id.
@@ -96,71 +120,146 @@ class TransactionListenerManager(MetaApiClient):
         """
         if listener_id in self._subscriberTransactionListeners:
             del self._subscriberTransactionListeners[listener_id]
+            self._remove_stats(listener_id)
+            self._jobs.stop(listener_id)
+
+    def stats(self) -> List[StreamListenerStats]:
+        """Returns health statistics of active listeners.
+
+        Returns:
+            Listener statistics.
+        """
+        return [tracker.stats() for tracker in self._listenerStats.values()]
+
+    async def close(self, timeout: float = 10):
+        """Removes all listeners, cancels their jobs including stream requests in flight and waits until the jobs stop.
+
+        Args:
+            timeout: Maximum time to wait for jobs to stop in seconds, default value is 10.
+        """
+        self._strategyTransactionListeners.clear()
+        self._subscriberTransactionListeners.clear()
+        for stats in self._listenerStats.values():
+            stats.close()
+        self._listenerStats.clear()
+        await self._jobs.close(timeout)
+
+    def _remove_stats(self, listener_id: str):
+        stats = self._listenerStats.pop(listener_id, None)
+        if stats:
+            stats.close()
+
+    def _create_dedup(self, start_time: datetime = None) -> TransactionDedup:
+        return TransactionDedup(start_time, self._listenerOpts['dedupWindowSize']
+                                if 'dedupWindowSize' in self._listenerOpts else 10000)
 
     async def _start_strategy_transaction_stream_job(self, listener_id: str, listener: TransactionListener,
-                                                     strategy_id: str, start_time: datetime = None):
+                                                     stats: ListenerStatsTracker, strategy_id: str,
+                                                     start_time: datetime = None):
         throttle_time = self._errorThrottleTime
+        poll = AdaptivePoll(self._listenerOpts['limit'] if 'limit' in self._listenerOpts else 1000, self._listenerOpts)
+        dedup = self._create_dedup(start_time)
         while listener_id in self._strategyTransactionListeners:
             opts = {
                 'url': f'/users/current/strategies/{strategy_id}/transactions/stream',
                 'method': 'GET',
                 'params': {
-                    'limit': 1000
+                    'limit': poll.limit
                 },
                 'headers': {
                     'auth-token': self._token
-                }
+                },
+                'convertDates': True
             }
             if start_time:
                 opts['params']['startTime'] = format_date(start_time)
             try:
                 packets = await self._domainClient.request_copyfactory(opts, True)
-                await listener.on_transaction(packets)
+                transactions = dedup.filter(packets)
+                callback_start = time.perf_counter()
+                await invoke_listener_callback(listener.on_transaction, self._executor, transactions)
+                callback_time = time.perf_counter() - callback_start
                 throttle_time = self._errorThrottleTime
-                if listener_id in self._strategyTransactionListeners and len(packets):
-                    start_time = date(packets[0]['time']) + timedelta(milliseconds=1)
+                full_page = poll.limit is not None and len(packets) >= poll.limit
+                if listener_id in self._strategyTransactionListeners:
+                    dedup.commit(packets, full_page)
+                    start_time = dedup.start_time
+                stats.record_success(packets, callback_time, start_time, caught_up=not full_page)
+                delay = poll.record_poll(len(packets), len(transactions))
+                if delay:
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # cancellation is an Exception on python 3.7
+                raise
             except NotFoundException as err:
-                await listener.on_error(err)
-                self._logger.error(f'Strategy {strategy_id} not found, removing listener f{listener_id}')
+                await invoke_listener_callback(listener.on_error, self._executor, err)
+                self._logger.error(f'Strategy {strategy_id} not found, removing listener {listener_id}',
+                                   extra={'listener_id': listener_id, 'strategy_id': strategy_id})
                 if listener_id in self._strategyTransactionListeners:
                     del self._strategyTransactionListeners[listener_id]
+                    self._remove_stats(listener_id)
+                    self._jobs.stop(listener_id)
             except Exception as err:
-                await listener.on_error(err)
+                await invoke_listener_callback(listener.on_error, self._executor, err)
                 self._logger.error(f'Failed to retrieve transactions stream for strategy {strategy_id}, ' +
-                                   f'listener {listener_id}, retrying in {math.floor(throttle_time)} seconds', err)
-                await asyncio.sleep(throttle_time)
+                                   f'listener {listener_id}, retrying in {math.floor(throttle_time)} seconds', err,
+                                   extra={'listener_id': listener_id, 'strategy_id': strategy_id,
+                                          'throttle_time': throttle_time})
+                stats.record_error(err, throttle_time)
+                await asyncio.sleep(poll.error_delay(throttle_time))
                 throttle_time = min(throttle_time * 2, 30)
 
     async def _start_subscriber_transaction_stream_job(self, listener_id: str, listener: TransactionListener,
-                                                       subscriber_id: str, start_time: datetime = None):
+                                                       stats: ListenerStatsTracker, subscriber_id: str,
+                                                       start_time: datetime = None):
         throttle_time = self._errorThrottleTime
+        poll = AdaptivePoll(self._listenerOpts['limit'] if 'limit' in self._listenerOpts else 1000, self._listenerOpts)
+        dedup = self._create_dedup(start_time)
         while listener_id in self._subscriberTransactionListeners:
             opts = {
                 'url': f'/users/current/subscribers/{subscriber_id}/transactions/stream',
                 'method': 'GET',
                 'params': {
-                    'limit': 1000
+                    'limit': poll.limit
                 },
                 'headers': {
                     'auth-token': self._token
-                }
+                },
+                'convertDates': True
             }
             if start_time:
                 opts['params']['startTime'] = format_date(start_time)
             try:
                 packets = await self._domainClient.request_copyfactory(opts, True)
-                await listener.on_transaction(packets)
+                transactions = dedup.filter(packets)
+                callback_start = time.perf_counter()
+                await invoke_listener_callback(listener.on_transaction, self._executor, transactions)
+                callback_time = time.perf_counter() - callback_start
                 throttle_time = self._errorThrottleTime
-                if listener_id in self._subscriberTransactionListeners and len(packets):
-                    start_time = date(packets[0]['time']) + timedelta(milliseconds=1)
+                full_page = poll.limit is not None and len(packets) >= poll.limit
+                if listener_id in self._subscriberTransactionListeners:
+                    dedup.commit(packets, full_page)
+                    start_time = dedup.start_time
+                stats.record_success(packets, callback_time, start_time, caught_up=not full_page)
+                delay = poll.record_poll(len(packets), len(transactions))
+                if delay:
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                raise
             except NotFoundException as err:
-                await listener.on_error(err)
-                self._logger.error(f'Subscriber {subscriber_id} not found, removing listener f{listener_id}')
+                await invoke_listener_callback(listener.on_error, self._executor, err)
+                self._logger.error(f'Subscriber {subscriber_id} not found, removing listener {listener_id}',
+                                   extra={'listener_id': listener_id, 'subscriber_id': subscriber_id})
                 if listener_id in self._subscriberTransactionListeners:
                     del self._subscriberTransactionListeners[listener_id]
+                    self._remove_stats(listener_id)
+                    self._jobs.stop(listener_id)
             except Exception as err:
-                await listener.on_error(err)
+                await invoke_listener_callback(listener.on_error, self._executor, err)
                 self._logger.error(f'Failed to retrieve transactions stream for subscriber {subscriber_id}, ' +
-                                   f'listener {listener_id}, retrying in {math.floor(throttle_time)} seconds', err)
-                await asyncio.sleep(throttle_time)
+                                   f'listener {listener_id}, retrying in {math.floor(throttle_time)} seconds', err,
+                                   extra={'listener_id': listener_id, 'subscriber_id': subscriber_id,
+                                          'throttle_time': throttle_time})
+                stats.record_error(err, throttle_time)
+                await asyncio.sleep(poll.error_delay(throttle_time))
                 throttle_time = min(throttle_time * 2, 30)
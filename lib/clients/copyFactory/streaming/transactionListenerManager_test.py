@@ -10,6 +10,8 @@ from typing import List
 import pytest
 
 token = 'header.payload.sign'
+# polls are not randomized so that retry timing can be asserted
+poll_opts = {'emptyPollJitterInSeconds': 0, 'errorJitter': 0}
 expected = [{
     'id': '64664661:close',
     'type': 'DEAL_TYPE_SELL',
@@ -41,7 +43,7 @@ async def run_around_tests():
     global domain_client
     domain_client = DomainClient(MagicMock(), token)
     global transaction_listener_manager
-    transaction_listener_manager = TransactionListenerManager(domain_client)
+    transaction_listener_manager = TransactionListenerManager(domain_client, listener_opts=poll_opts)
     global call_stub
     call_stub = MagicMock()
     global error_stub
@@ -71,6 +73,7 @@ async def prepare_strategy_transactions():
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }:
             await sleep(0.1)
             return expected
@@ -78,12 +81,13 @@ async def prepare_strategy_transactions():
             'url': '/users/current/strategies/ABCD/transactions/stream',
             'method': 'GET',
             'params': {
-                'startTime': '2020-08-08T08:57:30.329Z',
+                'startTime': '2020-08-08T08:57:30.328Z',
                 'limit': 1000
             },
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }:
             await sleep(0.1)
             return expected2
@@ -94,6 +98,26 @@ async def prepare_strategy_transactions():
     domain_client.request_copyfactory = AsyncMock(side_effect=get_transactions_func)
 
 
+def inclusive_stream(transactions: List[dict], fail_second_request: bool = False):
+    """Returns a stand-in of a transaction stream which returns transactions from startTime inclusive, oldest page
+    first and newest transaction first in a page, and holds the long poll while there are no transactions."""
+    call_count = 0
+
+    async def get_transactions_func(arg, arg2):
+        nonlocal call_count
+        call_count += 1
+        await sleep(0.01)
+        if fail_second_request and call_count == 2:
+            raise Exception('test')
+        start_time = date(arg['params']['startTime'])
+        page = [transaction for transaction in transactions if date(transaction['time']) >= start_time]
+        page = page[:arg['params']['limit']]
+        if not page:
+            await sleep(10)
+        return list(reversed(page))
+    return get_transactions_func
+
+
 class TestStrategyTransactions:
     @pytest.mark.asyncio
     async def test_add_strategy_listener(self, prepare_strategy_transactions):
@@ -107,9 +131,90 @@ class TestStrategyTransactions:
             call_stub.assert_any_call(expected2)
             transaction_listener_manager.remove_strategy_transaction_listener(id)
 
+    @pytest.mark.asyncio
+    async def test_collect_strategy_listener_stats(self, prepare_strategy_transactions):
+        """Should collect listener stats and remove them with the listener."""
+        with patch('lib.clients.copyFactory.streaming.transactionListenerManager.asyncio.sleep',
+                   new=lambda x: sleep(x / 10)):
+            id = transaction_listener_manager.add_strategy_transaction_listener(listener, 'ABCD',
+                                                                                date('2020-08-08T00:00:00.000Z'))
+            await sleep(0.22)
+            stats = transaction_listener_manager.stats()
+            assert len(stats) == 1
+            assert stats[0]['listenerId'] == id
+            assert stats[0]['type'] == 'strategyTransactions'
+            assert stats[0]['id'] == 'ABCD'
+            assert stats[0]['polls'] == 2
+            assert stats[0]['packets'] == 4
+            assert stats[0]['cursor'] == date('2020-08-08T10:57:30.328Z')
+            assert stats[0]['consecutiveErrors'] == 0
+            assert stats[0]['lastCallbackTimeInSeconds'] is not None
+            tracker = transaction_listener_manager._listenerStats[id]
+            tracker.close = MagicMock()
+            transaction_listener_manager.remove_strategy_transaction_listener(id)
+            assert transaction_listener_manager.stats() == []
+            tracker.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_request_burst_pages_after_full_page(self):
+        """Should request next pages at once with burst limit while pages are full."""
+        pages = [expected2, expected, []]
+
+        async def get_transactions_func(arg, arg2):
+            await sleep(0.01)
+            return pages.pop(0) if pages else []
+
+        domain_client.request_copyfactory = AsyncMock(side_effect=get_transactions_func)
+        manager = TransactionListenerManager(domain_client, listener_opts={**poll_opts, 'limit': 2, 'burstLimit': 4})
+        id = manager.add_strategy_transaction_listener(listener, 'ABCD')
+        await sleep(0.05)
+        manager.remove_strategy_transaction_listener(id)
+        limits = [call[0][0]['params']['limit'] for call in domain_client.request_copyfactory.call_args_list[:4]]
+        assert limits == [2, 4, 2, 2]
+        call_stub.assert_any_call(expected2)
+        call_stub.assert_any_call(expected)
+
+    @pytest.mark.asyncio
+    async def test_deliver_each_transaction_once(self):
+        """Should deliver transactions sharing a millisecond with the stream position once across retries."""
+        same_time = {**expected[0], 'id': '64664662:close'}
+        get_transactions_func = inclusive_stream([expected[1], expected[0], same_time], True)
+        domain_client.request_copyfactory = AsyncMock(side_effect=get_transactions_func)
+        manager = TransactionListenerManager(domain_client, listener_opts={**poll_opts, 'limit': 2})
+        with patch('lib.clients.copyFactory.streaming.transactionListenerManager.asyncio.sleep',
+                   new=lambda x: sleep(x / 100)):
+            manager.add_strategy_transaction_listener(listener, 'ABCD', date('2020-08-08T00:00:00.000Z'))
+            await sleep(0.1)
+            await manager.close()
+        start_times = [call[0][0]['params']['startTime'] for call in domain_client.request_copyfactory.call_args_list]
+        assert start_times == ['2020-08-08T00:00:00.000Z', '2020-08-08T08:57:30.328Z', '2020-08-08T08:57:30.328Z',
+                               '2020-08-08T08:57:30.329Z']
+        delivered = [transaction for call in call_stub.call_args_list for transaction in call[0][0]]
+        assert delivered == expected + [same_time]
+
+    @pytest.mark.asyncio
+    async def test_deliver_transactions_committed_later_within_millisecond(self):
+        """Should deliver a transaction committed later with the millisecond of the newest transaction of a quiet
+        stream and delay polls which return only transactions delivered already."""
+        transactions = [expected[1]]
+        domain_client.request_copyfactory = AsyncMock(side_effect=inclusive_stream(transactions))
+        manager = TransactionListenerManager(domain_client, listener_opts={'emptyPollJitterInSeconds': 1})
+        with patch('lib.clients.copyFactory.streaming.adaptivePoll.random.uniform', return_value=0.05):
+            manager.add_strategy_transaction_listener(listener, 'ABCD', date('2020-08-08T00:00:00.000Z'))
+            await sleep(0.09)
+            assert domain_client.request_copyfactory.call_count == 3
+            same_time = {**expected[1], 'id': '64664662:close'}
+            transactions.append(same_time)
+            await sleep(0.1)
+            await manager.close()
+        start_times = [call[0][0]['params']['startTime'] for call in domain_client.request_copyfactory.call_args_list]
+        assert set(start_times[1:]) == {'2020-08-08T07:57:30.328Z'}
+        delivered = [transaction for call in call_stub.call_args_list for transaction in call[0][0]]
+        assert delivered == [expected[1], same_time]
+
     @pytest.mark.asyncio
     async def test_remove_strategy_listener(self, prepare_strategy_transactions):
-        """Should remove listener."""
+        """Should remove listener and cancel its stream request in flight."""
         with patch('lib.clients.copyFactory.streaming.transactionListenerManager.asyncio.sleep',
                    new=lambda x: sleep(x / 10)):
             id = transaction_listener_manager.add_strategy_transaction_listener(listener, 'ABCD',
@@ -117,8 +222,8 @@ class TestStrategyTransactions:
             await sleep(0.08)
             transaction_listener_manager.remove_strategy_transaction_listener(id)
             await sleep(0.22)
-            call_stub.assert_any_call(expected)
-            assert call_stub.call_count == 1
+            assert call_stub.call_count == 0
+            assert domain_client.request_copyfactory.call_count == 1
 
     @pytest.mark.asyncio
     async def test_wait_if_error_returned(self):
@@ -145,6 +250,7 @@ class TestStrategyTransactions:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.05)
                 return expected
@@ -190,6 +296,7 @@ class TestStrategyTransactions:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.1)
                 return expected
@@ -197,12 +304,13 @@ class TestStrategyTransactions:
                 'url': '/users/current/strategies/ABCD/transactions/stream',
                 'method': 'GET',
                 'params': {
-                    'startTime': '2020-08-08T08:57:30.329Z',
+                    'startTime': '2020-08-08T08:57:30.328Z',
                     'limit': 1000
                 },
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.1)
                 raise error
@@ -241,6 +349,7 @@ async def prepare_subscriber_transactions():
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }:
             await sleep(0.1)
             return expected
@@ -248,12 +357,13 @@ async def prepare_subscriber_transactions():
             'url': '/users/current/subscribers/accountId/transactions/stream',
             'method': 'GET',
             'params': {
-                'startTime': '2020-08-08T08:57:30.329Z',
+                'startTime': '2020-08-08T08:57:30.328Z',
                 'limit': 1000
             },
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }:
             await sleep(0.1)
             return expected2
@@ -279,7 +389,7 @@ class TestSubscriberTransactions:
 
     @pytest.mark.asyncio
     async def test_remove_strategy_listener(self, prepare_subscriber_transactions):
-        """Should remove listener."""
+        """Should remove listener and cancel its stream request in flight."""
         with patch('lib.clients.copyFactory.streaming.transactionListenerManager.asyncio.sleep',
                    new=lambda x: sleep(x / 10)):
             id = transaction_listener_manager.add_subscriber_transaction_listener(listener, 'accountId',
@@ -287,8 +397,8 @@ class TestSubscriberTransactions:
             await sleep(0.08)
             transaction_listener_manager.remove_subscriber_transaction_listener(id)
             await sleep(0.22)
-            call_stub.assert_any_call(expected)
-            assert call_stub.call_count == 1
+            assert call_stub.call_count == 0
+            assert domain_client.request_copyfactory.call_count == 1
 
     @pytest.mark.asyncio
     async def test_wait_if_error_returned(self):
@@ -315,6 +425,7 @@ class TestSubscriberTransactions:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.05)
                 return expected
@@ -360,6 +471,7 @@ class TestSubscriberTransactions:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.1)
                 return expected
@@ -367,12 +479,13 @@ class TestSubscriberTransactions:
                 'url': '/users/current/subscribers/accountId/transactions/stream',
                 'method': 'GET',
                 'params': {
-                    'startTime': '2020-08-08T08:57:30.329Z',
+                    'startTime': '2020-08-08T08:57:30.328Z',
                     'limit': 1000
                 },
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.1)
                 raise error
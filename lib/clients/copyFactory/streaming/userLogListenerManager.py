@@ -6,24 +6,40 @@ from .userLogListener import UserLogListener
 from ..copyFactory_models import LogLevel
 from datetime import datetime, timedelta
 from ....logger import LoggerManager
+from .listenerCallback import invoke_listener_callback
+from .listenerJobs import ListenerJobs
+from .adaptivePoll import AdaptivePoll
+from .streamListenerOpts import StreamListenerOpts
+from concurrent.futures import Executor
+from .listenerStats import ListenerStatsTracker, StreamListenerStats
+from typing import Dict, List
 import asyncio
+import time
 import math
 
 
 class UserLogListenerManager(MetaApiClient):
     """User log listener manager."""
 
-    def __init__(self, domain_client: DomainClient):
+    def __init__(self, domain_client: DomainClient, executor: Executor = None,
+                 listener_opts: StreamListenerOpts = None):
         """Inits user log listener manager instance.
 
         Args:
             domain_client: Domain client.
+            executor: Thread or process pool to run synchronous listener callbacks in. If not specified, callbacks
+                run on the event loop.
+            listener_opts: Stream listener options.
         """
         super().__init__(domain_client)
         self._domainClient = domain_client
+        self._executor = executor
+        self._listenerOpts: StreamListenerOpts = listener_opts or {}
         self._strategyLogListeners = {}
         self._subscriberLogListeners = {}
         self._errorThrottleTime = 1
+        self._listenerStats: Dict[str, ListenerStatsTracker] = {}
+        self._jobs = ListenerJobs()
         self._logger = LoggerManager.get_logger('UserLogListenerManager')
 
     @property
@@ -61,8 +77,11 @@ class UserLogListenerManager(MetaApiClient):
         """
         listener_id = random_id(10)
         self._strategyLogListeners[listener_id] = listener
-        asyncio.create_task(self._start_strategy_log_stream_job(listener_id, listener, strategy_id, start_time,
-                                                                position_id, level, limit))
+        stats = ListenerStatsTracker(listener_id, 'strategyLog', strategy_id, start_time, self._domainClient)
+        self._listenerStats[listener_id] = stats
+        job = self._start_strategy_log_stream_job(listener_id, listener, stats, strategy_id, start_time, position_id,
+                                                  level, limit)
+        self._jobs.start(listener_id, job)
         return listener_id
 
     def add_subscriber_log_listener(self, listener: UserLogListener, subscriber_id: str, start_time: datetime = None,
@@ -84,8 +103,11 @@ class UserLogListenerManager(MetaApiClient):
         """
         listener_id = random_id(10)
         self._subscriberLogListeners[listener_id] = listener
-        asyncio.create_task(self._start_subscriber_log_stream_job(listener_id, listener, subscriber_id, start_time,
-                                                                  strategy_id, position_id, level, limit))
+        stats = ListenerStatsTracker(listener_id, 'subscriberLog', subscriber_id, start_time, self._domainClient)
+        self._listenerStats[listener_id] = stats
+        job = self._start_subscriber_log_stream_job(listener_id, listener, stats, subscriber_id, start_time,
+                                                    strategy_id, position_id, level, limit)
+        self._jobs.start(listener_id, job)
         return listener_id
 
     def remove_strategy_log_listener(self, listener_id: str):
@@ -96,6 +118,8 @@ class UserLogListenerManager(MetaApiClient):
         """
         if listener_id in self._strategyLogListeners:
             del self._strategyLogListeners[listener_id]
+            self._remove_stats(listener_id)
+            self._jobs.stop(listener_id)
 
     def remove_subscriber_log_listener(self, listener_id: str):
         """Removes subscriber transaction listener by id.
@@ -105,11 +129,40 @@ class UserLogListenerManager(MetaApiClient):
         """
         if listener_id in self._subscriberLogListeners:
             del self._subscriberLogListeners[listener_id]
+            self._remove_stats(listener_id)
+            self._jobs.stop(listener_id)
+
+    def stats(self) -> List[StreamListenerStats]:
+        """Returns health statistics of active listeners.
+
+        Returns:
+            Listener statistics.
+        """
+        return [tracker.stats() for tracker in self._listenerStats.values()]
+
+    async def close(self, timeout: float = 10):
+        """Removes all listeners, cancels their jobs including stream requests in flight and waits until the jobs stop.
+
+        Args:
+            timeout: Maximum time to wait for jobs to stop in seconds, default value is 10.
+        """
+        self._strategyLogListeners.clear()
+        self._subscriberLogListeners.clear()
+        for stats in self._listenerStats.values():
+            stats.close()
+        self._listenerStats.clear()
+        await self._jobs.close(timeout)
+
+    def _remove_stats(self, listener_id: str):
+        stats = self._listenerStats.pop(listener_id, None)
+        if stats:
+            stats.close()
 
     async def _start_strategy_log_stream_job(self, listener_id: str, listener: UserLogListener,
-                                             strategy_id: str, start_time: datetime = None, position_id: str = None,
-                                             level: LogLevel = None, limit: int = None):
+                                             stats: ListenerStatsTracker, strategy_id: str, start_time: datetime = None,
+                                             position_id: str = None, level: LogLevel = None, limit: int = None):
         throttle_time = self._errorThrottleTime
+        poll = AdaptivePoll(limit, self._listenerOpts)
         while listener_id in self._strategyLogListeners:
             opts = {
                 'url': f'/users/current/strategies/{strategy_id}/user-log/stream',
@@ -117,7 +170,8 @@ class UserLogListenerManager(MetaApiClient):
                 'params': {},
                 'headers': {
                     'auth-token': self._token
-                }
+                },
+                'convertDates': True
             }
             if start_time:
                 opts['params']['startTime'] = format_date(start_time)
@@ -125,33 +179,51 @@ class UserLogListenerManager(MetaApiClient):
                 opts['params']['positionId'] = position_id
             if level:
                 opts['params']['level'] = level
-            if limit:
-                opts['params']['limit'] = limit
+            if poll.limit:
+                opts['params']['limit'] = poll.limit
             try:
                 packets = await self._domainClient.request_copyfactory(opts, True)
                 # stop job if user has unsubscribed in time of new packets has been received
                 if listener_id not in self._strategyLogListeners:
                     return
-                await listener.on_user_log(packets)
+                callback_start = time.perf_counter()
+                await invoke_listener_callback(listener.on_user_log, self._executor, packets)
+                callback_time = time.perf_counter() - callback_start
                 throttle_time = self._errorThrottleTime
                 if listener_id in self._strategyLogListeners and len(packets):
                     start_time = date(packets[0]['time']) + timedelta(milliseconds=1)
+                stats.record_success(packets, callback_time, start_time,
+                                     caught_up=poll.limit is None or len(packets) < poll.limit)
+                delay = poll.record_poll(len(packets))
+                if delay:
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # cancellation is an Exception on python 3.7
+                raise
             except NotFoundException as err:
-                await listener.on_error(err)
-                self._logger.error(f'Strategy {strategy_id} not found, removing listener f{listener_id}')
+                await invoke_listener_callback(listener.on_error, self._executor, err)
+                self._logger.error(f'Strategy {strategy_id} not found, removing listener {listener_id}',
+                                   extra={'listener_id': listener_id, 'strategy_id': strategy_id})
                 if listener_id in self._strategyLogListeners:
                     del self._strategyLogListeners[listener_id]
+                    self._remove_stats(listener_id)
+                    self._jobs.stop(listener_id)
             except Exception as err:
-                await listener.on_error(err)
+                await invoke_listener_callback(listener.on_error, self._executor, err)
                 self._logger.error(f'Failed to retrieve user log stream for strategy {strategy_id}, ' +
-                                   f'listener {listener_id}, retrying in {math.floor(throttle_time)} seconds', err)
-                await asyncio.sleep(throttle_time)
+                                   f'listener {listener_id}, retrying in {math.floor(throttle_time)} seconds', err,
+                                   extra={'listener_id': listener_id, 'strategy_id': strategy_id,
+                                          'throttle_time': throttle_time})
+                stats.record_error(err, throttle_time)
+                await asyncio.sleep(poll.error_delay(throttle_time))
                 throttle_time = min(throttle_time * 2, 30)
 
-    async def _start_subscriber_log_stream_job(self, listener_id: str, listener: UserLogListener, subscriber_id: str,
+    async def _start_subscriber_log_stream_job(self, listener_id: str, listener: UserLogListener,
+                                               stats: ListenerStatsTracker, subscriber_id: str,
                                                start_time: datetime = None, strategy_id: str = None,
                                                position_id: str = None, level: LogLevel = None, limit: int = None):
         throttle_time = self._errorThrottleTime
+        poll = AdaptivePoll(limit, self._listenerOpts)
         while listener_id in self._subscriberLogListeners:
             opts = {
                 'url': f'/users/current/subscribers/{subscriber_id}/user-log/stream',
@@ -159,7 +231,8 @@ class UserLogListenerManager(MetaApiClient):
                 'params': {},
                 'headers': {
                     'auth-token': self._token
-                }
+                },
+                'convertDates': True
             }
             if start_time:
                 opts['params']['startTime'] = format_date(start_time)
@@ -169,25 +242,40 @@ class UserLogListenerManager(MetaApiClient):
                 opts['params']['positionId'] = position_id
             if level:
                 opts['params']['level'] = level
-            if limit:
-                opts['params']['limit'] = limit
+            if poll.limit:
+                opts['params']['limit'] = poll.limit
             try:
                 packets = await self._domainClient.request_copyfactory(opts, True)
                 # stop job if user has unsubscribed in time of new packets has been received
                 if listener_id not in self._subscriberLogListeners:
                     return
-                await listener.on_user_log(packets)
+                callback_start = time.perf_counter()
+                await invoke_listener_callback(listener.on_user_log, self._executor, packets)
+                callback_time = time.perf_counter() - callback_start
                 throttle_time = self._errorThrottleTime
                 if listener_id in self._subscriberLogListeners and len(packets):
                     start_time = date(packets[0]['time']) + timedelta(milliseconds=1)
+                stats.record_success(packets, callback_time, start_time,
+                                     caught_up=poll.limit is None or len(packets) < poll.limit)
+                delay = poll.record_poll(len(packets))
+                if delay:
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                raise
             except NotFoundException as err:
-                await listener.on_error(err)
-                self._logger.error(f'Subscriber {subscriber_id} not found, removing listener f{listener_id}')
+                await invoke_listener_callback(listener.on_error, self._executor, err)
+                self._logger.error(f'Subscriber {subscriber_id} not found, removing listener {listener_id}',
+                                   extra={'listener_id': listener_id, 'subscriber_id': subscriber_id})
                 if listener_id in self._subscriberLogListeners:
                     del self._subscriberLogListeners[listener_id]
+                    self._remove_stats(listener_id)
+                    self._jobs.stop(listener_id)
             except Exception as err:
-                await listener.on_error(err)
+                await invoke_listener_callback(listener.on_error, self._executor, err)
                 self._logger.error(f'Failed to retrieve user log stream for subscriber {subscriber_id}, ' +
-                                   f'listener {listener_id}, retrying in {math.floor(throttle_time)} seconds', err)
-                await asyncio.sleep(throttle_time)
+                                   f'listener {listener_id}, retrying in {math.floor(throttle_time)} seconds', err,
+                                   extra={'listener_id': listener_id, 'subscriber_id': subscriber_id,
+                                          'throttle_time': throttle_time})
+                stats.record_error(err, throttle_time)
+                await asyncio.sleep(poll.error_delay(throttle_time))
                 throttle_time = min(throttle_time * 2, 30)
@@ -10,6 +10,8 @@ from typing import List
 import pytest
 
 token = 'header.payload.sign'
+# polls are not randomized so that retry timing can be asserted
+poll_opts = {'emptyPollJitterInSeconds': 0, 'errorJitter': 0}
 expected = [{
     'time': '2020-08-08T08:57:30.328Z',
     'level': 'INFO',
@@ -43,7 +45,7 @@ async def run_around_tests():
     domain_client = DomainClient(MagicMock(), token)
     domain_client.request_copyfactory = AsyncMock()
     global user_log_listener_manager
-    user_log_listener_manager = UserLogListenerManager(domain_client)
+    user_log_listener_manager = UserLogListenerManager(domain_client, listener_opts=poll_opts)
     global call_stub
     call_stub = MagicMock()
     global error_stub
@@ -75,6 +77,7 @@ async def prepare_strategy_logs():
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }:
             await sleep(0.1)
             return expected
@@ -90,6 +93,7 @@ async def prepare_strategy_logs():
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }:
             await sleep(0.1)
             return expected2
@@ -153,6 +157,7 @@ class TestStrategyLogs:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.05)
                 return expected
@@ -200,6 +205,7 @@ class TestStrategyLogs:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.1)
                 return expected
@@ -215,6 +221,7 @@ class TestStrategyLogs:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.1)
                 raise error
@@ -256,6 +263,7 @@ async def prepare_subscriber_logs():
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }:
             await sleep(0.1)
             return expected
@@ -272,6 +280,7 @@ async def prepare_subscriber_logs():
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }:
             await sleep(0.1)
             return expected2
@@ -336,6 +345,7 @@ class TestSubscriberTransactions:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.05)
                 return expected
@@ -384,6 +394,7 @@ class TestSubscriberTransactions:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.1)
                 return expected
@@ -400,6 +411,7 @@ class TestSubscriberTransactions:
                 'headers': {
                     'auth-token': token
                 },
+                'convertDates': True
             }:
                 await sleep(0.1)
                 raise error
@@ -1,16 +1,22 @@
 from ..metaApi_client import MetaApiClient
 from ..domain_client import DomainClient
-from .streaming.stopoutListenerManager import StopoutListenerManager
-from .streaming.userLogListenerManager import UserLogListenerManager
 from .signal_client import SignalClient
+from .signal_client_registry import SignalClientRegistry
 from .copyFactory_models import CopyFactoryStrategyStopout, CopyFactoryUserLogMessage, \
-    CopyFactoryStrategyStopoutReason, LogLevel
+    CopyFactoryStrategyStopoutReason, LogLevel, CopyFactoryResynchronizeJob
+from ..batchExecutor import BatchExecutor, BatchOpts, BatchResult
 from .streaming.stopoutListener import StopoutListener
 from .streaming.userLogListener import UserLogListener
-from typing import List
-from httpx import Response
+from .streaming.listenerStats import StreamListenerStats
+from typing import List, AsyncIterator, TYPE_CHECKING
 from datetime import datetime
-from ...models import format_date, convert_iso_time_to_date
+import pytz
+import asyncio
+from ...models import format_date
+if TYPE_CHECKING:
+    from httpx import Response
+    from .streaming.stopoutListenerManager import StopoutListenerManager
+    from .streaming.userLogListenerManager import UserLogListenerManager
 
 
 class TradingClient(MetaApiClient):
@@ -25,11 +31,22 @@ class TradingClient(MetaApiClient):
         """
         super().__init__(domain_client)
         self._domainClient = domain_client
-        self._stopoutListenerManager = StopoutListenerManager(domain_client)
-        self._userLogListenerManager = UserLogListenerManager(domain_client)
+        # listener managers are created on first use, so that their modules are only loaded when streams are used
+        self._stopoutListenerManager = None
+        self._userLogListenerManager = None
+        self._signalClientRegistry = SignalClientRegistry(self, domain_client)
+
+    @property
+    def signal_client_registry(self) -> SignalClientRegistry:
+        """Returns registry of signal clients with pre-warmed region connections.
+
+        Returns:
+            Signal client registry.
+        """
+        return self._signalClientRegistry
 
     async def resynchronize(self, subscriber_id: str, strategy_ids: List[str] = None,
-                            position_ids: List[str] = None) -> Response:
+                            position_ids: List[str] = None) -> 'Response':
         """Resynchronizes the account. See
         https://metaapi.cloud/docs/copyfactory/restApi/api/trading/resynchronize/
 
@@ -58,6 +75,32 @@ class TradingClient(MetaApiClient):
         }
         return await self._domainClient.request_copyfactory(opts)
 
+    async def resynchronize_many(self, jobs: List[CopyFactoryResynchronizeJob], opts: BatchOpts = None) \
+            -> BatchResult:
+        """Resynchronizes many subscribers with bounded concurrency and rate. Failures of single subscribers are
+        collected in the result and do not stop the batch. If a checkpoint file is specified, jobs completed by a
+        previous run are skipped, so that an interrupted batch can be resumed.
+
+        Args:
+            jobs: Resynchronization jobs.
+            opts: Batch options. By default 10 jobs are executed concurrently at a rate of 10 jobs per second.
+
+        Returns:
+            A coroutine which resolves with batch result.
+        """
+        if self._is_not_jwt_token():
+            return self._handle_no_access_exception('resynchronize_many')
+        opts = {'concurrency': 10, 'requestsPerSecond': 10, **(opts or {})}
+
+        def job_key(job: CopyFactoryResynchronizeJob) -> str:
+            return '/'.join([job['subscriberId'], ','.join(sorted(job.get('strategyIds') or [])),
+                             ','.join(sorted(job.get('positionIds') or []))])
+
+        async def resynchronize(job: CopyFactoryResynchronizeJob):
+            return await self.resynchronize(job['subscriberId'], job.get('strategyIds'), job.get('positionIds'))
+
+        return await BatchExecutor(opts).execute(jobs, resynchronize, job_key)
+
     async def get_signal_client(self, account_id: str):
         """Generates an instance of signal client for an account.
 
@@ -88,14 +131,14 @@ class TradingClient(MetaApiClient):
             'method': 'GET',
             'headers': {
                 'auth-token': self._token
-            }
+            },
+            'convertDates': True
         }
         result = await self._domainClient.request_copyfactory(opts)
-        convert_iso_time_to_date(result)
         return result
 
     async def reset_stopouts(self, subscriber_id: str, strategy_id: str, reason: CopyFactoryStrategyStopoutReason) \
-            -> Response:
+            -> 'Response':
         """Resets strategy stopouts. See
         https://metaapi.cloud/docs/copyfactory/restApi/api/trading/resetStopOuts/
 
@@ -160,10 +203,10 @@ class TradingClient(MetaApiClient):
             'headers': {
                 'auth-token': self._token
             },
-            'params': qs
+            'params': qs,
+            'convertDates': True
         }
         result = await self._domainClient.request_copyfactory(opts, True)
-        convert_iso_time_to_date(result)
         return result
 
     async def get_strategy_log(self, strategy_id: str, start_time: datetime = None, end_time: datetime = None,
@@ -204,12 +247,75 @@ class TradingClient(MetaApiClient):
             'headers': {
                 'auth-token': self._token
             },
-            'params': qs
+            'params': qs,
+            'convertDates': True
         }
         result = await self._domainClient.request_copyfactory(opts, True)
-        convert_iso_time_to_date(result)
         return result
 
+    async def iter_user_log(self, subscriber_id: str, start_time: datetime = None, end_time: datetime = None,
+                            strategy_id: str = None, position_id: str = None, level: LogLevel = None,
+                            page_size: int = 1000) -> AsyncIterator[CopyFactoryUserLogMessage]:
+        """Iterates over all copy trading user log records of an account for a time range, in reverse chronological
+        order, requesting pages as they are consumed. If end time is not specified, current time is used so that new
+        records do not shift pagination offsets.
+
+        Args:
+            subscriber_id: Subscriber id.
+            start_time: Time to start loading data from.
+            end_time: Time to stop loading data at.
+            strategy_id: Strategy id filter.
+            position_id: Position id filter.
+            level: Minimum severity level.
+            page_size: Amount of records requested per page. Default is 1000.
+
+        Returns:
+            An asynchronous iterator over log records found.
+        """
+        if self._is_not_jwt_token():
+            self._handle_no_access_exception('iter_user_log')
+        end_time = end_time or datetime.now(pytz.utc)
+        offset = 0
+        while True:
+            records = await self.get_user_log(subscriber_id, start_time, end_time, strategy_id, position_id, level,
+                                              offset, page_size)
+            for record in records:
+                yield record
+            if len(records) < page_size:
+                return
+            offset += page_size
+
+    async def iter_strategy_log(self, strategy_id: str, start_time: datetime = None, end_time: datetime = None,
+                                position_id: str = None, level: LogLevel = None,
+                                page_size: int = 1000) -> AsyncIterator[CopyFactoryUserLogMessage]:
+        """Iterates over all event log records of a CopyFactory strategy for a time range, in reverse chronological
+        order, requesting pages as they are consumed. If end time is not specified, current time is used so that new
+        records do not shift pagination offsets.
+
+        Args:
+            strategy_id: Strategy id to retrieve log for.
+            start_time: Time to start loading data from.
+            end_time: Time to stop loading data at.
+            position_id: Position id filter.
+            level: Minimum severity level.
+            page_size: Amount of records requested per page. Default is 1000.
+
+        Returns:
+            An asynchronous iterator over log records found.
+        """
+        if self._is_not_jwt_token():
+            self._handle_no_access_exception('iter_strategy_log')
+        end_time = end_time or datetime.now(pytz.utc)
+        offset = 0
+        while True:
+            records = await self.get_strategy_log(strategy_id, start_time, end_time, position_id, level, offset,
+                                                  page_size)
+            for record in records:
+                yield record
+            if len(records) < page_size:
+                return
+            offset += page_size
+
     def add_stopout_listener(self, listener: StopoutListener, account_id: str = None, strategy_id: str = None,
                              sequence_number: int = None) -> str:
         """Adds a stopout listener and creates a job to make requests.
@@ -223,7 +329,8 @@ class TradingClient(MetaApiClient):
         Returns:
             Listener id.
         """
-        return self._stopoutListenerManager.add_stopout_listener(listener, account_id, strategy_id, sequence_number)
+        return self._get_stopout_listener_manager().add_stopout_listener(listener, account_id, strategy_id,
+                                                                         sequence_number)
 
     def remove_stopout_listener(self, listener_id: str):
         """Removes stopout listener and cancels the event stream.
@@ -231,7 +338,7 @@ class TradingClient(MetaApiClient):
         Args:
             listener_id: Stopout listener id.
         """
-        self._stopoutListenerManager.remove_stopout_listener(listener_id)
+        self._get_stopout_listener_manager().remove_stopout_listener(listener_id)
 
     def add_strategy_log_listener(self, listener: UserLogListener, strategy_id: str, start_time: datetime = None,
                                   position_id: str = None, level: LogLevel = None, limit: int = None) -> str:
@@ -248,8 +355,8 @@ class TradingClient(MetaApiClient):
         Returns:
             Listener id.
         """
-        return self._userLogListenerManager.add_strategy_log_listener(listener, strategy_id, start_time, position_id,
-                                                                      level, limit)
+        return self._get_user_log_listener_manager().add_strategy_log_listener(
+            listener, strategy_id, start_time, position_id, level, limit)
 
     def remove_strategy_log_listener(self, listener_id: str):
         """Removes strategy log listener and cancels the event stream.
@@ -257,7 +364,7 @@ class TradingClient(MetaApiClient):
         Args:
             listener_id: Strategy log listener id.
         """
-        self._userLogListenerManager.remove_strategy_log_listener(listener_id)
+        self._get_user_log_listener_manager().remove_strategy_log_listener(listener_id)
 
     def add_subscriber_log_listener(self, listener: UserLogListener, subscriber_id: str, start_time: datetime = None,
                                     strategy_id: str = None, position_id: str = None, level: LogLevel = None,
@@ -276,7 +383,7 @@ class TradingClient(MetaApiClient):
         Returns:
             Listener id.
         """
-        return self._userLogListenerManager.add_subscriber_log_listener(
+        return self._get_user_log_listener_manager().add_subscriber_log_listener(
             listener, subscriber_id, start_time, strategy_id, position_id, level, limit)
 
     def remove_subscriber_log_listener(self, listener_id: str):
@@ -285,4 +392,38 @@ class TradingClient(MetaApiClient):
         Args:
             listener_id: Subscriber log listener id.
         """
-        self._userLogListenerManager.remove_subscriber_log_listener(listener_id)
+        self._get_user_log_listener_manager().remove_subscriber_log_listener(listener_id)
+
+    def stats(self) -> 'List[StreamListenerStats]':
+        """Returns health statistics of active user log and stopout listeners, such as last successful poll,
+        throughput, stream position, lag, errors and callback execution time.
+
+        Returns:
+            Statistics of strategy log, subscriber log and stopout listeners.
+        """
+        return (self._userLogListenerManager.stats() if self._userLogListenerManager else []) + \
+            (self._stopoutListenerManager.stats() if self._stopoutListenerManager else [])
+
+    async def close(self, timeout: float = 10):
+        """Removes all user log and stopout listeners, cancels their stream requests in flight and waits until their
+        jobs stop. Stops keep-alive probes of signal clients.
+
+        Args:
+            timeout: Maximum time to wait for listener jobs to stop in seconds, default value is 10.
+        """
+        managers = [manager for manager in [self._userLogListenerManager, self._stopoutListenerManager] if manager]
+        await asyncio.gather(self._signalClientRegistry.close(), *[manager.close(timeout) for manager in managers])
+
+    def _get_stopout_listener_manager(self) -> 'StopoutListenerManager':
+        if self._stopoutListenerManager is None:
+            from .streaming.stopoutListenerManager import StopoutListenerManager
+            self._stopoutListenerManager = StopoutListenerManager(
+                self._domainClient, self._domainClient.executor, self._domainClient.stream_listener_opts)
+        return self._stopoutListenerManager
+
+    def _get_user_log_listener_manager(self) -> 'UserLogListenerManager':
+        if self._userLogListenerManager is None:
+            from .streaming.userLogListenerManager import UserLogListenerManager
+            self._userLogListenerManager = UserLogListenerManager(
+                self._domainClient, self._domainClient.executor, self._domainClient.stream_listener_opts)
+        return self._userLogListenerManager
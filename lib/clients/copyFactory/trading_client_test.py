@@ -49,6 +49,36 @@ class TestTradingClient:
                    'because you have connected with account access token. Please use API access token from ' + \
                    'https://app.metaapi.cloud/token page to invoke this method.'
 
+    @pytest.mark.asyncio
+    async def test_resynchronize_many_subscribers(self):
+        """Should resynchronize many subscribers and collect failures."""
+        error = Exception('test')
+
+        async def request(opts):
+            if 'subscriber2' in opts['url']:
+                raise error
+
+        domain_client.request_copyfactory = AsyncMock(side_effect=request)
+        result = await trading_client.resynchronize_many([
+            {'subscriberId': 'subscriber1', 'strategyIds': ['ABCD']},
+            {'subscriberId': 'subscriber2'},
+            {'subscriberId': 'subscriber3', 'positionIds': ['0123456']}
+        ])
+        assert domain_client.request_copyfactory.call_count == 3
+        domain_client.request_copyfactory.assert_any_call({
+            'url': '/users/current/subscribers/subscriber1/resynchronize',
+            'method': 'POST',
+            'headers': {
+                'auth-token': token
+            },
+            'params': {
+                'strategyId': ['ABCD']
+            }
+        })
+        assert len(result['results']) == 3
+        assert list(map(lambda r: r['key'], result['failed'])) == ['subscriber2//']
+        assert result['failed'][0]['error'] == error
+
     @pytest.mark.asyncio
     async def test_retrieve_stopouts(self):
         """Should retrieve stopouts."""
@@ -72,6 +102,7 @@ class TestTradingClient:
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         })
 
     @pytest.mark.asyncio
@@ -141,6 +172,7 @@ class TestTradingClient:
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }, True)
 
     @pytest.mark.asyncio
@@ -182,6 +214,7 @@ class TestTradingClient:
             'headers': {
                 'auth-token': token
             },
+            'convertDates': True
         }, True)
 
     @pytest.mark.asyncio
@@ -218,7 +251,7 @@ class TestTradingClient:
     async def test_add_stopout_listener(self):
         """Should add stopout listener."""
         call_stub = MagicMock(return_value='listenerId')
-        trading_client._stopoutListenerManager.add_stopout_listener = call_stub
+        trading_client._get_stopout_listener_manager().add_stopout_listener = call_stub
         listener = MagicMock()
         listener_id = trading_client.add_stopout_listener(listener, 'accountId', 'ABCD', 1)
         assert listener_id == 'listenerId'
@@ -228,7 +261,7 @@ class TestTradingClient:
     async def test_remove_stopout_listener(self):
         """Should remove stopout listener."""
         call_stub = MagicMock()
-        trading_client._stopoutListenerManager.remove_stopout_listener = call_stub
+        trading_client._get_stopout_listener_manager().remove_stopout_listener = call_stub
         trading_client.remove_stopout_listener('id')
         call_stub.assert_called_with('id')
 
@@ -239,7 +272,7 @@ class TestUserLogListener:
     async def test_add_strategy_log_listener(self):
         """Should add strategy listener."""
         call_stub = MagicMock(return_value='listenerId')
-        trading_client._userLogListenerManager.add_strategy_log_listener = call_stub
+        trading_client._get_user_log_listener_manager().add_strategy_log_listener = call_stub
         listener = MagicMock()
         listener_id = trading_client.add_strategy_log_listener(listener, 'ABCD')
         assert listener_id == 'listenerId'
@@ -249,7 +282,7 @@ class TestUserLogListener:
     async def test_remove_strategy_log_listener(self):
         """Should remove stopout listener."""
         call_stub = MagicMock()
-        trading_client._stopoutListenerManager.remove_stopout_listener = call_stub
+        trading_client._get_stopout_listener_manager().remove_stopout_listener = call_stub
         trading_client.remove_stopout_listener('id')
         call_stub.assert_called_with('id')
 
@@ -257,7 +290,7 @@ class TestUserLogListener:
     async def test_add_subscriber_log_listener(self):
         """Should add subscriber listener."""
         call_stub = MagicMock(return_value='listenerId')
-        trading_client._userLogListenerManager.add_subscriber_log_listener = call_stub
+        trading_client._get_user_log_listener_manager().add_subscriber_log_listener = call_stub
         listener = MagicMock()
         listener_id = trading_client.add_subscriber_log_listener(listener, 'accountId')
         assert listener_id == 'listenerId'
@@ -267,6 +300,48 @@ class TestUserLogListener:
     async def test_remove_subscriber_log_listener(self):
         """Should remove subscriber listener."""
         call_stub = MagicMock()
-        trading_client._userLogListenerManager.remove_subscriber_log_listener = call_stub
+        trading_client._get_user_log_listener_manager().remove_subscriber_log_listener = call_stub
         trading_client.remove_subscriber_log_listener('id')
         call_stub.assert_called_with('id')
+
+    @pytest.mark.asyncio
+    async def test_iterate_user_log_pages(self):
+        """Should iterate over all pages of user log."""
+        pages = [[{'message': '1'}, {'message': '2'}], [{'message': '3'}, {'message': '4'}], [{'message': '5'}]]
+        domain_client.request_copyfactory = AsyncMock(side_effect=pages)
+        records = [record async for record in trading_client.iter_user_log(
+            'e8867baa-5ec2-45ae-9930-4d5cea18d0d6', date('2020-08-01T00:00:00.000Z'),
+            date('2020-08-10T00:00:00.000Z'), page_size=2)]
+        assert list(map(lambda r: r['message'], records)) == ['1', '2', '3', '4', '5']
+        assert domain_client.request_copyfactory.call_count == 3
+        domain_client.request_copyfactory.assert_called_with({
+            'url': '/users/current/subscribers/e8867baa-5ec2-45ae-9930-4d5cea18d0d6/user-log',
+            'method': 'GET',
+            'headers': {
+                'auth-token': token
+            },
+            'params': {
+                'startTime': '2020-08-01T00:00:00.000Z',
+                'endTime': '2020-08-10T00:00:00.000Z',
+                'offset': 4,
+                'limit': 2
+            },
+            'convertDates': True
+        }, True)
+
+    @pytest.mark.asyncio
+    async def test_iterate_strategy_log_pages(self):
+        """Should iterate over all pages of strategy log."""
+        pages = [[{'message': '1'}, {'message': '2'}], []]
+        domain_client.request_copyfactory = AsyncMock(side_effect=pages)
+        records = [record async for record in trading_client.iter_strategy_log('ABCD', page_size=2)]
+        assert list(map(lambda r: r['message'], records)) == ['1', '2']
+        assert domain_client.request_copyfactory.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_close_signal_client_registry(self):
+        """Should stop keep-alive probes of signal clients on close."""
+        registry = trading_client.signal_client_registry
+        registry.close = AsyncMock()
+        await trading_client.close()
+        registry.close.assert_called_once()
@@ -0,0 +1,169 @@
+from .copyFactory_models import CopyFactoryUserLogMessage, LogLevel
+from typing_extensions import TypedDict
+from typing import List, Optional, AsyncIterator, Callable, Awaitable
+from datetime import datetime, timedelta
+import asyncio
+import heapq
+import pytz
+
+
+class UserLogFetcherOpts(TypedDict, total=False):
+    """User log fetcher options."""
+    concurrency: Optional[int]
+    """Maximum amount of concurrent page requests, default value is 10."""
+    windowInHours: Optional[float]
+    """Size of time windows the requested time range is split into, default value is 24."""
+    pageSize: Optional[int]
+    """Amount of records requested per page, default value is 1000."""
+    bufferedPages: Optional[int]
+    """Maximum amount of pages buffered per time window ahead of the consumer, default value is 1."""
+
+
+class UserLogFetcher:
+    """Fetches user or strategy logs of many subscribers or strategies for a time range. The time range is split into
+    windows, windows are fetched concurrently and records are merged into a single stream sorted in reverse
+    chronological order. Only a bounded amount of pages is kept in memory."""
+
+    def __init__(self, trading_client, opts: UserLogFetcherOpts = None):
+        """Inits user log fetcher instance.
+
+        Args:
+            trading_client: CopyFactory trading API client.
+            opts: Fetcher options.
+        """
+        opts: UserLogFetcherOpts = opts or {}
+        self._tradingClient = trading_client
+        self._concurrency = opts['concurrency'] if 'concurrency' in opts else 10
+        self._window = timedelta(hours=opts['windowInHours'] if 'windowInHours' in opts else 24)
+        self._pageSize = opts['pageSize'] if 'pageSize' in opts else 1000
+        self._bufferedPages = opts['bufferedPages'] if 'bufferedPages' in opts else 1
+
+    async def fetch_subscriber_logs(self, subscriber_ids: List[str], start_time: datetime, end_time: datetime = None,
+                                    strategy_id: str = None, position_id: str = None, level: LogLevel = None) \
+            -> AsyncIterator[CopyFactoryUserLogMessage]:
+        """Fetches user log records of subscribers, merged in reverse chronological order.
+
+        Args:
+            subscriber_ids: Subscriber ids.
+            start_time: Time to start loading data from.
+            end_time: Time to stop loading data at, default is current time.
+            strategy_id: Strategy id filter.
+            position_id: Position id filter.
+            level: Minimum severity level.
+
+        Returns:
+            An asynchronous iterator over log records found.
+        """
+        def page_fetcher(subscriber_id: str, window_start: datetime, window_end: datetime):
+            return lambda offset, limit: self._tradingClient.get_user_log(
+                subscriber_id, window_start, window_end, strategy_id, position_id, level, offset, limit)
+
+        async for record in self._fetch(subscriber_ids, page_fetcher, start_time, end_time):
+            yield record
+
+    async def fetch_strategy_logs(self, strategy_ids: List[str], start_time: datetime, end_time: datetime = None,
+                                  position_id: str = None, level: LogLevel = None) \
+            -> AsyncIterator[CopyFactoryUserLogMessage]:
+        """Fetches event log records of strategies, merged in reverse chronological order.
+
+        Args:
+            strategy_ids: Strategy ids.
+            start_time: Time to start loading data from.
+            end_time: Time to stop loading data at, default is current time.
+            position_id: Position id filter.
+            level: Minimum severity level.
+
+        Returns:
+            An asynchronous iterator over log records found.
+        """
+        def page_fetcher(strategy_id: str, window_start: datetime, window_end: datetime):
+            return lambda offset, limit: self._tradingClient.get_strategy_log(
+                strategy_id, window_start, window_end, position_id, level, offset, limit)
+
+        async for record in self._fetch(strategy_ids, page_fetcher, start_time, end_time):
+            yield record
+
+    async def _fetch(self, ids: List[str], page_fetcher: Callable, start_time: datetime, end_time: datetime = None):
+        end_time = end_time or datetime.now(pytz.utc)
+        semaphore = asyncio.Semaphore(self._concurrency)
+        windows = []
+        window_end = end_time
+        while window_end > start_time:
+            window_start = max(start_time, window_end - self._window)
+            windows.append((window_start, window_end))
+            # log request time bounds are inclusive
+            window_end = window_start - timedelta(milliseconds=1)
+        streams = [self._shard_stream([page_fetcher(id, window_start, window_end)
+                                       for window_start, window_end in windows], semaphore) for id in ids]
+        try:
+            async for record in self._merge(streams):
+                yield record
+        finally:
+            for stream in streams:
+                await stream.aclose()
+
+    async def _shard_stream(self, fetchers: List[Callable[[int, int], Awaitable[list]]],
+                            semaphore: asyncio.Semaphore):
+        # windows are consumed in order, the next window is prefetched while the current one is consumed
+        tasks = []
+        queues = []
+
+        def start(index: int):
+            if index < len(fetchers) and index == len(tasks):
+                queue = asyncio.Queue(self._bufferedPages)
+                queues.append(queue)
+                tasks.append(asyncio.create_task(self._produce(fetchers[index], queue, semaphore)))
+
+        try:
+            start(0)
+            for index in range(len(fetchers)):
+                start(index + 1)
+                while True:
+                    page = await queues[index].get()
+                    if page is None:
+                        break
+                    if isinstance(page, Exception):
+                        raise page
+                    for record in page:
+                        yield record
+                queues[index] = None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _produce(self, fetch_page: Callable[[int, int], Awaitable[list]], queue: asyncio.Queue,
+                       semaphore: asyncio.Semaphore):
+        offset = 0
+        try:
+            while True:
+                async with semaphore:
+                    page = await fetch_page(offset, self._pageSize)
+                await queue.put(page)
+                if len(page) < self._pageSize:
+                    break
+                offset += self._pageSize
+            await queue.put(None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            await queue.put(err)
+
+    @staticmethod
+    async def _merge(streams: List[AsyncIterator[CopyFactoryUserLogMessage]]):
+        heap = []
+
+        async def push(index: int):
+            try:
+                record = await streams[index].__anext__()
+                heapq.heappush(heap, (-record['time'].timestamp(), index, record))
+            except StopAsyncIteration:
+                pass
+
+        results = await asyncio.gather(*[push(index) for index in range(len(streams))], return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        while heap:
+            timestamp, index, record = heapq.heappop(heap)
+            yield record
+            await push(index)
@@ -0,0 +1,66 @@
+from .user_log_fetcher import UserLogFetcher
+from ...models import date
+from mock import MagicMock, AsyncMock
+from datetime import timedelta
+from asyncio import sleep
+import pytest
+
+trading_client = MagicMock()
+fetcher = UserLogFetcher(trading_client)
+start_time = date('2020-08-01T00:00:00.000Z')
+end_time = date('2020-08-03T00:00:00.000Z')
+
+
+def records(subscriber_id: str, window_start, window_end):
+    # one record per 6 hours, in reverse chronological order
+    result = []
+    time = window_end
+    while time >= window_start:
+        result.append({'time': time, 'subscriberId': subscriber_id, 'message': 'message', 'level': 'INFO'})
+        time -= timedelta(hours=6)
+    return result
+
+
+@pytest.fixture(autouse=True)
+async def run_around_tests():
+    global trading_client
+    trading_client = MagicMock()
+
+    async def get_user_log(subscriber_id, window_start, window_end, strategy_id, position_id, level, offset, limit):
+        await sleep(0.01)
+        return records(subscriber_id, window_start, window_end)[offset:offset + limit]
+
+    trading_client.get_user_log = AsyncMock(side_effect=get_user_log)
+    global fetcher
+    fetcher = UserLogFetcher(trading_client, {'pageSize': 2, 'windowInHours': 24, 'concurrency': 3})
+
+
+class TestUserLogFetcher:
+    @pytest.mark.asyncio
+    async def test_merge_logs_of_subscribers(self):
+        """Should fetch logs of all subscribers and windows merged in reverse chronological order."""
+        result = [record async for record in fetcher.fetch_subscriber_logs(['s1', 's2'], start_time, end_time)]
+        expected = sorted(records('s1', start_time, end_time - timedelta(days=1, milliseconds=1)) +
+                          records('s1', end_time - timedelta(days=1), end_time) +
+                          records('s2', start_time, end_time - timedelta(days=1, milliseconds=1)) +
+                          records('s2', end_time - timedelta(days=1), end_time),
+                          key=lambda record: record['time'], reverse=True)
+        assert list(map(lambda r: r['time'], result)) == list(map(lambda r: r['time'], expected))
+        assert len(list(filter(lambda r: r['subscriberId'] == 's1', result))) == 9
+
+    @pytest.mark.asyncio
+    async def test_paginate_windows(self):
+        """Should request pages of every window until a page is not full."""
+        [record async for record in fetcher.fetch_subscriber_logs(['s1'], start_time, end_time)]
+        trading_client.get_user_log.assert_any_call('s1', end_time - timedelta(days=1), end_time, None, None, None,
+                                                    0, 2)
+        trading_client.get_user_log.assert_any_call('s1', end_time - timedelta(days=1), end_time, None, None, None,
+                                                    4, 2)
+        assert trading_client.get_user_log.call_count == 6
+
+    @pytest.mark.asyncio
+    async def test_raise_fetch_error(self):
+        """Should raise error if a page failed to load."""
+        trading_client.get_user_log = AsyncMock(side_effect=Exception('test'))
+        with pytest.raises(Exception):
+            [record async for record in fetcher.fetch_subscriber_logs(['s1', 's2'], start_time, end_time)]
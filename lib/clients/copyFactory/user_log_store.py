@@ -0,0 +1,248 @@
+from .copyFactory_models import CopyFactoryUserLogMessage, LogLevel
+from .streaming.userLogListener import UserLogListener
+from ...models import date, format_date
+from typing import List, Iterator, Optional
+from concurrent.futures import Executor
+from datetime import datetime
+from enum import Enum
+import threading
+import functools
+import asyncio
+import sqlite3
+import hashlib
+import json
+import re
+
+_token_pattern = re.compile(r'\w+')
+
+
+class UserLogStoreListener(UserLogListener):
+    """User log listener which writes received records into a user log store."""
+
+    def __init__(self, store: 'UserLogStore', subscriber_id: str = None):
+        """Inits user log store listener instance.
+
+        Args:
+            store: User log store.
+            subscriber_id: Id of the subscriber the records belong to.
+        """
+        self._store = store
+        self._subscriberId = subscriber_id
+
+    async def on_user_log(self, log_event: List[CopyFactoryUserLogMessage]):
+        await self._store._add_in_executor(log_event, self._subscriberId)
+
+
+class UserLogStore:
+    """On-disk store of user log records indexed by position id, strategy id, symbol, level, time and message
+    tokens."""
+
+    def __init__(self, path: str, executor: Executor = None):
+        """Inits user log store instance, creating the database file if it does not exist.
+
+        Args:
+            path: Database file path, use :memory: to keep the store in memory.
+            executor: Thread pool to write streamed and loaded records and run searches in, so that disk access does
+            not block the event loop. If not specified, the default executor of the event loop is used.
+        """
+        # records are written and searched in executor threads, statements are serialized by the lock
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._executor = executor
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE,
+                time REAL,
+                subscriberId TEXT,
+                strategyId TEXT,
+                positionId TEXT,
+                symbol TEXT,
+                level TEXT,
+                data TEXT
+            );
+            CREATE INDEX IF NOT EXISTS records_time ON records (time);
+            CREATE INDEX IF NOT EXISTS records_subscriber ON records (subscriberId, time);
+            CREATE INDEX IF NOT EXISTS records_strategy ON records (strategyId, time);
+            CREATE INDEX IF NOT EXISTS records_position ON records (positionId, time);
+            CREATE INDEX IF NOT EXISTS records_symbol ON records (symbol, time);
+            CREATE INDEX IF NOT EXISTS records_level ON records (level, time);
+            CREATE TABLE IF NOT EXISTS tokens (
+                token TEXT,
+                recordId INTEGER,
+                PRIMARY KEY (token, recordId)
+            ) WITHOUT ROWID;
+        """)
+
+    def listener(self, subscriber_id: str = None) -> UserLogStoreListener:
+        """Creates a user log listener which writes received records into the store.
+
+        Args:
+            subscriber_id: Id of the subscriber the listener streams records of.
+
+        Returns:
+            User log listener.
+        """
+        return UserLogStoreListener(self, subscriber_id)
+
+    def add(self, records: List[CopyFactoryUserLogMessage], subscriber_id: str = None) -> int:
+        """Adds records to the store. Records which are already stored are skipped.
+
+        Args:
+            records: User log records.
+            subscriber_id: Id of the subscriber the records belong to.
+
+        Returns:
+            Amount of records added.
+        """
+        added = 0
+        with self._lock, self._db:
+            for record in records:
+                data = json.dumps(record, default=self._serialize, sort_keys=True)
+                key = hashlib.sha1(((subscriber_id or '') + data).encode()).hexdigest()
+                cursor = self._db.execute(
+                    'INSERT OR IGNORE INTO records (key, time, subscriberId, strategyId, positionId, symbol, level, '
+                    'data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, date(record['time']).timestamp(), subscriber_id, record.get('strategyId'),
+                     record.get('positionId'), record.get('symbol'), self._level(record.get('level')), data))
+                if cursor.rowcount:
+                    added += 1
+                    self._db.executemany('INSERT OR IGNORE INTO tokens (token, recordId) VALUES (?, ?)',
+                                         [(token, cursor.lastrowid) for token in
+                                          set(self._tokenize(record.get('message') or ''))])
+        return added
+
+    async def load_user_log(self, trading_client, subscriber_id: str, start_time: datetime = None,
+                            end_time: datetime = None) -> int:
+        """Loads user log records of a subscriber from the API into the store.
+
+        Args:
+            trading_client: CopyFactory trading API client.
+            subscriber_id: Subscriber id.
+            start_time: Time to start loading data from.
+            end_time: Time to stop loading data at.
+
+        Returns:
+            A coroutine resolving with amount of records added.
+        """
+        added = 0
+        page = []
+        async for record in trading_client.iter_user_log(subscriber_id, start_time, end_time):
+            page.append(record)
+            if len(page) == 1000:
+                added += await self._add_in_executor(page, subscriber_id)
+                page = []
+        return added + await self._add_in_executor(page, subscriber_id)
+
+    async def query(self, subscriber_id: str = None, strategy_id: str = None, position_id: str = None,
+                    symbol: str = None, level: LogLevel = None, text: str = None, start_time: datetime = None,
+                    end_time: datetime = None, limit: int = 1000) -> List[CopyFactoryUserLogMessage]:
+        """Searches records, sorted in reverse chronological order. The search runs in the executor of the store.
+
+        Args:
+            subscriber_id: Subscriber id filter.
+            strategy_id: Strategy id filter.
+            position_id: Position id filter.
+            symbol: Symbol filter.
+            level: Exact log level filter.
+            text: Words which must all be present in the record message.
+            start_time: Time to search records from.
+            end_time: Time to search records till.
+            limit: Maximum amount of records returned. Default is 1000.
+
+        Returns:
+            A coroutine resolving with records found.
+        """
+        conditions = []
+        params = []
+        for column, value in [('subscriberId', subscriber_id), ('strategyId', strategy_id),
+                              ('positionId', position_id), ('symbol', symbol), ('level', self._level(level))]:
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        for token in set(self._tokenize(text or '')):
+            conditions.append('id IN (SELECT recordId FROM tokens WHERE token = ?)')
+            params.append(token)
+        self._add_time_conditions(conditions, params, start_time, end_time)
+        where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._select, f'SELECT data FROM records {where} ORDER BY time DESC LIMIT ?',
+            params + [limit])
+
+    def scan(self, start_time: datetime = None, end_time: datetime = None, batch_size: int = 1000) \
+            -> Iterator[CopyFactoryUserLogMessage]:
+        """Iterates over records of a time range in chronological order, reading them from disk in batches. Records
+        written while the scan runs may or may not be returned.
+
+        Args:
+            start_time: Time to scan records from.
+            end_time: Time to scan records till.
+            batch_size: Amount of records read from disk at once.
+
+        Returns:
+            Iterator over records found.
+        """
+        conditions = []
+        params = []
+        self._add_time_conditions(conditions, params, start_time, end_time)
+        where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+        with self._lock:
+            cursor = self._db.execute(f'SELECT data FROM records {where} ORDER BY time', params)
+        try:
+            while True:
+                # the cursor is kept between batches, so the lock is only held while a batch is read
+                with self._lock:
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield self._deserialize(row[0])
+        finally:
+            with self._lock:
+                cursor.close()
+
+    def close(self):
+        """Closes the store."""
+        with self._lock:
+            self._db.close()
+
+    def _select(self, sql: str, params: list) -> List[CopyFactoryUserLogMessage]:
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [self._deserialize(row[0]) for row in rows]
+
+    async def _add_in_executor(self, records: List[CopyFactoryUserLogMessage], subscriber_id: Optional[str]) -> int:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(self.add, records, subscriber_id))
+
+    @staticmethod
+    def _add_time_conditions(conditions: list, params: list, start_time: Optional[datetime],
+                             end_time: Optional[datetime]):
+        if start_time:
+            conditions.append('time >= ?')
+            params.append(start_time.timestamp())
+        if end_time:
+            conditions.append('time <= ?')
+            params.append(end_time.timestamp())
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        return _token_pattern.findall(text.lower())
+
+    @staticmethod
+    def _level(level) -> Optional[str]:
+        return level.value if isinstance(level, Enum) else level
+
+    @staticmethod
+    def _serialize(value):
+        if isinstance(value, datetime):
+            return format_date(value)
+        if isinstance(value, Enum):
+            return value.value
+        raise TypeError(f'Object of type {value.__class__.__name__} is not JSON serializable')
+
+    @staticmethod
+    def _deserialize(data: str) -> CopyFactoryUserLogMessage:
+        record = json.loads(data)
+        record['time'] = date(record['time'])
+        return record
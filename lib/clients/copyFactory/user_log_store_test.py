@@ -0,0 +1,113 @@
+from .user_log_store import UserLogStore
+from ...models import date
+from mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+
+store: UserLogStore = None
+records = [
+    {'time': date('2020-08-08T07:57:33.328Z'), 'strategyId': 'ABCD', 'positionId': '1', 'symbol': 'EURUSD',
+     'level': 'ERROR', 'message': 'Failed to open position: not enough money'},
+    {'time': '2020-08-08T07:57:32.328Z', 'strategyId': 'ABCD', 'positionId': '2', 'symbol': 'GBPUSD',
+     'level': 'INFO', 'message': 'Position opened'},
+    {'time': date('2020-08-08T07:57:31.328Z'), 'strategyId': 'EFGH', 'positionId': '1', 'symbol': 'EURUSD',
+     'level': 'INFO', 'message': 'Position opened'},
+    {'time': date('2020-08-08T07:57:30.328Z'), 'strategyId': 'EFGH', 'positionId': '1', 'symbol': 'EURUSD',
+     'level': 'ERROR', 'message': 'Failed to close position'}
+]
+
+
+@pytest.fixture(autouse=True)
+async def run_around_tests():
+    global store
+    store = UserLogStore(':memory:')
+    yield
+    store.close()
+
+
+class TestUserLogStore:
+    @pytest.mark.asyncio
+    async def test_query_by_fields(self):
+        """Should query records by indexed fields in reverse chronological order."""
+        assert store.add(records, 'subscriber1') == 4
+        result = await store.query(position_id='1', level='ERROR')
+        assert list(map(lambda r: r['time'], result)) == [records[0]['time'], records[3]['time']]
+        assert len(await store.query(strategy_id='ABCD', symbol='GBPUSD')) == 1
+        assert len(await store.query(subscriber_id='subscriber1')) == 4
+        assert await store.query(subscriber_id='subscriber2') == []
+
+    @pytest.mark.asyncio
+    async def test_query_by_message_tokens(self):
+        """Should query records by message words."""
+        store.add(records)
+        assert list(map(lambda r: r['message'], await store.query(text='failed POSITION'))) == \
+            ['Failed to open position: not enough money', 'Failed to close position']
+        assert len(await store.query(text='opened', position_id='2')) == 1
+        assert await store.query(text='closed') == []
+
+    @pytest.mark.asyncio
+    async def test_skip_duplicates(self):
+        """Should not store the same record twice."""
+        store.add(records)
+        assert store.add(records[:2]) == 0
+        assert len(await store.query()) == 4
+
+    def test_scan_time_range(self):
+        """Should scan time range in chronological order."""
+        store.add(records)
+        result = list(store.scan(date('2020-08-08T07:57:31.000Z'), date('2020-08-08T07:57:33.000Z'), batch_size=1))
+        assert list(map(lambda r: r['time'], result)) == [records[2]['time'], date(records[1]['time'])]
+
+    def test_scan_while_records_are_written(self):
+        """Should hold the lock only while a batch of a scan is read."""
+        store.add(records)
+        iterator = store.scan(batch_size=2)
+        assert next(iterator)['time'] == records[3]['time']
+        assert not store._lock.locked()
+        store.add([{**records[0], 'message': 'Position closed'}])
+        assert len(list(iterator)) >= 3
+
+    @pytest.mark.asyncio
+    async def test_store_streamed_records(self):
+        """Should store records received by the listener."""
+        await store.listener('subscriber1').on_user_log(records[:1])
+        assert await store.query(subscriber_id='subscriber1') == records[:1]
+
+    @pytest.mark.asyncio
+    async def test_write_streamed_records_in_executor(self):
+        """Should write records received by the listener and search them in the executor instead of the event
+        loop."""
+        with ThreadPoolExecutor(1) as executor:
+            executor_store = UserLogStore(':memory:', executor)
+            threads = []
+            add = executor_store.add
+
+            def add_in_thread(*args):
+                threads.append(threading.get_ident())
+                return add(*args)
+
+            executor_store.add = add_in_thread
+            select = executor_store._select
+
+            def select_in_thread(*args):
+                threads.append(threading.get_ident())
+                return select(*args)
+
+            executor_store._select = select_in_thread
+            await executor_store.listener('subscriber1').on_user_log(records[:1])
+            assert await executor_store.query(subscriber_id='subscriber1') == records[:1]
+            assert len(threads) == 2 and threading.get_ident() not in threads
+            executor_store.close()
+
+    @pytest.mark.asyncio
+    async def test_load_user_log(self):
+        """Should load user log from the API."""
+        trading_client = MagicMock()
+
+        async def iter_user_log(subscriber_id, start_time, end_time):
+            for record in records:
+                yield record
+
+        trading_client.iter_user_log = iter_user_log
+        assert await store.load_user_log(trading_client, 'subscriber1') == 4
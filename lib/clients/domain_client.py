@@ -1,7 +1,13 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+from concurrent.futures import Executor
 from copy import copy
 from ..models import promise_any
+from ..logger import LoggerManager
+from .metrics import MetricsListener, endpoint_template
+from .copyFactory.streaming.listenerStats import StreamListenerStats
+from .copyFactory.streaming.streamListenerOpts import StreamListenerOpts
+from .errorHandler import NotFoundException
 from typing_extensions import TypedDict
 import asyncio
 
@@ -14,23 +20,56 @@ class AccountInfo(TypedDict):
     """Account available regions."""
 
 
+class DomainCache:
+    """Region list and CopyFactory API domain of a domain. A cache may be shared by domain clients of different tokens,
+    so that regions and the API host are requested once per domain rather than once per token. Regions are requested
+    with the token of the client which updates the cache first, so tokens sharing a cache are expected to have the same
+    regions available. Region failover state is not shared, so that a failover of one token does not move requests of
+    other tokens to another region."""
+
+    def __init__(self):
+        """Inits domain cache instance."""
+        self.url_cache: Optional[dict] = None
+        self.region_cache: List[str] = []
+        self._updateLock = None
+        self._updateLockLoop = None
+
+    def update_lock(self) -> asyncio.Lock:
+        """Returns lock held while the cache is updated, so that concurrent requests of many tokens trigger a single
+        update.
+
+        Returns:
+            Lock bound to the running event loop.
+        """
+        loop = asyncio.get_event_loop()
+        if self._updateLock is None or self._updateLockLoop is not loop:
+            self._updateLock = asyncio.Lock()
+            self._updateLockLoop = loop
+        return self._updateLock
+
+
 class DomainClient:
     """Connection URL and request managing client"""
 
-    def __init__(self, http_client, token: str, domain: str = None):
+    def __init__(self, http_client, token: str, domain: str = None, cache: DomainCache = None,
+                 stream_listener_opts: StreamListenerOpts = None):
         """Inits domain client instance.
 
         Args:
             http_client: HTTP client.
             token: Authorization token.
             domain: Domain to connect to, default is agiliumtrade.agiliumtrade.ai.
+            cache: Region and url cache of the domain, may be shared with domain clients of other tokens. Default is
+            a cache of this client only.
+            stream_listener_opts: Options of stream listeners.
         """
         self._httpClient = http_client
         self._domain = domain or 'agiliumtrade.agiliumtrade.ai'
         self._token = token
-        self._urlCache = None
-        self._regionCache = []
+        self._cache = cache or DomainCache()
         self._regionIndex = 0
+        self._streamListenerOpts = stream_listener_opts
+        self._logger = LoggerManager.get_logger('DomainClient')
 
     @property
     def domain(self) -> str:
@@ -50,32 +89,101 @@ class DomainClient:
         """
         return self._token
 
-    async def request_copyfactory(self, opts: dict, is_extended_timeout: bool = False):
+    @property
+    def stream_listener_opts(self) -> Optional[StreamListenerOpts]:
+        """Returns options of stream listeners.
+
+        Returns:
+            Stream listener options.
+        """
+        return self._streamListenerOpts
+
+    @property
+    def metrics_listeners(self) -> List[MetricsListener]:
+        """Returns metrics listeners of the HTTP client.
+
+        Returns:
+            Metrics listeners.
+        """
+        return self._httpClient.metrics_listeners
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """Returns executor of the HTTP client, which decodes large responses and runs synchronous listener callbacks.
+
+        Returns:
+            Executor or None if work runs on the event loop.
+        """
+        return self._httpClient.executor
+
+    def report_listener_stats(self, stats: StreamListenerStats):
+        """Reports stream listener statistics to metrics listeners.
+
+        Args:
+            stats: Stream listener statistics.
+        """
+        self._httpClient.report_listener_stats(stats)
+
+    def report_listener_removed(self, stats: StreamListenerStats):
+        """Reports a stream listener removed to metrics listeners.
+
+        Args:
+            stats: Last statistics of the stream listener.
+        """
+        self._httpClient.report_listener_removed(stats)
+
+    async def request_copyfactory(self, opts: dict, is_extended_timeout: bool = False, conditional: bool = False):
         """Sends a CopyFactory API request.
 
         Args:
             opts: Options request options.
             is_extended_timeout: Whether to run the request with an extended timeout.
+            conditional: Whether to send a conditional request and resolve with a response containing status and
+            resource validators instead of the response body.
 
         Returns:
             Request result.
         """
         await self._update_host()
-        try:
-            request_opts = copy(opts)
-            request_opts['url'] = self._urlCache['url'] + request_opts['url']
-            return await self._httpClient.request(request_opts, is_extended_timeout)
-        except Exception as err:
-            if err.__class__.__name__ not in ['ConflictException', 'InternalException', 'ApiException',
-                                              'ConnectTimeout']:
-                raise err
-            else:
-                if len(self._regionCache) == self._regionIndex + 1:
+        # failover cursor is local to the request, regions are tried starting from the region the last request of
+        # this client succeeded in
+        regions = self._cache.region_cache
+        if not regions:
+            raise NotFoundException(f'No CopyFactory regions are available in domain {self._domain}')
+        start_index = self._regionIndex if self._regionIndex < len(regions) else 0
+        for attempt in range(len(regions)):
+            region_index = (start_index + attempt) % len(regions)
+            region = regions[region_index]
+            try:
+                request_opts = copy(opts)
+                request_opts['url'] = f'https://copyfactory-api-v1.{region}.{self._cache.url_cache["domain"]}' + \
+                    request_opts['url']
+                request_opts['region'] = region
+                if conditional:
+                    result = await self._httpClient.request_conditional(request_opts, is_extended_timeout)
+                else:
+                    result = await self._httpClient.request(request_opts, is_extended_timeout)
+                self._regionIndex = region_index
+                return result
+            except Exception as err:
+                if err.__class__.__name__ not in ['ConflictException', 'InternalException', 'ApiException',
+                                                  'ConnectTimeout']:
+                    raise err
+                elif attempt == len(regions) - 1:
                     self._regionIndex = 0
                     raise err
                 else:
-                    self._regionIndex += 1
-                    return await self.request_copyfactory(opts, is_extended_timeout)
+                    to_region = regions[(region_index + 1) % len(regions)]
+                    self._logger.debug(lambda: f'Request to {opts["url"]} failed in region {region}, retrying in '
+                                       f'region {to_region}', err,
+                                       extra={'region': region, 'failover_region': to_region})
+                    if self._httpClient.metrics_listeners:
+                        self._httpClient.report_region_failover({
+                            'endpoint': endpoint_template(opts['url']),
+                            'fromRegion': region,
+                            'toRegion': to_region,
+                            'error': err.__class__.__name__
+                        })
 
     async def request(self, opts: dict):
         """Sends an http request.
@@ -105,9 +213,19 @@ class DomainClient:
             request_opts = copy(opts)
             request_opts['url'] = f'{host["host"]}.{region}.{host["domain"]}' + opts["url"]
             request_opts['headers'] = {'auth-token': self._token}
+            request_opts['region'] = region
             tasks.append(asyncio.create_task(self._httpClient.request_with_failover(request_opts)))
         return await promise_any(tasks)
 
+    async def warm_up_signal_host(self, host: dict):
+        """Opens or keeps alive connections to all regions of a signal client host.
+
+        Args:
+            host: Signal client host data.
+        """
+        await asyncio.gather(*[self._httpClient.warm_up(f'{host["host"]}.{region}.{host["domain"]}')
+                               for region in host['regions']])
+
     async def get_signal_client_host(self, regions: List[str]) -> dict:
         """Returns CopyFactory host for signal client requests.
 
@@ -122,7 +240,7 @@ class DomainClient:
             'host': 'https://copyfactory-api-v1',
             'regions': regions,
             'lastUpdated': datetime.now().timestamp(),
-            'domain': self._urlCache['domain']
+            'domain': self._cache.url_cache['domain']
         }
 
     async def get_account_info(self, account_id: str) -> AccountInfo:
@@ -161,30 +279,35 @@ class DomainClient:
         }
 
     async def _update_host(self):
-        if not self._urlCache or self._urlCache['lastUpdated'] < datetime.now().timestamp() - 60 * 10:
-            await self._update_regions()
-            url_settings = await self._httpClient.request({
-                'url': f'https://mt-provisioning-api-v1.{self._domain}/users/current/servers/mt-client-api',
-                'method': 'GET',
-                'headers': {
-                    'auth-token': self._token
-                }
-            })
-            self._urlCache = {
-                'url': f'https://copyfactory-api-v1.{self._regionCache[self._regionIndex]}.{url_settings["domain"]}',
-                'domain': url_settings['domain'],
-                'lastUpdated': datetime.now().timestamp()
-            }
-        else:
-            self._urlCache = {
-                'url': f'https://copyfactory-api-v1.{self._regionCache[self._regionIndex]}.{self._urlCache["domain"]}',
-                'domain': self._urlCache['domain'],
-                'lastUpdated': datetime.now().timestamp()
-            }
+        cache = self._cache
+        if self._is_url_cache_expired():
+            async with cache.update_lock():
+                # another client sharing the cache may have updated it while this one waited for the lock
+                if self._is_url_cache_expired():
+                    await self._update_regions()
+                    url_settings = await self._httpClient.request({
+                        'url': f'https://mt-provisioning-api-v1.{self._domain}/users/current/servers/mt-client-api',
+                        'method': 'GET',
+                        'headers': {
+                            'auth-token': self._token
+                        }
+                    })
+                    cache.url_cache = {
+                        'domain': url_settings['domain'],
+                        'lastUpdated': datetime.now().timestamp()
+                    }
+                    return
+        cache.url_cache = {
+            'domain': cache.url_cache['domain'],
+            'lastUpdated': datetime.now().timestamp()
+        }
+
+    def _is_url_cache_expired(self) -> bool:
+        url_cache = self._cache.url_cache
+        return not url_cache or url_cache['lastUpdated'] < datetime.now().timestamp() - 60 * 10
 
     async def _update_regions(self):
-        self._regionIndex = 0
-        self._regionCache = await self._httpClient.request({
+        self._cache.region_cache = await self._httpClient.request({
             'url': f'https://mt-provisioning-api-v1.{self._domain}/users/current/regions',
             'method': 'GET',
             'headers': {
@@ -1,6 +1,6 @@
 from .httpClient import HttpClient
-from .domain_client import DomainClient
-from mock import AsyncMock, ANY
+from .domain_client import DomainClient, DomainCache
+from mock import AsyncMock, MagicMock, ANY
 import pytest
 from freezegun import freeze_time
 import respx
@@ -162,6 +162,18 @@ class TestDomainClient:
         except Exception as err:
             assert err.__class__.__name__ == 'ValidationException'
 
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_return_error_if_no_regions(self):
+        """Should return not found error if no region is available."""
+        regions_call.mock(return_value=Response(200, json=[]))
+        try:
+            await domain_client.request_copyfactory(opts)
+            pytest.fail()
+        except Exception as err:
+            assert err.__class__.__name__ == 'NotFoundException'
+        assert request_call.call_count == 0
+
     @respx.mock
     @pytest.mark.asyncio
     async def test_try_another_region_if_first_failed(self):
@@ -176,6 +188,24 @@ class TestDomainClient:
         assert host_call.call_count == 1
         assert regions_call.call_count == 1
 
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_report_region_failover_metrics(self):
+        """Should report request regions and region failovers to metrics listeners."""
+        listener = MagicMock()
+        http_client.add_metrics_listener(listener)
+        request_call.mock(return_value=Response(500))
+        respx.get('https://copyfactory-api-v1.us-west.agiliumtrade.agiliumtrade.ai/users/current/' +
+                  'configuration/strategies').mock(return_value=Response(200, content=json.dumps(expected)))
+        await domain_client.request_copyfactory(opts)
+        listener.on_region_failover.assert_called_once_with({
+            'endpoint': '/users/current/configuration/strategies', 'fromRegion': 'vint-hill', 'toRegion': 'us-west',
+            'error': 'InternalException'})
+        requests = [call.args[0] for call in listener.on_request.call_args_list]
+        assert [(item['endpoint'], item['region'], item['status']) for item in requests[-2:]] == [
+            ('/users/current/configuration/strategies', 'vint-hill', 500),
+            ('/users/current/configuration/strategies', 'us-west', 200)]
+
     @respx.mock
     @pytest.mark.asyncio
     async def test_return_error_if_all_regions_failed(self):
@@ -208,6 +238,26 @@ class TestDomainClient:
         response = await domain_client.request_copyfactory(opts)
         assert response == expected
 
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_keep_region_failover_per_client(self):
+        """Should not move requests of other clients sharing the domain cache to another region on failover."""
+        request_call.mock(side_effect=lambda request: Response(500 if request.headers['auth-token'] == token else 200,
+                                                               content=json.dumps(expected)))
+        us_west_call = respx.get('https://copyfactory-api-v1.us-west.agiliumtrade.agiliumtrade.ai/users/current/' +
+                                 'configuration/strategies')\
+            .mock(return_value=Response(200, content=json.dumps(expected)))
+        cache = DomainCache()
+        first = DomainClient(http_client, token, cache=cache)
+        second = DomainClient(http_client, 'other.token', cache=cache)
+        assert await first.request_copyfactory(opts) == expected
+        assert us_west_call.call_count == 1
+        assert await second.request_copyfactory({**opts, 'headers': {'auth-token': 'other.token'}}) == expected
+        assert us_west_call.call_count == 1
+        assert await first.request_copyfactory(opts) == expected
+        assert us_west_call.call_count == 2
+        assert regions_call.call_count == 1
+
     @respx.mock
     @pytest.mark.asyncio
     async def test_execute_normal_request(self):
@@ -357,3 +407,18 @@ class TestGetSignalClientHost:
             'regions': ['vint-hill'],
             'domain': 'agiliumtrade.agiliumtrade.ai'
         }
+
+
+class TestWarmUpSignalHost:
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_warm_up_all_regions(self):
+        """Should probe every region of signal client host."""
+        vint_hill_call = respx.head('https://copyfactory-api-v1.vint-hill.agiliumtrade.ai')\
+            .mock(return_value=Response(404))
+        us_west_call = respx.head('https://copyfactory-api-v1.us-west.agiliumtrade.ai')\
+            .mock(return_value=Response(200))
+        host['regions'] = ['vint-hill', 'us-west']
+        await domain_client.warm_up_signal_host(host)
+        assert vint_hill_call.call_count == 1
+        assert us_west_call.call_count == 1
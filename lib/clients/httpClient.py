@@ -1,19 +1,21 @@
 from .errorHandler import UnauthorizedException, ForbiddenException, ApiException, ConflictException, \
     ValidationException, InternalException, NotFoundException, TooManyRequestsException
 from typing_extensions import TypedDict
-from typing import Optional
-from ..models import ExceptionMessage, date
+from typing import Optional, Dict, List
+from concurrent.futures import Executor
+from ..models import ExceptionMessage, date, json_default, random_id, lazy_import, convert_iso_time_to_date
+from ..logger import LoggerManager
 from .timeoutException import TimeoutException
+from .metrics import MetricsListener, RequestMetrics, RegionFailoverMetrics, endpoint_template
+from .copyFactory.streaming.listenerStats import StreamListenerStats
 import json
 import asyncio
-import sys
-import httpx
+import time
 from datetime import datetime
-from httpx import HTTPError, Response
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+httpx = lazy_import('httpx')
 
-
-if sys.version_info[0] == 3 and sys.version_info[1] >= 8 and sys.platform.startswith('win'):
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+_json_encoder = json.JSONEncoder(default=json_default)
 
 
 class RequestOptions(TypedDict):
@@ -25,17 +27,56 @@ class RequestOptions(TypedDict):
     params: Optional[dict]
     body: Optional[dict]
     files: Optional[dict]
+    region: Optional[str]
+    """Region the request is sent to, reported to metrics listeners."""
+    convertDates: Optional[bool]
+    """Whether to convert time fields of the response into datetime objects while decoding it, so that conversion of
+    large responses runs in the executor together with decoding. Default value is False."""
+
+
+class ConditionalResponse(TypedDict):
+    """Response of a conditional request."""
+    status: int
+    """HTTP status, 304 if the resource was not modified."""
+    body: Optional[dict]
+    """Response body, None if the resource was not modified."""
+    etag: Optional[str]
+    """Value of ETag response header."""
+    lastModified: Optional[str]
+    """Value of Last-Modified response header."""
+
+
+def decode_json(content: bytes, convert_dates: bool = False):
+    """Decodes JSON response body, used to decode large responses in an executor.
+
+    Args:
+        content: Response body.
+        convert_dates: Whether to convert time fields into datetime objects.
+
+    Returns:
+        Decoded body.
+    """
+    body = json.loads(content)
+    if convert_dates:
+        convert_iso_time_to_date(body)
+    return body
 
 
 class HttpClient:
     """HTTP client library based on requests module."""
-    def __init__(self, timeout: float = 10, extended_timeout: float = 70, retry_opts=None):
+    def __init__(self, timeout: float = 10, extended_timeout: float = 70, retry_opts=None,
+                 transport: 'httpx.AsyncBaseTransport' = None, executor: Executor = None,
+                 offload_threshold: int = 65536):
         """Inits HttpClient class instance.
 
         Args:
             timeout: Request timeout in seconds.
             extended_timeout: Extended request timeout in seconds.
             retry_opts: Retry options.
+            transport: Transport to send requests with, default is to send requests over the network.
+            executor: Thread or process pool to decode large responses in, default is to decode responses on the
+            event loop.
+            offload_threshold: Minimum response size in bytes to decode in the executor.
         """
         if retry_opts is None:
             retry_opts = {}
@@ -44,6 +85,89 @@ class HttpClient:
         self._retries = retry_opts['retries'] if 'retries' in retry_opts else 5
         self._minRetryDelayInSeconds = retry_opts['minDelayInSeconds'] if 'minDelayInSeconds' in retry_opts else 1
         self._maxRetryDelayInSeconds = retry_opts['maxDelayInSeconds'] if 'maxDelayInSeconds' in retry_opts else 30
+        self._transport = transport
+        self._executor = executor
+        self._offloadThreshold = offload_threshold
+        self._client = None
+        self._clientLoop = None
+        self._metricsListeners: Dict[str, MetricsListener] = {}
+        self._logger = LoggerManager.get_logger('HttpClient')
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """Returns executor which decodes large responses and runs synchronous listener callbacks.
+
+        Returns:
+            Executor or None if work runs on the event loop.
+        """
+        return self._executor
+
+    @property
+    def metrics_listeners(self) -> List[MetricsListener]:
+        """Returns registered metrics listeners.
+
+        Returns:
+            Metrics listeners.
+        """
+        return list(self._metricsListeners.values())
+
+    def add_metrics_listener(self, listener: MetricsListener) -> str:
+        """Adds a listener of request metrics. Metrics are only collected while at least one listener is added.
+
+        Args:
+            listener: Metrics listener.
+
+        Returns:
+            Listener id.
+        """
+        listener_id = random_id(10)
+        self._metricsListeners[listener_id] = listener
+        return listener_id
+
+    def remove_metrics_listener(self, listener_id: str):
+        """Removes metrics listener.
+
+        Args:
+            listener_id: Listener id.
+        """
+        if listener_id in self._metricsListeners:
+            del self._metricsListeners[listener_id]
+
+    def report_region_failover(self, metrics: RegionFailoverMetrics):
+        """Reports a region failover of a request to metrics listeners.
+
+        Args:
+            metrics: Region failover metrics.
+        """
+        for listener_id, listener in list(self._metricsListeners.items()):
+            try:
+                listener.on_region_failover(metrics)
+            except Exception as err:
+                self._logger.error(f'Failed to report region failover metrics to listener {listener_id}', err)
+
+    def report_listener_stats(self, stats: StreamListenerStats):
+        """Reports stream listener statistics to metrics listeners.
+
+        Args:
+            stats: Stream listener statistics.
+        """
+        for listener_id, listener in list(self._metricsListeners.items()):
+            try:
+                listener.on_listener_stats(stats)
+            except Exception as err:
+                self._logger.error(f'Failed to report stream listener stats to listener {listener_id}', err)
+
+    def report_listener_removed(self, stats: StreamListenerStats):
+        """Reports a stream listener removed to metrics listeners.
+
+        Args:
+            stats: Last statistics of the stream listener.
+        """
+        for listener_id, listener in list(self._metricsListeners.items()):
+            try:
+                listener.on_listener_removed(stats)
+            except Exception as err:
+                self._logger.error(f'Failed to report stream listener removal to listener {listener_id}', err)
 
     async def request(self, options: dict, is_extended_timeout: bool = False):
         """Performs a request. Response errors are returned as ApiError or subclasses.
@@ -61,15 +185,47 @@ class HttpClient:
             response.raise_for_status()
             if response.content:
                 try:
-                    response = response.json()
+                    response = await self._decode(response, options)
                 except Exception as err:
                     print('Error parsing json', err)
-        except HTTPError as err:
+        except httpx.HTTPError as err:
             raise self._convert_error(err)
         return response
 
+    async def request_conditional(self, options: RequestOptions, is_extended_timeout: bool = False) \
+            -> ConditionalResponse:
+        """Performs a conditional request. Conditional headers such as If-None-Match or If-Modified-Since should be
+        specified in request options. Response errors are returned as ApiError or subclasses.
+
+        Args:
+            options: Request options.
+            is_extended_timeout: Whether to run the request with an extended timeout.
+
+        Returns:
+            Response with validators of the resource returned.
+        """
+        options['timeout'] = self._extendedTimeout if is_extended_timeout else self._timeout
+        try:
+            response = await self._make_request(options)
+            if response.status_code != 304:
+                response.raise_for_status()
+        except httpx.HTTPError as err:
+            raise self._convert_error(err)
+        body = None
+        if response.status_code != 304 and response.content:
+            try:
+                body = await self._decode(response, options)
+            except Exception as err:
+                print('Error parsing json', err)
+        return {
+            'status': response.status_code,
+            'body': body,
+            'etag': response.headers.get('etag'),
+            'lastModified': response.headers.get('last-modified')
+        }
+
     async def request_with_failover(self, options: RequestOptions, retry_counter: int = 0, end_time: float = None) \
-            -> Response:
+            -> 'httpx.Response':
         """Performs a request. Response errors are returned as ApiException or subclasses.
 
         Args:
@@ -78,11 +234,15 @@ class HttpClient:
         Returns:
             A request response.
         """
+        return await self._request_with_failover(options, retry_counter, end_time)
+
+    async def _request_with_failover(self, options: RequestOptions, retry_counter: int = 0, end_time: float = None,
+                                     attempt: int = 1, retry_sleep: float = 0) -> 'httpx.Response':
         if not end_time:
             end_time = datetime.now().timestamp() + self._maxRetryDelayInSeconds * self._retries
         retry_after_seconds = 0
         try:
-            response = await self._make_request(options)
+            response = await self._make_request(options, attempt, retry_sleep)
             response.raise_for_status()
             if response.status_code == 202:
                 retry_after_seconds = response.headers['retry-after']
@@ -90,28 +250,135 @@ class HttpClient:
                     retry_after_seconds = float(retry_after_seconds)
             if response.content:
                 try:
-                    response = response.json()
+                    response = await self._decode(response, options)
                 except Exception as err:
                     print('Error parsing json', err)
-        except HTTPError as err:
-            retry_counter = await self._handle_error(err, retry_counter, end_time)
-            return await self.request_with_failover(options, retry_counter, end_time)
+        except httpx.HTTPError as err:
+            retry_counter, retry_sleep = await self._handle_error(err, retry_counter, end_time)
+            return await self._request_with_failover(options, retry_counter, end_time, attempt + 1, retry_sleep)
         if retry_after_seconds:
             await self._handle_retry(end_time, retry_after_seconds)
-            response = await self.request_with_failover(options, retry_counter, end_time)
+            response = await self._request_with_failover(options, retry_counter, end_time, attempt + 1,
+                                                         retry_after_seconds)
         return response
 
-    async def _make_request(self, options: RequestOptions) -> Response:
-        async with httpx.AsyncClient(timeout=options['timeout'] if 'timeout' in options else self._timeout) as client:
-            method = options['method'] if ('method' in options) else 'GET'
-            url = options['url']
-            params = options['params'] if 'params' in options else None
-            files = options['files'] if 'files' in options else None
-            headers = options['headers'] if 'headers' in options else None
-            body = options['body'] if 'body' in options else None
-            req = client.build_request(method, url, params=params, files=files, headers=headers, json=body)
-            response = await client.send(req)
+    async def warm_up(self, url: str, timeout: float = None):
+        """Opens a pooled connection to a host, or keeps an existing one alive, by sending a lightweight HEAD
+        request. Response status and connection errors are ignored.
+
+        Args:
+            url: Host url to warm up the connection to.
+            timeout: Probe timeout in seconds, default is request timeout.
+        """
+        client = self._get_client()
+        try:
+            req = client.build_request('HEAD', url, timeout=timeout or self._timeout)
+            await client.send(req)
+        except httpx.HTTPError:
+            pass
+
+    async def _decode(self, response: 'httpx.Response', options: RequestOptions):
+        convert_dates = options['convertDates'] if 'convertDates' in options else False
+        if self._executor is not None and len(response.content) >= self._offloadThreshold:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, decode_json, response.content,
+                                                                    convert_dates)
+        body = response.json()
+        if convert_dates:
+            convert_iso_time_to_date(body)
+        return body
+
+    async def close(self):
+        """Closes pooled connections."""
+        if self._client is not None:
+            client = self._client
+            self._client = None
+            self._clientLoop = None
+            await client.aclose()
+
+    def _get_client(self) -> 'httpx.AsyncClient':
+        # connection pool is bound to the event loop it was created in
+        loop = asyncio.get_event_loop()
+        if self._client is None or self._clientLoop is not loop:
+            if self._client is not None:
+                self._discard_client(self._client, self._clientLoop)
+            # requests are authorized with auth-token headers, cookies are not kept so that they are not shared by
+            # tokens sending requests through the same client
+            self._client = httpx.AsyncClient(limits=httpx.Limits(max_connections=None, max_keepalive_connections=100,
+                                                                 keepalive_expiry=60), transport=self._transport,
+                                             cookies=CookieJar(DefaultCookiePolicy(allowed_domains=[])))
+            self._clientLoop = loop
+        return self._client
+
+    def _discard_client(self, client: 'httpx.AsyncClient', loop: asyncio.AbstractEventLoop):
+        # connections of a loop which still runs are closed in it, otherwise they can not be used anymore and are
+        # released in the current loop
+        if loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._close_client(client), loop)
+        else:
+            asyncio.ensure_future(self._close_client(client))
+
+    async def _close_client(self, client: 'httpx.AsyncClient'):
+        try:
+            await client.aclose()
+        except Exception as err:
+            self._logger.debug('Failed to close connections of a previous event loop', err)
+
+    async def _make_request(self, options: RequestOptions, attempt: int = 1,
+                            retry_sleep: float = 0) -> 'httpx.Response':
+        client = self._get_client()
+        method = options['method'] if ('method' in options) else 'GET'
+        url = options['url']
+        params = options['params'] if 'params' in options else None
+        files = options['files'] if 'files' in options else None
+        headers = options['headers'] if 'headers' in options else None
+        body = options['body'] if 'body' in options else None
+        timeout = options['timeout'] if 'timeout' in options else self._timeout
+        content = None
+        if body is not None:
+            # datetime values are converted during encoding, so that request bodies do not need to be copied
+            content = _json_encoder.encode(body).encode('utf-8')
+            headers = {**(headers or {}), 'content-type': 'application/json'}
+        req = client.build_request(method, url, params=params, files=files, headers=headers, content=content,
+                                   timeout=timeout)
+        if not self._metricsListeners:
+            return await client.send(req)
+        start = time.perf_counter()
+        response = None
+        time_to_headers = None
+        error = None
+        try:
+            response = await client.send(req, stream=True)
+            time_to_headers = time.perf_counter() - start
+            await response.aread()
             return response
+        except BaseException as err:
+            # cancellation is not an Exception, the response is closed on it as well
+            error = err.__class__.__name__
+            raise err
+        finally:
+            if response is not None:
+                await response.aclose()
+            self._report_request({
+                'method': method,
+                'endpoint': endpoint_template(url),
+                'host': req.url.host,
+                'region': options['region'] if 'region' in options else None,
+                'status': response.status_code if response is not None else None,
+                'error': error,
+                'attempt': attempt,
+                'retrySleepInSeconds': retry_sleep,
+                'requestBytes': int(req.headers.get('content-length', 0)),
+                'responseBytes': response.num_bytes_downloaded if response is not None else 0,
+                'timeToHeadersInSeconds': time_to_headers,
+                'durationInSeconds': time.perf_counter() - start
+            })
+
+    def _report_request(self, metrics: RequestMetrics):
+        for listener_id, listener in list(self._metricsListeners.items()):
+            try:
+                listener.on_request(metrics)
+            except Exception as err:
+                self._logger.error(f'Failed to report request metrics to listener {listener_id}', err)
 
     async def _handle_retry(self, end_time: float, retry_after: float):
         if end_time > datetime.now().timestamp() + retry_after:
@@ -128,15 +395,16 @@ class HttpClient:
                 and retry_counter < self._retries:
             pause = min(pow(2, retry_counter) * self._minRetryDelayInSeconds, self._maxRetryDelayInSeconds)
             await asyncio.sleep(pause)
-            return retry_counter + 1
+            return retry_counter + 1, pause
         elif error.__class__.__name__ == 'TooManyRequestsException':
             retry_time = date(error.metadata['recommendedRetryTime']).timestamp()
             if retry_time < end_time:
-                await asyncio.sleep(retry_time - datetime.now().timestamp())
-                return retry_counter
+                pause = max(retry_time - datetime.now().timestamp(), 0)
+                await asyncio.sleep(pause)
+                return retry_counter, pause
         raise error
 
-    def _convert_error(self, err: HTTPError):
+    def _convert_error(self, err: 'httpx.HTTPError'):
         if err.__class__.__name__ == 'ConnectTimeout':
             return err
         try:
@@ -1,11 +1,17 @@
-from .httpClient import HttpClient
+from .httpClient import HttpClient, decode_json
 import re
 import pytest
+import asyncio
 import respx
 from datetime import datetime
+import pytz
 import json
 from httpx import Response
+import httpx
+from mock import MagicMock, AsyncMock
 from ..models import format_date
+from concurrent.futures import ThreadPoolExecutor
+from mock import patch
 httpClient: HttpClient = None
 test_url = 'http://example.com'
 opts = {}
@@ -195,3 +201,146 @@ class TestHttpClient:
             assert err.__class__.__name__ == 'TimeoutException'
             assert err.args[0] == 'Timed out waiting for the response'
         assert respx.get(test_url).call_count == 6
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_conditional_request(self):
+        """Should return validators and not modified status of a conditional request."""
+        respx.get(test_url).mock(side_effect=[
+            Response(200, content=json.dumps(['response']), headers={'etag': '"v1"'}),
+            Response(304, headers={'etag': '"v1"'})])
+        response = await httpClient.request_conditional({'url': test_url})
+        assert response == {'status': 200, 'body': ['response'], 'etag': '"v1"', 'lastModified': None}
+        response = await httpClient.request_conditional({'url': test_url, 'headers': {'if-none-match': '"v1"'}})
+        assert response == {'status': 304, 'body': None, 'etag': '"v1"', 'lastModified': None}
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_serialize_dates_in_request_body(self):
+        """Should convert dates of request body during serialization without changing the body."""
+        route = respx.put(test_url).mock(return_value=Response(204))
+        body = {'name': 'Test', 'riskLimits': [{'startTime': datetime(2020, 8, 24, 0, 0, 1, tzinfo=pytz.utc)}]}
+        await httpClient.request({'url': test_url, 'method': 'PUT', 'body': body})
+        request = route.calls.last.request
+        assert request.headers['content-type'] == 'application/json'
+        assert json.loads(request.content) == {'name': 'Test',
+                                               'riskLimits': [{'startTime': '2020-08-24T00:00:01.000Z'}]}
+        assert isinstance(body['riskLimits'][0]['startTime'], datetime)
+
+    @pytest.mark.asyncio
+    async def test_send_requests_with_custom_transport(self):
+        """Should send requests with custom transport."""
+        transport = httpx.MockTransport(lambda request: Response(200, json={'path': request.url.path}))
+        http_client = HttpClient(transport=transport)
+        assert await http_client.request({'url': 'https://copyfactory.local/users/current'}) == \
+            {'path': '/users/current'}
+        await http_client.close()
+
+    @pytest.mark.asyncio
+    async def test_close_connections_of_previous_event_loop(self):
+        """Should close connection pool of a previous event loop when requests are sent from a new one."""
+        transport = httpx.MockTransport(lambda request: Response(200, json={}))
+        transport.aclose = AsyncMock()
+        http_client = HttpClient(transport=transport)
+        with ThreadPoolExecutor(1) as executor:
+            await asyncio.get_running_loop().run_in_executor(
+                executor, asyncio.run, http_client.request({'url': 'https://copyfactory.local/users/current'}))
+        await http_client.request({'url': 'https://copyfactory.local/users/current'})
+        await asyncio.sleep(0)
+        transport.aclose.assert_called_once()
+        await http_client.close()
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_report_request_metrics(self):
+        """Should report metrics of each request attempt including retry sleeps."""
+        http_client = HttpClient(10, 60, {'minDelayInSeconds': 0.05})
+        listener = MagicMock()
+        http_client.add_metrics_listener(listener)
+        url = 'https://copyfactory-api-v1.vint-hill.agiliumtrade.ai/users/current/configuration/subscribers/ABCD'
+        respx.put(url).mock(side_effect=[Response(500), Response(202, headers={'retry-after': '0.1'}),
+                                         Response(200, json={'ok': True})])
+        response = await http_client.request_with_failover({'url': url, 'method': 'PUT', 'body': {'name': 'Test'},
+                                                            'region': 'vint-hill'})
+        assert response == {'ok': True}
+        metrics = [call.args[0] for call in listener.on_request.call_args_list]
+        assert [(item['status'], item['attempt'], item['retrySleepInSeconds']) for item in metrics] == \
+            [(500, 1, 0), (202, 2, 0.05), (200, 3, 0.1)]
+        assert metrics[2]['method'] == 'PUT'
+        assert metrics[2]['endpoint'] == '/users/current/configuration/subscribers/:id'
+        assert metrics[2]['host'] == 'copyfactory-api-v1.vint-hill.agiliumtrade.ai'
+        assert metrics[2]['region'] == 'vint-hill'
+        assert metrics[2]['error'] is None
+        assert metrics[2]['requestBytes'] == len(json.dumps({'name': 'Test'}))
+        assert metrics[2]['responseBytes'] == len(json.dumps({'ok': True}))
+        assert 0 <= metrics[2]['timeToHeadersInSeconds'] <= metrics[2]['durationInSeconds']
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_report_metrics_of_failed_connections(self):
+        """Should report metrics of requests failed without a response."""
+        listener = MagicMock()
+        httpClient.add_metrics_listener(listener)
+        respx.get(test_url).mock(side_effect=httpx.ConnectError('Connection refused'))
+        with pytest.raises(Exception):
+            await httpClient.request(opts)
+        metrics = listener.on_request.call_args[0][0]
+        assert metrics['status'] is None
+        assert metrics['error'] == 'ConnectError'
+        assert metrics['timeToHeadersInSeconds'] is None
+
+    @pytest.mark.asyncio
+    async def test_close_response_on_cancellation(self):
+        """Should close response and report metrics if a request is cancelled while reading the response."""
+        closed = asyncio.Event()
+
+        class SlowStream(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                yield b'['
+                await asyncio.sleep(10)
+
+            async def aclose(self):
+                closed.set()
+
+        http_client = HttpClient(transport=httpx.MockTransport(lambda request: Response(200, stream=SlowStream())))
+        listener = MagicMock()
+        http_client.add_metrics_listener(listener)
+        task = asyncio.create_task(http_client.request(opts))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert closed.is_set()
+        assert listener.on_request.call_args[0][0]['error'] == 'CancelledError'
+        await http_client.close()
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_ignore_metrics_listener_errors(self):
+        """Should not fail requests if a metrics listener fails, and stop reporting to removed listeners."""
+        listener = MagicMock()
+        listener.on_request.side_effect = Exception('test')
+        listener_id = httpClient.add_metrics_listener(listener)
+        respx.get(test_url).mock(return_value=Response(200, json=['response']))
+        assert await httpClient.request(opts) == ['response']
+        httpClient.remove_metrics_listener(listener_id)
+        assert await httpClient.request({'url': test_url}) == ['response']
+        listener.on_request.assert_called_once()
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_decode_large_responses_in_executor(self):
+        """Should decode responses above offload threshold in executor and convert dates if requested."""
+        executor = ThreadPoolExecutor(1)
+        http_client = HttpClient(executor=executor, offload_threshold=100)
+        small = [{'time': '2020-04-15T02:45:06.521Z'}]
+        large = small * 10
+        respx.get(test_url).mock(side_effect=[Response(200, json=small), Response(200, json=large)])
+        with patch('lib.clients.httpClient.decode_json', wraps=decode_json) as decode_stub:
+            assert await http_client.request({'url': test_url, 'convertDates': True}) == \
+                [{'time': datetime(2020, 4, 15, 2, 45, 6, 521000, tzinfo=pytz.utc)}]
+            decode_stub.assert_not_called()
+            assert await http_client.request({'url': test_url, 'convertDates': True}) == \
+                [{'time': datetime(2020, 4, 15, 2, 45, 6, 521000, tzinfo=pytz.utc)}] * 10
+            decode_stub.assert_called_once()
+        executor.shutdown()
@@ -0,0 +1,102 @@
+from .copyFactory.streaming.listenerStats import StreamListenerStats
+from typing_extensions import TypedDict
+from typing import Optional
+from urllib.parse import urlsplit
+
+_collections = frozenset(['accounts', 'strategies', 'subscribers', 'portfolio-strategies', 'members', 'subscriptions',
+                          'subscription-strategies', 'external-signals'])
+"""Path segments followed by an object id."""
+
+
+class RequestMetrics(TypedDict):
+    """Metrics of a single HTTP request attempt."""
+    method: str
+    """HTTP method."""
+    endpoint: str
+    """Request path with object ids replaced by :id, e.g. /users/current/configuration/subscribers/:id."""
+    host: str
+    """Request host."""
+    region: Optional[str]
+    """Region the request was sent to, None for requests which are not bound to a region."""
+    status: Optional[int]
+    """Response status, None if no response was received."""
+    error: Optional[str]
+    """Class name of the transport error if no response was received, e.g. ConnectTimeout."""
+    attempt: int
+    """Attempt number, starting from 1. Retries after 202 and 429 responses are counted as attempts as well."""
+    retrySleepInSeconds: float
+    """Time slept before this attempt after the previous attempt of the request."""
+    requestBytes: int
+    """Size of the request body."""
+    responseBytes: int
+    """Size of the response body as received over the network."""
+    timeToHeadersInSeconds: Optional[float]
+    """Time until response headers were received, None if no response was received."""
+    durationInSeconds: float
+    """Total time of the attempt, including reading the response body."""
+
+
+class RegionFailoverMetrics(TypedDict):
+    """Metrics of a CopyFactory request switched to another region after a failure."""
+    endpoint: str
+    """Request path with object ids replaced by :id."""
+    fromRegion: str
+    """Region the request failed in."""
+    toRegion: str
+    """Region the request is retried in."""
+    error: str
+    """Class name of the error the request failed with."""
+
+
+class MetricsListener:
+    """Listener of HTTP request metrics. Listeners are called synchronously on the request path, so they should only
+    record values and must not block."""
+
+    def on_request(self, metrics: RequestMetrics):
+        """Invoked when a request attempt completes, with or without a response.
+
+        Args:
+            metrics: Request attempt metrics.
+        """
+        pass
+
+    def on_region_failover(self, metrics: RegionFailoverMetrics):
+        """Invoked when a CopyFactory request is switched to another region after a failure.
+
+        Args:
+            metrics: Region failover metrics.
+        """
+        pass
+
+    def on_listener_stats(self, stats: StreamListenerStats):
+        """Invoked after each request of a transaction, user log or stopout stream listener.
+
+        Args:
+            stats: Stream listener statistics.
+        """
+        pass
+
+    def on_listener_removed(self, stats: StreamListenerStats):
+        """Invoked when a transaction, user log or stopout stream listener is removed, so that series recorded for it
+        can be released.
+
+        Args:
+            stats: Last statistics of the listener.
+        """
+        pass
+
+
+def endpoint_template(url: str) -> str:
+    """Returns request path with object ids replaced by :id, so that requests to the same endpoint can be grouped.
+
+    Args:
+        url: Request url or path.
+
+    Returns:
+        Endpoint template.
+    """
+    segments = urlsplit(url).path.split('/')
+    for index in range(1, len(segments)):
+        if segments[index - 1] in _collections and segments[index]:
+            segments[index] = ':id'
+    return '/'.join(segments)
@@ -0,0 +1,23 @@
+from .metrics import endpoint_template
+
+
+class TestEndpointTemplate:
+
+    def test_replace_ids(self):
+        """Should replace object ids in request paths."""
+        assert endpoint_template('https://copyfactory-api-v1.vint-hill.agiliumtrade.ai/users/current/configuration/'
+                                 'portfolio-strategies/ABCD/members/BCDE') == \
+            '/users/current/configuration/portfolio-strategies/:id/members/:id'
+        assert endpoint_template('/users/current/subscribers/ABCD/subscription-strategies/BCDE/stopouts/'
+                                 'daily-equity/reset') == \
+            '/users/current/subscribers/:id/subscription-strategies/:id/stopouts/daily-equity/reset'
+        assert endpoint_template('/users/current/strategies/ABCD/external-signals/0123456a/remove') == \
+            '/users/current/strategies/:id/external-signals/:id/remove'
+
+    def test_keep_paths_without_ids(self):
+        """Should keep collection and provisioning paths without ids unchanged."""
+        assert endpoint_template('/users/current/configuration/strategies?limit=1000') == \
+            '/users/current/configuration/strategies'
+        assert endpoint_template('https://mt-provisioning-api-v1.agiliumtrade.agiliumtrade.ai/users/current/servers/'
+                                 'mt-client-api') == '/users/current/servers/mt-client-api'
+        assert endpoint_template('/users/current/stopouts/stream') == '/users/current/stopouts/stream'
@@ -0,0 +1,78 @@
+from .metrics import MetricsListener, RequestMetrics, RegionFailoverMetrics
+from .copyFactory.streaming.listenerStats import StreamListenerStats
+from opentelemetry import metrics
+from opentelemetry.metrics import Meter
+
+
+class OpenTelemetryMetricsListener(MetricsListener):
+    """Records request metrics with OpenTelemetry counters and histograms. Requires opentelemetry-api package, which
+    is installed with the opentelemetry extra of the SDK. Metrics are exported by the meter provider configured by the
+    application. Since OpenTelemetry instruments can not release attribute sets, listener metrics are recorded by
+    stream type and strategy or subscriber id rather than by listener id, so that listener churn does not add series."""
+
+    def __init__(self, meter: Meter = None, prefix: str = 'copyfactory_sdk'):
+        """Inits OpenTelemetry metrics listener instance.
+
+        Args:
+            meter: Meter to create instruments with, default is a meter of the global meter provider.
+            prefix: Prefix of instrument names.
+        """
+        meter = meter or metrics.get_meter('metaapi_cloud_copyfactory_sdk')
+        self._requests = meter.create_counter(f'{prefix}.requests', description='HTTP request attempts')
+        self._retries = meter.create_counter(f'{prefix}.retries', description='HTTP request attempts following a '
+                                             'failed or accepted attempt')
+        self._duration = meter.create_histogram(f'{prefix}.request.duration', unit='s',
+                                                description='HTTP request attempt duration')
+        self._timeToHeaders = meter.create_histogram(f'{prefix}.time_to_headers', unit='s',
+                                                     description='Time until response headers')
+        self._retrySleep = meter.create_counter(f'{prefix}.retry_sleep', unit='s',
+                                                description='Time slept before request retries')
+        self._requestBytes = meter.create_counter(f'{prefix}.request.size', unit='By',
+                                                  description='HTTP request body size')
+        self._responseBytes = meter.create_counter(f'{prefix}.response.size', unit='By',
+                                                   description='HTTP response body size')
+        self._failovers = meter.create_counter(f'{prefix}.region_failovers',
+                                               description='Requests switched to another region')
+        self._listenerLag = meter.create_gauge(f'{prefix}.listener.lag', unit='s',
+                                               description='Estimated stream listener lag')
+        self._listenerPacketRate = meter.create_gauge(f'{prefix}.listener.packet_rate', unit='1/s',
+                                                      description='Stream listener packet rate')
+        self._listenerErrors = meter.create_gauge(f'{prefix}.listener.consecutive_errors',
+                                                  description='Stream requests failed in a row')
+        self._listenerThrottle = meter.create_gauge(f'{prefix}.listener.throttle_time', unit='s',
+                                                    description='Stream listener error throttle time')
+        self._listenerCallback = meter.create_histogram(f'{prefix}.listener.callback.duration', unit='s',
+                                                        description='Listener callback execution time')
+        self._listenerGaps = meter.create_gauge(f'{prefix}.listener.sequence_gaps',
+                                                description='Gaps found in stream sequence numbers')
+        self._listenerBackfilledGaps = meter.create_gauge(f'{prefix}.listener.backfilled_gaps',
+                                                          description='Gaps in stream sequence numbers all missing '
+                                                          'packets were fetched for')
+
+    def on_request(self, metrics: RequestMetrics):
+        attributes = {'method': metrics['method'], 'endpoint': metrics['endpoint'], 'region': metrics['region'] or '',
+                      'status': str(metrics['status']) if metrics['status'] is not None else metrics['error']}
+        self._requests.add(1, attributes)
+        if metrics['attempt'] > 1:
+            self._retries.add(1, attributes)
+            self._retrySleep.add(metrics['retrySleepInSeconds'], attributes)
+        self._duration.record(metrics['durationInSeconds'], attributes)
+        if metrics['timeToHeadersInSeconds'] is not None:
+            self._timeToHeaders.record(metrics['timeToHeadersInSeconds'], attributes)
+        self._requestBytes.add(metrics['requestBytes'], attributes)
+        self._responseBytes.add(metrics['responseBytes'], attributes)
+
+    def on_region_failover(self, metrics: RegionFailoverMetrics):
+        self._failovers.add(1, {'endpoint': metrics['endpoint'], 'from_region': metrics['fromRegion'],
+                                'to_region': metrics['toRegion'], 'error': metrics['error']})
+
+    def on_listener_stats(self, stats: StreamListenerStats):
+        attributes = {'type': stats['type'], 'id': stats['id'] or ''}
+        self._listenerLag.set(stats['lagInSeconds'], attributes)
+        self._listenerPacketRate.set(stats['packetsPerSecond'], attributes)
+        self._listenerErrors.set(stats['consecutiveErrors'], attributes)
+        self._listenerThrottle.set(stats['throttleTimeInSeconds'], attributes)
+        self._listenerGaps.set(stats['gaps'], attributes)
+        self._listenerBackfilledGaps.set(stats['backfilledGaps'], attributes)
+        if stats['consecutiveErrors'] == 0 and stats['lastCallbackTimeInSeconds'] is not None:
+            self._listenerCallback.record(stats['lastCallbackTimeInSeconds'], attributes)
@@ -0,0 +1,53 @@
+from .opentelemetry_metrics_listener import OpenTelemetryMetricsListener
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+request_metrics = {
+    'method': 'GET', 'endpoint': '/users/current/configuration/subscribers/:id',
+    'host': 'copyfactory-api-v1.vint-hill.agiliumtrade.ai', 'region': 'vint-hill', 'status': 200, 'error': None,
+    'attempt': 2, 'retrySleepInSeconds': 0.5, 'requestBytes': 0, 'responseBytes': 100,
+    'timeToHeadersInSeconds': 0.04, 'durationInSeconds': 0.05
+}
+
+
+def collect(reader: InMemoryMetricReader) -> dict:
+    data = reader.get_metrics_data()
+    return {metric.name: metric.data.data_points for resource_metrics in data.resource_metrics
+            for scope_metrics in resource_metrics.scope_metrics for metric in scope_metrics.metrics}
+
+
+class TestOpenTelemetryMetricsListener:
+
+    def test_record_metrics(self):
+        """Should record request and region failover metrics."""
+        reader = InMemoryMetricReader()
+        listener = OpenTelemetryMetricsListener(MeterProvider(metric_readers=[reader]).get_meter('test'))
+        listener.on_request(request_metrics)
+        listener.on_request({**request_metrics, 'attempt': 1, 'retrySleepInSeconds': 0})
+        listener.on_region_failover({'endpoint': '/users/current/configuration/strategies',
+                                     'fromRegion': 'vint-hill', 'toRegion': 'new-york', 'error': 'InternalException'})
+        metrics = collect(reader)
+        requests = list(metrics['copyfactory_sdk.requests'])
+        assert len(requests) == 1
+        assert requests[0].value == 2
+        assert dict(requests[0].attributes) == {'method': 'GET', 'region': 'vint-hill', 'status': '200',
+                                                'endpoint': '/users/current/configuration/subscribers/:id'}
+        assert list(metrics['copyfactory_sdk.retries'])[0].value == 1
+        assert list(metrics['copyfactory_sdk.retry_sleep'])[0].value == 0.5
+        assert list(metrics['copyfactory_sdk.request.duration'])[0].count == 2
+        assert list(metrics['copyfactory_sdk.region_failovers'])[0].value == 1
+
+    def test_record_listener_stats(self):
+        """Should record stream listener stats."""
+        reader = InMemoryMetricReader()
+        listener = OpenTelemetryMetricsListener(MeterProvider(metric_readers=[reader]).get_meter('test'))
+        listener.on_listener_stats({'listenerId': 'listenerId', 'type': 'stopouts', 'id': None, 'lagInSeconds': 12.5,
+                                    'packetsPerSecond': 3, 'consecutiveErrors': 0, 'throttleTimeInSeconds': 0,
+                                    'lastCallbackTimeInSeconds': 0.01, 'gaps': 2, 'backfilledGaps': 1})
+        metrics = collect(reader)
+        lag = list(metrics['copyfactory_sdk.listener.lag'])[0]
+        assert lag.value == 12.5
+        assert dict(lag.attributes) == {'type': 'stopouts', 'id': ''}
+        assert list(metrics['copyfactory_sdk.listener.callback.duration'])[0].count == 1
+        assert list(metrics['copyfactory_sdk.listener.sequence_gaps'])[0].value == 2
+        assert list(metrics['copyfactory_sdk.listener.backfilled_gaps'])[0].value == 1
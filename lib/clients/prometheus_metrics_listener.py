@@ -0,0 +1,87 @@
+from .metrics import MetricsListener, RequestMetrics, RegionFailoverMetrics
+from .copyFactory.streaming.listenerStats import StreamListenerStats
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY
+
+_latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 70)
+
+
+class PrometheusMetricsListener(MetricsListener):
+    """Records request metrics with Prometheus counters and histograms. Requires prometheus-client package, which is
+    installed with the prometheus extra of the SDK."""
+
+    def __init__(self, registry: CollectorRegistry = REGISTRY, prefix: str = 'copyfactory_sdk'):
+        """Inits Prometheus metrics listener instance.
+
+        Args:
+            registry: Registry to register metrics in, default is the global registry.
+            prefix: Prefix of metric names.
+        """
+        labels = ['method', 'endpoint', 'region', 'status']
+        self._requests = Counter(f'{prefix}_requests', 'HTTP request attempts', labels, registry=registry)
+        self._retries = Counter(f'{prefix}_retries', 'HTTP request attempts following a failed or accepted attempt',
+                                labels, registry=registry)
+        self._duration = Histogram(f'{prefix}_request_duration_seconds', 'HTTP request attempt duration', labels,
+                                   registry=registry, buckets=_latency_buckets)
+        self._timeToHeaders = Histogram(f'{prefix}_time_to_headers_seconds', 'Time until response headers', labels,
+                                        registry=registry, buckets=_latency_buckets)
+        self._retrySleep = Counter(f'{prefix}_retry_sleep_seconds', 'Time slept before request retries',
+                                   ['method', 'endpoint', 'region'], registry=registry)
+        self._requestBytes = Counter(f'{prefix}_request_bytes', 'HTTP request body size', labels, registry=registry)
+        self._responseBytes = Counter(f'{prefix}_response_bytes', 'HTTP response body size', labels,
+                                      registry=registry)
+        self._failovers = Counter(f'{prefix}_region_failovers', 'Requests switched to another region',
+                                  ['endpoint', 'from_region', 'to_region', 'error'], registry=registry)
+        listener_labels = ['type', 'id', 'listener_id']
+        self._listenerLag = Gauge(f'{prefix}_listener_lag_seconds', 'Estimated stream listener lag', listener_labels,
+                                  registry=registry)
+        self._listenerPacketRate = Gauge(f'{prefix}_listener_packets_per_second', 'Stream listener packet rate',
+                                         listener_labels, registry=registry)
+        self._listenerErrors = Gauge(f'{prefix}_listener_consecutive_errors', 'Stream requests failed in a row',
+                                     listener_labels, registry=registry)
+        self._listenerThrottle = Gauge(f'{prefix}_listener_throttle_seconds', 'Stream listener error throttle time',
+                                       listener_labels, registry=registry)
+        self._listenerCallback = Gauge(f'{prefix}_listener_callback_seconds', 'Last listener callback execution time',
+                                       listener_labels, registry=registry)
+        self._listenerGaps = Gauge(f'{prefix}_listener_sequence_gaps', 'Gaps found in stream sequence numbers',
+                                   listener_labels, registry=registry)
+        self._listenerBackfilledGaps = Gauge(f'{prefix}_listener_backfilled_gaps',
+                                             'Gaps in stream sequence numbers all missing packets were fetched for',
+                                             listener_labels, registry=registry)
+
+    def on_request(self, metrics: RequestMetrics):
+        labels = (metrics['method'], metrics['endpoint'], metrics['region'] or '',
+                  str(metrics['status']) if metrics['status'] is not None else metrics['error'])
+        self._requests.labels(*labels).inc()
+        if metrics['attempt'] > 1:
+            self._retries.labels(*labels).inc()
+            self._retrySleep.labels(*labels[:3]).inc(metrics['retrySleepInSeconds'])
+        self._duration.labels(*labels).observe(metrics['durationInSeconds'])
+        if metrics['timeToHeadersInSeconds'] is not None:
+            self._timeToHeaders.labels(*labels).observe(metrics['timeToHeadersInSeconds'])
+        self._requestBytes.labels(*labels).inc(metrics['requestBytes'])
+        self._responseBytes.labels(*labels).inc(metrics['responseBytes'])
+
+    def on_region_failover(self, metrics: RegionFailoverMetrics):
+        self._failovers.labels(metrics['endpoint'], metrics['fromRegion'], metrics['toRegion'],
+                               metrics['error']).inc()
+
+    def on_listener_stats(self, stats: StreamListenerStats):
+        labels = (stats['type'], stats['id'] or '', stats['listenerId'])
+        self._listenerLag.labels(*labels).set(stats['lagInSeconds'])
+        self._listenerPacketRate.labels(*labels).set(stats['packetsPerSecond'])
+        self._listenerErrors.labels(*labels).set(stats['consecutiveErrors'])
+        self._listenerThrottle.labels(*labels).set(stats['throttleTimeInSeconds'])
+        self._listenerGaps.labels(*labels).set(stats['gaps'])
+        self._listenerBackfilledGaps.labels(*labels).set(stats['backfilledGaps'])
+        if stats['lastCallbackTimeInSeconds'] is not None:
+            self._listenerCallback.labels(*labels).set(stats['lastCallbackTimeInSeconds'])
+
+    def on_listener_removed(self, stats: StreamListenerStats):
+        labels = (stats['type'], stats['id'] or '', stats['listenerId'])
+        for gauge in [self._listenerLag, self._listenerPacketRate, self._listenerErrors, self._listenerThrottle,
+                      self._listenerCallback, self._listenerGaps, self._listenerBackfilledGaps]:
+            try:
+                gauge.remove(*labels)
+            except KeyError:
+                # the value was not recorded for the listener
+                pass
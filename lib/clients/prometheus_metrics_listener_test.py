@@ -0,0 +1,72 @@
+from .prometheus_metrics_listener import PrometheusMetricsListener
+from prometheus_client import CollectorRegistry
+
+request_metrics = {
+    'method': 'GET', 'endpoint': '/users/current/configuration/subscribers/:id',
+    'host': 'copyfactory-api-v1.vint-hill.agiliumtrade.ai', 'region': 'vint-hill', 'status': 200, 'error': None,
+    'attempt': 2, 'retrySleepInSeconds': 0.5, 'requestBytes': 0, 'responseBytes': 100,
+    'timeToHeadersInSeconds': 0.04, 'durationInSeconds': 0.05
+}
+labels = {'method': 'GET', 'endpoint': '/users/current/configuration/subscribers/:id', 'region': 'vint-hill',
+          'status': '200'}
+
+
+class TestPrometheusMetricsListener:
+
+    def test_record_request_metrics(self):
+        """Should record request metrics."""
+        registry = CollectorRegistry()
+        listener = PrometheusMetricsListener(registry)
+        listener.on_request(request_metrics)
+        listener.on_request({**request_metrics, 'attempt': 1, 'retrySleepInSeconds': 0})
+        assert registry.get_sample_value('copyfactory_sdk_requests_total', labels) == 2
+        assert registry.get_sample_value('copyfactory_sdk_retries_total', labels) == 1
+        assert registry.get_sample_value('copyfactory_sdk_retry_sleep_seconds_total',
+                                         {key: labels[key] for key in ['method', 'endpoint', 'region']}) == 0.5
+        assert registry.get_sample_value('copyfactory_sdk_request_duration_seconds_count', labels) == 2
+        assert registry.get_sample_value('copyfactory_sdk_time_to_headers_seconds_sum', labels) == 0.08
+        assert registry.get_sample_value('copyfactory_sdk_response_bytes_total', labels) == 200
+
+    def test_record_failed_connections_and_failovers(self):
+        """Should record requests without a response and region failovers."""
+        registry = CollectorRegistry()
+        listener = PrometheusMetricsListener(registry, 'sdk')
+        listener.on_request({**request_metrics, 'status': None, 'error': 'ConnectTimeout',
+                             'timeToHeadersInSeconds': None})
+        listener.on_region_failover({'endpoint': '/users/current/configuration/strategies',
+                                     'fromRegion': 'vint-hill', 'toRegion': 'new-york', 'error': 'InternalException'})
+        assert registry.get_sample_value('sdk_requests_total', {**labels, 'status': 'ConnectTimeout'}) == 1
+        assert registry.get_sample_value('sdk_region_failovers_total', {
+            'endpoint': '/users/current/configuration/strategies', 'from_region': 'vint-hill',
+            'to_region': 'new-york', 'error': 'InternalException'}) == 1
+
+    def test_record_listener_stats(self):
+        """Should record stream listener stats."""
+        registry = CollectorRegistry()
+        listener = PrometheusMetricsListener(registry)
+        listener.on_listener_stats({'listenerId': 'listenerId', 'type': 'subscriberTransactions',
+                                    'id': 'subscriberId', 'lagInSeconds': 12.5, 'packetsPerSecond': 3,
+                                    'consecutiveErrors': 2, 'throttleTimeInSeconds': 4,
+                                    'lastCallbackTimeInSeconds': 0.01, 'gaps': 2, 'backfilledGaps': 1})
+        labels = {'type': 'subscriberTransactions', 'id': 'subscriberId', 'listener_id': 'listenerId'}
+        assert registry.get_sample_value('copyfactory_sdk_listener_lag_seconds', labels) == 12.5
+        assert registry.get_sample_value('copyfactory_sdk_listener_packets_per_second', labels) == 3
+        assert registry.get_sample_value('copyfactory_sdk_listener_consecutive_errors', labels) == 2
+        assert registry.get_sample_value('copyfactory_sdk_listener_throttle_seconds', labels) == 4
+        assert registry.get_sample_value('copyfactory_sdk_listener_callback_seconds', labels) == 0.01
+        assert registry.get_sample_value('copyfactory_sdk_listener_sequence_gaps', labels) == 2
+        assert registry.get_sample_value('copyfactory_sdk_listener_backfilled_gaps', labels) == 1
+
+    def test_remove_listener_series(self):
+        """Should remove series of a removed stream listener."""
+        registry = CollectorRegistry()
+        listener = PrometheusMetricsListener(registry)
+        stats = {'listenerId': 'listenerId', 'type': 'strategyLog', 'id': 'strategyId', 'lagInSeconds': 0,
+                 'packetsPerSecond': 0, 'consecutiveErrors': 0, 'throttleTimeInSeconds': 0,
+                 'lastCallbackTimeInSeconds': None, 'gaps': 0, 'backfilledGaps': 0}
+        listener.on_listener_stats(stats)
+        labels = {'type': 'strategyLog', 'id': 'strategyId', 'listener_id': 'listenerId'}
+        assert registry.get_sample_value('copyfactory_sdk_listener_lag_seconds', labels) == 0
+        listener.on_listener_removed(stats)
+        assert registry.get_sample_value('copyfactory_sdk_listener_lag_seconds', labels) is None
+        assert registry.get_sample_value('copyfactory_sdk_listener_packets_per_second', labels) is None
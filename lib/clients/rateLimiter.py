@@ -0,0 +1,38 @@
+import asyncio
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of outgoing requests."""
+
+    def __init__(self, requests_per_second: float, burst: int = None):
+        """Inits rate limiter instance.
+
+        Args:
+            requests_per_second: Amount of requests allowed per second.
+            burst: Maximum amount of requests which can be sent at once, default is requests_per_second rounded up.
+        """
+        self._rate = requests_per_second
+        self._capacity = burst or max(1, int(requests_per_second + 0.999999))
+        self._tokens = self._capacity
+        self._lastRefill = None
+        self._lock = None
+
+    async def acquire(self):
+        """Waits until a request is allowed by the rate limit.
+
+        Returns:
+            A coroutine resolving when request can be sent.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            loop = asyncio.get_event_loop()
+            while True:
+                now = loop.time()
+                if self._lastRefill is not None:
+                    self._tokens = min(self._capacity, self._tokens + (now - self._lastRefill) * self._rate)
+                self._lastRefill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
@@ -1,11 +1,18 @@
 from .clients.httpClient import HttpClient
 from .clients.domain_client import DomainClient
-from .clients.copyFactory.configuration_client import ConfigurationClient
-from .clients.copyFactory.history_client import HistoryClient
-from .clients.copyFactory.trading_client import TradingClient
+from .clients.metrics import MetricsListener
+from .clients.copyFactory.streaming.streamListenerOpts import StreamListenerOpts
 from typing_extensions import TypedDict
-from typing import Optional
-from .logger import LoggerManager
+from typing import Optional, TYPE_CHECKING
+from concurrent.futures import Executor
+from .logger import LoggerManager, AsyncLoggingOpts
+from .event_loop import EventLoopPolicyName, set_event_loop_policy, new_event_loop
+import asyncio
+if TYPE_CHECKING:
+    import httpx
+    from .clients.copyFactory.configuration_client import ConfigurationClient
+    from .clients.copyFactory.history_client import HistoryClient
+    from .clients.copyFactory.trading_client import TradingClient
 
 
 class RetryOpts(TypedDict):
@@ -27,6 +34,35 @@ class CopyFactoryOpts(TypedDict):
     """Timeout for http requests in seconds."""
     retryOpts: Optional[RetryOpts]
     """Options for request retries."""
+    transport: Optional['httpx.AsyncBaseTransport']
+    """Transport to send requests with, e.g. to run against a local stand-in server. Default is to send requests over
+    the network."""
+    executor: Optional[Executor]
+    """Thread or process pool to decode large responses and run synchronous listener callbacks in, so that the event
+    loop stays free to run stream requests. Default is to run them on the event loop."""
+    offloadThresholdInBytes: Optional[int]
+    """Minimum size of a response body decoded in the executor, default value is 65536."""
+    streamListenerOpts: Optional[StreamListenerOpts]
+    """Options of stream listeners, such as polling, transaction deduplication and stopout backfill options."""
+
+
+def create_http_client(opts: CopyFactoryOpts = None) -> HttpClient:
+    """Creates HTTP client from CopyFactory options.
+
+    Args:
+        opts: Connection options.
+
+    Returns:
+        HTTP client.
+    """
+    opts: CopyFactoryOpts = opts or {}
+    request_timeout = opts['requestTimeout'] if 'requestTimeout' in opts else 10
+    request_extended_timeout = opts['extendedTimeout'] if 'extendedTimeout' in opts else 70
+    retry_opts = opts['retryOpts'] if 'retryOpts' in opts else {}
+    transport = opts['transport'] if 'transport' in opts else None
+    executor = opts['executor'] if 'executor' in opts else None
+    offload_threshold = opts['offloadThresholdInBytes'] if 'offloadThresholdInBytes' in opts else 65536
+    return HttpClient(request_timeout, request_extended_timeout, retry_opts, transport, executor, offload_threshold)
 
 
 class CopyFactory:
@@ -41,14 +77,34 @@ class CopyFactory:
         """
         opts: CopyFactoryOpts = opts or {}
         domain = opts['domain'] if 'domain' in opts else 'agiliumtrade.agiliumtrade.ai'
-        request_timeout = opts['requestTimeout'] if 'requestTimeout' in opts else 10
-        request_extended_timeout = opts['extendedTimeout'] if 'extendedTimeout' in opts else 70
-        retry_opts = opts['retryOpts'] if 'retryOpts' in opts else {}
-        http_client = HttpClient(request_timeout, request_extended_timeout, retry_opts)
-        self._domainClient = DomainClient(http_client, token, domain)
-        self._configurationClient = ConfigurationClient(self._domainClient)
-        self._historyClient = HistoryClient(self._domainClient)
-        self._tradingClient = TradingClient(self._domainClient)
+        http_client = create_http_client(opts)
+        stream_listener_opts = opts['streamListenerOpts'] if 'streamListenerOpts' in opts else None
+        self._init_clients(http_client, DomainClient(http_client, token, domain,
+                                                     stream_listener_opts=stream_listener_opts))
+
+    @classmethod
+    def _with_clients(cls, http_client: HttpClient, domain_client: DomainClient) -> 'CopyFactory':
+        """Creates CopyFactory instance which sends requests with existing clients, e.g. ones shared by a pool.
+
+        Args:
+            http_client: HTTP client.
+            domain_client: Domain client of the token.
+
+        Returns:
+            CopyFactory instance.
+        """
+        copy_factory = cls.__new__(cls)
+        copy_factory._init_clients(http_client, domain_client, False)
+        return copy_factory
+
+    def _init_clients(self, http_client: HttpClient, domain_client: DomainClient, owns_http_client: bool = True):
+        self._httpClient = http_client
+        self._ownsHttpClient = owns_http_client
+        self._domainClient = domain_client
+        # API clients are created on first use, so that only modules of the APIs used are loaded
+        self._configurationClient = None
+        self._historyClient = None
+        self._tradingClient = None
 
     @staticmethod
     def enable_logging():
@@ -56,29 +112,109 @@ class CopyFactory:
         print function. Note that Logging configuration is performed by the user."""
         LoggerManager.use_logging()
 
+    @staticmethod
+    def enable_async_logging(opts: AsyncLoggingOpts = None):
+        """Enables non-blocking logging. Records are formatted and written on a background thread, carry structured
+        fields such as listener_id, strategy_id, region and throttle_time, and repeated identical records are rate
+        limited. Should be called before creating CopyFactory instances.
+
+        Args:
+            opts: Logging options.
+        """
+        LoggerManager.use_async_logging(opts)
+
+    @staticmethod
+    def use_event_loop_policy(policy: EventLoopPolicyName = 'auto') -> str:
+        """Installs event loop policy globally. The SDK does not change the event loop policy on its own. auto policy
+        selects uvloop if it is installed, which gives higher stream listener throughput, selector event loop on
+        Windows and default asyncio policy otherwise. Should be called before the event loop is created, e.g. before
+        asyncio.run.
+
+        Args:
+            policy: Event loop policy name, one of auto, uvloop, selector or default.
+
+        Returns:
+            Installed policy name, one of uvloop, selector or default.
+        """
+        return set_event_loop_policy(policy)
+
+    @staticmethod
+    def new_event_loop(policy: EventLoopPolicyName = 'auto') -> asyncio.AbstractEventLoop:
+        """Creates a new event loop of specified policy without changing the global event loop policy, e.g. to
+        be used as asyncio.Runner loop factory.
+
+        Args:
+            policy: Event loop policy name, one of auto, uvloop, selector or default.
+
+        Returns:
+            Event loop.
+        """
+        return new_event_loop(policy)
+
     @property
-    def configuration_api(self) -> ConfigurationClient:
+    def configuration_api(self) -> 'ConfigurationClient':
         """Returns CopyFactory configuration API.
 
         Returns:
             Configuration API.
         """
+        if self._configurationClient is None:
+            from .clients.copyFactory.configuration_client import ConfigurationClient
+            self._configurationClient = ConfigurationClient(self._domainClient)
         return self._configurationClient
 
     @property
-    def history_api(self) -> HistoryClient:
+    def history_api(self) -> 'HistoryClient':
         """Returns CopyFactory history API.
 
         Returns:
             History API.
         """
+        if self._historyClient is None:
+            from .clients.copyFactory.history_client import HistoryClient
+            self._historyClient = HistoryClient(self._domainClient)
         return self._historyClient
 
     @property
-    def trading_api(self) -> TradingClient:
-        """Returns CopyFactory history API.
+    def trading_api(self) -> 'TradingClient':
+        """Returns CopyFactory trading API.
 
         Returns:
-            History API.
+            Trading API.
         """
+        if self._tradingClient is None:
+            from .clients.copyFactory.trading_client import TradingClient
+            self._tradingClient = TradingClient(self._domainClient)
         return self._tradingClient
+
+    def add_metrics_listener(self, listener: MetricsListener) -> str:
+        """Adds a listener of HTTP request metrics, such as endpoint, region, status, attempt number, timings and
+        retry sleeps. Metrics are only collected while at least one listener is added.
+
+        Args:
+            listener: Metrics listener.
+
+        Returns:
+            Listener id.
+        """
+        return self._httpClient.add_metrics_listener(listener)
+
+    def remove_metrics_listener(self, listener_id: str):
+        """Removes metrics listener.
+
+        Args:
+            listener_id: Listener id.
+        """
+        self._httpClient.remove_metrics_listener(listener_id)
+
+    async def close(self, timeout: float = 10):
+        """Removes all stream listeners, cancels their requests in flight, waits until their jobs stop and closes
+        pooled connections. Instances created by a CopyFactoryPool leave connections shared by the pool open.
+
+        Args:
+            timeout: Maximum time to wait for listener jobs to stop in seconds, default value is 10.
+        """
+        clients = [client for client in [self._historyClient, self._tradingClient] if client]
+        await asyncio.gather(*[client.close(timeout) for client in clients])
+        if self._ownsHttpClient:
+            await self._httpClient.close()
@@ -0,0 +1,97 @@
+from .copyFactory import CopyFactory, CopyFactoryOpts, create_http_client
+from .clients.domain_client import DomainClient, DomainCache
+from .clients.metrics import MetricsListener
+from typing import Dict, Tuple
+import asyncio
+
+
+class CopyFactoryPool:
+    """Pool of CopyFactory instances of many tokens, e.g. of users an application operates on behalf of. Instances of
+    the pool share the HTTP client with its connection pool, executor and metrics listeners, as well as the region and
+    API url cache of each domain, so that an instance only keeps its token and the API clients used. Each instance
+    sends requests with its own auth-token header and no cookies are kept, so that tokens are not mixed up."""
+
+    def __init__(self, opts: CopyFactoryOpts = None):
+        """Inits CopyFactory pool instance.
+
+        Args:
+            opts: Connection options shared by instances of the pool. domain option sets the default domain of
+            instances.
+        """
+        opts: CopyFactoryOpts = opts or {}
+        self._domain = opts['domain'] if 'domain' in opts else 'agiliumtrade.agiliumtrade.ai'
+        self._httpClient = create_http_client(opts)
+        self._streamListenerOpts = opts['streamListenerOpts'] if 'streamListenerOpts' in opts else None
+        self._domainCaches: Dict[str, DomainCache] = {}
+        self._instances: Dict[Tuple[str, str], CopyFactory] = {}
+
+    @property
+    def size(self) -> int:
+        """Returns amount of instances in the pool.
+
+        Returns:
+            Amount of instances.
+        """
+        return len(self._instances)
+
+    def get(self, token: str, domain: str = None) -> CopyFactory:
+        """Returns CopyFactory instance of a token, creating it on first request.
+
+        Args:
+            token: Authorization token.
+            domain: Domain to connect to, default is domain of the pool.
+
+        Returns:
+            CopyFactory instance.
+        """
+        domain = domain or self._domain
+        key = (domain, token)
+        if key not in self._instances:
+            if domain not in self._domainCaches:
+                self._domainCaches[domain] = DomainCache()
+            domain_client = DomainClient(self._httpClient, token, domain, self._domainCaches[domain],
+                                         self._streamListenerOpts)
+            self._instances[key] = CopyFactory._with_clients(self._httpClient, domain_client)
+        return self._instances[key]
+
+    async def remove(self, token: str, domain: str = None, timeout: float = 10):
+        """Removes CopyFactory instance of a token from the pool and closes its listeners.
+
+        Args:
+            token: Authorization token.
+            domain: Domain of the instance, default is domain of the pool.
+            timeout: Maximum time to wait for listener jobs to stop in seconds, default value is 10.
+        """
+        instance = self._instances.pop((domain or self._domain, token), None)
+        if instance is not None:
+            await instance.close(timeout)
+
+    def add_metrics_listener(self, listener: MetricsListener) -> str:
+        """Adds a listener of HTTP request metrics of all instances of the pool.
+
+        Args:
+            listener: Metrics listener.
+
+        Returns:
+            Listener id.
+        """
+        return self._httpClient.add_metrics_listener(listener)
+
+    def remove_metrics_listener(self, listener_id: str):
+        """Removes metrics listener.
+
+        Args:
+            listener_id: Listener id.
+        """
+        self._httpClient.remove_metrics_listener(listener_id)
+
+    async def close(self, timeout: float = 10):
+        """Removes all instances, closes their listeners and closes pooled connections shared by the instances.
+
+        Args:
+            timeout: Maximum time to wait for listener jobs to stop in seconds, default value is 10.
+        """
+        instances = list(self._instances.values())
+        self._instances.clear()
+        await asyncio.gather(*[instance.close(timeout) for instance in instances])
+        await self._httpClient.close()
@@ -0,0 +1,108 @@
+from .copyFactoryPool import CopyFactoryPool
+from httpx import MockTransport, Response
+from mock import MagicMock
+import asyncio
+import tracemalloc
+import pytest
+
+provisioning_url = 'https://mt-provisioning-api-v1.agiliumtrade.agiliumtrade.ai/users/current'
+requests = []
+
+
+def handler(request):
+    requests.append(request)
+    if request.url.path == '/users/current/regions':
+        return Response(200, json=['vint-hill'])
+    if request.url.path == '/users/current/servers/mt-client-api':
+        return Response(200, json={'domain': 'agiliumtrade.ai'})
+    return Response(200, json={'_id': request.url.path.split('/')[-1], 'token': request.headers['auth-token']},
+                    headers={'set-cookie': 'session=1; Path=/'})
+
+
+def tokens(count):
+    return [f'header.payload.sign{index}' for index in range(count)]
+
+
+@pytest.fixture(autouse=True)
+async def run_around_tests():
+    requests.clear()
+    yield
+
+
+class TestCopyFactoryPool:
+    @pytest.mark.asyncio
+    async def test_share_http_client_and_domain_cache(self):
+        """Should share HTTP client and domain cache by instances of the pool."""
+        pool = CopyFactoryPool({'transport': MockTransport(handler)})
+        first, second = [pool.get(token) for token in tokens(2)]
+        assert pool.get(tokens(1)[0]) is first
+        assert first._httpClient is second._httpClient
+        assert first._domainClient._cache is second._domainClient._cache
+        assert pool.get(tokens(1)[0], 'other.domain')._domainClient._cache is not first._domainClient._cache
+        assert pool.size == 3
+        await pool.remove(tokens(1)[0], 'other.domain')
+        assert pool.size == 2
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_isolate_auth_headers(self):
+        """Should send requests of each instance with its own token and without cookies of other instances."""
+        pool = CopyFactoryPool({'transport': MockTransport(handler)})
+        results = [await pool.get(token).configuration_api.get_strategy('ABCD') for token in tokens(3)]
+        assert [result['token'] for result in results] == tokens(3)
+        assert all('cookie' not in request.headers for request in requests)
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_update_domain_cache_once(self):
+        """Should request regions and API host once for concurrent first requests of many tokens."""
+        pool = CopyFactoryPool({'transport': MockTransport(handler)})
+        await asyncio.gather(*[pool.get(token).configuration_api.get_strategy('ABCD') for token in tokens(50)])
+        paths = [request.url.path for request in requests]
+        assert paths.count('/users/current/regions') == 1
+        assert paths.count('/users/current/servers/mt-client-api') == 1
+        assert paths.count('/users/current/configuration/strategies/ABCD') == 50
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_report_metrics_of_all_instances(self):
+        """Should report request metrics of all instances to pool metrics listeners."""
+        pool = CopyFactoryPool({'transport': MockTransport(handler)})
+        listener = MagicMock()
+        pool.add_metrics_listener(listener)
+        for token in tokens(2):
+            await pool.get(token).configuration_api.get_strategy('ABCD')
+        endpoints = [call[0][0]['endpoint'] for call in listener.on_request.call_args_list]
+        assert endpoints.count('/users/current/configuration/strategies/:id') == 2
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_close_listeners_of_removed_instance(self):
+        """Should close listeners of a removed instance and keep shared connections of the pool open."""
+        async def stream_handler(request):
+            if request.url.path.endswith('/transactions/stream'):
+                await asyncio.sleep(10)
+            return handler(request)
+
+        pool = CopyFactoryPool({'transport': MockTransport(stream_handler)})
+        history_api = pool.get(tokens(1)[0]).history_api
+        history_api.add_subscriber_transaction_listener(MagicMock(), 'subscriberId')
+        await asyncio.sleep(0.05)
+        jobs = list(history_api._get_transaction_listener_manager()._jobs._tasks.values())
+        await pool.remove(tokens(1)[0], timeout=1)
+        assert all(job.cancelled() for job in jobs)
+        assert history_api.stats() == []
+        assert (await pool.get(tokens(2)[1]).configuration_api.get_strategy('ABCD'))['token'] == tokens(2)[1]
+        await pool.close()
+
+    def test_keep_instances_small(self):
+        """Should keep memory of an instance within a few kilobytes."""
+        pool = CopyFactoryPool()
+        pool.get('warm.up.token')
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for token in tokens(1000):
+            pool.get(token)
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        assert used / 1000 < 4096
@@ -0,0 +1,75 @@
+from typing_extensions import Literal
+import asyncio
+import importlib.util
+import sys
+
+EventLoopPolicyName = Literal['auto', 'uvloop', 'selector', 'default']
+"""Event loop policy name. auto selects uvloop if it is installed, selector event loop on Windows and default policy
+otherwise. uvloop requires uvloop package. selector selects selector event loop, which is the default one on platforms
+other than Windows. default selects default asyncio policy of the platform."""
+
+
+def resolve_event_loop_policy(policy: EventLoopPolicyName = 'auto') -> str:
+    """Resolves policy name to the concrete policy available on the platform.
+
+    Args:
+        policy: Event loop policy name.
+
+    Returns:
+        Concrete policy name, one of uvloop, selector or default.
+    """
+    if policy == 'auto':
+        if not sys.platform.startswith('win') and importlib.util.find_spec('uvloop') is not None:
+            return 'uvloop'
+        return 'selector' if sys.platform.startswith('win') else 'default'
+    if policy not in ['uvloop', 'selector', 'default']:
+        raise ValueError(f'Unknown event loop policy {policy}, expected one of auto, uvloop, selector or default')
+    return policy
+
+
+def create_event_loop_policy(policy: EventLoopPolicyName = 'auto') -> asyncio.AbstractEventLoopPolicy:
+    """Creates event loop policy instance without installing it.
+
+    Args:
+        policy: Event loop policy name.
+
+    Returns:
+        Event loop policy.
+    """
+    policy = resolve_event_loop_policy(policy)
+    if policy == 'uvloop':
+        try:
+            import uvloop
+        except ImportError:
+            raise ImportError('uvloop event loop policy requires uvloop package, install it with '
+                              'pip install metaapi-cloud-copyfactory-sdk[uvloop]')
+        return uvloop.EventLoopPolicy()
+    if policy == 'selector' and sys.platform.startswith('win'):
+        return asyncio.WindowsSelectorEventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+
+def new_event_loop(policy: EventLoopPolicyName = 'auto') -> asyncio.AbstractEventLoop:
+    """Creates a new event loop of specified policy without changing the global event loop policy. Can be passed as a
+    loop factory, e.g. to asyncio.Runner.
+
+    Args:
+        policy: Event loop policy name.
+
+    Returns:
+        Event loop.
+    """
+    return create_event_loop_policy(policy).new_event_loop()
+
+
+def set_event_loop_policy(policy: EventLoopPolicyName = 'auto') -> str:
+    """Installs event loop policy globally. Should be called before the event loop is created.
+
+    Args:
+        policy: Event loop policy name.
+
+    Returns:
+        Concrete policy name installed, one of uvloop, selector or default.
+    """
+    asyncio.set_event_loop_policy(create_event_loop_policy(policy))
+    return resolve_event_loop_policy(policy)
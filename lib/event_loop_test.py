@@ -0,0 +1,60 @@
+from .event_loop import resolve_event_loop_policy, create_event_loop_policy, new_event_loop, set_event_loop_policy
+from mock import patch
+import asyncio
+import pytest
+import sys
+
+
+@pytest.fixture(autouse=True)
+def run_around_tests():
+    policy = asyncio.get_event_loop_policy()
+    yield
+    asyncio.set_event_loop_policy(policy)
+
+
+class TestEventLoopPolicy:
+
+    def test_resolve_auto_policy(self):
+        """Should select uvloop if it is installed and platform default policy otherwise."""
+        with patch('lib.event_loop.sys.platform', 'linux'):
+            with patch('lib.event_loop.importlib.util.find_spec', return_value=object()):
+                assert resolve_event_loop_policy('auto') == 'uvloop'
+            with patch('lib.event_loop.importlib.util.find_spec', return_value=None):
+                assert resolve_event_loop_policy('auto') == 'default'
+        with patch('lib.event_loop.sys.platform', 'win32'):
+            assert resolve_event_loop_policy('auto') == 'selector'
+
+    def test_reject_unknown_policy(self):
+        """Should reject unknown policy names."""
+        with pytest.raises(ValueError):
+            resolve_event_loop_policy('proactor')
+
+    def test_require_uvloop(self):
+        """Should raise an error if uvloop policy is requested without uvloop installed."""
+        with patch.dict(sys.modules, {'uvloop': None}):
+            with pytest.raises(ImportError):
+                create_event_loop_policy('uvloop')
+
+    def test_create_loop_without_changing_global_policy(self):
+        """Should create an event loop without changing the global policy."""
+        policy = asyncio.get_event_loop_policy()
+        loop = new_event_loop('default')
+        try:
+            assert loop.run_until_complete(asyncio.sleep(0, 'result')) == 'result'
+        finally:
+            loop.close()
+        assert asyncio.get_event_loop_policy() is policy
+
+    def test_create_uvloop_loop(self):
+        """Should create uvloop event loop."""
+        uvloop = pytest.importorskip('uvloop')
+        loop = new_event_loop('uvloop')
+        try:
+            assert isinstance(loop, uvloop.Loop)
+        finally:
+            loop.close()
+
+    def test_set_policy(self):
+        """Should install event loop policy globally."""
+        assert set_event_loop_policy('default') == 'default'
+        assert isinstance(asyncio.get_event_loop_policy(), asyncio.DefaultEventLoopPolicy)
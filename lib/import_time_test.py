@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+package = __name__.split('.')[0]
+budget_in_ms = 250
+"""Budget of import time of the SDK and its third party dependencies, excluding standard library modules."""
+
+
+def import_sdk(statement: str):
+    """Imports the SDK in a fresh interpreter with -X importtime and returns self import time of each module in
+    microseconds."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=root, capture_output=True,
+                            text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and 'self [us]' not in line:
+            self_time, cumulative_time, name = line[len('import time:'):].split('|')
+            times[name.strip()] = int(self_time)
+    return times
+
+
+class TestImportTime:
+
+    def test_load_modules_lazily(self):
+        """Should not load API clients, listener managers and HTTP client dependency until they are used."""
+        modules = import_sdk(f'from {package} import CopyFactory; CopyFactory("token")')
+        for name in ['httpx', f'{package}.clients.copyFactory.configuration_client',
+                     f'{package}.clients.copyFactory.history_client', f'{package}.clients.copyFactory.trading_client',
+                     f'{package}.clients.copyFactory.streaming.transactionListenerManager',
+                     f'{package}.clients.copyFactory.user_log_store']:
+            assert name not in modules
+        modules = import_sdk(f'from {package} import CopyFactory; CopyFactory("token").trading_api')
+        assert f'{package}.clients.copyFactory.trading_client' in modules
+        assert f'{package}.clients.copyFactory.streaming.stopoutListenerManager' not in modules
+
+    @pytest.mark.skipif(not hasattr(sys, 'stdlib_module_names'), reason='requires python 3.10+')
+    def test_import_within_budget(self):
+        """Should import the SDK and create a CopyFactory instance within import time budget."""
+        best = None
+        for i in range(3):
+            modules = import_sdk(f'from {package} import CopyFactory; CopyFactory("token")')
+            total = sum(time for name, time in modules.items()
+                        if name.split('.')[0] not in sys.stdlib_module_names) / 1000
+            best = total if best is None else min(best, total)
+        assert best < budget_in_ms
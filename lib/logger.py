@@ -1,8 +1,33 @@
+import atexit
+import json
 import logging
+import queue
+import sys
 from logging import Logger
-from typing import Callable
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Optional, List, Dict, Tuple
+from typing_extensions import TypedDict, Literal
 from datetime import datetime
 logging_enabled = False
+async_logging = None
+
+
+class AsyncLoggingOpts(TypedDict, total=False):
+    """Non-blocking logging options."""
+    handlers: Optional[List[logging.Handler]]
+    """Handlers writing log records on the background thread. Default is a handler printing records to standard output
+    with StructuredFormatter."""
+    format: Optional[Literal['text', 'json']]
+    """Format of the default handler, either text lines with key=value fields or one JSON object per line. Default
+    value is text."""
+    level: Optional[int]
+    """Minimum level of records, default value is logging.INFO."""
+    queueSize: Optional[int]
+    """Maximum amount of records waiting to be written, records are dropped when the queue is full. Default value is
+    10000."""
+    rateLimitIntervalInSeconds: Optional[float]
+    """Interval during which repeated identical records are suppressed, 0 disables rate limiting. Default value is
+    60."""
 
 
 class LoggerManager:
@@ -15,6 +40,29 @@ class LoggerManager:
         global logging_enabled
         logging_enabled = True
 
+    @staticmethod
+    def use_async_logging(opts: AsyncLoggingOpts = None):
+        """Enables non-blocking logging. Log calls only create a record and put it to a queue, records are formatted
+        and written by handlers on a background thread. Structured fields passed via the extra argument are kept in
+        records and repeated identical records are rate limited. Applies to loggers created after the call.
+
+        Args:
+            opts: Logging options.
+        """
+        global async_logging
+        LoggerManager.stop_async_logging()
+        async_logging = AsyncLoggingBackend(opts)
+        async_logging.start()
+
+    @staticmethod
+    def stop_async_logging():
+        """Writes remaining queued records and stops the background thread of non-blocking logging. Loggers created
+        after the call use the previous logging mode."""
+        global async_logging
+        if async_logging is not None:
+            async_logging.stop()
+            async_logging = None
+
     @staticmethod
     def get_logger(category):
         """Creates a new logger for specified category.
@@ -25,15 +73,20 @@ class LoggerManager:
         Returns:
             Created logger.
         """
-        if logging_enabled:
+        if async_logging is not None:
+            return AsyncLogger(category, async_logging)
+        elif logging_enabled:
             logger = logging.getLogger(category)
-            original_log = logger._log
+            # loggers are shared per category, so the wrapper resolving callable messages is installed only once
+            if not getattr(logger, '_resolvesCallableMessages', False):
+                original_log = logger._log
 
-            def logging_func(level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1):
-                if isinstance(msg, Callable):
-                    msg = msg()
-                original_log(level, msg, args, exc_info, extra, stack_info, stacklevel)
-            logger._log = logging_func
+                def logging_func(level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1):
+                    if isinstance(msg, Callable):
+                        msg = msg()
+                    original_log(level, msg, args, exc_info, extra, stack_info, stacklevel)
+                logger._log = logging_func
+                logger._resolvesCallableMessages = True
             return logger
         else:
             return NativeLogger(category)
@@ -63,3 +116,178 @@ class NativeLogger(Logger):
         if isinstance(msg, Callable):
             msg = msg()
         print(f'[{datetime.now().isoformat()}] {msg}', *args)
+
+
+class LazyLogRecord(logging.LogRecord):
+    """Log record which resolves a callable message and appends arguments to the message only when it is formatted,
+    the same way native logger prints them."""
+
+    def getMessage(self) -> str:
+        msg = self.msg() if isinstance(self.msg, Callable) else self.msg
+        msg = str(msg)
+        if self.args:
+            if '%' in msg:
+                try:
+                    return msg % self.args
+                except (TypeError, ValueError):
+                    pass
+            msg = ' '.join([msg] + [str(arg) for arg in self.args])
+        return msg
+
+
+_standard_fields = frozenset(list(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) +
+                             ['message', 'asctime', 'suppressed'])
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as text lines with key=value structured fields or as JSON objects. Structured fields are the
+    attributes passed to log calls via the extra argument, e.g. listener_id, strategy_id, region or throttle_time."""
+
+    def __init__(self, format: Literal['text', 'json'] = 'text'):
+        """Inits structured formatter instance.
+
+        Args:
+            format: Output format.
+        """
+        super().__init__()
+        self._format = format
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {key: value for key, value in record.__dict__.items() if key not in _standard_fields}
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            fields['suppressed'] = suppressed
+        time_string = datetime.fromtimestamp(record.created).isoformat()
+        message = record.getMessage()
+        if record.exc_info:
+            message += '\n' + self.formatException(record.exc_info)
+        if self._format == 'json':
+            return json.dumps({'time': time_string, 'level': record.levelname, 'category': record.name,
+                               'message': message, **fields}, default=str)
+        text = f'[{time_string}] [{record.levelname}] [{record.name}] {message}'
+        if fields:
+            text += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return text
+
+
+class RateLimitFilter(logging.Filter):
+    """Suppresses records identical to a record passed during the last interval. The first record passed after the
+    interval has suppressed attribute set to the amount of records suppressed before it."""
+
+    def __init__(self, interval_in_seconds: float = 60, max_keys: int = 10000):
+        """Inits rate limit filter instance.
+
+        Args:
+            interval_in_seconds: Interval during which identical records are suppressed.
+            max_keys: Maximum amount of distinct records remembered.
+        """
+        super().__init__()
+        self._interval = interval_in_seconds
+        self._maxKeys = max_keys
+        self._records: Dict[Tuple, List] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # callable messages are compared by identity since their text is not known until they are resolved
+        key = (record.name, record.levelno, record.msg, tuple(str(arg) for arg in record.args or ()))
+        now = record.created
+        state = self._records.get(key)
+        if state is not None and now - state[0] < self._interval:
+            state[1] += 1
+            return False
+        if state is not None and state[1]:
+            record.suppressed = state[1]
+        if state is None and len(self._records) >= self._maxKeys:
+            self._records = {key: value for key, value in self._records.items() if now - value[0] < self._interval}
+            if len(self._records) >= self._maxKeys:
+                self._records.pop(next(iter(self._records)))
+        self._records[key] = [now, 0]
+        return True
+
+
+class _DroppingQueueHandler(QueueHandler):
+
+    def __init__(self, records_queue: queue.Queue):
+        super().__init__(records_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # records are formatted by the handlers on the background thread
+        return record
+
+
+class AsyncLoggingBackend:
+    """Queue and background thread of non-blocking logging."""
+
+    def __init__(self, opts: AsyncLoggingOpts = None):
+        """Inits non-blocking logging backend instance.
+
+        Args:
+            opts: Logging options.
+        """
+        opts: AsyncLoggingOpts = opts or {}
+        handlers = opts['handlers'] if 'handlers' in opts else None
+        if not handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(StructuredFormatter(opts['format'] if 'format' in opts else 'text'))
+            handlers = [handler]
+        self.level = opts['level'] if 'level' in opts else logging.INFO
+        interval = opts['rateLimitIntervalInSeconds'] if 'rateLimitIntervalInSeconds' in opts else 60
+        self.rate_limit_filter = RateLimitFilter(interval) if interval else None
+        self._queue = queue.Queue(opts['queueSize'] if 'queueSize' in opts else 10000)
+        self.handler = _DroppingQueueHandler(self._queue)
+        self._listener = QueueListener(self._queue, *handlers, respect_handler_level=True)
+
+    @property
+    def dropped(self) -> int:
+        """Returns amount of records dropped because the queue was full.
+
+        Returns:
+            Amount of dropped records.
+        """
+        return self.handler.dropped
+
+    def start(self):
+        """Starts the background thread."""
+        self._listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Writes remaining queued records and stops the background thread."""
+        if self._listener._thread is not None:
+            self._listener.stop()
+        atexit.unregister(self.stop)
+
+
+class AsyncLogger(Logger):
+    """Logger which puts records to the queue of non-blocking logging backend. Messages may be callables which are
+    resolved when a record is written, and structured fields are passed via the extra argument, e.g.
+    logger.error('Failed to retrieve stream', err, extra={'listener_id': listener_id})."""
+
+    def __init__(self, name: str, backend: AsyncLoggingBackend):
+        """Inits non-blocking logger instance.
+
+        Args:
+            name: Logger category.
+            backend: Non-blocking logging backend.
+        """
+        super().__init__(name, backend.level)
+        self._backend = backend
+        if backend.rate_limit_filter is not None:
+            self.addFilter(backend.rate_limit_filter)
+
+    def _log(self, level: int, msg, args, exc_info=None, extra=None, stack_info: bool = False,
+             stacklevel: int = 1) -> None:
+        if exc_info and not isinstance(exc_info, tuple):
+            exc_info = sys.exc_info() if not isinstance(exc_info, BaseException) else \
+                (type(exc_info), exc_info, exc_info.__traceback__)
+        record = LazyLogRecord(self.name, level, '', 0, msg, args, exc_info)
+        if extra:
+            record.__dict__.update(extra)
+        if self.filter(record):
+            self._backend.handler.handle(record)
@@ -0,0 +1,146 @@
+from . import logger as logger_module
+from .logger import LoggerManager, NativeLogger, AsyncLogger, StructuredFormatter, RateLimitFilter
+from freezegun import freeze_time
+import json
+import logging
+import pytest
+import threading
+
+
+class CollectingHandler(logging.Handler):
+
+    def __init__(self, formatter: logging.Formatter = None):
+        super().__init__()
+        self.setFormatter(formatter or StructuredFormatter())
+        self.lines = []
+        self.threads = []
+
+    def emit(self, record):
+        self.threads.append(threading.current_thread())
+        self.lines.append(self.format(record))
+
+
+@pytest.fixture(autouse=True)
+def run_around_tests():
+    yield
+    LoggerManager.stop_async_logging()
+    logger_module.logging_enabled = False
+
+
+class TestLoggerManager:
+
+    def test_native_logger(self):
+        """Should create native logger by default."""
+        assert isinstance(LoggerManager.get_logger('test'), NativeLogger)
+
+    def test_patch_logging_logger_once(self):
+        """Should wrap Logging logger only once and resolve callable messages."""
+        LoggerManager.use_logging()
+        logger = LoggerManager.get_logger('copyfactory-logger-test')
+        wrapped_log = logger._log
+        assert LoggerManager.get_logger('copyfactory-logger-test')._log is wrapped_log
+        handler = CollectingHandler(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        try:
+            logger.info(lambda: 'lazy message')
+        finally:
+            logger.removeHandler(handler)
+        assert handler.lines == ['lazy message']
+
+
+class TestAsyncLogging:
+
+    def test_write_records_on_background_thread(self):
+        """Should format and write records on a background thread."""
+        handler = CollectingHandler()
+        LoggerManager.use_async_logging({'handlers': [handler]})
+        logger = LoggerManager.get_logger('TransactionListenerManager')
+        assert isinstance(logger, AsyncLogger)
+        calling_threads = []
+
+        def message():
+            calling_threads.append(threading.current_thread())
+            return 'Failed to retrieve transactions stream'
+        logger.error(message, Exception('test'), extra={'listener_id': 'listenerId', 'subscriber_id': 'subscriberId',
+                                                        'throttle_time': 2})
+        logger.debug('debug message')
+        LoggerManager.stop_async_logging()
+        assert len(handler.lines) == 1
+        assert handler.lines[0].endswith('[ERROR] [TransactionListenerManager] Failed to retrieve transactions stream '
+                                         'test listener_id=listenerId subscriber_id=subscriberId throttle_time=2')
+        assert calling_threads == handler.threads
+        assert calling_threads[0] is not threading.current_thread()
+
+    def test_format_json(self):
+        """Should format records as JSON objects with structured fields."""
+        handler = CollectingHandler(StructuredFormatter('json'))
+        LoggerManager.use_async_logging({'handlers': [handler]})
+        LoggerManager.get_logger('DomainClient').warning('Request failed', extra={'region': 'vint-hill'})
+        LoggerManager.stop_async_logging()
+        record = json.loads(handler.lines[0])
+        assert record['level'] == 'WARNING'
+        assert record['category'] == 'DomainClient'
+        assert record['message'] == 'Request failed'
+        assert record['region'] == 'vint-hill'
+
+    def test_include_exception(self):
+        """Should capture exception info at the time of the log call."""
+        handler = CollectingHandler()
+        LoggerManager.use_async_logging({'handlers': [handler]})
+        logger = LoggerManager.get_logger('test')
+        try:
+            raise ValueError('test error')
+        except ValueError:
+            logger.exception('Operation failed')
+        LoggerManager.stop_async_logging()
+        assert 'Operation failed' in handler.lines[0]
+        assert 'ValueError: test error' in handler.lines[0]
+
+    def test_rate_limit_identical_records(self):
+        """Should suppress repeated identical records and report amount of suppressed records."""
+        handler = CollectingHandler()
+        with freeze_time() as frozen_datetime:
+            LoggerManager.use_async_logging({'handlers': [handler], 'rateLimitIntervalInSeconds': 60})
+            logger = LoggerManager.get_logger('test')
+            for i in range(5):
+                logger.error('Failed to retrieve stream', 'timeout')
+            logger.error('Failed to retrieve stream', 'not found')
+            frozen_datetime.tick(61)
+            logger.error('Failed to retrieve stream', 'timeout')
+            LoggerManager.stop_async_logging()
+        assert len(handler.lines) == 3
+        assert handler.lines[0].endswith('Failed to retrieve stream timeout')
+        assert handler.lines[1].endswith('Failed to retrieve stream not found')
+        assert handler.lines[2].endswith('Failed to retrieve stream timeout suppressed=4')
+
+    def test_disable_rate_limit(self):
+        """Should write all records if rate limiting is disabled."""
+        handler = CollectingHandler()
+        LoggerManager.use_async_logging({'handlers': [handler], 'rateLimitIntervalInSeconds': 0})
+        logger = LoggerManager.get_logger('test')
+        for i in range(5):
+            logger.error('Failed to retrieve stream')
+        LoggerManager.stop_async_logging()
+        assert len(handler.lines) == 5
+
+    def test_drop_records_when_queue_is_full(self):
+        """Should drop records instead of blocking when the queue is full."""
+        handler = CollectingHandler()
+        LoggerManager.use_async_logging({'handlers': [handler], 'queueSize': 1, 'rateLimitIntervalInSeconds': 0})
+        backend = logger_module.async_logging
+        backend._listener.stop()
+        logger = LoggerManager.get_logger('test')
+        for i in range(3):
+            logger.info('message')
+        assert backend.dropped == 2
+
+
+class TestRateLimitFilter:
+
+    def test_bound_remembered_records(self):
+        """Should not remember more distinct records than allowed."""
+        rate_limit_filter = RateLimitFilter(60, 10)
+        for i in range(100):
+            assert rate_limit_filter.filter(logging.LogRecord('test', logging.ERROR, '', 0, f'message {i}', (), None))
+        assert len(rate_limit_filter._records) <= 10
@@ -1,13 +1,44 @@
 from datetime import datetime
 from typing_extensions import TypedDict
 from typing import List, Optional
-import iso8601
+import importlib.util
 import random
 import string
+import sys
+import iso8601
 import pytz
 import asyncio
 
 
+def lazy_import(name: str):
+    """Returns a module which is loaded on first attribute access, so that dependencies are only loaded once they
+    are used. Returns the module itself if it is loaded already.
+
+    The lazy module is registered in sys.modules, so that the application and the SDK share one instance of it and
+    exceptions and classes of the dependency stay compatible. An application importing the module after the SDK gets
+    the lazy module as well, which is loaded on its first attribute access by either of them. Loading is not thread
+    safe before python 3.12, so modules used by code running in an executor, such as date parsing, are not imported
+    lazily.
+
+    Args:
+        name: Module name.
+
+    Returns:
+        Module.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
 def date(date_time: str or float or int or datetime) -> datetime:
     """Parses a date string into a datetime object."""
     if isinstance(date_time, float) or isinstance(date_time, int):
@@ -26,6 +57,14 @@ def format_date(date_object: datetime or str) -> str:
         return date_object
 
 
+def json_default(value):
+    """Converts values not supported by JSON encoder, used as a default hook of JSON encoding. Datetime values are
+    converted to format compatible with JS."""
+    if isinstance(value, datetime):
+        return format_date(value)
+    raise TypeError(f'Object of type {value.__class__.__name__} is not JSON serializable')
+
+
 def random_id(length: int = 32) -> str:
     """Generates a random id of 32 symbols."""
     return ''.join(random.choice(string.ascii_lowercase) for i in range(length))
@@ -4,17 +4,24 @@ with open("README.rst", "r") as fh:
     long_description = fh.read()
 
 install_requires = [
-   'aiohttp==3.7.4', 'typing-extensions~=3.10.0.0', 'iso8601', 'pytz', 'requests==2.24.0', 'httpx==0.23.0'
+   'typing-extensions~=3.10.0.0', 'iso8601', 'pytz', 'httpx==0.23.0'
 ]
 
 tests_require = [
-    'pytest==6.2.5', 'pytest-mock', 'pytest-asyncio==0.16.0', 'asynctest', 'aiohttp', 'mock', 'freezegun==1.0.0',
-    'respx==0.19.2'
+    'pytest==6.2.5', 'pytest-mock', 'pytest-asyncio==0.16.0', 'asynctest', 'mock', 'freezegun==1.0.0',
+    'respx==0.19.2', 'prometheus-client', 'opentelemetry-api', 'opentelemetry-sdk',
+    'uvloop; sys_platform != "win32"'
 ]
 
+extras_require = {
+    'prometheus': ['prometheus-client'],
+    'opentelemetry': ['opentelemetry-api>=1.23'],
+    'uvloop': ['uvloop; sys_platform != "win32"']
+}
+
 setuptools.setup(
     name="metaapi_cloud_copyfactory_sdk",
-    version="6.1.1",
+    version="6.2.0",
     author="MetaApi DMCC",
     author_email="support@metaapi.cloud",
     description="Python SDK for SDK for CopyFactory trade copying API. Can copy trades both between MetaTrader 5 "
@@ -29,11 +36,12 @@ setuptools.setup(
     packages=['metaapi_cloud_copyfactory_sdk'],
     install_requires=install_requires,
     tests_require=tests_require,
+    extras_require=extras_require,
     license='SEE LICENSE IN LICENSE',
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: Other/Proprietary License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
 )
\ No newline at end of file